@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark dei backend di click
+Autore: Andrea Piani
+Descrizione: Click al secondo di pyautogui (con la sua PAUSE) e del backend XTest,
+             click singoli e a raffiche, sul display corrente. Da eseguire su un
+             display virtuale (Xvfb): i click arrivano davvero alle finestre
+Utilizzo: python bench_click_backends.py [--clicks N] [--burst N] [--x X] [--y Y]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+from click_backends import ClickBackendError, FailSafeError, PyAutoGUIBackend, XTestBackend
+
+
+def measure(backend, clicks, x, y, burst=1):
+    """Click al secondo inviando clicks click in raffiche da burst"""
+    start = time.perf_counter()
+    if burst == 1:
+        for _ in range(clicks):
+            backend.click(x, y)
+    else:
+        events = [(x, y, 'left', 1)] * burst
+        for _ in range(clicks // burst):
+            backend.burst(events)
+    return clicks / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dei backend di click")
+    parser.add_argument('--clicks', type=int, default=200)
+    parser.add_argument('--burst', type=int, default=20)
+    parser.add_argument('--x', type=int, default=200)
+    parser.add_argument('--y', type=int, default=200)
+    args = parser.parse_args()
+
+    if not os.environ.get('DISPLAY'):
+        print("Errore: serve un display X11 (es. xvfb-run python bench_click_backends.py)", file=sys.stderr)
+        return 1
+
+    print(f"{args.clicks} click in ({args.x}, {args.y})")
+    for backend_class in (PyAutoGUIBackend, XTestBackend):
+        try:
+            backend = backend_class()
+        except ClickBackendError as e:
+            print(f"{backend_class.name}: non disponibile ({e})")
+            continue
+        try:
+            # pyautogui paga la PAUSE a ogni click: bastano meno click per la misura
+            clicks = min(args.clicks, 20) if backend_class is PyAutoGUIBackend else args.clicks
+            single = measure(backend, clicks, args.x, args.y)
+            bursts = measure(backend, clicks, args.x, args.y, burst=args.burst)
+        except FailSafeError:
+            print(f"{backend_class.name}: interrotto dal failsafe")
+            continue
+        finally:
+            backend.close()
+        print(f"{backend_class.name}: {single:.0f} CPS click singoli, {bursts:.0f} CPS a raffiche da {args.burst}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark del motore di click
+Autore: Andrea Piani
+Descrizione: Simula un milione di click con backend nullo e orologio virtuale
+             (nessuna attesa reale) e misura il throughput del percorso caldo;
+             con --min-cps termina con errore sotto la soglia (regressioni in CI)
+Utilizzo: python bench_click_engine.py [--clicks N] [--min-cps CPS]
+"""
+
+import argparse
+import sys
+import time
+from click_backends import NullBackend
+from click_clock import VirtualClock
+from click_engine import ClickEngine, EngineListener
+from run_config import RunConfig
+from run_control import RunControl
+from sequence_program import BUTTON_NAMES, compile_sequence
+
+
+class StopListener(EngineListener):
+    """Ferma il RunControl a fine esecuzione"""
+
+    def __init__(self, run_control):
+        self.run_control = run_control
+
+    def request_stop(self):
+        self.run_control.stop()
+
+
+def make_config(clicks, sequence_mode):
+    """Configurazione con intervallo fisso di 1 ms (virtuale)"""
+    steps = 100
+    sequence = compile_sequence([
+        {'x': i, 'y': i, 'button': BUTTON_NAMES[i % 3], 'delay': 0.001}
+        for i in range(steps)
+    ])
+    return RunConfig(min_interval=0.001, max_interval=0.001, max_clicks=clicks,
+                     click_type='left', double_click=False, use_current_position=False,
+                     fixed_x=100, fixed_y=100, initial_delay=0.0, click_backend='null',
+                     file_log=False, file_log_compress=False, sequence_mode=sequence_mode,
+                     sequence=sequence, sequence_repeats=max(1, clicks // steps),
+                     sequence_pause=0.001)
+
+
+def measure(clicks, sequence_mode):
+    """Restituisce (click eseguiti, secondi reali, secondi simulati)"""
+    clock = VirtualClock()
+    run_control = RunControl(clock=clock)
+    backend = NullBackend()
+    engine = ClickEngine(make_config(clicks, sequence_mode), run_control, backend,
+                         clock=clock, listener=StopListener(run_control))
+    run_control.start()
+    start = time.perf_counter()
+    engine.run()
+    elapsed = time.perf_counter() - start
+    run_control.mark_halted()
+    return backend.clicks, elapsed, clock.now()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del motore di click")
+    parser.add_argument('--clicks', type=int, default=1000000)
+    parser.add_argument('--min-cps', type=float, default=None,
+                        help="throughput minimo (click/s) sotto cui il benchmark fallisce")
+    args = parser.parse_args()
+
+    failed = False
+    for label, sequence_mode in (("Click singoli", False), ("Sequenza", True)):
+        clicks, elapsed, simulated = measure(args.clicks, sequence_mode)
+        cps = clicks / elapsed
+        print(f"{label:14s}: {clicks} click in {elapsed:.2f}s reali "
+              f"({simulated:.0f}s simulati) - {cps:,.0f} click/s, {elapsed / clicks * 1e6:.2f} us/click")
+        if args.min_cps is not None and cps < args.min_cps:
+            print(f"  REGRESSIONE: sotto la soglia di {args.min_cps:,.0f} click/s")
+            failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
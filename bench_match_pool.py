@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark della ricerca immagini in processi separati
+Autore: Andrea Piani
+Descrizione: Millisecondi in cui il thread dei click resta bloccato per step immagine
+             (ricerca nel thread, nei processi, nei processi con prefetch durante la
+             pausa) e avanzamento di un thread Python concorrente, come quello di Tk.
+             Richiede OpenCV e NumPy
+Utilizzo: python bench_match_pool.py [--steps N] [--delay S]
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from match_pool import PoolLocator
+from template_matcher import ImageLocator, ImageTarget
+
+
+class MovingCapture:
+    """Schermo sintetico 1920x1080 su cui il bersaglio cambia posizione a ogni step"""
+
+    def __init__(self, screen, template):
+        self.base = screen
+        self.template = template
+        self.step = 0
+        self.screen = screen
+
+    def move(self):
+        self.step += 1
+        self.screen = self.base.copy()
+        height, width = self.template.shape
+        x, y = 200 + self.step * 37 % 1500, 150 + self.step * 53 % 800
+        self.screen[y:y + height, x:x + width] = self.template
+
+    def grab_gray(self, region):
+        return self.screen, (0, 0)
+
+    def close(self):
+        pass
+
+
+def background_ticks(stop, counter):
+    """Lavoro Python puro (come il loop di Tk): conta le iterazioni completate"""
+    while not stop.is_set():
+        sum(range(200))
+        counter[0] += 1
+
+
+def run(locator, capture, target, steps, delay, prefetch):
+    """Millisecondi medi di blocco per step e iterazioni al secondo del thread concorrente"""
+    stop = threading.Event()
+    counter = [0]
+    thread = threading.Thread(target=background_ticks, args=(stop, counter), daemon=True)
+    thread.start()
+    blocked = 0.0
+    start = time.perf_counter()
+    for _ in range(steps):
+        capture.move()
+        if prefetch:
+            locator.prefetch(target)
+        time.sleep(delay)  # Pausa dello step precedente
+        begin = time.perf_counter()
+        assert locator.locate(target) is not None
+        blocked += time.perf_counter() - begin
+    elapsed = time.perf_counter() - start
+    stop.set()
+    thread.join()
+    return blocked / steps * 1000, counter[0] / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark della ricerca immagini in processi separati")
+    parser.add_argument('--steps', type=int, default=30)
+    parser.add_argument('--delay', type=float, default=0.1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(3)
+    screen = cv2.GaussianBlur((rng.random((1080, 1920)) * 255).astype(np.uint8), (0, 0), 3)
+    template = (rng.random((48, 64)) * 255).astype(np.uint8)
+    path = os.path.join(tempfile.mkdtemp(), 'bersaglio.png')
+    cv2.imwrite(path, template)
+    target = ImageTarget(path, 0.8)
+    print(f"{args.steps} step, pausa {args.delay * 1000:.0f} ms, CPU disponibili: {os.cpu_count()}")
+
+    capture = MovingCapture(screen, template)
+    thread_ms, thread_ticks = run(ImageLocator(capture=capture), capture, target,
+                                  args.steps, args.delay, prefetch=False)
+    print(f"Nel thread dei click: {thread_ms:.1f} ms bloccato per step, thread concorrente {thread_ticks:.0f} it/s")
+
+    for prefetch in (False, True):
+        locator = PoolLocator(capture=capture)
+        locator.locate(target)  # Avvio dei processi escluso dalla misura
+        pool_ms, pool_ticks = run(locator, capture, target, args.steps, args.delay, prefetch)
+        locator.close()
+        label = "Processi con prefetch" if prefetch else "Processi"
+        print(f"{label}: {pool_ms:.1f} ms bloccato per step, thread concorrente {pool_ticks:.0f} it/s")
+
+
+if __name__ == "__main__":
+    main()
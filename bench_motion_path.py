@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark dei percorsi di movimento
+Autore: Andrea Piani
+Descrizione: Comprime un movimento del mouse campionato a 1 kHz e misura punti chiave,
+             byte su disco, tempo di compressione, scarto massimo e CPU della
+             riproduzione a 100 Hz (backend nullo, orologio reale). Richiede NumPy
+Utilizzo: python bench_motion_path.py [--seconds S]
+"""
+
+import argparse
+import math
+import random
+import time
+
+from click_backends import NullBackend
+from click_engine import ClickEngine
+from motion_path import compress_path
+from run_control import RunControl
+from sequence_file import PATH_RECORD
+
+
+def make_motion(seconds, rate=1000):
+    """Movimento realistico: curve morbide con piccole oscillazioni della mano e soste"""
+    rng = random.Random(7)
+    xs, ys, ts = [], [], []
+    x, y = 960.0, 540.0
+    heading = 0.0
+    for i in range(int(seconds * rate)):
+        t = i * 1000 // rate
+        if (t // 700) % 4 != 3:  # Una sosta ogni 2.8 s
+            heading += rng.uniform(-0.02, 0.02)
+            x += 0.6 * math.cos(heading)
+            y += 0.6 * math.sin(heading)
+            if not (0 <= x <= 1919 and 0 <= y <= 1079):  # Bordo dello schermo: torna indietro
+                heading += math.pi
+        xs.append(round(x + rng.uniform(-0.4, 0.4)))
+        ys.append(round(y + rng.uniform(-0.4, 0.4)))
+        ts.append(t)
+    return xs, ys, ts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dei percorsi di movimento")
+    parser.add_argument('--seconds', type=float, default=10.0)
+    args = parser.parse_args()
+
+    xs, ys, ts = make_motion(args.seconds)
+    compress_path(xs[:100], ys[:100], ts[:100])  # Import di NumPy fuori dalla misura
+    start = time.perf_counter()
+    path = compress_path(xs, ys, ts)
+    compress_time = time.perf_counter() - start
+
+    raw_bytes = 12 * len(xs)
+    stored_bytes = PATH_RECORD.size + 12 * len(path)
+    print(f"Campioni registrati: {len(xs)} ({raw_bytes} byte)")
+    print(f"Punti chiave:        {len(path)} ({stored_bytes} byte, {raw_bytes / stored_bytes:.0f}x)")
+    print(f"Compressione:        {compress_time * 1000:.1f} ms")
+
+    times, frame_xs, frame_ys = path.frames()
+    error = 0.0
+    frame = 0
+    for x, y, t in zip(xs, ys, ts):
+        while frame + 1 < len(times) and times[frame + 1] * 1000 <= t:
+            frame += 1
+        error = max(error, math.hypot(frame_xs[frame] - x, frame_ys[frame] - y))
+    print(f"Scarto massimo:      {error:.1f} px ({len(times)} fotogrammi)")
+
+    # play_path non usa la configurazione
+    run_control = RunControl()
+    engine = ClickEngine(None, run_control, NullBackend())
+    run_control.start()
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    engine.play_path(path)
+    cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+    print(f"Riproduzione:        {wall:.2f} s reali, CPU {cpu * 1000:.1f} ms ({cpu / wall * 100:.2f}%), "
+          f"{engine.backend.moves} movimenti")
+
+
+if __name__ == "__main__":
+    main()
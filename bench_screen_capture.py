@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark della cattura dello schermo
+Autore: Andrea Piani
+Descrizione: Millisecondi per cattura di una regione 200x200 e dello schermo intero
+             con XShm, XGetImage e pyautogui, lettura di un singolo pixel (attese di colore)
+             e catture effettive per una sequenza di step immagine ravvicinati con e senza
+             cache. Richiede NumPy e un display X11
+Utilizzo: python bench_screen_capture.py [--repeat N] [--steps N]
+"""
+
+import argparse
+import time
+
+from click_clock import VirtualClock
+from screen_capture import CaptureError, PyAutoGUICapture, ScreenCapture, X11Capture
+
+
+def per_call(function, repeat):
+    """Millisecondi medi per chiamata"""
+    function()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def per_grab(backend, region, repeat):
+    """Millisecondi medi per cattura della regione (left, top, width, height)"""
+    return per_call(lambda: backend.grab(*region), repeat)
+
+
+def open_backends():
+    backends = []
+    for name, factory in (('xshm', lambda: X11Capture()),
+                          ('xgetimage', lambda: X11Capture(use_shm=False)),
+                          ('pyautogui', PyAutoGUICapture)):
+        try:
+            backend = factory()
+        except CaptureError as e:
+            print(f"{name}: non disponibile ({e})")
+            continue
+        if backend.mode == name:
+            backends.append((name, backend))
+        else:
+            backend.close()
+    return backends
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark della cattura dello schermo")
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--steps', type=int, default=20)
+    args = parser.parse_args()
+
+    backends = open_backends()
+    for name, backend in backends:
+        region_ms = per_grab(backend, (100, 100, 200, 200), args.repeat)
+        full_ms = per_grab(backend, (0, 0, backend.width, backend.height), max(1, args.repeat // 5))
+        pixel = ScreenCapture(backend=backend)
+        pixel_ms = per_call(lambda: pixel.color(100, 100), args.repeat)
+        print(f"{name}: regione 200x200 {region_ms:.2f} ms, "
+              f"schermo {backend.width}x{backend.height} {full_ms:.1f} ms ({full_ms / region_ms:.0f}x), "
+              f"pixel {pixel_ms * 1000:.0f} µs ({pixel_ms / 5:.1%} di un intervallo a 200 Hz)")
+
+    if not backends:
+        return
+    # Step immagine ogni 10 ms: un'area di lavoro e un pulsante al suo interno, alternati
+    name, backend = backends[0]
+    for ttl in (0.0, 0.05):
+        clock = VirtualClock()
+        capture = ScreenCapture(ttl=ttl, clock=clock, backend=backend)
+        start = time.perf_counter()
+        for step in range(args.steps):
+            capture.grab((100, 100, 400, 300) if step % 2 == 0 else (150, 150, 100, 100))
+            clock.sleep(0.01)
+        elapsed = (time.perf_counter() - start) * 1000
+        capture.invalidate()
+        print(f"{name}, TTL {ttl * 1000:.0f} ms: {capture.captures} catture per {args.steps} step, "
+              f"{elapsed:.1f} ms")
+
+    for _, backend in backends:
+        backend.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark del formato binario delle sequenze
+Autore: Andrea Piani
+Descrizione: Confronta dimensione su disco, tempo di apertura e memoria heap di una
+             sequenza lunga salvata come JSON nel profilo e come file .seq mappato
+Utilizzo: python bench_sequence_file.py [--steps N]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from sequence_file import MappedSequence, write_sequence_file
+from sequence_program import BUTTON_NAMES, compile_sequence
+
+
+def make_sequence(length):
+    """Sequenza come quella di una macro registrata"""
+    return [{'x': i % 1920, 'y': i % 1080, 'button': BUTTON_NAMES[i % 3],
+             'double': False, 'delay': 0.05} for i in range(length)]
+
+
+def measure(function):
+    """Esegue function e restituisce (risultato, secondi, picco heap in byte)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del formato binario delle sequenze")
+    parser.add_argument('--steps', type=int, default=1000000)
+    args = parser.parse_args()
+
+    sequence = make_sequence(args.steps)
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, 'macro.json')
+        seq_path = os.path.join(directory, 'macro.seq')
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump({'sequence_settings': {'current_sequence': sequence}}, f, indent=2)
+        write_sequence_file(seq_path, compile_sequence(sequence))
+        del sequence
+
+        def load_json():
+            with open(json_path, 'r', encoding='utf-8') as f:
+                return compile_sequence(json.load(f)['sequence_settings']['current_sequence'])
+
+        program, json_time, json_peak = measure(load_json)
+        mapped, seq_time, seq_peak = measure(lambda: MappedSequence(seq_path))
+        try:
+            # Un passaggio completo sugli step, come fa una ripetizione della sequenza
+            start = time.perf_counter()
+            total = sum(mapped.xs) + sum(mapped.ys)
+            scan_time = time.perf_counter() - start
+            assert total == sum(program.xs) + sum(program.ys)
+        finally:
+            mapped.close()
+
+        print(f"Step:                      {args.steps}")
+        print(f"JSON:  {os.path.getsize(json_path) / 1e6:8.1f} MB  apertura {json_time * 1000:9.1f} ms  "
+              f"heap {json_peak / 1e6:8.1f} MB")
+        print(f"Seq:   {os.path.getsize(seq_path) / 1e6:8.1f} MB  apertura {seq_time * 1000:9.3f} ms  "
+              f"heap {seq_peak / 1e6:8.3f} MB")
+        print(f"Lettura completa x/y dal file mappato: {scan_time * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
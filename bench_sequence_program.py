@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark della compilazione delle sequenze
+Autore: Andrea Piani
+Descrizione: Confronta l'overhead per step della validazione dict ad ogni
+             ripetizione con il ciclo sul programma compilato
+Utilizzo: python bench_sequence_program.py
+"""
+
+import time
+from sequence_program import BUTTON_NAMES, FLAG_DOUBLE, compile_sequence
+
+
+def make_sequence(length):
+    """Crea una sequenza di test come quella salvata nei profili"""
+    return [
+        {'x': 100 + i, 'y': 200 + i, 'button': BUTTON_NAMES[i % 3],
+         'double': i % 5 == 0, 'delay': 0.0}
+        for i in range(length)
+    ]
+
+
+def run_dict_validation(sequence, repeats, click):
+    """Ciclo precedente: conversioni e controlli su ogni dict ad ogni ripetizione"""
+    for _ in range(repeats):
+        for i, click_data in enumerate(sequence):
+            if not isinstance(click_data, dict):
+                continue
+            x = int(click_data.get('x', 0))
+            y = int(click_data.get('y', 0))
+            button = click_data.get('button', 'left')
+            is_double = bool(click_data.get('double', False))
+            delay = float(click_data.get('delay', 1.0))
+            if x < 0 or y < 0 or x > 32767 or y > 32767:
+                continue
+            if delay < 0:
+                delay = 0.1
+            if button not in ['left', 'middle', 'right']:
+                button = 'left'
+            click(x, y, button, 2 if is_double else 1)
+
+
+def run_compiled(sequence, repeats, click):
+    """Nuovo ciclo: compilazione una tantum e accesso diretto agli array"""
+    program = compile_sequence(sequence)
+    xs, ys, buttons, flags = program.xs, program.ys, program.buttons, program.flags
+    steps = len(program)
+    for _ in range(repeats):
+        for i in range(steps):
+            click(xs[i], ys[i], BUTTON_NAMES[buttons[i]], 2 if flags[i] & FLAG_DOUBLE else 1)
+
+
+def null_click(x, y, button, clicks):
+    """Click che non fa nulla: misura solo l'overhead del ciclo"""
+
+
+def measure(runner, sequence, repeats):
+    """Restituisce i nanosecondi per step"""
+    start = time.perf_counter()
+    runner(sequence, repeats, null_click)
+    elapsed = time.perf_counter() - start
+    return elapsed / (len(sequence) * repeats) * 1e9
+
+
+def main():
+    sequence = make_sequence(1000)
+    repeats = 200
+
+    before = measure(run_dict_validation, sequence, repeats)
+    after = measure(run_compiled, sequence, repeats)
+
+    print(f"Step eseguiti: {len(sequence) * repeats}")
+    print(f"Validazione dict per step: {before:8.1f} ns/step")
+    print(f"Programma compilato:       {after:8.1f} ns/step")
+    print(f"Riduzione overhead:        {before / after:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark dei tempi di avvio
+Autore: Andrea Piani
+Descrizione: Misura in processi separati il tempo di import di mouse_clicker, il tempo
+             dall'avvio del processo alla prima iterazione di mainloop, l'avvio del
+             runner headless e la memoria residente (RSS massima) di ciascun percorso
+Utilizzo: python bench_startup.py [--runs N] [--json risultati.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Preambolo comune degli script figli: RSS massima in KB (None se non misurabile)
+RSS_HELPER = """
+def max_rss_kb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == 'darwin' else rss
+"""
+
+IMPORT_SCRIPT = """
+import sys, time, json
+start = time.perf_counter()
+import mouse_clicker
+elapsed = time.perf_counter() - start
+""" + RSS_HELPER + """
+print(json.dumps({'import': elapsed, 'rss_kb': max_rss_kb(),
+                  'pyautogui_loaded': 'pyautogui' in sys.modules}))
+"""
+
+GUI_SCRIPT = """
+import sys, time, json
+start = time.perf_counter()
+import mouse_clicker
+imported = time.perf_counter() - start
+""" + RSS_HELPER + """
+root = mouse_clicker.tk.Tk()
+app = mouse_clicker.MouseClickerApp(root)
+
+def first_iteration():
+    print(json.dumps({'import': imported, 'first_loop_wall': time.time(),
+                      'first_loop': time.perf_counter() - start, 'rss_kb': max_rss_kb()}))
+    sys.stdout.flush()
+    app.on_closing() if hasattr(app, 'ui_updates') else root.destroy()
+
+root.after(0, first_iteration)
+root.mainloop()
+"""
+
+HEADLESS_SCRIPT = """
+import sys, time, json
+import headless_runner
+code = headless_runner.main(sys.argv[1:])
+""" + RSS_HELPER + """
+print(json.dumps({'done_wall': time.time(), 'code': code, 'rss_kb': max_rss_kb(),
+                  'tkinter_loaded': 'tkinter' in sys.modules}))
+"""
+
+PROFILE = {
+    'basic_settings': {'min_interval': '0.001', 'max_interval': '0.001',
+                       'infinite_clicks': False, 'max_clicks': '1'},
+    'advanced_settings': {'click_type': 'left', 'use_current_position': False,
+                          'fixed_x': '10', 'fixed_y': '10', 'initial_delay': '0',
+                          'click_backend': 'null'},
+    'sequence_settings': {'execution_mode': 'single', 'current_sequence': []},
+}
+
+
+def run_child(script, workdir, *args):
+    """Esegue uno script figlio; restituisce (ultima riga JSON, istante di lancio) o (None, errore)"""
+    env = dict(os.environ, PYTHONPATH=PROJECT_DIR)
+    launched = time.time()
+    result = subprocess.run([sys.executable, '-c', script, *args], cwd=workdir, env=env,
+                            capture_output=True, text=True, timeout=120)
+    lines = [line for line in result.stdout.splitlines() if line.startswith('{')]
+    if result.returncode != 0 or not lines:
+        error = (result.stderr.strip().splitlines() or ['errore sconosciuto'])[-1]
+        return None, error
+    return json.loads(lines[-1]), launched
+
+
+def summarize(values):
+    """Mediana e minimo di una serie di misure"""
+    return {'median': statistics.median(values), 'min': min(values)} if values else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dei tempi di avvio")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--json', default=None, help="salva i risultati in questo file")
+    args = parser.parse_args()
+
+    samples = {'import_ms': [], 'import_rss_kb': [], 'gui_first_loop_ms': [],
+               'gui_process_to_first_loop_ms': [], 'gui_rss_kb': [],
+               'headless_process_ms': [], 'headless_rss_kb': []}
+    notes = []
+
+    # Directory temporanea: licenza e cartella profili non toccano il progetto
+    with tempfile.TemporaryDirectory() as workdir:
+        profile_path = os.path.join(workdir, 'bench.json')
+        with open(profile_path, 'w', encoding='utf-8') as f:
+            json.dump(PROFILE, f)
+
+        for _ in range(args.runs):
+            data, info = run_child(IMPORT_SCRIPT, workdir)
+            if data is None:
+                notes.append(f"import: {info}")
+                break
+            samples['import_ms'].append(data['import'] * 1000)
+            if data['rss_kb'] is not None:
+                samples['import_rss_kb'].append(data['rss_kb'])
+            if data['pyautogui_loaded']:
+                notes.append("import: pyautogui caricato all'import (non più lazy)")
+
+        for _ in range(args.runs):
+            data, info = run_child(GUI_SCRIPT, workdir)
+            if data is None:
+                notes.append(f"GUI non misurabile: {info}")
+                break
+            samples['gui_first_loop_ms'].append(data['first_loop'] * 1000)
+            samples['gui_process_to_first_loop_ms'].append((data['first_loop_wall'] - info) * 1000)
+            if data['rss_kb'] is not None:
+                samples['gui_rss_kb'].append(data['rss_kb'])
+
+        for _ in range(args.runs):
+            data, info = run_child(HEADLESS_SCRIPT, workdir, profile_path, '--quiet',
+                                   '--backend', 'null', '--max-clicks', '1')
+            if data is None or data['code'] != 0:
+                notes.append(f"headless: {info if data is None else 'codice ' + str(data['code'])}")
+                break
+            samples['headless_process_ms'].append((data['done_wall'] - info) * 1000)
+            if data['rss_kb'] is not None:
+                samples['headless_rss_kb'].append(data['rss_kb'])
+            if data['tkinter_loaded']:
+                notes.append("headless: tkinter caricato")
+
+    results = {key: summarize(values) for key, values in samples.items()}
+    results['python'] = sys.version.split()[0]
+    results['platform'] = sys.platform
+    results['runs'] = args.runs
+    results['notes'] = notes
+
+    labels = [
+        ('import_ms', "Import mouse_clicker", "ms"),
+        ('import_rss_kb', "RSS dopo l'import", "KB"),
+        ('gui_first_loop_ms', "GUI: import -> prima iterazione mainloop", "ms"),
+        ('gui_process_to_first_loop_ms', "GUI: avvio processo -> prima iterazione", "ms"),
+        ('gui_rss_kb', "GUI: RSS alla prima iterazione", "KB"),
+        ('headless_process_ms', "Headless: avvio processo -> 1 click e uscita", "ms"),
+        ('headless_rss_kb', "Headless: RSS", "KB"),
+    ]
+    for key, label, unit in labels:
+        value = results[key]
+        if value is None:
+            print(f"{label:48s}: non disponibile")
+        else:
+            print(f"{label:48s}: {value['median']:10.1f} {unit} (min {value['min']:.1f})")
+    for note in notes:
+        print(f"  Nota: {note}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Risultati salvati in {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark della ricerca di immagini
+Autore: Andrea Piani
+Descrizione: Millisecondi per ricerca su un fotogramma 1920x1080: matching a piramide
+             (una e cinque scale) contro matchTemplate a piena risoluzione,
+             con template di dimensioni diverse. Richiede OpenCV e NumPy
+Utilizzo: python bench_template_matcher.py [--repeat N]
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from template_matcher import PyramidMatcher
+
+
+def make_frame(width=1920, height=1080):
+    """Fotogramma sintetico con struttura simile a un desktop (macchie, bordi netti)"""
+    rng = np.random.default_rng(3)
+    frame = (rng.random((height, width)) * 255).astype(np.uint8)
+    frame = cv2.GaussianBlur(frame, (0, 0), 4)
+    for _ in range(60):
+        x, y = int(rng.integers(0, width - 200)), int(rng.integers(0, height - 80))
+        cv2.rectangle(frame, (x, y), (x + int(rng.integers(40, 200)), y + int(rng.integers(20, 80))),
+                      int(rng.integers(0, 255)), -1)
+    return frame
+
+
+def per_search(function, repeat):
+    """Millisecondi medi per chiamata"""
+    function()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark della ricerca di immagini")
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    frame = make_frame()
+    single = PyramidMatcher()
+    multi = PyramidMatcher(scales=(0.8, 0.9, 1.0, 1.1, 1.25))
+    print(f"Fotogramma {frame.shape[1]}x{frame.shape[0]}, OpenCV {cv2.__version__}")
+
+    for width, height in ((32, 24), (64, 48), (160, 90)):
+        x, y = 1200, 600
+        template = frame[y:y + height, x:x + width].copy()
+        expected = (x + width // 2, y + height // 2)
+
+        full_ms, _ = per_search(lambda: cv2.minMaxLoc(cv2.matchTemplate(frame, template, cv2.TM_CCOEFF_NORMED)),
+                                args.repeat)
+        pyramid_ms, match = per_search(lambda: single.find(frame, template, key=(width, height)), args.repeat)
+        assert (match.x, match.y) == expected, match
+        multi_ms, match = per_search(lambda: multi.find(frame, template, key=(width, height)), args.repeat)
+        assert (match.x, match.y) == expected, match
+
+        print(f"Template {width}x{height}: piena risoluzione {full_ms:.1f} ms, "
+              f"piramide {pyramid_ms:.1f} ms ({full_ms / pyramid_ms:.0f}x), "
+              f"piramide 5 scale {multi_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Click Backends - Livello intercambiabile per l'invio dei click
+Autore: Andrea Piani
+Descrizione: Backend pyautogui (predefinito) e backend X11 XTest diretto che
+             evita la PAUSE di pyautogui e invia press/release con un solo flush;
+             backend nullo e di registrazione per test e benchmark senza display
+"""
+
+from array import array
+from click_clock import SYSTEM_CLOCK
+
+
+class ClickBackendError(Exception):
+    """Backend non disponibile o non inizializzabile"""
+
+
+class FailSafeError(Exception):
+    """Mouse nell'angolo dello schermo: stop di emergenza"""
+
+
+class ClickBackend:
+    """Interfaccia comune dei backend di click"""
+
+    name = 'base'
+
+    def position(self):
+        """Restituisce la posizione corrente del mouse come (x, y)"""
+        raise NotImplementedError
+
+    def click(self, x, y, button='left', clicks=1):
+        """Esegue clicks click del pulsante button in (x, y)"""
+        raise NotImplementedError
+
+    def move(self, x, y):
+        """Sposta il mouse in (x, y) senza cliccare (step di movimento)"""
+        raise NotImplementedError
+
+    def burst(self, events):
+        """Esegue una raffica di click (x, y, button, clicks) senza pause intermedie"""
+        for x, y, button, clicks in events:
+            self.click(x, y, button, clicks)
+
+    def close(self):
+        """Rilascia le risorse del backend"""
+
+
+class PyAutoGUIBackend(ClickBackend):
+    """Backend basato su pyautogui (PAUSE e failsafe di pyautogui inclusi)"""
+
+    name = 'pyautogui'
+
+    def __init__(self):
+        try:
+            import pyautogui
+        except ImportError as e:
+            raise ClickBackendError(f"pyautogui non installato: {e}")
+        except Exception as e:
+            # Su Linux l'import apre subito il display (DISPLAY mancante o non raggiungibile)
+            raise ClickBackendError(f"pyautogui non inizializzabile: {e}")
+        pyautogui.FAILSAFE = True  # Muovi mouse nell'angolo per fermare
+        self._pyautogui = pyautogui
+
+    def position(self):
+        pos = self._pyautogui.position()
+        return pos[0], pos[1]
+
+    def click(self, x, y, button='left', clicks=1):
+        try:
+            if clicks == 2:
+                self._pyautogui.doubleClick(x=x, y=y, button=button)
+            else:
+                self._pyautogui.click(x=x, y=y, button=button, clicks=clicks)
+        except self._pyautogui.FailSafeException as e:
+            raise FailSafeError(str(e))
+
+    def move(self, x, y):
+        # Niente PAUSE: i fotogrammi del percorso hanno già i loro tempi
+        try:
+            self._pyautogui.moveTo(x, y, _pause=False)
+        except self._pyautogui.FailSafeException as e:
+            raise FailSafeError(str(e))
+
+
+class XTestBackend(ClickBackend):
+    """Backend X11 che inietta gli eventi con l'estensione XTest (python-xlib)"""
+
+    name = 'xtest'
+
+    BUTTON_CODES = {'left': 1, 'middle': 2, 'right': 3}
+
+    def __init__(self, display_name=None, failsafe=True):
+        try:
+            from Xlib import X, display
+            from Xlib.ext import xtest
+        except ImportError as e:
+            raise ClickBackendError(f"python-xlib non installato: {e}")
+
+        try:
+            self._display = display.Display(display_name)
+        except Exception as e:
+            raise ClickBackendError(f"Impossibile aprire il display X11: {e}")
+
+        if not self._display.has_extension('XTEST'):
+            self._display.close()
+            raise ClickBackendError("Estensione XTEST non disponibile sul display")
+
+        self._X = X
+        self._fake_input = xtest.fake_input
+        self._root = self._display.screen().root
+        self._screen_width = self._display.screen().width_in_pixels
+        self._screen_height = self._display.screen().height_in_pixels
+        self.failsafe = failsafe
+
+    def position(self):
+        pointer = self._root.query_pointer()
+        return pointer.root_x, pointer.root_y
+
+    def _check_failsafe(self):
+        """Replica il failsafe di pyautogui: mouse in un angolo dello schermo"""
+        x, y = self.position()
+        if (x, y) in ((0, 0), (self._screen_width - 1, 0),
+                      (0, self._screen_height - 1),
+                      (self._screen_width - 1, self._screen_height - 1)):
+            raise FailSafeError("Mouse nell'angolo dello schermo")
+
+    def _queue_click(self, x, y, button, clicks):
+        """Accoda movimento e press/release senza inviarli al server"""
+        code = self.BUTTON_CODES.get(button, 1)
+        if x is not None and y is not None:
+            self._fake_input(self._display, self._X.MotionNotify, x=int(x), y=int(y))
+        for _ in range(clicks):
+            self._fake_input(self._display, self._X.ButtonPress, code)
+            self._fake_input(self._display, self._X.ButtonRelease, code)
+
+    def click(self, x, y, button='left', clicks=1):
+        if self.failsafe:
+            self._check_failsafe()
+        self._queue_click(x, y, button, clicks)
+        self._display.flush()
+
+    def move(self, x, y):
+        if self.failsafe:
+            self._check_failsafe()
+        self._fake_input(self._display, self._X.MotionNotify, x=int(x), y=int(y))
+        self._display.flush()
+
+    def burst(self, events):
+        if self.failsafe:
+            self._check_failsafe()
+        for x, y, button, clicks in events:
+            self._queue_click(x, y, button, clicks)
+        self._display.flush()
+
+    def close(self):
+        try:
+            self._display.close()
+        except Exception:
+            pass
+
+
+class NullBackend(ClickBackend):
+    """Backend che non invia nulla: conta solo i click (benchmark di throughput)"""
+
+    name = 'null'
+
+    def __init__(self, position=(0, 0)):
+        self._position = position
+        self.clicks = 0
+        self.moves = 0
+
+    def position(self):
+        return self._position
+
+    def click(self, x, y, button='left', clicks=1):
+        self.clicks += clicks
+
+    def move(self, x, y):
+        self.moves += 1
+
+
+class RecordingBackend(ClickBackend):
+    """Backend che registra in memoria gli eventi iniettati, con l'istante dell'orologio"""
+
+    name = 'recording'
+
+    BUTTON_CODES = {'left': 0, 'middle': 1, 'right': 2}
+
+    def __init__(self, clock=None, position=(0, 0)):
+        self.clock = clock or SYSTEM_CLOCK
+        self._position = position
+        # Un array per campo: un milione di eventi occupa pochi MB
+        self.times = array('d')
+        self.xs = array('i')
+        self.ys = array('i')
+        self.buttons = array('B')
+        self.clicks = array('B')
+        # Movimenti degli step di percorso, separati dai click
+        self.move_times = array('d')
+        self.move_xs = array('i')
+        self.move_ys = array('i')
+
+    def __len__(self):
+        return len(self.times)
+
+    def position(self):
+        return self._position
+
+    def click(self, x, y, button='left', clicks=1):
+        self.times.append(self.clock.now())
+        self.xs.append(x)
+        self.ys.append(y)
+        self.buttons.append(self.BUTTON_CODES.get(button, 0))
+        self.clicks.append(clicks)
+
+    def move(self, x, y):
+        self.move_times.append(self.clock.now())
+        self.move_xs.append(x)
+        self.move_ys.append(y)
+
+    def events(self):
+        """Restituisce gli eventi registrati come tuple (t, x, y, button, clicks)"""
+        names = ('left', 'middle', 'right')
+        return [(self.times[i], self.xs[i], self.ys[i], names[self.buttons[i]], self.clicks[i])
+                for i in range(len(self.times))]
+
+
+# Backend disponibili, nell'ordine mostrato nell'interfaccia
+BACKENDS = {
+    PyAutoGUIBackend.name: PyAutoGUIBackend,
+    XTestBackend.name: XTestBackend,
+}
+
+# Backend non mostrati nell'interfaccia (runner headless e prove a vuoto)
+EXTRA_BACKENDS = {
+    NullBackend.name: NullBackend,
+}
+
+
+def create_backend(name):
+    """Crea il backend richiesto; solleva ClickBackendError se non disponibile"""
+    backend_class = BACKENDS.get(name) or EXTRA_BACKENDS.get(name)
+    if backend_class is None:
+        raise ClickBackendError(f"Backend sconosciuto: {name}")
+    return backend_class()
+
+
+def create_backend_with_fallback(name, fallback='pyautogui', log=None):
+    """Crea il backend richiesto o, se non disponibile, quello di ripiego.
+
+    log riceve l'avviso del ripiego; se anche il ripiego non è disponibile
+    solleva ClickBackendError.
+    """
+    try:
+        return create_backend(name)
+    except ClickBackendError as e:
+        if name == fallback:
+            raise
+        if log is not None:
+            log(f"[AVVISO] Backend '{name}' non disponibile ({e}), uso {fallback}")
+        return create_backend(fallback)
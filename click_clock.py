@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Click Clock - Orologi intercambiabili per il motore di click
+Autore: Andrea Piani
+Descrizione: Orologio reale (perf_counter) e orologio virtuale in cui le attese
+             avanzano il tempo istantaneamente, per test e benchmark deterministici
+"""
+
+import time
+
+
+class SystemClock:
+    """Orologio reale: perf_counter e attese vere"""
+
+    virtual = False
+
+    def now(self):
+        return time.perf_counter()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class VirtualClock:
+    """Orologio simulato: sleep() sposta in avanti il tempo senza attendere"""
+
+    virtual = True
+
+    def __init__(self, start=0.0):
+        self._now = start
+
+    def now(self):
+        return self._now
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self._now += seconds
+
+    advance = sleep
+
+
+# Istanza condivisa dell'orologio reale
+SYSTEM_CLOCK = SystemClock()
@@ -0,0 +1,513 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Click Engine - Motore dei click singoli e delle sequenze
+Autore: Andrea Piani
+Descrizione: Esegue una RunConfig con backend, orologio e listener iniettabili,
+             senza dipendere da Tk: lo usano l'interfaccia grafica, i test e i benchmark
+"""
+
+import datetime
+import os
+import random
+import time
+
+from click_backends import FailSafeError
+from click_clock import SYSTEM_CLOCK
+from click_metrics import ClickMetrics
+from click_scheduler import DeadlineScheduler
+from screen_capture import ScreenCapture, format_color
+from sequence_program import BUTTON_NAMES, FLAG_DOUBLE, FLAG_IMAGE, FLAG_PATH, FLAG_WAIT, FLAG_WINDOW
+from template_matcher import ImageLocator
+from window_tracker import WindowTracker, WindowTrackerError
+
+
+class EngineListener:
+    """Riceve messaggi e stato dal motore; l'implementazione base li ignora"""
+
+    def log(self, message):
+        """Messaggio per il log dell'utente"""
+
+    def set_counter(self, text):
+        """Testo aggiornato del contatore click"""
+
+    def set_status(self, text):
+        """Testo aggiornato della barra di stato"""
+
+    def request_stop(self):
+        """Il motore ha terminato da solo (limite raggiunto, errori, failsafe)"""
+
+
+class ClickEngine:
+    """Esegue i click di una RunConfig fino a completamento o stop"""
+
+    # Ritardo oltre il quale un percorso riparte dal fotogramma corrente invece di recuperare
+    PATH_MAX_LAG = 0.1
+    # Intervallo di campionamento delle attese di colore (200 Hz)
+    WAIT_POLL_INTERVAL = 0.005
+
+    def __init__(self, config, run_control, backend, clock=None, listener=None,
+                 metrics=None, run_log=None, rng=None, click_count=0, click_limit=None, locator=None,
+                 screen=None, windows=None):
+        self.config = config
+        self.run_control = run_control
+        self.backend = backend
+        self.clock = clock or SYSTEM_CLOCK
+        self.listener = listener or EngineListener()
+        self.metrics = metrics or ClickMetrics()
+        self.run_log = run_log
+        self.rng = rng or random.Random()
+        self.click_count = click_count
+        # Limite complessivo di click anche in modalità sequenza (None = nessuno)
+        self.click_limit = click_limit
+        self._locator = locator
+        self._own_locator = False
+        self._screen = screen
+        self._own_screen = False
+        self._windows = windows
+        self._own_windows = False
+
+    @property
+    def screen(self):
+        """Cattura dello schermo, aperta al primo step che la usa e chiusa a fine run"""
+        if self._screen is None:
+            self._screen = ScreenCapture(ttl=self.config.capture_ttl, clock=self.clock)
+            self._own_screen = True
+        return self._screen
+
+    @property
+    def windows(self):
+        """Posizioni delle finestre per gli step ancorati, seguite dagli eventi X11 fino a fine run"""
+        if self._windows is None:
+            self._windows = WindowTracker().start()
+            self._own_windows = True
+        return self._windows
+
+    @property
+    def locator(self):
+        """Ricerca delle immagini sullo schermo (in processi separati se configurati), creata al primo uso"""
+        if self._locator is None:
+            if self.config.match_processes > 0:
+                from match_pool import PoolLocator  # multiprocessing solo se servono i processi
+                self._locator = PoolLocator(capture=self.screen, processes=self.config.match_processes,
+                                            run_control=self.run_control)
+            else:
+                self._locator = ImageLocator(capture=self.screen)
+            self._own_locator = True
+        return self._locator
+
+    def log_message(self, message):
+        self.listener.log(message)
+
+    def run(self):
+        """Ritardo iniziale e poi click singoli o sequenza secondo la configurazione"""
+        config = self.config
+        try:
+            # Il primo bersaglio viene cercato subito: i processi di ricerca partono
+            # durante il ritardo iniziale e lo step lo trova già pronto
+            target = config.target
+            if config.sequence_mode and len(config.sequence):
+                targets = config.sequence.targets
+                target = targets[min(targets)] if targets else None
+            if target is not None:
+                self.locator.prefetch(target)
+            # Le finestre degli step ancorati vengono lette una volta, poi seguite dagli eventi
+            if config.sequence_mode and config.sequence.anchors:
+                self.windows
+
+            # Ritardo iniziale
+            initial_delay = config.initial_delay
+            if initial_delay > 0:
+                self.log_message(f"Ritardo iniziale di {initial_delay} secondi...")
+                start_delay = self.clock.now()
+                remaining = initial_delay
+                while remaining > 0:
+                    self.listener.set_status(f"Avvio tra {remaining:.1f}s...")
+                    if not self.run_control.sleep(min(0.1, remaining)):
+                        return
+                    remaining = initial_delay - (self.clock.now() - start_delay)
+
+                self.listener.set_status("In esecuzione...")
+            self.metrics.start_clicks()
+
+            # Esegui modalità appropriata
+            if config.sequence_mode and len(config.sequence):
+                self.execute_sequence()
+            else:
+                self.execute_single_clicks()
+
+        except Exception as e:
+            self.log_message(f"[ERRORE] Errore nel loop di click: {str(e)}")
+            self.listener.request_stop()
+        finally:
+            if self._own_windows:
+                self._windows.close()
+                self._windows = None
+                self._own_windows = False
+            if self._own_locator:
+                self._locator.close()
+                self._locator = None
+                self._own_locator = False
+            if self._own_screen:
+                self._screen.close()
+                self._screen = None
+                self._own_screen = False
+
+    def execute_single_clicks(self):
+        """Esegue click singoli tradizionali con controlli di sicurezza"""
+        try:
+            # La configurazione è già validata da RunConfig.from_profile
+            config = self.config
+            min_interval = config.min_interval
+            max_interval = config.max_interval
+            max_clicks = config.max_clicks
+            button = config.click_type
+            button_name = button.upper()
+            clicks = 2 if config.double_click else 1
+            click_description = "Doppio click" if config.double_click else "Click"
+            use_current_position = config.use_current_position
+            fixed_pos = (config.fixed_x, config.fixed_y)
+            target = config.target
+            backend = self.backend
+            run_control = self.run_control
+            listener = self.listener
+            run_log = self.run_log
+            metrics = self.metrics
+            uniform = self.rng.uniform
+            perf_counter = time.perf_counter
+
+            consecutive_errors = 0
+            max_consecutive_errors = 5
+
+            # Scadenze assolute: l'intervallo non deriva con il costo del click
+            scheduler = DeadlineScheduler(clock=self.clock)
+            scheduler.start()
+
+            while run_control.is_running:
+                # Controlla se abbiamo raggiunto il numero massimo
+                if max_clicks is not None and self.click_count >= max_clicks:
+                    self.log_message(f"Raggiunto numero massimo di click ({max_clicks})")
+                    listener.request_stop()
+                    break
+
+                # Controlla errori consecutivi
+                if consecutive_errors >= max_consecutive_errors:
+                    self.log_message(f"[ERRORE] Troppi errori consecutivi ({consecutive_errors}), fermando")
+                    listener.request_stop()
+                    break
+
+                # Genera intervallo casuale
+                wait_time = uniform(min_interval, max_interval)
+
+                # Attendi la scadenza (controllando se dobbiamo fermarci)
+                scheduler.advance(wait_time)
+                if target is not None:
+                    # Ricerca avviata ora, confermata alla scadenza se l'area non è cambiata
+                    self.locator.prefetch(target)
+                schedule_error = scheduler.wait(run_control)
+
+                if schedule_error is None:
+                    break
+
+                # Esegui click
+                try:
+                    if target is not None:
+                        # Posizione dall'immagine di riferimento, cercata a ogni click
+                        match = self.locator.locate(target)
+                        if not run_control.is_running:
+                            break  # Stop durante la ricerca
+                        if match is None:
+                            self.log_message(f"[AVVISO] Immagine {os.path.basename(target.template)} "
+                                             "non trovata, click saltato")
+                            continue
+                        click_pos = (match.x, match.y)
+                    else:
+                        click_pos = backend.position() if use_current_position else fixed_pos
+
+                    # Verifica che le coordinate siano valide
+                    if click_pos[0] < 0 or click_pos[1] < 0:
+                        self.log_message(f"[ERRORE] Coordinate negative: {click_pos}")
+                        consecutive_errors += 1
+                        continue
+
+                    call_start = perf_counter()
+                    backend.click(click_pos[0], click_pos[1], button=button, clicks=clicks)
+                    metrics.observe_click(perf_counter() - call_start)
+                    metrics.observe_lateness(schedule_error)
+
+                    # Reset contatore errori se il click è riuscito
+                    consecutive_errors = 0
+
+                    # Aggiorna contatore
+                    self.click_count += 1
+                    listener.set_counter(f"Click eseguiti: {self.click_count}")
+
+                    if run_log is not None:
+                        run_log.write({'ts': time.time(), 'mode': 'single', 'step': self.click_count,
+                                       'button': button, 'double': clicks == 2,
+                                       'x': click_pos[0], 'y': click_pos[1],
+                                       'wait': wait_time, 'sched_error': schedule_error})
+
+                    # Log del click
+                    timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+                    remaining_text = ""
+                    if max_clicks is not None:
+                        remaining = max_clicks - self.click_count
+                        remaining_text = f" (rimangono: {remaining})"
+
+                    log_msg = (f"[{timestamp}] {click_description} {button_name} in ({click_pos[0]}, {click_pos[1]}) "
+                               f"- Attesa: {wait_time:.3f}s - Scarto: {schedule_error * 1000:+.3f}ms{remaining_text}")
+                    self.log_message(log_msg)
+
+                except FailSafeError:
+                    self.log_message("[EMERGENZA] Click fermati - mouse nell'angolo")
+                    listener.request_stop()
+                    break
+                except Exception as e:
+                    consecutive_errors += 1
+                    metrics.observe_error()
+                    self.log_message(f"[ERRORE] Errore durante il click: {str(e)}")
+
+                    # Pausa breve dopo un errore
+                    run_control.sleep(0.5)
+
+            # Riepilogo precisione della pianificazione
+            if scheduler.count:
+                self.log_message(f"Scarto pianificazione: medio {scheduler.mean_error * 1000:.3f}ms, "
+                                 f"massimo {scheduler.max_error * 1000:.3f}ms su {scheduler.count} click")
+
+        except Exception as e:
+            self.log_message(f"[ERRORE CRITICO] Errore nel metodo execute_single_clicks: {str(e)}")
+            self.listener.request_stop()
+
+    def play_path(self, path):
+        """Riproduce un percorso di movimento alla velocità registrata; False se è stato richiesto lo stop"""
+        times, xs, ys = path.frames()
+        move = self.backend.move
+        now = self.clock.now
+        sleep = self.run_control.sleep
+        start = now()
+        for t, x, y in zip(times, xs, ys):
+            wait = start + t - now()
+            if wait > 0:
+                if not sleep(wait):
+                    return False
+            elif wait < -self.PATH_MAX_LAG:
+                # Dopo una pausa (o un backend lento) prosegue da qui, senza movimenti accelerati
+                start -= wait
+            move(x, y)
+        return True
+
+    def wait_for_color(self, x, y, wait):
+        """Campiona il punto (x, y) finché il colore corrisponde a wait (ColorWait).
+
+        Restituisce il colore letto, o None allo scadere del timeout o allo stop.
+        """
+        run_control = self.run_control
+        now = self.clock.now
+        color_at = self.screen.color
+        deadline = now() + wait.timeout
+        while True:
+            color = color_at(x, y, wait.size)
+            if wait.matches(color):
+                return color
+            remaining = deadline - now()
+            if remaining <= 0 or not run_control.sleep(min(self.WAIT_POLL_INTERVAL, remaining)):
+                return None
+
+    def execute_sequence(self):
+        """Esegue una sequenza di click personalizzata con controlli di sicurezza"""
+        try:
+            # Sequenza già compilata e validata in RunConfig.from_profile
+            config = self.config
+            program = config.sequence
+            if not len(program):
+                self.log_message("Nessuna sequenza definita")
+                return
+
+            max_repeats = config.sequence_repeats if config.sequence_repeats is not None else float('inf')
+            sequence_pause = config.sequence_pause
+            click_limit = self.click_limit
+
+            xs, ys, buttons, flags, delays = program.xs, program.ys, program.buttons, program.flags, program.delays
+            paths = program.paths
+            targets = program.targets
+            waits = program.waits
+            anchors = program.anchors
+            steps = len(program)
+            last_step = steps - 1
+            backend = self.backend
+            run_control = self.run_control
+            listener = self.listener
+            run_log = self.run_log
+            metrics = self.metrics
+            now = self.clock.now
+            perf_counter = time.perf_counter
+
+            sequence_count = 0
+            consecutive_errors = 0
+            max_consecutive_errors = 5
+
+            self.log_message(f"Iniziando sequenza con {steps} click")
+
+            while run_control.is_running and sequence_count < max_repeats:
+                # Controlla errori consecutivi
+                if consecutive_errors >= max_consecutive_errors:
+                    self.log_message(f"[ERRORE] Troppi errori consecutivi ({consecutive_errors}), fermando")
+                    listener.request_stop()
+                    break
+
+                sequence_count += 1
+                self.log_message(f"Esecuzione sequenza #{sequence_count}")
+
+                for i in range(steps):
+                    if not run_control.wait_if_paused():
+                        break
+
+                    try:
+                        x = xs[i]
+                        y = ys[i]
+                        match = None
+                        window_missing = None
+                        if flags[i] & FLAG_IMAGE:
+                            match = self.locator.locate(targets[i])
+                            if not run_control.is_running:
+                                break  # Stop durante la ricerca
+                            if match is not None:
+                                x, y = match.x, match.y
+                        elif flags[i] & FLAG_WINDOW:
+                            # Coordinate relative alla finestra, nella sua posizione attuale
+                            try:
+                                geometry = self.windows.geometry(anchors[i])
+                            except WindowTrackerError as e:
+                                window_missing = f"non localizzabile ({e})"
+                            else:
+                                if geometry is None:
+                                    window_missing = "non visibile"
+                                else:
+                                    x += geometry[0]
+                                    y += geometry[1]
+
+                        if window_missing:
+                            # Finestra chiusa, minimizzata o non più seguita: la sequenza prosegue con la pausa
+                            timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+                            self.log_message(f"[{timestamp}] Seq {sequence_count}.{i+1}: [AVVISO] Finestra "
+                                             f"{anchors[i].describe()} {window_missing}, step saltato")
+                        elif flags[i] & FLAG_PATH:
+                            # Step di movimento: nessun click, il percorso alla velocità originale
+                            if not self.play_path(paths[i]):
+                                break
+                            consecutive_errors = 0
+
+                            if run_log is not None:
+                                run_log.write({'ts': time.time(), 'mode': 'sequence', 'repeat': sequence_count,
+                                               'step': i + 1, 'path': len(paths[i]),
+                                               'x': x, 'y': y, 'wait': delays[i], 'sched_error': None})
+
+                            timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+                            self.log_message(f"[{timestamp}] Seq {sequence_count}.{i+1}: Movimento fino a ({x}, {y})")
+                        elif flags[i] & FLAG_WAIT:
+                            # Attesa del colore al posto di un delay fisso: nessun click
+                            wait = waits[i]
+                            wait_start = now()
+                            color = self.wait_for_color(x, y, wait)
+                            if not run_control.is_running:
+                                break
+                            consecutive_errors = 0
+                            waited = now() - wait_start
+
+                            if run_log is not None:
+                                run_log.write({'ts': time.time(), 'mode': 'sequence', 'repeat': sequence_count,
+                                               'step': i + 1, 'color': color is not None,
+                                               'x': x, 'y': y, 'wait': delays[i], 'sched_error': None})
+
+                            timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+                            if color is None:
+                                self.log_message(f"[{timestamp}] Seq {sequence_count}.{i+1}: [AVVISO] Colore "
+                                                 f"{format_color(wait.color)} non comparso in ({x}, {y}) "
+                                                 f"entro {wait.timeout}s, la sequenza prosegue")
+                            else:
+                                self.log_message(f"[{timestamp}] Seq {sequence_count}.{i+1}: Colore "
+                                                 f"{format_color(color)} in ({x}, {y}) dopo {waited:.2f}s")
+                        elif flags[i] & FLAG_IMAGE and match is None:
+                            # Immagine non visibile: nessun click, la sequenza prosegue con la pausa
+                            timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+                            self.log_message(f"[{timestamp}] Seq {sequence_count}.{i+1}: [AVVISO] Immagine "
+                                             f"{os.path.basename(targets[i].template)} non trovata, click saltato")
+                        else:
+                            button = BUTTON_NAMES[buttons[i]]
+
+                            # Esegui il click
+                            call_start = perf_counter()
+                            if flags[i] & FLAG_DOUBLE:
+                                backend.click(x, y, button=button, clicks=2)
+                                click_description = "Doppio click"
+                            else:
+                                backend.click(x, y, button=button)
+                                click_description = "Click"
+                            metrics.observe_click(perf_counter() - call_start)
+
+                            # Reset contatore errori se il click è riuscito
+                            consecutive_errors = 0
+
+                            # Aggiorna contatore
+                            self.click_count += 1
+                            listener.set_counter(f"Click eseguiti: {self.click_count} (Seq: {sequence_count})")
+
+                            if run_log is not None:
+                                run_log.write({'ts': time.time(), 'mode': 'sequence', 'repeat': sequence_count,
+                                               'step': i + 1, 'button': button, 'double': bool(flags[i] & FLAG_DOUBLE),
+                                               'x': x, 'y': y, 'wait': delays[i], 'sched_error': None})
+
+                            # Log del click
+                            timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+                            log_msg = f"[{timestamp}] Seq {sequence_count}.{i+1}: {click_description} {button.upper()} in ({x}, {y})"
+                            self.log_message(log_msg)
+
+                            if click_limit is not None and self.click_count >= click_limit:
+                                self.log_message(f"Raggiunto numero massimo di click ({click_limit})")
+                                listener.request_stop()
+                                return
+
+                        # Il bersaglio dello step successivo viene cercato durante la pausa
+                        next_step = i + 1 if i < last_step else 0
+                        if flags[next_step] & FLAG_IMAGE and (next_step or sequence_count < max_repeats):
+                            self.locator.prefetch(targets[next_step])
+
+                        # Pausa tra click nella sequenza
+                        if i < last_step:
+                            delay = delays[i]
+                            sleep_start = now()
+                            paused_before = run_control.paused_time
+                            if run_control.sleep(delay):
+                                # Il tempo in pausa non è ritardo
+                                paused = run_control.paused_time - paused_before
+                                metrics.observe_lateness(now() - sleep_start - delay - paused)
+
+                    except FailSafeError:
+                        self.log_message("[EMERGENZA] Click fermati - mouse nell'angolo")
+                        listener.request_stop()
+                        return
+                    except Exception as e:
+                        consecutive_errors += 1
+                        metrics.observe_error()
+                        self.log_message(f"[ERRORE] Errore durante il click {i+1} della sequenza: {str(e)}")
+
+                        # Pausa breve dopo un errore
+                        run_control.sleep(0.5)
+                        continue
+
+                # Pausa tra ripetizioni della sequenza
+                if run_control.is_running and sequence_count < max_repeats:
+                    self.log_message(f"Pausa di {sequence_pause}s prima della prossima sequenza")
+                    run_control.sleep(sequence_pause)
+
+            self.log_message(f"Sequenza completata. Ripetizioni: {sequence_count}, Totale click: {self.click_count}")
+
+            # Se abbiamo raggiunto il numero massimo di ripetizioni, ferma
+            if sequence_count >= max_repeats:
+                listener.request_stop()
+
+        except Exception as e:
+            self.log_message(f"[ERRORE CRITICO] Errore nel metodo execute_sequence: {str(e)}")
+            self.listener.request_stop()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Click Metrics - Metriche di prestazione del motore di click
+Autore: Andrea Piani
+Descrizione: Contatori e istogrammi di latenza in streaming (durata delle chiamate
+             al backend, ritardo di pianificazione) con esportazione in formato
+             testo Prometheus su un endpoint HTTP locale opzionale
+"""
+
+import bisect
+import threading
+from collections import deque
+from click_clock import SYSTEM_CLOCK
+
+
+# Limiti superiori dei bucket in secondi (10µs .. 10s)
+DEFAULT_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# Finestra (secondi di esecuzione attiva) su cui si calcolano i click al secondo
+CPS_WINDOW = 5.0
+
+
+class LatencyHistogram:
+    """Istogramma a bucket fissi: memoria costante, observe O(log bucket)"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # ultimo = +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        """Registra un valore in secondi (i valori negativi contano come 0)"""
+        if value < 0:
+            value = 0.0
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q):
+        """Stima il quantile q (0..1) interpolando linearmente nel bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        lower = 0.0
+        for index, bucket_count in enumerate(self.counts):
+            upper = self.buckets[index] if index < len(self.buckets) else self.max
+            if bucket_count and cumulative + bucket_count >= rank:
+                fraction = (rank - cumulative) / bucket_count
+                return min(lower + (upper - lower) * fraction, self.max)
+            cumulative += bucket_count
+            lower = upper
+        return self.max
+
+
+class ClickMetrics:
+    """Metriche del motore di click, aggiornate dal thread di click"""
+
+    def __init__(self):
+        self.clicks_total = 0
+        self.errors_total = 0
+        self.click_call_seconds = LatencyHistogram()
+        self.schedule_lateness_seconds = LatencyHistogram()
+        # Funzione che restituisce la profondità della coda UI (impostata dall'app)
+        self.ui_queue_depth = lambda: 0
+
+        self.run_clicks = 0
+        self._run_control = None
+        self._clock = SYSTEM_CLOCK
+        self._clicks_started = None
+        # Istanti (in tempo attivo) dei click dell'ultima finestra; li sfoltisce solo il thread di click
+        self._recent_clicks = deque()
+
+    def start_run(self, run_control=None):
+        """Segna l'inizio di una nuova esecuzione; da run_control si leggono orologio e pause"""
+        self._run_control = run_control
+        self._clock = run_control.clock if run_control is not None else SYSTEM_CLOCK
+        self.run_clicks = 0
+        self._recent_clicks = deque()
+        self._clicks_started = self._active_now()
+
+    def start_clicks(self):
+        """Segna la fine del ritardo iniziale: da qui parte la finestra dei click al secondo"""
+        self._clicks_started = self._active_now()
+
+    def _active_now(self):
+        """Tempo dell'orologio esclusi i periodi di pausa"""
+        now = self._clock.now()
+        if self._run_control is not None:
+            now -= self._run_control.paused_seconds()
+        return now
+
+    def observe_click(self, call_seconds):
+        """Registra un click riuscito e la durata della chiamata al backend"""
+        self.clicks_total += 1
+        self.run_clicks += 1
+        self.click_call_seconds.observe(call_seconds)
+        recent = self._recent_clicks
+        active = self._active_now()
+        recent.append(active)
+        cutoff = active - CPS_WINDOW
+        while recent[0] < cutoff:
+            recent.popleft()
+
+    def observe_lateness(self, seconds):
+        """Registra di quanto il click è partito in ritardo rispetto al previsto"""
+        self.schedule_lateness_seconds.observe(seconds)
+
+    def observe_error(self):
+        self.errors_total += 1
+
+    @property
+    def clicks_per_second(self):
+        """Click al secondo negli ultimi CPS_WINDOW secondi di esecuzione attiva.
+
+        Pause e ritardo iniziale non contano; per la media di lungo periodo
+        Prometheus calcola rate() sul contatore clicks_total.
+        """
+        if self._clicks_started is None:
+            return 0.0
+        active = self._active_now()
+        elapsed = min(CPS_WINDOW, active - self._clicks_started)
+        if elapsed <= 0:
+            return 0.0
+        cutoff = active - elapsed
+        # Copia: il thread di click può aggiungere e togliere istanti nel frattempo
+        clicks = sum(1 for instant in list(self._recent_clicks) if instant > cutoff)
+        return clicks / elapsed
+
+    def to_prometheus(self):
+        """Esporta le metriche nel formato testo di Prometheus"""
+        lines = [
+            "# HELP mouse_clicker_clicks_total Click eseguiti con successo (usare rate() per il ritmo).",
+            "# TYPE mouse_clicker_clicks_total counter",
+            f"mouse_clicker_clicks_total {self.clicks_total}",
+            "# HELP mouse_clicker_errors_total Errori durante i click.",
+            "# TYPE mouse_clicker_errors_total counter",
+            f"mouse_clicker_errors_total {self.errors_total}",
+            f"# HELP mouse_clicker_clicks_per_second Click al secondo negli ultimi {CPS_WINDOW:g}s di esecuzione attiva.",
+            "# TYPE mouse_clicker_clicks_per_second gauge",
+            f"mouse_clicker_clicks_per_second {self.clicks_per_second:.6f}",
+            "# HELP mouse_clicker_ui_queue_depth Messaggi di log in attesa di essere mostrati.",
+            "# TYPE mouse_clicker_ui_queue_depth gauge",
+            f"mouse_clicker_ui_queue_depth {self.ui_queue_depth()}",
+        ]
+        lines += self._histogram_lines("mouse_clicker_click_call_seconds",
+                                       "Durata della chiamata al backend di click.",
+                                       self.click_call_seconds)
+        lines += self._histogram_lines("mouse_clicker_schedule_lateness_seconds",
+                                       "Ritardo del click rispetto alla scadenza prevista.",
+                                       self.schedule_lateness_seconds)
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _histogram_lines(name, help_text, histogram):
+        lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+        cumulative = 0
+        for bucket, bucket_count in zip(histogram.buckets, histogram.counts):
+            cumulative += bucket_count
+            lines.append(f'{name}_bucket{{le="{bucket}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{le="+Inf"}} {histogram.count}')
+        lines.append(f"{name}_sum {histogram.sum:.9f}")
+        lines.append(f"{name}_count {histogram.count}")
+        return lines
+
+
+class MetricsServer:
+    """Endpoint HTTP locale (solo 127.0.0.1) che espone /metrics"""
+
+    def __init__(self, metrics, port=9101, host="127.0.0.1"):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        # http.server (con http.client ed email) pesa all'avvio: caricato solo se serve
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.to_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Niente log su stderr per ogni scrape
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="MetricsServer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            self._thread = None
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Click Scheduler - Pianificazione dei click su scadenze assolute
+Autore: Andrea Piani
+Descrizione: Attende scadenze monotone basate su perf_counter con uno spin finale,
+             così l'intervallo tra i click non deriva con il costo del click stesso
+"""
+
+from click_clock import SYSTEM_CLOCK
+
+
+class DeadlineScheduler:
+    """Pianifica i click su scadenze assolute e misura l'errore di pianificazione"""
+
+    def __init__(self, spin_window=0.002, max_sleep_chunk=0.1, clock=None):
+        self.clock = clock or SYSTEM_CLOCK
+        # Ultimi secondi prima della scadenza gestiti con busy-wait
+        # (con un orologio virtuale non serve: le attese sono esatte)
+        self.spin_window = 0.0 if self.clock.virtual else spin_window
+        # Durata massima di una singola sleep quando non c'è un RunControl
+        self.max_sleep_chunk = max_sleep_chunk
+        self._clock = self.clock.now
+        self._sleep = self.clock.sleep
+
+        self.deadline = None
+        # Tempo in pausa del RunControl già considerato nelle scadenze
+        self._control = None
+        self._paused_seen = 0.0
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Azzera le statistiche sull'errore di pianificazione"""
+        self.count = 0
+        self.last_error = 0.0
+        self.max_error = 0.0
+        self.total_error = 0.0
+
+    @property
+    def mean_error(self):
+        """Errore medio di pianificazione in secondi"""
+        return self.total_error / self.count if self.count else 0.0
+
+    def start(self):
+        """Fissa l'istante di riferimento da cui partono le scadenze"""
+        self.deadline = self._clock()
+        self._control = None
+        return self.deadline
+
+    def _skip_pauses(self, control):
+        """Sposta la scadenza del tempo trascorso in pausa dall'ultimo controllo.
+
+        La pausa congela l'intervallo: alla ripresa manca lo stesso tempo di
+        quando è iniziata, e la pausa non viene contata come ritardo.
+        """
+        if control is not self._control:
+            self._control = control
+            self._paused_seen = control.paused_time
+            return
+        paused = control.paused_time - self._paused_seen
+        if paused:
+            self._paused_seen += paused
+            self.deadline += paused
+
+    def advance(self, interval):
+        """Sposta la prossima scadenza di interval secondi dalla precedente"""
+        if self.deadline is None:
+            self.start()
+
+        now = self._clock()
+        # Se siamo in ritardo di più di un intervallo (es. click molto lento)
+        # riparti da adesso invece di recuperare con una raffica di click
+        if now - self.deadline > interval:
+            self.deadline = now
+            if self._control is not None:
+                self._paused_seen = self._control.paused_time  # Pause già assorbite
+
+        self.deadline += interval
+        return self.deadline
+
+    def wait(self, control=None):
+        """Attende la scadenza corrente.
+
+        Se viene passato un RunControl l'attesa usa control.sleep(), che si
+        sveglia subito allo stop. Restituisce l'errore di pianificazione in
+        secondi (positivo se in ritardo) oppure None se è stato richiesto lo stop.
+        """
+        clock = self._clock
+
+        while True:
+            # Fase 1: attesa passiva fino a spin_window dalla scadenza
+            while True:
+                if control is not None:
+                    self._skip_pauses(control)
+                remaining = self.deadline - clock()
+                if remaining <= self.spin_window:
+                    break
+                if control is not None:
+                    if not control.sleep(remaining - self.spin_window):
+                        return None
+                else:
+                    self._sleep(min(remaining - self.spin_window, self.max_sleep_chunk))
+
+            if control is not None:
+                # Una pausa arrivata ora blocca qui; alla ripresa la scadenza slitta
+                if not control.wait_if_paused():
+                    return None
+                deadline = self.deadline
+                self._skip_pauses(control)
+                if self.deadline != deadline:
+                    continue
+
+            # Fase 2: spin fino alla scadenza esatta (interrotto da una pausa)
+            deadline = self.deadline
+            now = clock()
+            while now < deadline and not (control is not None and control.is_paused):
+                now = clock()
+            if now >= deadline:
+                break
+
+        error = now - deadline
+        self.count += 1
+        self.last_error = error
+        self.total_error += error
+        if error > self.max_error:
+            self.max_error = error
+        return error
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Global Recorder - Registrazione dei click su tutto il display
+Autore: Andrea Piani
+Descrizione: Cattura i click di qualsiasi finestra con l'estensione X11 RECORD
+             (python-xlib) in un thread dedicato. Le pause tra gli step vengono dai
+             timestamp degli eventi del server X (millisecondi, orologio monotono),
+             quindi l'esecuzione riproduce i tempi reali della registrazione.
+             I movimenti del puntatore tra un click e l'altro diventano step di
+             percorso compressi (motion_path)
+"""
+
+import threading
+from array import array
+
+from motion_path import MAX_PATH_MS, compress_path
+from sequence_program import MAX_COORDINATE
+
+
+class RecorderError(Exception):
+    """Registrazione globale non disponibile (python-xlib, display o estensione RECORD)"""
+
+
+class ClickTimeline:
+    """Converte le pressioni dei pulsanti, con il loro timestamp, in step di una sequenza.
+
+    Ogni step viene scritto subito con pausa 0; quando arriva il click successivo
+    la pausa dello step precedente diventa l'intervallo reale tra i due eventi.
+    Con record_motion i movimenti vengono accumulati e, al click successivo,
+    scritti come step di percorso: la pausa prima del percorso arriva fino al
+    suo primo campione, quella dopo dall'ultimo campione al click.
+    """
+
+    BUTTON_NAMES = {1: 'left', 2: 'middle', 3: 'right'}
+
+    # I timestamp X11 sono millisecondi a 32 bit: ricominciano da 0 ogni ~49 giorni
+    TIME_MASK = 0xFFFFFFFF
+
+    # Campioni oltre i quali un movimento continuo viene scritto subito (memoria limitata)
+    MAX_MOTION_SAMPLES = 5000
+
+    def __init__(self, writer, on_click=None, record_motion=False):
+        self.writer = writer
+        self.on_click = on_click
+        self.record_motion = record_motion
+        # Area (x1, y1, x2, y2) da ignorare, es. la finestra dell'app; aggiornabile da un altro thread
+        self.ignore_rect = None
+        self._last_time = None
+        # Campioni del movimento in corso: ms relativi al primo campione (senza azzeramento a 32 bit)
+        self._motion_start = None
+        self._motion_xs = array('i')
+        self._motion_ys = array('i')
+        self._motion_ts = array('I')
+
+    def __len__(self):
+        return len(self.writer)
+
+    def _elapsed(self, start, time_ms):
+        return (time_ms - start) & self.TIME_MASK
+
+    def _set_last_delay(self, time_ms):
+        """Pausa dopo l'ultimo step scritto: fino all'istante time_ms"""
+        writer = self.writer
+        if self._last_time is not None and len(writer):
+            writer.set_delay(len(writer) - 1, self._elapsed(self._last_time, time_ms) / 1000.0)
+        self._last_time = time_ms
+
+    def motion(self, x, y, time_ms):
+        """Registra la posizione del puntatore (x, y) all'istante time_ms del server"""
+        if not self.record_motion:
+            return
+        if not (0 <= x <= MAX_COORDINATE and 0 <= y <= MAX_COORDINATE):
+            return
+
+        if self._motion_start is None:
+            self._motion_start = time_ms
+        elapsed = self._elapsed(self._motion_start, time_ms)
+        if elapsed > MAX_PATH_MS:
+            # Lunga sosta senza click: il movimento precedente finisce lì
+            self.flush_motion()
+            self._motion_start = time_ms
+            elapsed = 0
+
+        self._motion_xs.append(x)
+        self._motion_ys.append(y)
+        self._motion_ts.append(elapsed)
+        if len(self._motion_xs) >= self.MAX_MOTION_SAMPLES:
+            self.flush_motion()
+
+    def flush_motion(self):
+        """Scrive il movimento accumulato come step di percorso (almeno due campioni)"""
+        xs, ys, ts = self._motion_xs, self._motion_ys, self._motion_ts
+        start = self._motion_start
+        self._motion_start = None
+        self._motion_xs, self._motion_ys, self._motion_ts = array('i'), array('i'), array('I')
+        if len(xs) < 2 or (min(xs) == max(xs) and min(ys) == max(ys)):
+            return False
+
+        path = compress_path(xs, ys, ts)
+        self._set_last_delay(start)
+        self.writer.append_path(path, 0.0)
+        # La pausa dopo il percorso parte dal suo ultimo campione
+        self._last_time = (start + ts[-1]) & self.TIME_MASK
+        return True
+
+    def button_press(self, code, x, y, time_ms):
+        """Registra la pressione del pulsante code in (x, y) all'istante time_ms del server"""
+        button = self.BUTTON_NAMES.get(code)
+        if button is None:
+            return False  # Rotella e pulsanti extra
+
+        rect = self.ignore_rect
+        if rect is not None and rect[0] <= x < rect[2] and rect[1] <= y < rect[3]:
+            return False
+        if not (0 <= x <= MAX_COORDINATE and 0 <= y <= MAX_COORDINATE):
+            return False
+
+        if self._motion_start is not None:
+            self.flush_motion()
+
+        writer = self.writer
+        self._set_last_delay(time_ms)
+        writer.append(x, y, button, False, 0.0)
+        if self.on_click is not None:
+            self.on_click(len(writer), button, x, y)
+        return True
+
+
+class GlobalClickRecorder:
+    """Thread di registrazione con l'estensione RECORD: passa ButtonPress e MotionNotify a una ClickTimeline.
+
+    Servono due connessioni: quella dei dati resta bloccata in
+    record_enable_context, quella di controllo la sblocca da stop().
+    """
+
+    def __init__(self, timeline, display_name=None):
+        try:
+            from Xlib import X, display
+            from Xlib.ext import record
+            from Xlib.protocol import rq
+        except ImportError as e:
+            raise RecorderError(f"python-xlib non installato: {e}")
+
+        self.timeline = timeline
+        self._X = X
+        self._record = record
+        self._event_field = rq.EventField(None)
+        self._thread = None
+        self._context = None
+
+        try:
+            self._control_display = display.Display(display_name)
+        except Exception as e:
+            raise RecorderError(f"Impossibile aprire il display X11: {e}")
+
+        try:
+            if not self._control_display.has_extension('RECORD'):
+                raise RecorderError("Estensione RECORD non disponibile sul display")
+            self._data_display = display.Display(display_name)
+        except RecorderError:
+            self._control_display.close()
+            raise
+        except Exception as e:
+            self._control_display.close()
+            raise RecorderError(f"Impossibile aprire il display X11: {e}")
+
+    def start(self):
+        """Crea il contesto RECORD e avvia il thread di registrazione; restituisce self"""
+        X = self._X
+        try:
+            self._context = self._control_display.record_create_context(
+                0, [self._record.AllClients], [{
+                    'core_requests': (0, 0), 'core_replies': (0, 0),
+                    'ext_requests': (0, 0, 0, 0), 'ext_replies': (0, 0, 0, 0),
+                    'delivered_events': (0, 0),
+                    # ButtonPress, ButtonRelease e MotionNotify sono consecutivi
+                    'device_events': (X.ButtonPress, X.MotionNotify if self.timeline.record_motion else X.ButtonPress),
+                    'errors': (0, 0), 'client_started': False, 'client_died': False,
+                }])
+            self._control_display.sync()
+        except Exception as e:
+            self._context = None
+            self.stop()
+            raise RecorderError(f"Impossibile creare il contesto RECORD: {e}")
+
+        self._thread = threading.Thread(target=self._run, name="GlobalRecorder", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        # Blocca fino a record_disable_context
+        self._data_display.record_enable_context(self._context, self._handle_reply)
+
+    def _handle_reply(self, reply):
+        if reply.category != self._record.FromServer or reply.client_swapped:
+            return
+
+        data = reply.data
+        display = self._data_display.display
+        button_press = self._X.ButtonPress
+        motion_notify = self._X.MotionNotify
+        timeline = self.timeline
+        while len(data) >= 32:
+            event, data = self._event_field.parse_binary_value(data, display, None, None)
+            if event.type == button_press:
+                timeline.button_press(event.detail, event.root_x, event.root_y, event.time)
+            elif event.type == motion_notify:
+                timeline.motion(event.root_x, event.root_y, event.time)
+
+    def stop(self, timeout=2.0):
+        """Ferma la registrazione e chiude le connessioni al display"""
+        if self._context is not None:
+            try:
+                self._control_display.record_disable_context(self._context)
+                self._control_display.sync()
+            except Exception:
+                pass
+            if self._thread is not None:
+                self._thread.join(timeout)
+                self._thread = None
+            try:
+                self._control_display.record_free_context(self._context)
+                self._control_display.sync()
+            except Exception:
+                pass
+            self._context = None
+
+        for connection in (self._data_display, self._control_display):
+            try:
+                connection.close()
+            except Exception:
+                pass
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Headless Runner - Esecuzione dei profili da riga di comando, senza interfaccia
+Autore: Andrea Piani
+Descrizione: Carica un profilo salvato da save_profile ed esegue click singoli o
+             sequenza con lo stesso motore dell'applicazione, senza creare widget Tk
+Utilizzo: python -m mouse_clicker run profiles/foo.json [--max-clicks N]
+          python headless_runner.py profiles/foo.json [--max-clicks N]
+"""
+
+import argparse
+import datetime
+import signal
+import sys
+import threading
+import time
+
+from click_backends import BACKENDS, EXTRA_BACKENDS, ClickBackendError, create_backend, create_backend_with_fallback
+from click_engine import ClickEngine, EngineListener
+from click_metrics import ClickMetrics, MetricsServer
+from profile_files import ProfileError, read_profile
+from run_config import RunConfig
+from run_control import RunControl
+from run_log_writer import RunLogWriter
+
+
+class ConsoleListener(EngineListener):
+    """Stampa il log del motore su console e ferma l'esecuzione quando richiesto"""
+
+    def __init__(self, run_control, quiet=False, stream=None):
+        self.run_control = run_control
+        self.quiet = quiet
+        self.stream = stream or sys.stdout
+
+    def log(self, message):
+        if not self.quiet:
+            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            print(f"[{timestamp}] {message}", file=self.stream)
+
+    def request_stop(self):
+        self.run_control.stop()
+
+
+def check_license():
+    """Applica le stesse regole di utilizzo dell'interfaccia; False se il limite è raggiunto"""
+    from license_manager import LicenseManager
+
+    license_manager = LicenseManager()
+    if not license_manager.can_use_app():
+        print(f"Hai raggiunto il limite di {license_manager.max_free_uses} utilizzi gratuiti. "
+              "Acquista la licenza Premium per continuare ad usare l'app.", file=sys.stderr)
+        return False
+    license_manager.increment_usage()
+    return True
+
+
+def build_parser():
+    """Opzioni della riga di comando del runner headless"""
+    parser = argparse.ArgumentParser(
+        prog="mouse_clicker run",
+        description="Esegue un profilo di Mouse Auto Clicker senza interfaccia grafica")
+    parser.add_argument('profile', help="file profilo JSON (come salvato da 'Salva Profilo')")
+    parser.add_argument('--max-clicks', type=int, default=None,
+                        help="numero massimo di click (anche in modalità sequenza)")
+    parser.add_argument('--backend', choices=list(BACKENDS) + list(EXTRA_BACKENDS), default=None,
+                        help="backend di click (predefinito: quello del profilo)")
+    parser.add_argument('--initial-delay', type=float, default=None,
+                        help="ritardo iniziale in secondi (predefinito: quello del profilo)")
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help="espone le metriche Prometheus su 127.0.0.1:PORTA")
+    parser.add_argument('--quiet', action='store_true',
+                        help="stampa solo il riepilogo finale")
+    return parser
+
+
+def run_profile(args, started=None):
+    """Esegue il profilo descritto da args; restituisce il codice di uscita"""
+    started = started if started is not None else time.perf_counter()
+
+    try:
+        config = RunConfig.from_profile(read_profile(args.profile))
+    except ProfileError as e:
+        print(f"Errore: {e}", file=sys.stderr)
+        return 1
+    except ValueError as e:
+        print(f"Errore: configurazione non valida: {e}", file=sys.stderr)
+        return 1
+
+    if args.max_clicks is not None:
+        if args.max_clicks <= 0:
+            print("Errore: il numero massimo di click deve essere maggiore di 0", file=sys.stderr)
+            return 1
+        config = config._replace(max_clicks=args.max_clicks)
+    if args.initial_delay is not None:
+        config = config._replace(initial_delay=max(0.0, args.initial_delay))
+    if args.backend is not None:
+        config = config._replace(click_backend=args.backend)
+
+    if not check_license():
+        return 1
+
+    run_control = RunControl()
+    listener = ConsoleListener(run_control, quiet=args.quiet)
+
+    # Crea il backend: quello richiesto esplicitamente non ha ripiego
+    try:
+        if args.backend is not None:
+            backend = create_backend(config.click_backend)
+        else:
+            backend = create_backend_with_fallback(config.click_backend, log=listener.log)
+    except ClickBackendError as e:
+        print(f"Errore: {e}", file=sys.stderr)
+        return 1
+
+    metrics = ClickMetrics()
+    metrics_server = None
+    if args.metrics_port is not None:
+        try:
+            metrics_server = MetricsServer(metrics, port=args.metrics_port).start()
+            listener.log(f"Endpoint metriche attivo su http://127.0.0.1:{metrics_server.port}/metrics")
+        except OSError as e:
+            print(f"Errore: impossibile avviare l'endpoint metriche: {e}", file=sys.stderr)
+            backend.close()
+            return 1
+
+    run_log = None
+    if config.file_log:
+        run_log = RunLogWriter(compress=config.file_log_compress).start()
+        run_log.write({'ts': time.time(), 'event': 'start',
+                       'mode': 'sequence' if config.sequence_mode else 'single',
+                       'backend': backend.name})
+
+    engine = ClickEngine(config, run_control, backend, listener=listener, metrics=metrics,
+                         run_log=run_log, click_limit=args.max_clicks)
+
+    def worker():
+        try:
+            engine.run()
+        finally:
+            config.sequence.close()
+            run_control.mark_halted()
+
+    # SIGTERM (es. dal gestore della farm) ferma l'esecuzione come il pulsante Stop
+    previous_sigterm = signal.signal(signal.SIGTERM, lambda signum, frame: run_control.stop())
+
+    run_control.start()
+    metrics.start_run(run_control)
+    ready = time.perf_counter() - started
+    if not args.quiet:
+        listener.log(f"Avvio headless in {ready * 1000:.1f}ms - profilo '{args.profile}', "
+                     f"backend {backend.name}, modalità {'sequenza' if config.sequence_mode else 'singola'}")
+
+    click_thread = threading.Thread(target=worker, daemon=True)
+    click_thread.start()
+    try:
+        # Attesa a intervalli, così Ctrl+C viene gestito subito dal thread principale
+        while not run_control.wait_halted(0.2):
+            pass
+    except KeyboardInterrupt:
+        listener.log("Interrotto dall'utente")
+        run_control.stop()
+        run_control.wait_halted(3.0)
+    finally:
+        signal.signal(signal.SIGTERM, previous_sigterm)
+        backend.close()
+        if run_log is not None:
+            run_log.write({'ts': time.time(), 'event': 'stop', 'clicks': engine.click_count})
+            run_log.close()
+        if metrics_server is not None:
+            metrics_server.stop()
+
+    elapsed = time.perf_counter() - started
+    call = metrics.click_call_seconds
+    lateness = metrics.schedule_lateness_seconds
+    print(f"Click eseguiti: {engine.click_count} in {elapsed:.2f}s | "
+          f"avvio {ready * 1000:.1f}ms | "
+          f"chiamata click p50/p99 {call.quantile(0.5) * 1000:.2f}/{call.quantile(0.99) * 1000:.2f}ms | "
+          f"ritardo p50/p99 {lateness.quantile(0.5) * 1000:.2f}/{lateness.quantile(0.99) * 1000:.2f}ms",
+          flush=True)
+    return 0
+
+
+def main(argv=None, started=None):
+    """Punto di ingresso del runner headless; started è l'istante di avvio da misurare"""
+    started = started if started is not None else time.perf_counter()
+    args = build_parser().parse_args(argv)
+    return run_profile(args, started)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Log Buffer - Buffer circolare in memoria per le righe di log
+Autore: Andrea Piani
+Descrizione: Conserva le ultime N righe di log con append e accesso per indice O(1),
+             così il widget di log può tenerne solo una parte e il resto si sfoglia a pagine
+"""
+
+
+class LogRingBuffer:
+    """Buffer circolare di dimensione fissa (le righe più vecchie vengono sovrascritte)"""
+
+    def __init__(self, capacity=100000):
+        if capacity <= 0:
+            raise ValueError("La capacità deve essere maggiore di 0")
+        self.capacity = capacity
+        self._items = [None] * capacity
+        self._start = 0
+        self._size = 0
+        # Righe totali ricevute, incluse quelle già sovrascritte
+        self.total = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def first_number(self):
+        """Numero progressivo (da 1) della riga più vecchia ancora disponibile"""
+        return self.total - self._size + 1
+
+    def append(self, line):
+        """Aggiunge una riga, sovrascrivendo la più vecchia se il buffer è pieno"""
+        if self._size < self.capacity:
+            self._items[(self._start + self._size) % self.capacity] = line
+            self._size += 1
+        else:
+            self._items[self._start] = line
+            self._start = (self._start + 1) % self.capacity
+        self.total += 1
+
+    def extend(self, lines):
+        """Aggiunge più righe"""
+        for line in lines:
+            self.append(line)
+
+    def __getitem__(self, index):
+        """Riga index-esima, dalla più vecchia (0) alla più recente (len - 1)"""
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("Indice fuori dal buffer di log")
+        return self._items[(self._start + index) % self.capacity]
+
+    def page(self, start, count):
+        """Restituisce al massimo count righe a partire da start"""
+        start = max(0, start)
+        end = min(self._size, start + count)
+        return [self[i] for i in range(start, end)]
+
+    def clear(self):
+        """Svuota il buffer"""
+        self._items = [None] * self.capacity
+        self._start = 0
+        self._size = 0
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Match Pool - Ricerca delle immagini in processi separati
+Autore: Andrea Piani
+Descrizione: Il template matching gira in un ProcessPoolExecutor, fuori dal GIL del
+             thread dei click. I fotogrammi passano ai processi tramite
+             multiprocessing.shared_memory (una copia, nessuna serializzazione), due
+             blocchi per bersaglio usati a turno. Il processo confronta la regione con
+             quella della ricerca precedente e, se non è cambiata, riusa il risultato.
+             prefetch() avvia la ricerca dello step successivo durante la pausa corrente
+"""
+
+from screen_capture import ScreenCapture
+from template_matcher import ImageLocator, import_cv2
+
+# Differenza massima (livelli di grigio) per considerare invariata una regione
+DIFF_TOLERANCE = 8
+
+# Blocchi condivisi tenuti aperti da ogni processo
+WORKER_MAX_FRAMES = 32
+
+# Intervallo con cui l'attesa di una ricerca controlla lo stop (secondi)
+RESULT_POLL_INTERVAL = 0.01
+
+
+# === Lato processo di lavoro ===
+
+_worker_frames = {}     # Nome del blocco condiviso -> SharedMemory
+_worker_locator = None  # Template e piramidi in cache nel processo
+
+
+def _attach(name, shape):
+    """Vista NumPy sul fotogramma nel blocco condiviso name (aperto una volta per processo)"""
+    from multiprocessing import shared_memory
+
+    import numpy as np
+
+    shm = _worker_frames.pop(name, None)
+    if shm is None:
+        if len(_worker_frames) >= WORKER_MAX_FRAMES:
+            # Blocchi più vecchi: il processo principale li ha già sostituiti
+            _worker_frames.pop(next(iter(_worker_frames))).close()
+        shm = shared_memory.SharedMemory(name=name)
+    _worker_frames[name] = shm
+    return np.ndarray(shape, np.uint8, shm.buf)
+
+
+def warm_up():
+    """Importa OpenCV nel processo, così la prima ricerca non ne paga il costo"""
+    import multiprocessing
+
+    import_cv2()
+    return multiprocessing.current_process().pid
+
+
+def match_frame(frame, template, threshold, previous=None, scales=None):
+    """Cerca template (alle scale indicate) nel fotogramma frame (nome, shape) e restituisce (match, riusato).
+
+    previous è (fotogramma, match) della ricerca precedente dello stesso bersaglio:
+    se la regione non è cambiata il match (anche None) viene riusato senza ricerca.
+    """
+    global _worker_locator
+    cv2 = import_cv2()
+    screen = _attach(*frame)
+    if previous is not None:
+        old_frame, old_match = previous
+        old = _attach(*old_frame)
+        if old.shape == screen.shape and cv2.norm(old, screen, cv2.NORM_INF) <= DIFF_TOLERANCE:
+            return old_match, True
+
+    if _worker_locator is None:
+        # La cattura del locator non viene mai aperta: il fotogramma arriva dal processo principale
+        _worker_locator = ImageLocator()
+    locator = _worker_locator
+    return locator.matcher.find(screen, locator.template(template), threshold, key=template, scales=scales), False
+
+
+# === Lato processo principale ===
+
+class SharedFrame:
+    """Blocco di memoria condivisa per un fotogramma in scala di grigi, ingrandito quando serve"""
+
+    def __init__(self):
+        self._shm = None
+        self.spec = None  # (nome, shape) dell'ultimo fotogramma scritto
+
+    def write(self, image):
+        """Copia image nel blocco e restituisce (nome, shape) per il processo di lavoro"""
+        from multiprocessing import shared_memory
+
+        import numpy as np
+
+        if self._shm is None or self._shm.size < image.size:
+            self.close()
+            self._shm = shared_memory.SharedMemory(create=True, size=max(1, image.size))
+        view = np.ndarray(image.shape, np.uint8, self._shm.buf)
+        view[...] = image
+        del view  # Nessuna vista deve restare aperta sul blocco (close)
+        self.spec = (self._shm.name, image.shape)
+        return self.spec
+
+    def close(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+            self.spec = None
+
+
+class _SearchCancelled(Exception):
+    """Stop richiesto mentre si attendeva una ricerca"""
+
+
+class PoolLocator:
+    """Come ImageLocator, con la ricerca in processi separati e il prefetch.
+
+    Per ogni bersaglio (template e regione) tiene due SharedFrame: uno con il
+    fotogramma della ricerca precedente, l'altro per quello nuovo. Va usato da
+    un solo thread (quello dei click). Con un RunControl l'attesa di una ricerca
+    si interrompe allo stop; se un processo muore (memoria esaurita, crash di
+    OpenCV) i processi vengono ricreati e la ricerca ripetuta una volta.
+    """
+
+    def __init__(self, capture=None, processes=1, run_control=None):
+        self.capture = capture or ScreenCapture()
+        self.processes = processes
+        self.run_control = run_control
+        self._executor = None
+        self._targets = {}   # Bersaglio -> stato (vedi _state)
+        self.searches = 0    # Ricerche complete nei processi
+        self.reused = 0      # Regione invariata: match precedente riusato
+        self.prefetched = 0  # Step risolti da un prefetch
+        self.restarts = 0    # Processi ricreati dopo un crash
+
+    @property
+    def executor(self):
+        """Processi di lavoro, avviati al primo uso (spawn: nessuna copia delle connessioni X11 e Tk)"""
+        if self._executor is None:
+            # Importati qui: avviare l'applicazione senza step immagine non li carica
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            self._executor = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context('spawn'))
+            for _ in range(self.processes):
+                self._executor.submit(warm_up)
+        return self._executor
+
+    def _restart(self):
+        """Scarta i processi (il pool è rotto) e le ricerche legate a quei processi"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self.restarts += 1
+        for state in self._targets.values():
+            state['pending'] = None
+
+    def _state(self, target):
+        state = self._targets.get(target)
+        if state is None:
+            # frames: i due blocchi; last: (blocco, origine, match) della ricerca precedente;
+            # pending: (blocco, origine, future) di un prefetch in corso
+            state = self._targets[target] = {'frames': (SharedFrame(), SharedFrame()), 'last': None, 'pending': None}
+        return state
+
+    def _submit(self, target, state):
+        """Cattura la regione del bersaglio nel blocco libero e avvia la ricerca; restituisce (blocco, origine, future)"""
+        gray, origin = self.capture.grab_gray(target.region)
+        last = state['last']
+        frames = state['frames']
+        frame = frames[1] if last is not None and last[0] is frames[0] else frames[0]
+        spec = frame.write(gray)
+
+        previous = None
+        if last is not None and last[1] == origin:
+            previous = (last[0].spec, last[2])
+        future = self.executor.submit(match_frame, spec, target.template, target.threshold, previous, target.scales)
+        return frame, origin, future
+
+    def _result(self, future):
+        """Risultato della ricerca, atteso a intervalli brevi per restare reattivi allo stop"""
+        from concurrent.futures import TimeoutError as FutureTimeout
+
+        while True:
+            try:
+                return future.result(RESULT_POLL_INTERVAL)
+            except FutureTimeout:
+                if self.run_control is not None and not self.run_control.is_running:
+                    future.cancel()
+                    raise _SearchCancelled()
+
+    def _finish(self, state, frame, origin, future):
+        """Attende la ricerca e la registra come precedente del bersaglio"""
+        match, reused = self._result(future)
+        if reused:
+            self.reused += 1
+        else:
+            self.searches += 1
+        state['last'] = (frame, origin, match)
+        return match
+
+    def prefetch(self, target):
+        """Avvia la ricerca di target senza attenderla (es. durante la pausa dello step precedente)"""
+        from concurrent.futures.process import BrokenProcessPool
+
+        state = self._state(target)
+        if state['pending'] is None:
+            try:
+                state['pending'] = self._submit(target, state)
+            except BrokenProcessPool:
+                self._restart()  # La ricerca verrà fatta da locate()
+
+    def locate(self, target):
+        """Match del bersaglio in coordinate schermo, o None se non è visibile.
+
+        Un prefetch in corso viene completato e usato come ricerca precedente: se
+        la regione nel frattempo non è cambiata il processo ne conferma il risultato
+        con il solo confronto, altrimenti ripete la ricerca. Restituisce None anche
+        se lo stop arriva durante l'attesa.
+        """
+        from concurrent.futures.process import BrokenProcessPool
+
+        state = self._state(target)
+        pending, state['pending'] = state['pending'], None
+        try:
+            if pending is not None:
+                try:
+                    self._finish(state, *pending)
+                    self.prefetched += 1
+                except _SearchCancelled:
+                    raise
+                except BrokenProcessPool:
+                    self._restart()
+                    state['last'] = None
+                except Exception:
+                    state['last'] = None  # L'errore, se persiste, emerge dalla ricerca qui sotto
+
+            try:
+                match = self._finish(state, *self._submit(target, state))
+            except BrokenProcessPool:
+                # Processo morto durante la ricerca: processi nuovi, una seconda prova
+                self._restart()
+                state['last'] = None
+                match = self._finish(state, *self._submit(target, state))
+        except _SearchCancelled:
+            return None
+        if match is None:
+            return None
+        left, top = state['last'][1]
+        return match._replace(x=match.x + left, y=match.y + top)
+
+    def close(self):
+        """Ferma i processi e libera i blocchi condivisi e la cattura.
+
+        Non attende una ricerca ancora in corso (es. dopo uno stop): il processo
+        termina da solo, i blocchi restano validi finché li tiene aperti.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        for state in self._targets.values():
+            for frame in state['frames']:
+                frame.close()
+        self._targets = {}
+        self.capture.close()
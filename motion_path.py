@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motion Path - Percorsi del mouse registrati
+Autore: Andrea Piani
+Descrizione: Comprime i movimenti del puntatore catturati durante la registrazione
+             (ricampionamento nel tempo e Ramer-Douglas-Peucker, vettorizzati con NumPy)
+             e prepara i fotogrammi per riprodurli alla velocità originale.
+             NumPy viene importato solo quando serve: la sola esecuzione di
+             sequenze senza percorsi non lo carica
+"""
+
+from array import array
+
+# Coordinate massime (come in sequence_program, senza importarlo: dipendenza circolare)
+MAX_COORDINATE = 32767
+
+# Fotogrammi al secondo della riproduzione: fluido per hover e menu, CPU trascurabile
+PLAYBACK_RATE = 100
+
+# Durata massima di un percorso: oltre, il registratore lo spezza in più step
+MAX_PATH_MS = 10 * 60 * 1000
+
+
+class MotionPathError(ValueError):
+    """Punti del percorso non validi"""
+
+
+def motion_available():
+    """True se NumPy è installato (serve per comprimere e riprodurre i percorsi), senza importarlo"""
+    import importlib.util
+    return importlib.util.find_spec('numpy') is not None
+
+
+class MotionPath:
+    """Percorso compresso: punti chiave (x, y) con l'istante in ms dall'inizio del percorso"""
+
+    __slots__ = ('xs', 'ys', 'ts', '_frames')
+
+    def __init__(self, xs, ys, ts):
+        self.xs = xs            # array('i')
+        self.ys = ys            # array('i')
+        self.ts = ts            # array('I'), crescenti, ts[0] == 0
+        self._frames = None
+
+    def __len__(self):
+        return len(self.xs)
+
+    @property
+    def duration(self):
+        """Durata del percorso in secondi"""
+        return self.ts[-1] / 1000.0
+
+    @property
+    def end(self):
+        return self.xs[-1], self.ys[-1]
+
+    def to_list(self):
+        """Punti come [[x, y, ms], ...] (formato JSON dei profili)"""
+        return [[x, y, t] for x, y, t in zip(self.xs, self.ys, self.ts)]
+
+    @classmethod
+    def from_list(cls, points):
+        """Percorso da [[x, y, ms], ...]; solleva MotionPathError se i punti non sono validi"""
+        if not isinstance(points, list) or not points:
+            raise MotionPathError("percorso senza punti")
+
+        xs, ys, ts = array('i'), array('i'), array('I')
+        previous = 0
+        for point in points:
+            try:
+                x, y, t = (int(value) for value in point)
+            except (TypeError, ValueError):
+                raise MotionPathError(f"punto non valido: {point}")
+            if not (0 <= x <= MAX_COORDINATE and 0 <= y <= MAX_COORDINATE):
+                raise MotionPathError(f"coordinate non valide ({x}, {y})")
+            if t < previous or t > MAX_PATH_MS:
+                raise MotionPathError(f"istante non valido ({t} ms)")
+            xs.append(x)
+            ys.append(y)
+            ts.append(t)
+            previous = t
+
+        if ts[0] != 0:
+            raise MotionPathError("il primo punto deve essere all'istante 0")
+        return cls(xs, ys, ts)
+
+    def frames(self, rate=PLAYBACK_RATE):
+        """Fotogrammi (secondi, x, y) a rate Hz interpolando i punti chiave; calcolati una volta.
+
+        I fotogrammi che non cambiano posizione vengono omessi: una pausa
+        diventa un'attesa, non una serie di movimenti sul posto.
+        """
+        if self._frames is None:
+            import numpy as np
+
+            ts = np.frombuffer(self.ts, dtype=np.uint32).astype(np.float64)
+            step_ms = 1000.0 / rate
+            grid = np.append(np.arange(0.0, ts[-1], step_ms), ts[-1])
+            xs = np.rint(np.interp(grid, ts, np.frombuffer(self.xs, dtype=np.int32))).astype(np.int64)
+            ys = np.rint(np.interp(grid, ts, np.frombuffer(self.ys, dtype=np.int32))).astype(np.int64)
+
+            moved = np.ones(len(grid), dtype=bool)
+            moved[1:] = (np.diff(xs) != 0) | (np.diff(ys) != 0)
+            moved[-1] = True  # L'ultimo fotogramma resta: la durata del percorso non cambia
+            self._frames = ((grid[moved] / 1000.0).tolist(), xs[moved].tolist(), ys[moved].tolist())
+        return self._frames
+
+
+def rdp_mask(points, epsilon):
+    """Ramer-Douglas-Peucker iterativo: maschera dei punti da tenere.
+
+    Le distanze dal segmento vengono calcolate con NumPy per tutto
+    l'intervallo in una volta; lo stack evita la ricorsione sui percorsi lunghi.
+    """
+    import numpy as np
+
+    count = len(points)
+    keep = np.zeros(count, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, count - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+
+        first = points[start]
+        segment = points[end] - first
+        inner = points[start + 1:end] - first
+        length = segment @ segment
+        if length > 0:
+            # Proiezione sul segmento (non sulla retta): gli estremi contano come punti
+            t = np.clip(inner @ segment / length, 0.0, 1.0)
+            inner = inner - np.outer(t, segment)
+        distances = np.einsum('ij,ij->i', inner, inner)
+
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > epsilon * epsilon:
+            index = start + 1 + farthest
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+    return keep
+
+
+def compress_path(xs, ys, ts, epsilon=1.5, sample_ms=10, time_weight=0.05):
+    """Comprime un movimento registrato in un MotionPath.
+
+    xs, ys, ts: campioni del puntatore (ts in ms, crescenti, anche a intervalli
+    irregolari). I campioni vengono prima ricampionati a intervalli di sample_ms,
+    poi ridotti con RDP nello spazio (x, y, t * time_weight): così restano anche i
+    cambi di velocità e le soste (con 0.05 px/ms, 30 ms fermi valgono 1.5 px).
+    """
+    import numpy as np
+
+    ts = np.asarray(ts, dtype=np.float64)
+    ts = ts - ts[0]
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+
+    # Campioni con lo stesso istante: vale l'ultimo (np.interp vuole ascisse crescenti)
+    last = np.append(ts[1:] != ts[:-1], True)
+    ts, xs, ys = ts[last], xs[last], ys[last]
+
+    if len(ts) > 1:
+        grid = np.append(np.arange(0.0, ts[-1], sample_ms), ts[-1])
+        xs = np.interp(grid, ts, xs)
+        ys = np.interp(grid, ts, ys)
+        ts = grid
+        keep = rdp_mask(np.column_stack((xs, ys, ts * time_weight)), epsilon)
+        xs, ys, ts = xs[keep], ys[keep], ts[keep]
+
+    return MotionPath(array('i', np.rint(xs).astype(np.int32).tobytes()),
+                      array('i', np.rint(ys).astype(np.int32).tobytes()),
+                      array('I', np.rint(ts).astype(np.uint32).tobytes()))
@@ -8,16 +8,33 @@ Descrizione: Simula click del mouse a intervalli casuali
 
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext, filedialog, simpledialog
+import bisect
 import threading
 import time
-import random
 import datetime
-import pyautogui
 import sys
 import json
 import os
 from typing import List, Dict, Tuple, Optional
 from license_manager import LicenseManager
+from run_control import RunControl
+from click_backends import BACKENDS, create_backend_with_fallback
+from click_engine import ClickEngine, EngineListener
+from run_config import RunConfig
+from profile_files import ProfileError, ProfileIndex, read_import_profile, read_profile, relink_profile_paths
+from profile_watcher import ProfileWatcher
+from global_recorder import ClickTimeline, GlobalClickRecorder, RecorderError
+from motion_path import motion_available
+from sequence_file import SEQUENCE_EXTENSION, SequenceFileWriter, paths_file_path, read_step_count
+from sequence_program import (BUTTON_CODES, SequenceCompileError, compile_path_step, compile_wait_step,
+                              compile_window)
+from ui_pipeline import UIUpdatePipeline
+from log_buffer import LogRingBuffer
+from run_log_writer import RunLogWriter
+from screen_capture import format_color
+from template_matcher import format_scales, parse_scales
+from window_tracker import WindowAnchor, find_window_geometry
+from click_metrics import ClickMetrics, MetricsServer
 
 
 # === CLASSE DIALOG PER CLICK ===
@@ -31,7 +48,7 @@ class ClickDialog:
         # Crea finestra dialog
         self.dialog = tk.Toplevel(parent)
         self.dialog.title(title)
-        self.dialog.geometry("400x350")
+        self.dialog.geometry("400x470")
         self.dialog.resizable(False, False)
         self.dialog.transient(parent)
         self.dialog.grab_set()
@@ -39,8 +56,8 @@ class ClickDialog:
         # Centra la finestra
         self.dialog.update_idletasks()
         x = (self.dialog.winfo_screenwidth() // 2) - (400 // 2)
-        y = (self.dialog.winfo_screenheight() // 2) - (350 // 2)
-        self.dialog.geometry(f"400x350+{x}+{y}")
+        y = (self.dialog.winfo_screenheight() // 2) - (470 // 2)
+        self.dialog.geometry(f"400x470+{x}+{y}")
         
         # Variabili
         self.x_var = tk.StringVar(value=str(click_data.get('x', 100)) if click_data else "100")
@@ -48,6 +65,9 @@ class ClickDialog:
         self.button_var = tk.StringVar(value=click_data.get('button', 'left') if click_data else 'left')
         self.double_var = tk.BooleanVar(value=click_data.get('double', False) if click_data else False)
         self.delay_var = tk.StringVar(value=str(click_data.get('delay', 1.0)) if click_data else "1.0")
+        window = (click_data.get('window') or {}) if click_data else {}
+        self.window_class_var = tk.StringVar(value=window.get('class', ''))
+        self.window_title_var = tk.StringVar(value=window.get('title', ''))
         
         self.setup_ui()
         
@@ -83,6 +103,20 @@ class ClickDialog:
         ttk.Button(coord_frame, text="📍 Usa Posizione Corrente", 
                   command=self.get_current_position).pack(pady=(5, 0))
         
+        # Finestra di riferimento: con una finestra X e Y sono relativi al suo angolo
+        window_frame = ttk.LabelFrame(main_frame, text="Finestra (opzionale, coordinate relative)", padding="10")
+        window_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        class_frame = ttk.Frame(window_frame)
+        class_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(class_frame, text="Classe (WM_CLASS):").pack(side=tk.LEFT)
+        ttk.Entry(class_frame, textvariable=self.window_class_var, width=20).pack(side=tk.LEFT, padx=(5, 0))
+        
+        title_frame = ttk.Frame(window_frame)
+        title_frame.pack(fill=tk.X)
+        ttk.Label(title_frame, text="Titolo contiene:").pack(side=tk.LEFT)
+        ttk.Entry(title_frame, textvariable=self.window_title_var, width=20).pack(side=tk.LEFT, padx=(5, 0))
+        
         # Frame per tipo di click
         click_frame = ttk.LabelFrame(main_frame, text="Tipo di Click", padding="10")
         click_frame.pack(fill=tk.X, pady=(0, 10))
@@ -131,11 +165,24 @@ class ClickDialog:
             tk.messagebox.showerror("Errore", f"Errore nell'ottenere la posizione: {str(e)}")
             self.dialog.deiconify()
     
+    def window_anchor(self):
+        """Finestra indicata nel dialog, o None"""
+        wm_class = self.window_class_var.get().strip()
+        title = self.window_title_var.get().strip()
+        return WindowAnchor(wm_class, title) if wm_class or title else None
+    
     def _get_position(self):
         """Ottiene effettivamente la posizione del mouse"""
         try:
             import pyautogui
             x, y = pyautogui.position()
+            anchor = self.window_anchor()
+            if anchor is not None:
+                # Posizione relativa alla finestra indicata
+                geometry = find_window_geometry(anchor)
+                if geometry is None:
+                    raise ValueError(f"finestra {anchor.describe()} non visibile")
+                x, y = x - geometry[0], y - geometry[1]
             self.x_var.set(str(x))
             self.y_var.set(str(y))
             
@@ -177,16 +224,18 @@ class ClickDialog:
                                              f"Hai impostato un delay molto lungo ({delay}s). Continuare?"):
                     return
             
-            # Verifica che le coordinate siano entro i limiti dello schermo
-            try:
-                import pyautogui
-                screen_width, screen_height = pyautogui.size()
-                if x >= screen_width or y >= screen_height:
-                    if not tk.messagebox.askyesno("Attenzione", 
-                                                 f"Le coordinate ({x}, {y}) sono fuori dallo schermo ({screen_width}x{screen_height}). Continuare?"):
-                        return
-            except Exception:
-                pass  # Se non riusciamo a ottenere le dimensioni dello schermo, continuiamo
+            # Verifica che le coordinate siano entro i limiti dello schermo (non relative a una finestra)
+            anchor = self.window_anchor()
+            if anchor is None:
+                try:
+                    import pyautogui
+                    screen_width, screen_height = pyautogui.size()
+                    if x >= screen_width or y >= screen_height:
+                        if not tk.messagebox.askyesno("Attenzione", 
+                                                     f"Le coordinate ({x}, {y}) sono fuori dallo schermo ({screen_width}x{screen_height}). Continuare?"):
+                            return
+                except Exception:
+                    pass  # Se non riusciamo a ottenere le dimensioni dello schermo, continuiamo
             
             # Crea il risultato
             self.result = {
@@ -196,6 +245,8 @@ class ClickDialog:
                 'double': self.double_var.get(),
                 'delay': delay
             }
+            if anchor is not None:
+                self.result['window'] = {'class': anchor.wm_class, 'title': anchor.title}
             
             self.dialog.destroy()
             
@@ -210,9 +261,109 @@ class ClickDialog:
         self.dialog.destroy()
 
 
+# === CLASSE DIALOG PER CRONOLOGIA LOG ===
+
+class LogHistoryDialog:
+    """Finestra che sfoglia a pagine la cronologia del log (solo la pagina visibile è nel widget)"""
+    
+    PAGE_SIZE = 500
+    
+    def __init__(self, parent, history):
+        self.history = history
+        
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("Cronologia Log")
+        self.dialog.geometry("800x600")
+        self.dialog.transient(parent)
+        
+        self.page_info_var = tk.StringVar()
+        
+        self.setup_ui()
+        
+        # Parti dall'ultima pagina (righe più recenti)
+        self.page_start = max(0, len(self.history) - self.PAGE_SIZE)
+        self.show_page()
+    
+    def setup_ui(self):
+        """Configura l'interfaccia del dialog"""
+        main_frame = ttk.Frame(self.dialog, padding="10")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        self.page_text = scrolledtext.ScrolledText(main_frame, state='disabled', wrap=tk.WORD)
+        self.page_text.pack(fill=tk.BOTH, expand=True)
+        
+        nav_frame = ttk.Frame(main_frame)
+        nav_frame.pack(fill=tk.X, pady=(10, 0))
+        
+        ttk.Button(nav_frame, text="⏮ Più Vecchi", command=self.first_page).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(nav_frame, text="◀ Precedenti", command=self.previous_page).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(nav_frame, text="Successivi ▶", command=self.next_page).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(nav_frame, text="Più Recenti ⏭", command=self.last_page).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Label(nav_frame, textvariable=self.page_info_var).pack(side=tk.LEFT)
+        ttk.Button(nav_frame, text="Chiudi", command=self.dialog.destroy).pack(side=tk.RIGHT)
+    
+    def show_page(self):
+        """Mostra la pagina corrente leggendo solo le righe necessarie dal buffer"""
+        total = len(self.history)
+        self.page_start = max(0, min(self.page_start, total - self.PAGE_SIZE))
+        lines = self.history.page(self.page_start, self.PAGE_SIZE)
+        
+        self.page_text.config(state='normal')
+        self.page_text.delete(1.0, tk.END)
+        self.page_text.insert(tk.END, "".join(lines))
+        self.page_text.config(state='disabled')
+        
+        first = self.history.first_number + self.page_start
+        self.page_info_var.set(f"Righe {first}-{first + len(lines) - 1} di {self.history.total} "
+                               f"({total} in memoria)" if lines else "Log vuoto")
+    
+    def first_page(self):
+        self.page_start = 0
+        self.show_page()
+    
+    def previous_page(self):
+        self.page_start -= self.PAGE_SIZE
+        self.show_page()
+    
+    def next_page(self):
+        self.page_start += self.PAGE_SIZE
+        self.show_page()
+    
+    def last_page(self):
+        self.page_start = len(self.history)
+        self.show_page()
+
+
+# === ADATTATORE MOTORE -> INTERFACCIA ===
+
+class AppEngineListener(EngineListener):
+    """Inoltra messaggi e stato del motore alla pipeline UI dell'applicazione"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    def log(self, message):
+        self.app.log_message(message)
+    
+    def set_counter(self, text):
+        self.app.ui_updates.set_counter(text)
+    
+    def set_status(self, text):
+        self.app.ui_updates.set_status(text)
+    
+    def request_stop(self):
+        self.app.ui_updates.post_call(self.app.stop_clicking)
+
+
 # === CLASSE PRINCIPALE ===
 
 class MouseClickerApp:
+    # Profili letti da ogni task del pool durante la scansione
+    PROFILE_SCAN_BATCH = 64
+    
+    # Campionamento del puntatore per i movimenti registrati senza RECORD (ms)
+    MOTION_SAMPLE_MS = 10
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Mouse Auto Clicker - Click Automatici")
@@ -228,32 +379,65 @@ class MouseClickerApp:
             return
         
         # Variabili di controllo
-        self.is_running = False
+        self.run_control = RunControl()
         self.click_thread = None
+        self.click_backend = None
+        self.click_engine = None
+        self.run_log = None
+        
+        # Aggiornamenti UI dal thread di click accorpati a 30 Hz
+        self.ui_updates = UIUpdatePipeline(self.root, self._apply_log_lines,
+                                           self._apply_click_counter, self._apply_status)
+        
+        # Log: il widget tiene solo le ultime righe, la cronologia sta nel buffer circolare
+        self.log_history = LogRingBuffer(capacity=100000)
+        self.log_widget_lines = 0
+        
+        # Metriche di prestazione (pannello statistiche ed endpoint opzionale)
+        self.metrics = ClickMetrics()
+        self.metrics.ui_queue_depth = lambda: self.ui_updates.queue_depth
+        self.metrics_server = None
         self.click_count = 0
         
         # Variabili per sequenze e macro
         self.is_recording = False
-        self.recorded_sequence = []
+        self.recorder = None  # SequenceFileWriter della registrazione in corso
+        self.recording_timeline = None
+        self.global_recorder = None
+        self.motion_sample_id = None  # Campionamento del puntatore (registrazione nella finestra)
         self.current_sequence = []
+        self.sequence_file = None  # Sequenza binaria (.seq) al posto di current_sequence
         self.sequence_mode = False
         
         # Profili
         self.profiles_dir = "profiles"
         self.current_profile = None
+        self.profile_index = ProfileIndex(self.profiles_dir)
+        self.profile_rows = []  # File profilo nell'ordine delle righe della lista
+        self.profile_executor = None
+        self.profile_scan_generation = 0
+        self.profile_scan_futures = []
+        self.profile_scan_total = 0
+        self.profile_scan_done = 0
+        self.profile_watcher = None
+        self.profile_index_save_id = None
         
         # Crea directory profili se non esiste
         if not os.path.exists(self.profiles_dir):
             os.makedirs(self.profiles_dir)
         
-        # Configurazione pyautogui
-        pyautogui.FAILSAFE = True  # Muovi mouse nell'angolo per fermare
-        
         # Configura stili per Windows
         self.setup_styles()
         
         self.setup_ui()
         self.update_license_status()
+        self.ui_updates.start()
+        self.update_stats_panel()
+    
+    @property
+    def is_running(self):
+        """True se i click automatici sono in esecuzione"""
+        return self.run_control.is_running
     
     def check_license_on_startup(self):
         """Controlla la licenza all'avvio dell'applicazione"""
@@ -381,6 +565,7 @@ class MouseClickerApp:
         
         # Notebook per organizzare le impostazioni
         notebook = ttk.Notebook(main_frame)
+        self.notebook = notebook
         notebook.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S), pady=(0, 10))
         
         # Tab 1: Impostazioni Base
@@ -403,6 +588,16 @@ class MouseClickerApp:
         profiles_frame = ttk.Frame(notebook, padding="10")
         notebook.add(profiles_frame, text="Profili")
         
+        # I tab oltre al primo vengono costruiti alla prima apertura (vedi on_tab_changed);
+        # le variabili Tk esistono già, così profili e avvio funzionano anche prima
+        self.setup_tab_variables()
+        self.lazy_tabs = {
+            str(advanced_frame): (self.setup_advanced_tab, advanced_frame),
+            str(sequence_frame): (self.setup_sequence_tab, sequence_frame),
+            str(profiles_frame): (self.setup_profiles_tab, profiles_frame),
+        }
+        notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+        
         # === TAB IMPOSTAZIONI BASE ===
         # Frame per impostazioni intervallo
         interval_frame = ttk.LabelFrame(basic_frame, text="Intervallo Click (secondi)", 
@@ -450,84 +645,6 @@ class MouseClickerApp:
                                             width=10, state='disabled')
         self.max_clicks_spinbox.grid(row=0, column=2, sticky=(tk.W, tk.E))
         
-        # === TAB CONFIGURAZIONE AVANZATA ===
-        # Frame tipo di click
-        click_type_frame = ttk.LabelFrame(advanced_frame, text="Tipo di Click", padding="10")
-        click_type_frame.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
-        
-        self.click_type = tk.StringVar(value="left")
-        ttk.Radiobutton(click_type_frame, text="Click Sinistro", variable=self.click_type, 
-                       value="left").grid(row=0, column=0, sticky=tk.W, padx=(0, 20))
-        ttk.Radiobutton(click_type_frame, text="Click Destro", variable=self.click_type, 
-                       value="right").grid(row=0, column=1, sticky=tk.W, padx=(0, 20))
-        ttk.Radiobutton(click_type_frame, text="Click Centrale", variable=self.click_type, 
-                       value="middle").grid(row=0, column=2, sticky=tk.W)
-        
-        # Doppio click
-        self.double_click = tk.BooleanVar(value=False)
-        ttk.Checkbutton(click_type_frame, text="Doppio Click", 
-                       variable=self.double_click).grid(row=1, column=0, sticky=tk.W, pady=(10, 0))
-        
-        # Frame posizione click
-        position_frame = ttk.LabelFrame(advanced_frame, text="Posizione Click", padding="10")
-        position_frame.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
-        position_frame.columnconfigure(1, weight=1)
-        position_frame.columnconfigure(3, weight=1)
-        
-        # Opzione posizione corrente vs fissa
-        self.use_current_position = tk.BooleanVar(value=True)
-        current_pos_check = ttk.Checkbutton(position_frame, text="Usa posizione corrente del mouse", 
-                                          variable=self.use_current_position,
-                                          command=self.toggle_position_mode)
-        current_pos_check.grid(row=0, column=0, columnspan=4, sticky=tk.W, pady=(0, 10))
-        
-        # Coordinate fisse
-        ttk.Label(position_frame, text="X:").grid(row=1, column=0, sticky=tk.W, padx=(0, 5))
-        self.fixed_x = tk.StringVar(value="100")
-        self.x_spinbox = ttk.Spinbox(position_frame, from_=0, to=9999, 
-                                   increment=1, textvariable=self.fixed_x,
-                                   width=10, state='disabled')
-        self.x_spinbox.grid(row=1, column=1, sticky=(tk.W, tk.E), padx=(0, 20))
-        
-        ttk.Label(position_frame, text="Y:").grid(row=1, column=2, sticky=tk.W, padx=(0, 5))
-        self.fixed_y = tk.StringVar(value="100")
-        self.y_spinbox = ttk.Spinbox(position_frame, from_=0, to=9999, 
-                                   increment=1, textvariable=self.fixed_y,
-                                   width=10, state='disabled')
-        self.y_spinbox.grid(row=1, column=3, sticky=(tk.W, tk.E))
-        
-        # Pulsante per catturare posizione corrente
-        self.capture_button = ttk.Button(position_frame, text="📍 Cattura Posizione Corrente", 
-                                        command=self.capture_current_position,
-                                        state='disabled')
-        self.capture_button.grid(row=2, column=0, columnspan=4, pady=(10, 0))
-        
-        # Frame opzioni avanzate
-        options_frame = ttk.LabelFrame(advanced_frame, text="Opzioni Avanzate", padding="10")
-        options_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
-        
-        # Ritardo iniziale
-        ttk.Label(options_frame, text="Ritardo iniziale (secondi):").grid(row=0, column=0, sticky=tk.W, padx=(0, 5))
-        self.initial_delay = tk.StringVar(value="3")
-        ttk.Spinbox(options_frame, from_=0, to=60, increment=1, 
-                   textvariable=self.initial_delay, width=10).grid(row=0, column=1, sticky=tk.W)
-        
-        # Suono di notifica
-        self.play_sound = tk.BooleanVar(value=False)
-        ttk.Checkbutton(options_frame, text="Suono di notifica", 
-                       variable=self.play_sound).grid(row=1, column=0, sticky=tk.W, pady=(10, 0))
-        
-        # Minimizza durante l'esecuzione
-        self.minimize_on_start = tk.BooleanVar(value=False)
-        ttk.Checkbutton(options_frame, text="Minimizza finestra durante l'esecuzione", 
-                       variable=self.minimize_on_start).grid(row=2, column=0, sticky=tk.W, pady=(5, 0))
-        
-        # === TAB SEQUENZE E MACRO ===
-        self.setup_sequence_tab(sequence_frame)
-        
-        # === TAB PROFILI ===
-        self.setup_profiles_tab(profiles_frame)
-        
         # Frame per pulsanti di controllo
         control_frame = ttk.Frame(main_frame)
         control_frame.grid(row=2, column=0, columnspan=2, pady=(0, 10))
@@ -549,9 +666,25 @@ class MouseClickerApp:
                                     style='Accent.TButton' if sys.platform == 'win32' else None)
         self.stop_button.grid(row=0, column=1, padx=(0, 10))
         
+        # Pulsante Pausa/Riprendi
+        pause_icon = "⏸" if sys.platform != 'win32' else ""
+        resume_icon = "▶" if sys.platform != 'win32' else ""
+        self.pause_button_text = f"{pause_icon} Pausa" if pause_icon else "Pausa"
+        self.resume_button_text = f"{resume_icon} Riprendi" if resume_icon else "Riprendi"
+        self.pause_button = ttk.Button(control_frame, 
+                                     text=self.pause_button_text,
+                                     command=self.toggle_pause,
+                                     state='disabled')
+        self.pause_button.grid(row=0, column=2, padx=(0, 10))
+        
         # Stato applicazione e contatori
         status_frame = ttk.Frame(main_frame)
-        status_frame.grid(row=3, column=0, columnspan=2, pady=(0, 10))
+        status_frame.grid(row=3, column=0, pady=(0, 10), sticky=tk.W)
+        
+        # Statistiche di prestazione aggiornate due volte al secondo
+        self.stats_var = tk.StringVar(value="CPS: - | Chiamata click: - | Ritardo: - | Coda UI: 0")
+        ttk.Label(status_frame, textvariable=self.stats_var, 
+                 font=('Arial', 9)).grid(row=0, column=0, sticky=tk.W)
         # Barra di stato con stile migliorato
         self.status_var = tk.StringVar(value="Pronto")
         status_bar = ttk.Label(main_frame, 
@@ -577,7 +710,7 @@ class MouseClickerApp:
         reset_button = ttk.Button(control_frame, 
                                 text=f"{reset_icon} Resetta Contatore" if reset_icon else "Resetta Contatore",
                                 command=self.reset_counter)
-        reset_button.grid(row=0, column=2, padx=(0, 10))
+        reset_button.grid(row=0, column=3, padx=(0, 10))
         
         # Frame per log
         log_frame = ttk.LabelFrame(main_frame, text="Log Click", padding="5")
@@ -593,10 +726,21 @@ class MouseClickerApp:
                                                  wrap=tk.WORD)
         self.log_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
-        # Pulsante per pulire log
-        clear_log_button = ttk.Button(log_frame, text="Pulisci Log", 
+        # Pulsanti e limite righe del log
+        log_buttons_frame = ttk.Frame(log_frame)
+        log_buttons_frame.grid(row=1, column=0, pady=(5, 0))
+        
+        clear_log_button = ttk.Button(log_buttons_frame, text="Pulisci Log", 
                                      command=self.clear_log)
-        clear_log_button.grid(row=1, column=0, pady=(5, 0))
+        clear_log_button.grid(row=0, column=0, padx=(0, 10))
+        
+        ttk.Button(log_buttons_frame, text="📜 Cronologia", 
+                  command=self.show_log_history).grid(row=0, column=1, padx=(0, 20))
+        
+        ttk.Label(log_buttons_frame, text="Righe visibili max:").grid(row=0, column=2, padx=(0, 5))
+        self.log_max_lines = tk.StringVar(value="1000")
+        ttk.Spinbox(log_buttons_frame, from_=100, to=100000, increment=100, 
+                   textvariable=self.log_max_lines, width=8).grid(row=0, column=3)
         
         # Info e istruzioni
         info_frame = ttk.LabelFrame(main_frame, text="Informazioni", padding="5")
@@ -615,6 +759,163 @@ class MouseClickerApp:
         # Log iniziale
         self.log_message("Applicazione avviata. Pronta per l'uso.")
     
+    def setup_tab_variables(self):
+        """Crea le variabili Tk dei tab costruiti in modo lazy"""
+        # Configurazione avanzata
+        self.click_type = tk.StringVar(value="left")
+        self.double_click = tk.BooleanVar(value=False)
+        self.use_current_position = tk.BooleanVar(value=True)
+        self.fixed_x = tk.StringVar(value="100")
+        self.fixed_y = tk.StringVar(value="100")
+        self.target_image = tk.StringVar(value="")
+        self.target_threshold = tk.StringVar(value="0.8")
+        self.target_scales = tk.StringVar(value="1")
+        self.initial_delay = tk.StringVar(value="3")
+        self.play_sound = tk.BooleanVar(value=False)
+        self.minimize_on_start = tk.BooleanVar(value=False)
+        self.click_backend_name = tk.StringVar(value="pyautogui")
+        self.file_log = tk.BooleanVar(value=False)
+        self.file_log_compress = tk.BooleanVar(value=False)
+        self.metrics_endpoint = tk.BooleanVar(value=False)
+        self.metrics_port = tk.StringVar(value="9101")
+        self.capture_ttl_ms = tk.StringVar(value="50")
+        self.match_processes = tk.StringVar(value="1")
+        self.x_spinbox = None
+        self.y_spinbox = None
+        self.capture_button = None
+        
+        # Sequenze e macro
+        self.execution_mode = tk.StringVar(value="single")
+        self.recording_status = tk.StringVar(value="Pronto per registrare")
+        self.sequence_repeats = tk.StringVar(value="1")
+        self.sequence_pause = tk.StringVar(value="1.0")
+        self.infinite_sequence = tk.BooleanVar(value=False)
+        self.global_recording = tk.BooleanVar(value=False)
+        self.record_motion = tk.BooleanVar(value=False)
+        self.record_button = None
+        self.sequence_listbox = None
+        
+        # Profili
+        self.current_profile_var = tk.StringVar(value="Nessun profilo caricato")
+        self.profiles_listbox = None
+        self.profile_progress = None
+        self.profile_scan_status = tk.StringVar(value="")
+    
+    def setup_advanced_tab(self, parent):
+        """Configura il tab per le impostazioni avanzate"""
+        # Frame tipo di click
+        click_type_frame = ttk.LabelFrame(parent, text="Tipo di Click", padding="10")
+        click_type_frame.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+        
+        ttk.Radiobutton(click_type_frame, text="Click Sinistro", variable=self.click_type, 
+                       value="left").grid(row=0, column=0, sticky=tk.W, padx=(0, 20))
+        ttk.Radiobutton(click_type_frame, text="Click Destro", variable=self.click_type, 
+                       value="right").grid(row=0, column=1, sticky=tk.W, padx=(0, 20))
+        ttk.Radiobutton(click_type_frame, text="Click Centrale", variable=self.click_type, 
+                       value="middle").grid(row=0, column=2, sticky=tk.W)
+        
+        # Doppio click
+        ttk.Checkbutton(click_type_frame, text="Doppio Click", 
+                       variable=self.double_click).grid(row=1, column=0, sticky=tk.W, pady=(10, 0))
+        
+        # Frame posizione click
+        position_frame = ttk.LabelFrame(parent, text="Posizione Click", padding="10")
+        position_frame.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+        position_frame.columnconfigure(1, weight=1)
+        position_frame.columnconfigure(3, weight=1)
+        
+        # Opzione posizione corrente vs fissa
+        current_pos_check = ttk.Checkbutton(position_frame, text="Usa posizione corrente del mouse", 
+                                          variable=self.use_current_position,
+                                          command=self.toggle_position_mode)
+        current_pos_check.grid(row=0, column=0, columnspan=4, sticky=tk.W, pady=(0, 10))
+        
+        # Coordinate fisse
+        ttk.Label(position_frame, text="X:").grid(row=1, column=0, sticky=tk.W, padx=(0, 5))
+        self.x_spinbox = ttk.Spinbox(position_frame, from_=0, to=9999, 
+                                   increment=1, textvariable=self.fixed_x,
+                                   width=10)
+        self.x_spinbox.grid(row=1, column=1, sticky=(tk.W, tk.E), padx=(0, 20))
+        
+        ttk.Label(position_frame, text="Y:").grid(row=1, column=2, sticky=tk.W, padx=(0, 5))
+        self.y_spinbox = ttk.Spinbox(position_frame, from_=0, to=9999, 
+                                   increment=1, textvariable=self.fixed_y,
+                                   width=10)
+        self.y_spinbox.grid(row=1, column=3, sticky=(tk.W, tk.E))
+        
+        # Pulsante per catturare posizione corrente
+        self.capture_button = ttk.Button(position_frame, text="📍 Cattura Posizione Corrente", 
+                                        command=self.capture_current_position)
+        self.capture_button.grid(row=2, column=0, columnspan=4, pady=(10, 0))
+        
+        # Immagine bersaglio: se impostata, ogni click cerca l'immagine sullo schermo (OpenCV)
+        ttk.Label(position_frame, text="Immagine:").grid(row=3, column=0, sticky=tk.W, padx=(0, 5), pady=(10, 0))
+        ttk.Entry(position_frame, textvariable=self.target_image).grid(row=3, column=1, columnspan=2, 
+                                                                       sticky=(tk.W, tk.E), pady=(10, 0))
+        image_buttons = ttk.Frame(position_frame)
+        image_buttons.grid(row=3, column=3, sticky=tk.W, padx=(5, 0), pady=(10, 0))
+        ttk.Button(image_buttons, text="📂", width=3, 
+                  command=self.choose_target_image).grid(row=0, column=0)
+        ttk.Button(image_buttons, text="✖", width=3, 
+                  command=lambda: self.target_image.set("")).grid(row=0, column=1, padx=(2, 0))
+        ttk.Label(position_frame, text="Soglia:").grid(row=4, column=0, sticky=tk.W, padx=(0, 5), pady=(5, 0))
+        ttk.Spinbox(position_frame, from_=0.5, to=1.0, increment=0.05, 
+                   textvariable=self.target_threshold, width=10).grid(row=4, column=1, sticky=tk.W, pady=(5, 0))
+        # Scale del template (es. "0.8, 1, 1.25") per DPI o zoom diversi: ognuna è una ricerca in più
+        ttk.Label(position_frame, text="Scale:").grid(row=4, column=2, sticky=tk.W, padx=(10, 5), pady=(5, 0))
+        ttk.Entry(position_frame, textvariable=self.target_scales, width=12).grid(row=4, column=3, sticky=tk.W,
+                                                                                  pady=(5, 0))
+        
+        # Frame opzioni avanzate
+        options_frame = ttk.LabelFrame(parent, text="Opzioni Avanzate", padding="10")
+        options_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+        
+        # Ritardo iniziale
+        ttk.Label(options_frame, text="Ritardo iniziale (secondi):").grid(row=0, column=0, sticky=tk.W, padx=(0, 5))
+        ttk.Spinbox(options_frame, from_=0, to=60, increment=1, 
+                   textvariable=self.initial_delay, width=10).grid(row=0, column=1, sticky=tk.W)
+        
+        # Suono di notifica
+        ttk.Checkbutton(options_frame, text="Suono di notifica", 
+                       variable=self.play_sound).grid(row=1, column=0, sticky=tk.W, pady=(10, 0))
+        
+        # Minimizza durante l'esecuzione
+        ttk.Checkbutton(options_frame, text="Minimizza finestra durante l'esecuzione", 
+                       variable=self.minimize_on_start).grid(row=2, column=0, sticky=tk.W, pady=(5, 0))
+        
+        # Backend per l'invio dei click (xtest evita la PAUSE di pyautogui)
+        ttk.Label(options_frame, text="Backend click:").grid(row=3, column=0, sticky=tk.W, padx=(0, 5), pady=(10, 0))
+        ttk.Combobox(options_frame, textvariable=self.click_backend_name, 
+                    values=list(BACKENDS), state='readonly', width=12).grid(row=3, column=1, sticky=tk.W, pady=(10, 0))
+        
+        # Log strutturato su file (JSONL a rotazione nella cartella logs)
+        ttk.Checkbutton(options_frame, text="Salva log dei click su file (cartella logs)", 
+                       variable=self.file_log).grid(row=4, column=0, columnspan=2, sticky=tk.W, pady=(10, 0))
+        
+        ttk.Checkbutton(options_frame, text="Comprimi i file di log ruotati (gzip)", 
+                       variable=self.file_log_compress).grid(row=5, column=0, columnspan=2, sticky=tk.W, pady=(5, 0))
+        
+        # Endpoint metriche Prometheus su localhost
+        ttk.Checkbutton(options_frame, text="Endpoint metriche locale (http://127.0.0.1:PORTA/metrics)", 
+                       variable=self.metrics_endpoint,
+                       command=self.toggle_metrics_endpoint).grid(row=6, column=0, columnspan=2, sticky=tk.W, pady=(10, 0))
+        ttk.Label(options_frame, text="Porta metriche:").grid(row=7, column=0, sticky=tk.W, padx=(0, 5), pady=(5, 0))
+        ttk.Spinbox(options_frame, from_=1024, to=65535, increment=1, 
+                   textvariable=self.metrics_port, width=10).grid(row=7, column=1, sticky=tk.W, pady=(5, 0))
+        
+        # Step immagine ravvicinati condividono la stessa cattura dello schermo
+        ttk.Label(options_frame, text="Validità cattura schermo (ms):").grid(row=8, column=0, sticky=tk.W, padx=(0, 5), pady=(10, 0))
+        ttk.Spinbox(options_frame, from_=0, to=1000, increment=10, 
+                   textvariable=self.capture_ttl_ms, width=10).grid(row=8, column=1, sticky=tk.W, pady=(10, 0))
+        
+        # Ricerca immagini fuori dal thread dei click (0 = nello stesso thread)
+        ttk.Label(options_frame, text="Processi ricerca immagini:").grid(row=9, column=0, sticky=tk.W, padx=(0, 5), pady=(5, 0))
+        ttk.Spinbox(options_frame, from_=0, to=8, increment=1, 
+                   textvariable=self.match_processes, width=10).grid(row=9, column=1, sticky=tk.W, pady=(5, 0))
+        
+        # Stato dei campi coordinate secondo la variabile (un profilo può averla già cambiata)
+        self.toggle_position_mode()
+    
     def setup_sequence_tab(self, parent):
         """Configura il tab per sequenze e macro"""
         # Configurazione griglia per il tab
@@ -626,7 +927,6 @@ class MouseClickerApp:
         mode_frame = ttk.LabelFrame(parent, text="Modalità di Esecuzione", padding="10")
         mode_frame.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
         
-        self.execution_mode = tk.StringVar(value="single")
         ttk.Radiobutton(mode_frame, text="Click Singoli", variable=self.execution_mode, 
                        value="single", command=self.toggle_execution_mode).grid(row=0, column=0, sticky=tk.W, padx=(0, 20))
         ttk.Radiobutton(mode_frame, text="Sequenza Personalizzata", variable=self.execution_mode, 
@@ -644,8 +944,14 @@ class MouseClickerApp:
                                               command=self.clear_sequence)
         self.clear_sequence_button.grid(row=0, column=1, padx=(0, 10))
         
+        ttk.Checkbutton(record_frame, text="Tutto lo schermo (X11 RECORD)",
+                       variable=self.global_recording).grid(row=0, column=2, sticky=tk.W)
+        ttk.Checkbutton(record_frame, text="Registra movimenti",
+                       variable=self.record_motion).grid(row=0, column=3, sticky=tk.W, padx=(10, 0))
+        # Segue spostamenti e ridimensionamenti della finestra durante la registrazione globale
+        self.root.bind('<Configure>', self.update_recording_ignore_rect, add='+')
+        
         # Stato registrazione
-        self.recording_status = tk.StringVar(value="Pronto per registrare")
         ttk.Label(record_frame, textvariable=self.recording_status, 
                  font=('Arial', 9, 'italic')).grid(row=1, column=0, columnspan=2, pady=(5, 0))
         
@@ -670,10 +976,14 @@ class MouseClickerApp:
         
         ttk.Button(seq_buttons_frame, text="➕ Aggiungi Click Manuale", 
                   command=self.add_manual_click).grid(row=0, column=0, padx=(0, 5))
+        ttk.Button(seq_buttons_frame, text="🖼️ Aggiungi Click su Immagine", 
+                  command=self.add_image_click).grid(row=0, column=1, padx=(0, 5))
+        ttk.Button(seq_buttons_frame, text="⏳ Aggiungi Attesa Colore", 
+                  command=self.add_color_wait).grid(row=0, column=2, padx=(0, 5))
         ttk.Button(seq_buttons_frame, text="✏️ Modifica Selezionato", 
-                  command=self.edit_selected_click).grid(row=0, column=1, padx=(0, 5))
+                  command=self.edit_selected_click).grid(row=0, column=3, padx=(0, 5))
         ttk.Button(seq_buttons_frame, text="🗑️ Rimuovi Selezionato", 
-                  command=self.remove_selected_click).grid(row=0, column=2)
+                  command=self.remove_selected_click).grid(row=0, column=4)
         
         # Frame opzioni sequenza
         seq_options_frame = ttk.LabelFrame(parent, text="Opzioni Sequenza", padding="10")
@@ -681,21 +991,28 @@ class MouseClickerApp:
         
         # Ripetizioni sequenza
         ttk.Label(seq_options_frame, text="Ripetizioni sequenza:").grid(row=0, column=0, sticky=tk.W, padx=(0, 5))
-        self.sequence_repeats = tk.StringVar(value="1")
         ttk.Spinbox(seq_options_frame, from_=1, to=9999, increment=1, 
                    textvariable=self.sequence_repeats, width=10).grid(row=0, column=1, sticky=tk.W, padx=(0, 20))
         
         # Pausa tra ripetizioni
         ttk.Label(seq_options_frame, text="Pausa tra ripetizioni (s):").grid(row=0, column=2, sticky=tk.W, padx=(0, 5))
-        self.sequence_pause = tk.StringVar(value="1.0")
         ttk.Spinbox(seq_options_frame, from_=0.1, to=60, increment=0.1, 
                    textvariable=self.sequence_pause, width=10).grid(row=0, column=3, sticky=tk.W)
         
         # Sequenza infinita
-        self.infinite_sequence = tk.BooleanVar(value=False)
         ttk.Checkbutton(seq_options_frame, text="Ripeti sequenza infinitamente", 
                        variable=self.infinite_sequence, 
                        command=self.toggle_infinite_sequence).grid(row=1, column=0, columnspan=4, sticky=tk.W, pady=(10, 0))
+        
+        # Mostra la sequenza eventualmente già caricata da un profilo
+        self.update_sequence_display()
+    
+    def on_tab_changed(self, event=None):
+        """Costruisce il tab selezionato alla prima apertura (il tab Profili legge qui la cartella)"""
+        builder = self.lazy_tabs.pop(self.notebook.select(), None)
+        if builder is not None:
+            setup_tab, frame = builder
+            setup_tab(frame)
     
     def setup_profiles_tab(self, parent):
         """Configura il tab per i profili"""
@@ -708,7 +1025,6 @@ class MouseClickerApp:
         current_profile_frame = ttk.LabelFrame(parent, text="Profilo Corrente", padding="10")
         current_profile_frame.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
         
-        self.current_profile_var = tk.StringVar(value="Nessun profilo caricato")
         ttk.Label(current_profile_frame, textvariable=self.current_profile_var, 
                  font=('Arial', 10, 'bold')).grid(row=0, column=0, sticky=tk.W)
         
@@ -743,9 +1059,18 @@ class MouseClickerApp:
         profiles_scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
         self.profiles_listbox.configure(yscrollcommand=profiles_scrollbar.set)
         
+        # Avanzamento della lettura profili (visibile solo durante la scansione)
+        scan_frame = ttk.Frame(available_profiles_frame)
+        scan_frame.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(5, 0))
+        scan_frame.columnconfigure(1, weight=1)
+        ttk.Label(scan_frame, textvariable=self.profile_scan_status).grid(row=0, column=0, sticky=tk.W, padx=(0, 10))
+        self.profile_progress = ttk.Progressbar(scan_frame, mode='determinate')
+        self.profile_progress.grid(row=0, column=1, sticky=(tk.W, tk.E))
+        self.profile_progress.grid_remove()
+        
         # Pulsanti gestione profili
         profile_buttons_frame = ttk.Frame(available_profiles_frame)
-        profile_buttons_frame.grid(row=1, column=0, columnspan=2, pady=(10, 0))
+        profile_buttons_frame.grid(row=2, column=0, columnspan=2, pady=(10, 0))
         
         ttk.Button(profile_buttons_frame, text="🔄 Aggiorna Lista", 
                   command=self.refresh_profiles_list).grid(row=0, column=0, padx=(0, 10))
@@ -767,6 +1092,9 @@ class MouseClickerApp:
         
         # Carica lista profili iniziale
         self.refresh_profiles_list()
+        
+        # Profili aggiunti, modificati o eliminati da fuori aggiornano la loro riga
+        self.start_profile_watcher()
     
     def toggle_click_count(self):
         """Abilita/disabilita il campo numero massimo click"""
@@ -777,6 +1105,9 @@ class MouseClickerApp:
     
     def toggle_position_mode(self):
         """Abilita/disabilita i campi per coordinate fisse"""
+        if self.x_spinbox is None:
+            return  # Tab non ancora costruito: lo stato viene applicato alla prima apertura
+        
         if self.use_current_position.get():
             self.x_spinbox.config(state='disabled')
             self.y_spinbox.config(state='disabled')
@@ -789,6 +1120,7 @@ class MouseClickerApp:
     def capture_current_position(self):
         """Cattura la posizione corrente del mouse"""
         try:
+            import pyautogui
             current_pos = pyautogui.position()
             self.fixed_x.set(str(current_pos.x))
             self.fixed_y.set(str(current_pos.y))
@@ -796,9 +1128,26 @@ class MouseClickerApp:
         except Exception as e:
             self.log_message(f"Errore nel catturare la posizione: {str(e)}")
     
+    def ask_template_image(self, title):
+        """Chiede il file di un'immagine di riferimento; restituisce il percorso o None"""
+        filename = filedialog.askopenfilename(
+            title=title,
+            filetypes=[("Immagini", "*.png *.jpg *.jpeg *.bmp"), ("Tutti i file", "*.*")]
+        )
+        return filename or None
+    
+    def choose_target_image(self):
+        """Imposta l'immagine bersaglio dei click singoli"""
+        filename = self.ask_template_image("Immagine da cliccare")
+        if filename:
+            self.target_image.set(filename)
+            self.log_message(f"Immagine bersaglio: {filename}")
+    
     def reset_counter(self):
         """Resetta il contatore dei click"""
         self.click_count = 0
+        if self.click_engine is not None:
+            self.click_engine.click_count = 0
         self.click_counter_var.set("Click eseguiti: 0")
         self.log_message("Contatore click resettato")
     
@@ -891,14 +1240,23 @@ class MouseClickerApp:
         if not self.validate_configuration():
             return
         
+        # Istantanea immutabile: il thread di click non legge più le variabili Tk
+        try:
+            config = RunConfig.from_profile(self.get_current_config())
+        except ValueError as e:
+            messagebox.showerror("Errore", f"Configurazione non valida: {str(e)}")
+            return
+        
         # Resetta il contatore se necessario
-        if not self.infinite_clicks.get():
+        if config.max_clicks is not None:
             self.click_count = 0
             self.click_counter_var.set("Click eseguiti: 0")
         
-        self.is_running = True
+        self.run_control.start()
+        self.metrics.start_run(self.run_control)
         self.start_button.config(state='disabled')
         self.stop_button.config(state='normal')
+        self.pause_button.config(state='normal', text=self.pause_button_text)
         self.status_var.set("In esecuzione...")
         
         # Minimizza finestra se richiesto
@@ -907,346 +1265,187 @@ class MouseClickerApp:
         
         # Avvia thread per i click
         self.click_thread = threading.Thread(target=self.click_loop_advanced,
+                                            args=(config,),
                                             daemon=True)
         self.click_thread.start()
         
-        min_val = float(self.min_interval.get())
-        max_val = float(self.max_interval.get())
-        click_type = self.click_type.get()
-        max_clicks = "∞" if self.infinite_clicks.get() else self.max_clicks.get()
+        max_clicks = "∞" if config.max_clicks is None else config.max_clicks
         
         self.log_message(f"Click automatici avviati:")
-        self.log_message(f"  • Intervallo: {min_val}-{max_val}s")
-        self.log_message(f"  • Tipo: {click_type.upper()}")
+        self.log_message(f"  • Intervallo: {config.min_interval}-{config.max_interval}s")
+        self.log_message(f"  • Tipo: {config.click_type.upper()}")
         self.log_message(f"  • Numero massimo: {max_clicks}")
-        self.log_message(f"  • Doppio click: {'Sì' if self.double_click.get() else 'No'}")
+        self.log_message(f"  • Doppio click: {'Sì' if config.double_click else 'No'}")
+        self.log_message(f"  • Backend: {config.click_backend}")
         
         # Suono di avvio
         self.play_notification_sound()
     
     def stop_clicking(self):
         """Ferma il ciclo di click automatici"""
-        self.is_running = False
+        self.run_control.stop()
         self.start_button.config(state='normal')
         self.stop_button.config(state='disabled')
-        self.status_var.set("Fermato")
+        self.pause_button.config(state='disabled', text=self.pause_button_text)
+        # Tramite la pipeline, così sostituisce eventuali stati ancora in coda
+        self.ui_updates.set_status("Fermato")
         
         # Ripristina finestra se era minimizzata
         if self.root.state() == 'iconic':
             self.root.deiconify()
         
         self.log_message("Click automatici fermati")
+        self.log_message(f"Aggiornamenti UI: {self.ui_updates.messages} messaggi in "
+                         f"{self.ui_updates.log_updates} aggiornamenti del log "
+                         f"({self.ui_updates.coalesced_messages} accorpati, "
+                         f"{self.ui_updates.coalesced_counters} aggiornamenti contatore saltati)")
         
         # Suono di stop
         self.play_notification_sound()
     
-    def click_loop_advanced(self):
-        """Loop principale avanzato per i click automatici"""
+    def update_stats_panel(self):
+        """Aggiorna il pannello statistiche (thread principale, ogni 500 ms)"""
         try:
-            # Ottieni configurazione
-            initial_delay = float(self.initial_delay.get())
-            
-            # Ritardo iniziale
-            if initial_delay > 0:
-                self.log_message(f"Ritardo iniziale di {initial_delay} secondi...")
-                start_delay = time.time()
-                while time.time() - start_delay < initial_delay and self.is_running:
-                    remaining = initial_delay - (time.time() - start_delay)
-                    self.root.after(0, lambda: self.status_var.set(f"Avvio tra {remaining:.1f}s..."))
-                    time.sleep(0.1)
-                
-                if not self.is_running:
-                    return
-                
-                self.root.after(0, lambda: self.status_var.set("In esecuzione..."))
-            
-            # Esegui modalità appropriata
-            if self.sequence_mode and self.current_sequence:
-                self.execute_sequence()
-            else:
-                self.execute_single_clicks()
-                    
-        except Exception as e:
-            self.log_message(f"[ERRORE] Errore nel loop di click: {str(e)}")
-            self.root.after(0, self.stop_clicking)
-    
-    def execute_single_clicks(self):
-        """Esegue click singoli tradizionali con controlli di sicurezza"""
-        try:
-            min_interval = float(self.min_interval.get())
-            max_interval = float(self.max_interval.get())
-            max_clicks = None if self.infinite_clicks.get() else int(self.max_clicks.get())
-            
-            # Validazione parametri
-            if min_interval < 0 or max_interval < 0 or min_interval > max_interval:
-                self.log_message("[ERRORE] Intervalli non validi")
-                self.root.after(0, self.stop_clicking)
-                return
-            
-            if max_clicks is not None and max_clicks <= 0:
-                self.log_message("[ERRORE] Numero massimo click non valido")
-                self.root.after(0, self.stop_clicking)
-                return
-            
-            consecutive_errors = 0
-            max_consecutive_errors = 5
-            
-            while self.is_running:
-                # Controlla se abbiamo raggiunto il numero massimo
-                if max_clicks is not None and self.click_count >= max_clicks:
-                    self.log_message(f"Raggiunto numero massimo di click ({max_clicks})")
-                    self.root.after(0, self.stop_clicking)
-                    break
-                
-                # Controlla errori consecutivi
-                if consecutive_errors >= max_consecutive_errors:
-                    self.log_message(f"[ERRORE] Troppi errori consecutivi ({consecutive_errors}), fermando")
-                    self.root.after(0, self.stop_clicking)
-                    break
-                
-                # Genera intervallo casuale
-                wait_time = random.uniform(min_interval, max_interval)
-                
-                # Attendi (controllando se dobbiamo fermarci)
-                start_wait = time.time()
-                while time.time() - start_wait < wait_time and self.is_running:
-                    time.sleep(0.1)
-                
-                if not self.is_running:
-                    break
-                
-                # Determina posizione del click con validazione
-                try:
-                    if self.use_current_position.get():
-                        click_pos = pyautogui.position()
-                    else:
-                        fixed_x = int(self.fixed_x.get())
-                        fixed_y = int(self.fixed_y.get())
-                        
-                        # Validazione coordinate fisse
-                        if fixed_x < 0 or fixed_y < 0 or fixed_x > 32767 or fixed_y > 32767:
-                            self.log_message(f"[ERRORE] Coordinate fisse non valide: ({fixed_x}, {fixed_y})")
-                            consecutive_errors += 1
-                            continue
-                        
-                        click_pos = (fixed_x, fixed_y)
-                    
-                    # Verifica che le coordinate siano valide
-                    if click_pos[0] < 0 or click_pos[1] < 0:
-                        self.log_message(f"[ERRORE] Coordinate negative: {click_pos}")
-                        consecutive_errors += 1
-                        continue
-                        
-                except (ValueError, TypeError) as e:
-                    self.log_message(f"[ERRORE] Errore nelle coordinate: {str(e)}")
-                    consecutive_errors += 1
-                    continue
-                
-                # Esegui click
-                try:
-                    if self.double_click.get():
-                        pyautogui.doubleClick(x=click_pos[0], y=click_pos[1], 
-                                            button=self.click_type.get())
-                        click_description = "Doppio click"
-                    else:
-                        pyautogui.click(x=click_pos[0], y=click_pos[1], 
-                                      button=self.click_type.get())
-                        click_description = "Click"
-                    
-                    # Reset contatore errori se il click è riuscito
-                    consecutive_errors = 0
-                    
-                    # Aggiorna contatore
-                    self.click_count += 1
-                    self.root.after(0, lambda: self.click_counter_var.set(f"Click eseguiti: {self.click_count}"))
-                    
-                    # Log del click
-                    timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-                    button_name = self.click_type.get().upper()
-                    remaining_text = ""
-                    if max_clicks is not None:
-                        remaining = max_clicks - self.click_count
-                        remaining_text = f" (rimangono: {remaining})"
-                    
-                    log_msg = (f"[{timestamp}] {click_description} {button_name} in ({click_pos[0]}, {click_pos[1]}) "
-                              f"- Attesa: {wait_time:.1f}s{remaining_text}")
-                    self.log_message(log_msg)
-                    
-                except pyautogui.FailSafeException:
-                    self.log_message("[EMERGENZA] Click fermati - mouse nell'angolo")
-                    self.root.after(0, self.stop_clicking)
-                    break
-                except Exception as e:
-                    consecutive_errors += 1
-                    self.log_message(f"[ERRORE] Errore durante il click: {str(e)}")
-                    
-                    # Pausa breve dopo un errore
-                    if self.is_running:
-                        time.sleep(0.5)
-                        
-        except Exception as e:
-            self.log_message(f"[ERRORE CRITICO] Errore nel metodo execute_single_clicks: {str(e)}")
-            self.root.after(0, self.stop_clicking)
-    
-    def execute_sequence(self):
-        """Esegue una sequenza di click personalizzata con controlli di sicurezza"""
-        try:
-            if not self.current_sequence:
-                self.log_message("Nessuna sequenza definita")
-                return
-            
-            # Validazione parametri
-            try:
-                max_repeats = int(self.sequence_repeats.get()) if not self.infinite_sequence.get() else float('inf')
-                sequence_pause = float(self.sequence_pause.get())
-                
-                if max_repeats <= 0 and not self.infinite_sequence.get():
-                    self.log_message("[ERRORE] Numero di ripetizioni non valido")
-                    self.root.after(0, self.stop_clicking)
-                    return
-                    
-                if sequence_pause < 0:
-                    self.log_message("[ERRORE] Pausa sequenza non valida")
-                    self.root.after(0, self.stop_clicking)
-                    return
-            except (ValueError, TypeError) as e:
-                self.log_message(f"[ERRORE] Parametri sequenza non validi: {str(e)}")
-                self.root.after(0, self.stop_clicking)
-                return
-            
-            sequence_count = 0
-            consecutive_errors = 0
-            max_consecutive_errors = 5
-            
-            self.log_message(f"Iniziando sequenza con {len(self.current_sequence)} click")
-            
-            while self.is_running and sequence_count < max_repeats:
-                # Controlla errori consecutivi
-                if consecutive_errors >= max_consecutive_errors:
-                    self.log_message(f"[ERRORE] Troppi errori consecutivi ({consecutive_errors}), fermando")
-                    self.root.after(0, self.stop_clicking)
-                    break
-                    
-                sequence_count += 1
-                self.log_message(f"Esecuzione sequenza #{sequence_count}")
-                
-                for i, click_data in enumerate(self.current_sequence):
-                    if not self.is_running:
-                        break
-                    
-                    try:
-                        # Estrai e valida dati del click
-                        if not isinstance(click_data, dict):
-                            self.log_message(f"[ERRORE] Dati click {i+1} non validi")
-                            consecutive_errors += 1
-                            continue
-                            
-                        # Estrai dati con validazione
-                        try:
-                            x = int(click_data.get('x', 0))
-                            y = int(click_data.get('y', 0))
-                            button = click_data.get('button', 'left')
-                            is_double = bool(click_data.get('double', False))
-                            delay = float(click_data.get('delay', 1.0))
-                            
-                            # Validazione coordinate
-                            if x < 0 or y < 0 or x > 32767 or y > 32767:
-                                self.log_message(f"[ERRORE] Coordinate non valide nel click {i+1}: ({x}, {y})")
-                                consecutive_errors += 1
-                                continue
-                                
-                            # Validazione delay
-                            if delay < 0:
-                                delay = 0.1  # Correggi automaticamente
-                                self.log_message(f"[AVVISO] Delay negativo corretto nel click {i+1}")
-                                
-                            # Validazione button
-                            if button not in ['left', 'middle', 'right']:
-                                button = 'left'  # Correggi automaticamente
-                                self.log_message(f"[AVVISO] Tipo click non valido corretto nel click {i+1}")
-                                
-                        except (ValueError, TypeError) as e:
-                            self.log_message(f"[ERRORE] Dati click {i+1} non validi: {str(e)}")
-                            consecutive_errors += 1
-                            continue
-                        
-                        # Esegui il click
-                        if is_double:
-                            pyautogui.doubleClick(x, y, button=button)
-                            click_description = "Doppio click"
-                        else:
-                            pyautogui.click(x, y, button=button)
-                            click_description = "Click"
-                        
-                        # Reset contatore errori se il click è riuscito
-                        consecutive_errors = 0
-                        
-                        # Aggiorna contatore
-                        self.click_count += 1
-                        self.root.after(0, lambda count=sequence_count: 
-                                      self.click_counter_var.set(f"Click eseguiti: {self.click_count} (Seq: {count})"))
-                        
-                        # Log del click
-                        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-                        log_msg = f"[{timestamp}] Seq {sequence_count}.{i+1}: {click_description} {button.upper()} in ({x}, {y})"
-                        self.log_message(log_msg)
-                        
-                        # Pausa tra click nella sequenza
-                        if self.is_running and i < len(self.current_sequence) - 1:
-                            start_wait = time.time()
-                            while time.time() - start_wait < delay and self.is_running:
-                                time.sleep(0.1)
-                        
-                    except pyautogui.FailSafeException:
-                        self.log_message("[EMERGENZA] Click fermati - mouse nell'angolo")
-                        self.root.after(0, self.stop_clicking)
-                        return
-                    except Exception as e:
-                        consecutive_errors += 1
-                        self.log_message(f"[ERRORE] Errore durante il click {i+1} della sequenza: {str(e)}")
-                        
-                        # Pausa breve dopo un errore
-                        if self.is_running:
-                            time.sleep(0.5)
-                            continue
-                
-                # Pausa tra ripetizioni della sequenza
-                if self.is_running and sequence_count < max_repeats:
-                    self.log_message(f"Pausa di {sequence_pause}s prima della prossima sequenza")
-                    start_wait = time.time()
-                    while time.time() - start_wait < sequence_pause and self.is_running:
-                        time.sleep(0.1)
-            
-            self.log_message(f"Sequenza completata. Ripetizioni: {sequence_count}, Totale click: {self.click_count}")
-            
-            # Se abbiamo raggiunto il numero massimo di ripetizioni, ferma
-            if sequence_count >= max_repeats and not self.infinite_sequence.get():
-                self.root.after(0, self.stop_clicking)
-                
+            metrics = self.metrics
+            call = metrics.click_call_seconds
+            lateness = metrics.schedule_lateness_seconds
+            cps = metrics.clicks_per_second if self.is_running else 0.0
+            self.stats_var.set(
+                f"CPS: {cps:.1f} | "
+                f"Chiamata click p50/p99: {call.quantile(0.5) * 1000:.2f}/{call.quantile(0.99) * 1000:.2f}ms | "
+                f"Ritardo p50/p99: {lateness.quantile(0.5) * 1000:.2f}/{lateness.quantile(0.99) * 1000:.2f}ms | "
+                f"Coda UI: {self.ui_updates.queue_depth}")
+        finally:
+            self.root.after(500, self.update_stats_panel)
+    
+    def toggle_metrics_endpoint(self):
+        """Avvia o ferma l'endpoint HTTP locale delle metriche"""
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+            self.metrics_server = None
+            self.log_message("Endpoint metriche fermato")
+        
+        if self.metrics_endpoint.get():
+            try:
+                port = int(self.metrics_port.get())
+                self.metrics_server = MetricsServer(self.metrics, port=port).start()
+                self.log_message(f"Endpoint metriche attivo su http://127.0.0.1:{self.metrics_server.port}/metrics")
+            except (ValueError, OSError) as e:
+                self.metrics_endpoint.set(False)
+                self.log_message(f"[ERRORE] Impossibile avviare l'endpoint metriche: {str(e)}")
+    
+    def toggle_pause(self):
+        """Mette in pausa o riprende i click automatici"""
+        if not self.is_running:
+            return
+        
+        if self.run_control.is_paused:
+            self.run_control.resume()
+            self.pause_button.config(text=self.pause_button_text)
+            self.status_var.set("In esecuzione...")
+            self.log_message("Click automatici ripresi")
+        else:
+            self.run_control.pause()
+            self.pause_button.config(text=self.resume_button_text)
+            self.status_var.set("In pausa")
+            self.log_message("Click automatici in pausa")
+    
+    def click_loop_advanced(self, config):
+        """Loop principale avanzato per i click automatici"""
+        engine = None
+        try:
+            # Crea il backend di click selezionato
+            self.click_backend = create_backend_with_fallback(config.click_backend, log=self.log_message)
+            
+            # Log strutturato su file, scritto da un thread in background
+            if config.file_log:
+                self.run_log = RunLogWriter(compress=config.file_log_compress).start()
+                self.run_log.write({'ts': time.time(), 'event': 'start',
+                                    'mode': 'sequence' if config.sequence_mode else 'single',
+                                    'backend': config.click_backend})
+            
+            # Il motore non conosce Tk: messaggi e stato passano dalla pipeline UI
+            engine = ClickEngine(config, self.run_control, self.click_backend,
+                                 listener=AppEngineListener(self), metrics=self.metrics,
+                                 run_log=self.run_log, click_count=self.click_count)
+            self.click_engine = engine
+            engine.run()
+                    
         except Exception as e:
-            self.log_message(f"[ERRORE CRITICO] Errore nel metodo execute_sequence: {str(e)}")
-            self.root.after(0, self.stop_clicking)
+            self.log_message(f"[ERRORE] Errore nel loop di click: {str(e)}")
+            self.ui_updates.post_call(self.stop_clicking)
+        finally:
+            if engine is not None:
+                self.click_count = engine.click_count
+                self.click_engine = None
+            config.sequence.close()
+            if self.click_backend is not None:
+                self.click_backend.close()
+                self.click_backend = None
+            if self.run_log is not None:
+                self.run_log.write({'ts': time.time(), 'event': 'stop', 'clicks': self.click_count})
+                self.run_log.close()
+                self.log_message(f"Log su file: {self.run_log.records_written} record in "
+                                 f"{self.run_log.batches_written} blocchi ({self.run_log.path})")
+                self.run_log = None
+            self.run_control.mark_halted()
+            if self.run_control.stop_latency is not None:
+                self.log_message(f"Thread di click fermato {self.run_control.stop_latency * 1000:.3f}ms dopo lo stop")
     
     def log_message(self, message):
-        """Aggiunge un messaggio al log"""
-        def update_log():
-            self.log_text.config(state='normal')
-            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            self.log_text.insert(tk.END, f"[{timestamp}] {message}\n")
-            self.log_text.see(tk.END)
-            self.log_text.config(state='disabled')
-        
-        # Esegui aggiornamento nel thread principale
-        if threading.current_thread() == threading.main_thread():
-            update_log()
-        else:
-            self.root.after(0, update_log)
+        """Aggiunge un messaggio al log (sicuro da qualsiasi thread)"""
+        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.ui_updates.post_log(f"[{timestamp}] {message}\n")
+    
+    def get_log_max_lines(self):
+        """Limite di righe del widget di log (valore di default se non valido)"""
+        try:
+            return max(100, int(self.log_max_lines.get()))
+        except (ValueError, TypeError, AttributeError):
+            return 1000
+    
+    def _apply_log_lines(self, lines):
+        """Inserisce un blocco di righe nel log con un solo aggiornamento del widget"""
+        self.log_history.extend(lines)
+        
+        # Nel widget vanno al massimo max_lines righe anche se il blocco è più grande
+        max_lines = self.get_log_max_lines()
+        if len(lines) > max_lines:
+            lines = lines[-max_lines:]
+        
+        text = "".join(lines)
+        self.log_text.config(state='normal')
+        self.log_text.insert(tk.END, text)
+        self.log_widget_lines += text.count("\n")
+        
+        # Taglia le righe in testa: un solo delete, senza contare le righe del widget
+        excess = self.log_widget_lines - max_lines
+        if excess > 0:
+            self.log_text.delete('1.0', f'{excess + 1}.0')
+            self.log_widget_lines -= excess
+        
+        self.log_text.see(tk.END)
+        self.log_text.config(state='disabled')
+    
+    def show_log_history(self):
+        """Apre la cronologia completa del log sfogliabile a pagine"""
+        LogHistoryDialog(self.root, self.log_history)
+    
+    def _apply_click_counter(self, text):
+        """Aggiorna il contatore click (thread principale)"""
+        self.click_counter_var.set(text)
+    
+    def _apply_status(self, text):
+        """Aggiorna la barra di stato (thread principale)"""
+        self.status_var.set(text)
     
     def clear_log(self):
         """Pulisce il log"""
         self.log_text.config(state='normal')
         self.log_text.delete(1.0, tk.END)
         self.log_text.config(state='disabled')
+        self.log_widget_lines = 0
+        self.log_history.clear()
         self.log_message("Log pulito")
     
     # === METODI PER SEQUENZE E MACRO ===
@@ -1275,11 +1474,33 @@ class MouseClickerApp:
             if self.is_recording:
                 self.stop_recording()
             
+            # Gli step vanno direttamente su file: nessun limite di lunghezza
+            # I movimenti vengono compressi con NumPy: senza, si registrano solo i click
+            record_motion = self.record_motion.get()
+            if record_motion and not motion_available():
+                record_motion = False
+                self.log_message("[AVVISO] NumPy non installato: movimenti non registrati")
+            
+            self.recorder = self.create_recording_file()
+            self.recording_timeline = ClickTimeline(self.recorder, on_click=self._on_click_recorded,
+                                                    record_motion=record_motion)
             self.is_recording = True
-            self.recorded_sequence = []
             self.record_button.config(text="⏹️ Ferma Registrazione")
             self.recording_status.set("🔴 REGISTRAZIONE IN CORSO - Clicca per registrare")
             
+            # Registrazione globale: i click sulla finestra dell'app vengono ignorati
+            if self.global_recording.get():
+                try:
+                    self.global_recorder = GlobalClickRecorder(self.recording_timeline)
+                    self.update_recording_ignore_rect()
+                    self.global_recorder.start()
+                    self.log_message(f"Registrazione globale iniziata ({self.recorder.path})")
+                    return
+                except RecorderError as e:
+                    self.global_recorder = None
+                    self.log_message(f"[AVVISO] Registrazione globale non disponibile ({e}), "
+                                     "registro i click sulla finestra")
+            
             # Rimuovi eventuali bind precedenti
             try:
                 self.root.unbind('<Button-1>')
@@ -1293,7 +1514,11 @@ class MouseClickerApp:
             self.root.bind('<Button-2>', self.record_click)
             self.root.bind('<Button-3>', self.record_click)
             
-            self.log_message("Registrazione macro iniziata")
+            # Senza RECORD la posizione del puntatore viene campionata dal loop Tk
+            if record_motion:
+                self.sample_pointer()
+            
+            self.log_message(f"Registrazione macro iniziata ({self.recorder.path})")
             
         except Exception as e:
             self.log_message(f"Errore nell'avviare la registrazione: {str(e)}")
@@ -1301,6 +1526,47 @@ class MouseClickerApp:
             self.record_button.config(text="🔴 Inizia Registrazione")
             self.recording_status.set("Errore nella registrazione")
     
+    def update_recording_ignore_rect(self, event=None):
+        """Area della finestra dell'app, esclusa dalla registrazione globale"""
+        if self.global_recorder is None or self.recording_timeline is None:
+            return
+        x, y = self.root.winfo_rootx(), self.root.winfo_rooty()
+        self.recording_timeline.ignore_rect = (x, y, x + self.root.winfo_width(), y + self.root.winfo_height())
+    
+    def sample_pointer(self):
+        """Campiona la posizione del puntatore ogni MOTION_SAMPLE_MS durante la registrazione"""
+        self.motion_sample_id = None
+        timeline = self.recording_timeline
+        if not self.is_recording or timeline is None:
+            return
+        x, y = self.root.winfo_pointerxy()
+        timeline.motion(x, y, self.recording_time_ms())
+        self.motion_sample_id = self.root.after(self.MOTION_SAMPLE_MS, self.sample_pointer)
+    
+    @staticmethod
+    def recording_time_ms():
+        """Istante in ms per click e movimenti registrati dalla finestra (stesso orologio per entrambi)"""
+        return int(time.monotonic() * 1000) & ClickTimeline.TIME_MASK
+    
+    def _on_click_recorded(self, count, button, x, y):
+        """Click registrato (anche dal thread della registrazione globale)"""
+        self.log_message(f"Click registrato: {button.upper()} in ({x}, {y})")
+        self.ui_updates.post_call(
+            lambda: self.recording_status.set(f"🔴 REGISTRAZIONE - {count} click registrati"))
+    
+    def create_recording_file(self):
+        """Nuovo file .seq per una registrazione, nella sottocartella recordings dei profili"""
+        recordings_dir = os.path.join(self.profiles_dir, "recordings")
+        os.makedirs(recordings_dir, exist_ok=True)
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        base_path = os.path.join(recordings_dir, f"registrazione_{timestamp}")
+        path = f"{base_path}.seq"
+        suffix = 1
+        while os.path.exists(path):  # Mai sovrascrivere una registrazione precedente
+            path = f"{base_path}_{suffix}.seq"
+            suffix += 1
+        return SequenceFileWriter(path)
+    
     def stop_recording(self):
         """Ferma la registrazione macro"""
         try:
@@ -1321,14 +1587,33 @@ class MouseClickerApp:
             except:
                 pass
             
+            if self.motion_sample_id is not None:
+                self.root.after_cancel(self.motion_sample_id)
+                self.motion_sample_id = None
+            
+            # Il thread della registrazione globale termina prima della chiusura del file
+            if self.global_recorder is not None:
+                self.global_recorder.stop()
+                self.global_recorder = None
+            
             # Aggiorna status e sequenza
-            num_clicks = len(self.recorded_sequence) if hasattr(self, 'recorded_sequence') else 0
+            recorder = self.recorder
+            self.recorder = None
+            self.recording_timeline = None
+            num_clicks = len(recorder) if recorder is not None else 0
             self.recording_status.set(f"Registrazione completata - {num_clicks} click registrati")
             
-            # Copia sequenza registrata in quella corrente
-            if hasattr(self, 'recorded_sequence') and self.recorded_sequence:
-                self.current_sequence = self.recorded_sequence.copy()
-                self.update_sequence_display()
+            # Il file registrato diventa la sequenza corrente: l'esecuzione lo mappa senza copie
+            if recorder is not None:
+                recorder.close()
+                if num_clicks:
+                    self.current_sequence = []
+                    self.sequence_file = recorder.path
+                    self.update_sequence_display()
+                else:
+                    os.remove(recorder.path)
+                    if os.path.exists(paths_file_path(recorder.path)):
+                        os.remove(paths_file_path(recorder.path))
             
             self.log_message(f"Registrazione completata: {num_clicks} click")
             
@@ -1349,10 +1634,6 @@ class MouseClickerApp:
                 self.log_message("Evento click non valido ignorato")
                 return
             
-            # Determina tipo di click
-            button_map = {1: 'left', 2: 'middle', 3: 'right'}
-            button = button_map.get(event.num, 'left')
-            
             # Ottieni posizione assoluta del mouse con validazione
             x, y = None, None
             try:
@@ -1378,27 +1659,9 @@ class MouseClickerApp:
                     self.log_message(f"Impossibile ottenere posizione mouse: {pos_error}")
                     return
             
-            # Verifica che la sequenza non diventi troppo lunga
-            if len(self.recorded_sequence) >= 1000:  # Limite di sicurezza
-                self.log_message("Limite massimo sequenza raggiunto (1000 click)")
-                self.stop_recording()
-                return
-            
-            # Aggiungi alla sequenza
-            click_data = {
-                'x': int(x),
-                'y': int(y),
-                'button': button,
-                'double': False,
-                'delay': 1.0  # Delay di default
-            }
-            
-            self.recorded_sequence.append(click_data)
-            self.log_message(f"Click registrato: {button.upper()} in ({x}, {y})")
-            
-            # Aggiorna il contatore nella status
-            num_clicks = len(self.recorded_sequence)
-            self.recording_status.set(f"🔴 REGISTRAZIONE - {num_clicks} click registrati")
+            # Aggiungi alla sequenza (scritta subito su file): la pausa dello step
+            # precedente è l'intervallo reale tra i click (e i movimenti campionati)
+            self.recording_timeline.button_press(event.num, int(x), int(y), self.recording_time_ms())
             
         except Exception as e:
             self.log_message(f"Errore durante registrazione click: {str(e)}")
@@ -1407,33 +1670,110 @@ class MouseClickerApp:
     def clear_sequence(self):
         """Cancella la sequenza corrente"""
         self.current_sequence = []
-        self.recorded_sequence = []
+        self.sequence_file = None
         self.update_sequence_display()
         self.recording_status.set("Sequenza cancellata")
         self.log_message("Sequenza cancellata")
     
     def update_sequence_display(self):
         """Aggiorna la visualizzazione della sequenza"""
+        if self.sequence_listbox is None:
+            return  # Tab non ancora costruito: la lista viene riempita alla prima apertura
+        
         self.sequence_listbox.delete(0, tk.END)
         
+        # La sequenza binaria non viene elencata: può avere milioni di step
+        if self.sequence_file:
+            try:
+                steps_text = f"{read_step_count(self.sequence_file)} click"
+            except (OSError, ValueError) as e:
+                steps_text = f"non leggibile: {e}"
+            self.sequence_listbox.insert(tk.END, f"Sequenza binaria {os.path.basename(self.sequence_file)} ({steps_text})")
+            return
+        
         for i, click in enumerate(self.current_sequence):
+            if click.get('type') == 'path':
+                points = click['points']
+                self.sequence_listbox.insert(
+                    tk.END, f"{i+1}. Movimento ({len(points)} punti, {points[-1][2] / 1000:.2f}s) "
+                            f"fino a ({click['x']}, {click['y']}) - Pausa: {click.get('delay', 0.0)}s")
+                continue
+            if click.get('type') == 'image':
+                double_text = " (DOPPIO)" if click.get('double', False) else ""
+                self.sequence_listbox.insert(
+                    tk.END, f"{i+1}. Click {click['button'].upper()} su immagine {os.path.basename(click['template'])} "
+                            f"(soglia {click['threshold']:.2f}){double_text} - Pausa: {click.get('delay', 1.0)}s")
+                continue
+            if click.get('type') == 'wait':
+                self.sequence_listbox.insert(
+                    tk.END, f"{i+1}. Attendi colore {click['color']} in ({click['x']}, {click['y']}) "
+                            f"(±{click['tolerance']}, max {click['timeout']}s) - Pausa: {click.get('delay', 0.0)}s")
+                continue
             button_text = click['button'].upper()
             double_text = " (DOPPIO)" if click.get('double', False) else ""
             delay_text = f" - Pausa: {click.get('delay', 1.0)}s"
             
-            display_text = f"{i+1}. Click {button_text} in ({click['x']}, {click['y']}){double_text}{delay_text}"
+            window = click.get('window')
+            window_text = f" nella finestra {window.get('class') or window.get('title')}" if window else ""
+            display_text = f"{i+1}. Click {button_text} in ({click['x']}, {click['y']}){window_text}{double_text}{delay_text}"
             self.sequence_listbox.insert(tk.END, display_text)
     
+    def check_sequence_editable(self):
+        """La sequenza binaria non si modifica step per step: va prima cancellata"""
+        if self.sequence_file:
+            messagebox.showinfo("Sequenza binaria",
+                                "La sequenza è in un file binario e non è modificabile qui.\n"
+                                "Cancella la sequenza per crearne una nuova.")
+            return False
+        return True
+    
     def add_manual_click(self):
         """Aggiunge un click manuale alla sequenza"""
+        if not self.check_sequence_editable():
+            return
         dialog = ClickDialog(self.root, "Aggiungi Click")
         if dialog.result:
             self.current_sequence.append(dialog.result)
             self.update_sequence_display()
             self.log_message(f"Click manuale aggiunto: {dialog.result['button'].upper()} in ({dialog.result['x']}, {dialog.result['y']})")
     
+    def add_image_click(self):
+        """Aggiunge alla sequenza un click sull'immagine scelta (posizione cercata all'esecuzione)"""
+        if not self.check_sequence_editable():
+            return
+        filename = self.ask_template_image("Immagine da cliccare nella sequenza")
+        if not filename:
+            return
+        self.current_sequence.append({'type': 'image', 'template': filename, 'threshold': 0.8,
+                                      'button': 'left', 'double': False, 'delay': 1.0})
+        self.update_sequence_display()
+        self.log_message(f"Click su immagine aggiunto: {os.path.basename(filename)}")
+    
+    def add_color_wait(self):
+        """Aggiunge un'attesa del colore che c'è sotto il mouse tra 3 secondi"""
+        if not self.check_sequence_editable():
+            return
+        self.log_message("Posiziona il mouse sul punto da attendere: il colore viene letto tra 3 secondi")
+        self.root.after(3000, self._capture_color_wait)
+    
+    def _capture_color_wait(self):
+        """Legge posizione e colore sotto il mouse e aggiunge lo step di attesa"""
+        try:
+            import pyautogui
+            x, y = self.root.winfo_pointerxy()
+            color = format_color(pyautogui.pixel(x, y)[:3])
+        except Exception as e:
+            messagebox.showerror("Errore", f"Impossibile leggere il colore sotto il mouse: {str(e)}")
+            return
+        self.current_sequence.append({'type': 'wait', 'x': x, 'y': y, 'color': color, 'tolerance': 16,
+                                      'timeout': 10.0, 'size': 1, 'delay': 0.0})
+        self.update_sequence_display()
+        self.log_message(f"Attesa colore aggiunta: {color} in ({x}, {y})")
+    
     def edit_selected_click(self):
         """Modifica il click selezionato"""
+        if not self.check_sequence_editable():
+            return
         selection = self.sequence_listbox.curselection()
         if not selection:
             messagebox.showwarning("Attenzione", "Seleziona un click da modificare")
@@ -1441,6 +1781,17 @@ class MouseClickerApp:
         
         index = selection[0]
         current_click = self.current_sequence[index]
+        if current_click.get('type') == 'path':
+            messagebox.showinfo("Movimento", "I movimenti registrati non sono modificabili: rimuovili e registrali di nuovo.")
+            return
+        if current_click.get('type') == 'image':
+            messagebox.showinfo("Click su immagine", "La posizione viene cercata all'esecuzione: "
+                                "rimuovi lo step e aggiungilo con un'altra immagine.")
+            return
+        if current_click.get('type') == 'wait':
+            messagebox.showinfo("Attesa colore", "Rimuovi lo step e aggiungilo di nuovo sul punto e "
+                                "sul colore da attendere (tolleranza e timeout si modificano nel profilo).")
+            return
         
         dialog = ClickDialog(self.root, "Modifica Click", current_click)
         if dialog.result:
@@ -1450,6 +1801,8 @@ class MouseClickerApp:
     
     def remove_selected_click(self):
         """Rimuove il click selezionato"""
+        if not self.check_sequence_editable():
+            return
         selection = self.sequence_listbox.curselection()
         if not selection:
             messagebox.showwarning("Attenzione", "Seleziona un click da rimuovere")
@@ -1458,7 +1811,14 @@ class MouseClickerApp:
         index = selection[0]
         removed_click = self.current_sequence.pop(index)
         self.update_sequence_display()
-        self.log_message(f"Click rimosso: {removed_click['button'].upper()} in ({removed_click['x']}, {removed_click['y']})")
+        if removed_click.get('type') == 'path':
+            self.log_message(f"Movimento rimosso: fino a ({removed_click['x']}, {removed_click['y']})")
+        elif removed_click.get('type') == 'image':
+            self.log_message(f"Click su immagine rimosso: {os.path.basename(removed_click['template'])}")
+        elif removed_click.get('type') == 'wait':
+            self.log_message(f"Attesa colore rimossa: {removed_click['color']} in ({removed_click['x']}, {removed_click['y']})")
+        else:
+            self.log_message(f"Click rimosso: {removed_click['button'].upper()} in ({removed_click['x']}, {removed_click['y']})")
     
     def toggle_infinite_sequence(self):
         """Abilita/disabilita sequenza infinita"""
@@ -1484,13 +1844,22 @@ class MouseClickerApp:
                 'use_current_position': self.use_current_position.get(),
                 'fixed_x': self.fixed_x.get(),
                 'fixed_y': self.fixed_y.get(),
+                'target_image': self.target_image.get(),
+                'target_threshold': self.target_threshold.get(),
+                'target_scales': self.target_scales.get(),
                 'initial_delay': self.initial_delay.get(),
                 'play_sound': self.play_sound.get(),
-                'minimize_on_start': self.minimize_on_start.get()
+                'minimize_on_start': self.minimize_on_start.get(),
+                'click_backend': self.click_backend_name.get(),
+                'file_log': self.file_log.get(),
+                'file_log_compress': self.file_log_compress.get(),
+                'capture_ttl_ms': self.capture_ttl_ms.get(),
+                'match_processes': self.match_processes.get()
             },
             'sequence_settings': {
                 'execution_mode': self.execution_mode.get(),
                 'current_sequence': self.current_sequence,
+                'sequence_file': self.sequence_file,
                 'sequence_repeats': self.sequence_repeats.get(),
                 'sequence_pause': self.sequence_pause.get(),
                 'infinite_sequence': self.infinite_sequence.get()
@@ -1572,6 +1941,22 @@ class MouseClickerApp:
             self.fixed_x.set(fixed_x)
             self.fixed_y.set(fixed_y)
             
+            # Immagine bersaglio (percorso già risolto da read_profile)
+            target_image = advanced.get('target_image', '')
+            self.target_image.set(target_image if isinstance(target_image, str) else '')
+            target_threshold = str(advanced.get('target_threshold', '0.8'))
+            try:
+                if not 0 < float(target_threshold) <= 1:
+                    target_threshold = '0.8'
+            except (ValueError, TypeError):
+                target_threshold = '0.8'
+            self.target_threshold.set(target_threshold)
+            try:
+                target_scales = format_scales(parse_scales(advanced.get('target_scales')))
+            except ValueError:
+                target_scales = '1'
+            self.target_scales.set(target_scales)
+            
             # Validazione delay iniziale
             initial_delay = str(advanced.get('initial_delay', '3'))
             try:
@@ -1585,6 +1970,30 @@ class MouseClickerApp:
             self.play_sound.set(bool(advanced.get('play_sound', False)))
             self.minimize_on_start.set(bool(advanced.get('minimize_on_start', False)))
             
+            # Validazione backend di click
+            click_backend = advanced.get('click_backend', 'pyautogui')
+            if click_backend not in BACKENDS:
+                click_backend = 'pyautogui'
+            self.click_backend_name.set(click_backend)
+            self.file_log.set(bool(advanced.get('file_log', False)))
+            self.file_log_compress.set(bool(advanced.get('file_log_compress', False)))
+            
+            capture_ttl_ms = str(advanced.get('capture_ttl_ms', '50'))
+            try:
+                if not 0 <= float(capture_ttl_ms) <= 1000:
+                    capture_ttl_ms = '50'
+            except (ValueError, TypeError):
+                capture_ttl_ms = '50'
+            self.capture_ttl_ms.set(capture_ttl_ms)
+            
+            match_processes = str(advanced.get('match_processes', '1'))
+            try:
+                if not 0 <= int(match_processes) <= 8:
+                    match_processes = '1'
+            except (ValueError, TypeError):
+                match_processes = '1'
+            self.match_processes.set(match_processes)
+            
             # Impostazioni sequenze con validazione
             sequence = config.get('sequence_settings', {})
             if not isinstance(sequence, dict):
@@ -1607,7 +2016,49 @@ class MouseClickerApp:
                 # Valida ogni click nella sequenza
                 validated_sequence = []
                 for i, click in enumerate(current_sequence):
-                    if isinstance(click, dict):
+                    if isinstance(click, dict) and click.get('type') == 'path':
+                        # Movimento registrato: stessa validazione dell'esecuzione
+                        try:
+                            path, delay = compile_path_step(i, click)
+                        except SequenceCompileError:
+                            continue
+                        x, y = path.end
+                        validated_sequence.append({'type': 'path', 'x': x, 'y': y,
+                                                   'points': path.to_list(), 'delay': delay})
+                    elif isinstance(click, dict) and click.get('type') == 'wait':
+                        # Attesa del colore: stessa validazione dell'esecuzione
+                        try:
+                            x, y, wait, delay = compile_wait_step(i, click)
+                            anchor = compile_window(i, click)
+                        except SequenceCompileError:
+                            continue
+                        step = {'type': 'wait', 'x': x, 'y': y, 'color': format_color(wait.color),
+                                'tolerance': wait.tolerance, 'timeout': wait.timeout,
+                                'size': wait.size, 'delay': delay}
+                        if anchor is not None:
+                            step['window'] = {'class': anchor.wm_class, 'title': anchor.title}
+                        validated_sequence.append(step)
+                    elif isinstance(click, dict) and click.get('type') == 'image':
+                        # Click su immagine: il file viene verificato all'avvio dell'esecuzione
+                        template = click.get('template')
+                        button = click.get('button', 'left')
+                        try:
+                            threshold = float(click.get('threshold', 0.8))
+                            delay = float(click.get('delay', 1.0))
+                        except (ValueError, TypeError):
+                            continue
+                        if (isinstance(template, str) and template and button in BUTTON_CODES
+                                and 0 < threshold <= 1 and 0 <= delay <= 3600):
+                            step = {'type': 'image', 'template': template,
+                                    'threshold': threshold, 'button': button,
+                                    'double': bool(click.get('double', False)), 'delay': delay}
+                            # Regione di ricerca: validata con il resto all'avvio
+                            if isinstance(click.get('region'), list):
+                                step['region'] = click['region']
+                            if isinstance(click.get('scales'), list):
+                                step['scales'] = click['scales']
+                            validated_sequence.append(step)
+                    elif isinstance(click, dict):
                         # Valida campi obbligatori
                         if all(field in click for field in ['x', 'y', 'button']):
                             try:
@@ -1634,6 +2085,11 @@ class MouseClickerApp:
                                             'double': bool(click.get('double', False)),
                                             'delay': delay
                                         }
+                                        # Coordinate relative a una finestra (SequenceCompileError è un ValueError)
+                                        anchor = compile_window(i, click)
+                                        if anchor is not None:
+                                            validated_click['window'] = {'class': anchor.wm_class,
+                                                                         'title': anchor.title}
                                         validated_sequence.append(validated_click)
                             except (ValueError, TypeError):
                                 continue  # Salta click non validi
@@ -1642,6 +2098,10 @@ class MouseClickerApp:
             else:
                 self.current_sequence = []
             
+            # Sequenza binaria: percorso già risolto da read_profile
+            sequence_file = sequence.get('sequence_file')
+            self.sequence_file = sequence_file if isinstance(sequence_file, str) and sequence_file else None
+            
             # Validazione ripetizioni sequenza
             sequence_repeats = str(sequence.get('sequence_repeats', '1'))
             try:
@@ -1691,11 +2151,20 @@ class MouseClickerApp:
             self.use_current_position.set(True)
             self.fixed_x.set('100')
             self.fixed_y.set('100')
+            self.target_image.set('')
+            self.target_threshold.set('0.8')
+            self.target_scales.set('1')
             self.initial_delay.set('3')
             self.play_sound.set(False)
             self.minimize_on_start.set(False)
+            self.click_backend_name.set('pyautogui')
+            self.file_log.set(False)
+            self.file_log_compress.set(False)
+            self.capture_ttl_ms.set('50')
+            self.match_processes.set('1')
             self.execution_mode.set('single')
             self.current_sequence = []
+            self.sequence_file = None
             self.sequence_repeats.set('1')
             self.sequence_pause.set('1.0')
             self.infinite_sequence.set(False)
@@ -1739,6 +2208,7 @@ class MouseClickerApp:
         config = self.get_current_config()
         config['profile_name'] = name
         config['created_date'] = datetime.datetime.now().isoformat()
+        relink_profile_paths(config, self.profiles_dir)
         
         filename = f"{safe_name}.json"
         filepath = os.path.join(self.profiles_dir, filename)
@@ -1764,7 +2234,8 @@ class MouseClickerApp:
             
             self.current_profile = name
             self.current_profile_var.set(f"Profilo corrente: {name}")
-            self.refresh_profiles_list()
+            self.update_profile_file(filename)
+            self.update_profile_file(f"{safe_name}.backup.json")
             self.log_message(f"Profilo '{name}' salvato")
             
         except json.JSONEncodeError as e:
@@ -1795,40 +2266,12 @@ class MouseClickerApp:
             return
         
         try:
-            # Verifica che il file esista e sia leggibile
-            if not os.path.exists(filepath):
-                messagebox.showerror("Errore", "File non trovato")
-                return
-            
-            if not os.path.isfile(filepath):
-                messagebox.showerror("Errore", "Il percorso specificato non è un file")
-                return
-            
-            # Verifica dimensione file (max 10MB per sicurezza)
-            file_size = os.path.getsize(filepath)
-            if file_size > 10 * 1024 * 1024:  # 10MB
-                messagebox.showerror("Errore", "File troppo grande (max 10MB)")
-                return
-            
-            if file_size == 0:
-                messagebox.showerror("Errore", "File vuoto")
-                return
-            
-            with open(filepath, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-            
-            # Validazione struttura JSON
-            if not isinstance(config, dict):
-                messagebox.showerror("Errore", "Struttura profilo non valida")
-                return
-            
-            # Validazione campi obbligatori
-            required_sections = ['basic_settings', 'advanced_settings', 'sequence_settings']
-            for section in required_sections:
-                if section not in config or not isinstance(config[section], dict):
-                    messagebox.showerror("Errore", f"Sezione '{section}' mancante o non valida")
-                    return
-            
+            config = read_profile(filepath)
+        except ProfileError as e:
+            messagebox.showerror("Errore", str(e))
+            return
+        
+        try:
             self.apply_config(config)
             
             profile_name = config.get('profile_name', os.path.basename(filepath))
@@ -1839,14 +2282,6 @@ class MouseClickerApp:
             self.current_profile_var.set(f"Profilo corrente: {profile_name}")
             self.log_message(f"Profilo '{profile_name}' caricato")
             
-        except json.JSONDecodeError as e:
-            messagebox.showerror("Errore", f"File JSON non valido: {str(e)}")
-        except UnicodeDecodeError as e:
-            messagebox.showerror("Errore", f"Errore di codifica file: {str(e)}")
-        except PermissionError:
-            messagebox.showerror("Errore", "Permessi insufficienti per leggere il file")
-        except IOError as e:
-            messagebox.showerror("Errore", f"Errore di I/O: {str(e)}")
         except Exception as e:
             messagebox.showerror("Errore", f"Errore imprevisto nel caricare il profilo: {str(e)}")
     
@@ -1891,6 +2326,7 @@ class MouseClickerApp:
             
             config['profile_name'] = profile_name
             config['exported_date'] = datetime.datetime.now().isoformat()
+            relink_profile_paths(config, export_dir)
             
             # Verifica se il file esiste già
             if os.path.exists(filepath):
@@ -1940,60 +2376,23 @@ class MouseClickerApp:
         if not filepath:
             return
         
+        # Lettura e validazione nel pool, il resto nel thread principale
+        self.status_var.set("Lettura profilo da importare...")
+        self.run_profile_task(read_import_profile, filepath, callback=self._finish_import_profile)
+    
+    def _finish_import_profile(self, future):
+        """Chiede il nome e salva il profilo importato (thread principale)"""
+        self.status_var.set("Pronto")
+        try:
+            config = future.result()
+        except ProfileError as e:
+            messagebox.showerror("Errore", str(e))
+            return
+        except Exception as e:
+            messagebox.showerror("Errore", f"Errore imprevisto nell'importare il profilo: {str(e)}")
+            return
+        
         try:
-            # Verifica sicurezza del file
-            if not os.path.exists(filepath):
-                messagebox.showerror("Errore", "File non trovato")
-                return
-            
-            if not os.path.isfile(filepath):
-                messagebox.showerror("Errore", "Il percorso specificato non è un file")
-                return
-            
-            # Verifica dimensione file (max 10MB)
-            file_size = os.path.getsize(filepath)
-            if file_size > 10 * 1024 * 1024:  # 10MB
-                messagebox.showerror("Errore", "File troppo grande (max 10MB)")
-                return
-            
-            if file_size == 0:
-                messagebox.showerror("Errore", "File vuoto")
-                return
-            
-            with open(filepath, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-            
-            # Validazione struttura JSON
-            if not isinstance(config, dict):
-                messagebox.showerror("Errore", "Struttura profilo non valida")
-                return
-            
-            # Validazione campi obbligatori
-            required_sections = ['basic_settings', 'advanced_settings', 'sequence_settings']
-            for section in required_sections:
-                if section not in config or not isinstance(config[section], dict):
-                    messagebox.showerror("Errore", f"Sezione '{section}' mancante o non valida nel file")
-                    return
-            
-            # Validazione sequenza se presente
-            sequence_data = config.get('sequence_settings', {}).get('current_sequence', [])
-            if sequence_data and isinstance(sequence_data, list):
-                if len(sequence_data) > 1000:  # Limite di sicurezza
-                    messagebox.showerror("Errore", "Sequenza troppo lunga (max 1000 click)")
-                    return
-                
-                # Valida ogni click nella sequenza
-                for i, click in enumerate(sequence_data):
-                    if not isinstance(click, dict):
-                        messagebox.showerror("Errore", f"Click {i+1} nella sequenza non valido")
-                        return
-                    
-                    required_click_fields = ['x', 'y', 'button']
-                    for field in required_click_fields:
-                        if field not in click:
-                            messagebox.showerror("Errore", f"Campo '{field}' mancante nel click {i+1}")
-                            return
-            
             # Chiedi nome per il profilo importato
             default_name = config.get('profile_name', 'Profilo Importato')
             # Sanitizza il nome di default
@@ -2033,6 +2432,7 @@ class MouseClickerApp:
             
             config['profile_name'] = name
             config['imported_date'] = datetime.datetime.now().isoformat()
+            relink_profile_paths(config, self.profiles_dir)
             
             # Scrivi con file temporaneo per sicurezza
             temp_filepath = os.path.join(self.profiles_dir, f".temp_{safe_name}.json")
@@ -2046,7 +2446,7 @@ class MouseClickerApp:
                     os.remove(new_filepath)
                 os.rename(temp_filepath, new_filepath)
                 
-                self.refresh_profiles_list()
+                self.update_profile_file(filename)
                 self.log_message(f"Profilo '{name}' importato")
                 
             finally:
@@ -2057,10 +2457,6 @@ class MouseClickerApp:
                     except:
                         pass
             
-        except json.JSONDecodeError as e:
-            messagebox.showerror("Errore", f"File JSON non valido: {str(e)}")
-        except UnicodeDecodeError as e:
-            messagebox.showerror("Errore", f"Errore di codifica file: {str(e)}")
         except PermissionError:
             messagebox.showerror("Errore", "Permessi insufficienti per accedere al file")
         except IOError as e:
@@ -2068,9 +2464,24 @@ class MouseClickerApp:
         except Exception as e:
             messagebox.showerror("Errore", f"Errore imprevisto nell'importare il profilo: {str(e)}")
     
+    def get_profile_executor(self):
+        """Pool di thread per lettura e parsing dei profili (creato al primo uso)"""
+        if self.profile_executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self.profile_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ProfileIO")
+        return self.profile_executor
+    
+    def run_profile_task(self, function, *args, callback):
+        """Esegue function nel pool; callback(future) gira poi nel thread principale"""
+        future = self.get_profile_executor().submit(function, *args)
+        future.add_done_callback(lambda f: self.ui_updates.post_call(lambda: callback(f)))
+        return future
+    
     def refresh_profiles_list(self):
-        """Aggiorna la lista dei profili disponibili"""
-        self.profiles_listbox.delete(0, tk.END)
+        """Aggiorna la lista dei profili disponibili (scansione e parsing nel pool di thread)"""
+        # Tab Profili non ancora aperto: la lista verrà letta alla prima apertura
+        if self.profiles_listbox is None:
+            return
         
         # Assicura che la directory esista
         if not os.path.exists(self.profiles_dir):
@@ -2080,136 +2491,246 @@ class MouseClickerApp:
                 self.log_message(f"Errore creazione directory profili: {e}")
                 return
         
+        # Una nuova scansione rende obsoleti i risultati di quella precedente
+        self.profile_scan_generation += 1
+        generation = self.profile_scan_generation
+        for future in self.profile_scan_futures:
+            future.cancel()
+        self.profile_scan_futures = []
+        
+        self.profiles_listbox.delete(0, tk.END)
+        self.profile_rows = []
+        self.profile_scan_status.set("Scansione cartella profili...")
+        self.run_profile_task(self.profile_index.scan,
+                              callback=lambda f: self._on_profiles_scanned(generation, f))
+    
+    def _on_profiles_scanned(self, generation, future):
+        """Mostra subito i profili dall'indice e distribuisce nel pool quelli da rileggere"""
+        if generation != self.profile_scan_generation:
+            return
         try:
-            files = os.listdir(self.profiles_dir)
+            cached, pending = future.result()
         except OSError as e:
+            self.profile_scan_status.set("")
             self.log_message(f"Errore lettura directory profili: {e}")
             return
         
-        for filename in files:
-            if not filename.endswith('.json'):
-                continue
-                
-            filepath = os.path.join(self.profiles_dir, filename)
-            
-            # Verifica che sia un file e non una directory
-            if not os.path.isfile(filepath):
-                continue
-            
+        # Solo i file nuovi o modificati vengono riletti, il resto arriva dall'indice
+        for filename, entry in cached:
+            self.insert_profile_row(filename, entry)
+        
+        self.profile_scan_total = len(pending)
+        self.profile_scan_done = 0
+        if not pending:
+            self._finish_profile_scan()
+            return
+        
+        self.profile_progress.config(maximum=len(pending), value=0)
+        self.profile_progress.grid()
+        self._update_profile_scan_status()
+        # Blocchi di file per task: migliaia di profili non diventano migliaia di callback
+        batch_size = self.PROFILE_SCAN_BATCH
+        for start in range(0, len(pending), batch_size):
+            future = self.run_profile_task(
+                ProfileIndex.parse_batch, pending[start:start + batch_size],
+                callback=lambda f: self._on_profiles_parsed(generation, f))
+            self.profile_scan_futures.append(future)
+    
+    def _on_profiles_parsed(self, generation, future):
+        """Registra nell'indice e inserisce nella lista un blocco di profili appena riletti"""
+        if future.cancelled():
+            return
+        try:
+            parsed = future.result()
+        except Exception as e:
+            self.log_message(f"Errore lettura profili: {e}")
+            parsed = []
+        
+        for filename, entry in parsed:
+            self.profile_index.store(filename, entry)
+        
+        if generation != self.profile_scan_generation:
+            return
+        
+        for filename, entry in parsed:
+            self.insert_profile_row(filename, entry)
+        self.profile_scan_done += 1
+        self.profile_progress.config(value=min(self.profile_scan_done * self.PROFILE_SCAN_BATCH,
+                                               self.profile_scan_total))
+        if self.profile_scan_done >= len(self.profile_scan_futures):
+            self._finish_profile_scan()
+        else:
+            self._update_profile_scan_status()
+    
+    def _update_profile_scan_status(self):
+        done = min(self.profile_scan_done * self.PROFILE_SCAN_BATCH, self.profile_scan_total)
+        self.profile_scan_status.set(f"Lettura profili: {done}/{self.profile_scan_total}")
+    
+    def _finish_profile_scan(self):
+        """Fine scansione: nasconde l'avanzamento e salva l'indice in background"""
+        self.profile_scan_futures = []
+        self.profile_progress.grid_remove()
+        self.profile_scan_status.set(f"{len(self.profile_rows)} profili")
+        self.get_profile_executor().submit(self.profile_index.save)
+    
+    def format_profile_row(self, filename, entry):
+        """Testo della riga della lista per una voce dell'indice"""
+        status = entry.get('status')
+        if status != 'ok':
+            status_labels = {'empty': "File vuoto", 'invalid': "Struttura invalida",
+                             'corrupt': "File corrotto", 'error': "Errore lettura"}
+            return f"{filename[:-5]} ({status_labels.get(status, 'Errore sconosciuto')})"
+        
+        profile_name = entry.get('name') or filename[:-5]
+        date_str = 'Data sconosciuta'
+        if entry.get('created_date'):
             try:
-                # Verifica dimensione file
-                if os.path.getsize(filepath) == 0:
-                    self.profiles_listbox.insert(tk.END, f"{filename[:-5]} (File vuoto)")
-                    continue
-                
-                # Verifica che il file sia un JSON valido
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                
-                # Verifica struttura base del profilo
-                if not isinstance(config, dict):
-                    self.profiles_listbox.insert(tk.END, f"{filename[:-5]} (Struttura invalida)")
-                    continue
-                
-                profile_name = config.get('profile_name', filename[:-5])
-                created_date = config.get('created_date', 'Data sconosciuta')
-                
-                if created_date != 'Data sconosciuta':
-                    try:
-                        date_obj = datetime.datetime.fromisoformat(created_date)
-                        date_str = date_obj.strftime('%d/%m/%Y %H:%M')
-                    except (ValueError, TypeError):
-                        date_str = 'Data sconosciuta'
-                else:
-                    date_str = created_date
-                
-                display_text = f"{profile_name} ({date_str})"
-                self.profiles_listbox.insert(tk.END, display_text)
-                
-            except (json.JSONDecodeError, UnicodeDecodeError) as e:
-                self.profiles_listbox.insert(tk.END, f"{filename[:-5]} (File corrotto)")
-                self.log_message(f"File profilo corrotto: {filename} - {e}")
-            except (IOError, OSError) as e:
-                self.profiles_listbox.insert(tk.END, f"{filename[:-5]} (Errore lettura)")
-                self.log_message(f"Errore lettura profilo: {filename} - {e}")
-            except Exception as e:
-                self.profiles_listbox.insert(tk.END, f"{filename[:-5]} (Errore sconosciuto)")
-                self.log_message(f"Errore imprevisto con profilo: {filename} - {e}")
+                date_obj = datetime.datetime.fromisoformat(entry['created_date'])
+                date_str = date_obj.strftime('%d/%m/%Y %H:%M')
+            except (ValueError, TypeError):
+                pass
+        
+        steps = entry.get('steps', 0)
+        steps_text = f", {steps} click" if steps else ""
+        return f"{profile_name} ({date_str}{steps_text})"
     
-    def load_selected_profile(self, event=None):
-        """Carica il profilo selezionato dalla lista"""
-        selection = self.profiles_listbox.curselection()
-        if not selection:
+    def insert_profile_row(self, filename, entry):
+        """Inserisce (o sostituisce) la riga di un profilo mantenendo l'ordine per nome file"""
+        row = bisect.bisect_left(self.profile_rows, filename)
+        if row < len(self.profile_rows) and self.profile_rows[row] == filename:
+            self.profiles_listbox.delete(row)
+        else:
+            self.profile_rows.insert(row, filename)
+        self.profiles_listbox.insert(row, self.format_profile_row(filename, entry))
+        
+        if entry.get('error'):
+            self.log_message(f"Profilo non leggibile: {filename} - {entry['error']}")
+    
+    def remove_profile_row(self, filename):
+        """Toglie dalla lista la riga di un profilo, se presente"""
+        row = bisect.bisect_left(self.profile_rows, filename)
+        if row < len(self.profile_rows) and self.profile_rows[row] == filename:
+            del self.profile_rows[row]
+            self.profiles_listbox.delete(row)
+    
+    def start_profile_watcher(self):
+        """Avvia l'osservazione della cartella profili (inotify o polling)"""
+        if self.profile_watcher is not None:
+            return
+        self.profile_watcher = ProfileWatcher(self.profiles_dir, self._on_profile_file_event).start()
+        self.log_message(f"Cartella profili osservata ({self.profile_watcher.mode})")
+    
+    def _on_profile_file_event(self, filename):
+        """Evento dall'osservatore (thread dell'osservatore): prosegue nel thread principale"""
+        self.ui_updates.post_call(lambda: self.update_profile_file(filename))
+    
+    def update_profile_file(self, filename):
+        """Aggiorna la sola riga di un profilo cambiato su disco; None = scansione completa"""
+        # Tab Profili non ancora aperto: la lista verrà letta alla prima apertura
+        if self.profiles_listbox is None:
+            return
+        if filename is None:
+            self.refresh_profiles_list()
+            return
+        # Sequenza .seq rigenerata o eliminata: cambiano le righe dei profili che la usano
+        if filename.endswith(SEQUENCE_EXTENSION):
+            for profile_filename in self.profile_index.profiles_using(filename):
+                self.update_profile_file(profile_filename)
             return
         
-        selected_text = self.profiles_listbox.get(selection[0])
-        profile_name = selected_text.split(' (')[0]  # Rimuovi la data
+        generation = self.profile_scan_generation
+        self.run_profile_task(self.profile_index.update, filename,
+                              callback=lambda f: self._on_profile_file_updated(generation, filename, f))
+    
+    def _on_profile_file_updated(self, generation, filename, future):
+        """Applica alla lista la voce riletta da update_profile_file"""
+        # Una scansione completa partita nel frattempo porta già la versione aggiornata
+        if future.cancelled() or generation != self.profile_scan_generation:
+            return
+        try:
+            entry = future.result()
+        except Exception as e:
+            self.log_message(f"Errore lettura profilo {filename}: {e}")
+            return
         
-        # Trova il file corrispondente
-        for filename in os.listdir(self.profiles_dir):
-            if filename.endswith('.json'):
-                filepath = os.path.join(self.profiles_dir, filename)
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        config = json.load(f)
-                    
-                    if config.get('profile_name', filename[:-5]) == profile_name:
-                        self.apply_config(config)
-                        self.current_profile = profile_name
-                        self.current_profile_var.set(f"Profilo corrente: {profile_name}")
-                        self.log_message(f"Profilo '{profile_name}' caricato")
-                        return
-                        
-                except Exception as e:
-                    continue
+        if entry is None:
+            self.remove_profile_row(filename)
+        else:
+            self.insert_profile_row(filename, entry)
+        self.schedule_profile_index_save()
+    
+    def schedule_profile_index_save(self, delay_ms=1000):
+        """Salva l'indice una volta sola dopo una raffica di eventi"""
+        if self.profile_index_save_id is None:
+            self.profile_index_save_id = self.root.after(delay_ms, self._save_profile_index)
+    
+    def _save_profile_index(self):
+        self.profile_index_save_id = None
+        self.get_profile_executor().submit(self.profile_index.save)
+    
+    def get_selected_profile_file(self):
+        """Restituisce (percorso, nome) del profilo selezionato nella lista, o None"""
+        selection = self.profiles_listbox.curselection()
+        if not selection or selection[0] >= len(self.profile_rows):
+            return None
+        
+        filename = self.profile_rows[selection[0]]
+        entry = self.profile_index.entries.get(filename, {})
+        return os.path.join(self.profiles_dir, filename), entry.get('name') or filename[:-5]
+    
+    def load_selected_profile(self, event=None):
+        """Carica il profilo selezionato dalla lista (lettura nel pool di thread)"""
+        selected = self.get_selected_profile_file()
+        if selected is None:
+            return
+        filepath, profile_name = selected
         
-        messagebox.showerror("Errore", "Profilo non trovato o corrotto")
+        self.run_profile_task(read_profile, filepath,
+                              callback=lambda f: self._apply_selected_profile(profile_name, f))
+    
+    def _apply_selected_profile(self, profile_name, future):
+        """Applica il profilo letto nel pool (thread principale)"""
+        try:
+            self.apply_config(future.result())
+        except Exception as e:
+            messagebox.showerror("Errore", f"Profilo non trovato o corrotto: {str(e)}")
+            return
+        
+        self.current_profile = profile_name
+        self.current_profile_var.set(f"Profilo corrente: {profile_name}")
+        self.log_message(f"Profilo '{profile_name}' caricato")
     
     def delete_selected_profile(self):
         """Elimina il profilo selezionato"""
-        selection = self.profiles_listbox.curselection()
-        if not selection:
+        selected = self.get_selected_profile_file()
+        if selected is None:
             messagebox.showwarning("Attenzione", "Seleziona un profilo da eliminare")
             return
-        
-        selected_text = self.profiles_listbox.get(selection[0])
-        profile_name = selected_text.split(' (')[0]
+        filepath, profile_name = selected
         
         if not messagebox.askyesno("Conferma", f"Eliminare il profilo '{profile_name}'?"):
             return
         
-        # Trova e elimina il file
-        for filename in os.listdir(self.profiles_dir):
-            if filename.endswith('.json'):
-                filepath = os.path.join(self.profiles_dir, filename)
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        config = json.load(f)
-                    
-                    if config.get('profile_name', filename[:-5]) == profile_name:
-                        os.remove(filepath)
-                        self.refresh_profiles_list()
-                        self.log_message(f"Profilo '{profile_name}' eliminato")
-                        
-                        if self.current_profile == profile_name:
-                            self.current_profile = None
-                            self.current_profile_var.set("Nessun profilo caricato")
-                        return
-                        
-                except Exception as e:
-                    continue
+        try:
+            os.remove(filepath)
+        except OSError:
+            messagebox.showerror("Errore", "Profilo non trovato")
+            return
         
-        messagebox.showerror("Errore", "Profilo non trovato")
+        self.update_profile_file(os.path.basename(filepath))
+        self.log_message(f"Profilo '{profile_name}' eliminato")
+        
+        if self.current_profile == profile_name:
+            self.current_profile = None
+            self.current_profile_var.set("Nessun profilo caricato")
     
     def duplicate_selected_profile(self):
         """Duplica il profilo selezionato"""
-        selection = self.profiles_listbox.curselection()
-        if not selection:
+        selected = self.get_selected_profile_file()
+        if selected is None:
             messagebox.showwarning("Attenzione", "Seleziona un profilo da duplicare")
             return
-        
-        selected_text = self.profiles_listbox.get(selection[0])
-        original_name = selected_text.split(' (')[0]
+        filepath, original_name = selected
         
         new_name = tk.simpledialog.askstring(
             "Duplica Profilo", 
@@ -2220,35 +2741,27 @@ class MouseClickerApp:
         if not new_name:
             return
         
-        # Trova il file originale
-        for filename in os.listdir(self.profiles_dir):
-            if filename.endswith('.json'):
-                filepath = os.path.join(self.profiles_dir, filename)
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        config = json.load(f)
-                    
-                    if config.get('profile_name', filename[:-5]) == original_name:
-                        # Crea il duplicato
-                        config['profile_name'] = new_name
-                        config['created_date'] = datetime.datetime.now().isoformat()
-                        config['duplicated_from'] = original_name
-                        
-                        safe_name = "".join(c for c in new_name if c.isalnum() or c in (' ', '-', '_')).strip()
-                        new_filename = f"{safe_name}.json"
-                        new_filepath = os.path.join(self.profiles_dir, new_filename)
-                        
-                        with open(new_filepath, 'w', encoding='utf-8') as f:
-                            json.dump(config, f, indent=2, ensure_ascii=False)
-                        
-                        self.refresh_profiles_list()
-                        self.log_message(f"Profilo '{new_name}' creato come copia di '{original_name}'")
-                        return
-                        
-                except Exception as e:
-                    continue
+        try:
+            config = read_profile(filepath)
+            
+            # Crea il duplicato
+            config['profile_name'] = new_name
+            config['created_date'] = datetime.datetime.now().isoformat()
+            config['duplicated_from'] = original_name
+            relink_profile_paths(config, self.profiles_dir)
+            
+            safe_name = "".join(c for c in new_name if c.isalnum() or c in (' ', '-', '_')).strip()
+            new_filename = f"{safe_name}.json"
+            new_filepath = os.path.join(self.profiles_dir, new_filename)
+            
+            with open(new_filepath, 'w', encoding='utf-8') as f:
+                json.dump(config, f, indent=2, ensure_ascii=False)
+        except Exception:
+            messagebox.showerror("Errore", "Profilo originale non trovato")
+            return
         
-        messagebox.showerror("Errore", "Profilo originale non trovato")
+        self.update_profile_file(new_filename)
+        self.log_message(f"Profilo '{new_name}' creato come copia di '{original_name}'")
     
     def load_preset_profile(self, preset_type: str):
         """Carica un profilo predefinito"""
@@ -2357,9 +2870,10 @@ class MouseClickerApp:
                     try:
                         self.stop_clicking()
                         
-                        # Attendi che il thread si fermi con timeout
+                        # Il thread viene svegliato subito dallo stop: attendi che termini
                         if hasattr(self, 'click_thread') and self.click_thread and self.click_thread.is_alive():
-                            self.click_thread.join(timeout=3.0)
+                            if self.run_control.wait_halted(timeout=3.0):
+                                self.click_thread.join(timeout=1.0)
                             if self.click_thread.is_alive():
                                 self.log_message("[AVVISO] Thread di click non terminato entro il timeout")
                                 
@@ -2368,6 +2882,13 @@ class MouseClickerApp:
                 else:
                     return  # Non chiudere se l'utente annulla
             
+            if self.profile_watcher is not None:
+                self.profile_watcher.stop()
+            
+            # Letture profili in corso: quelle non iniziate vengono annullate
+            if self.profile_executor is not None:
+                self.profile_executor.shutdown(wait=False, cancel_futures=True)
+            
             # Rimuovi tutti i bind degli eventi in modo sicuro
             event_bindings = ['<Button-1>', '<Button-2>', '<Button-3>', '<KeyPress>', '<KeyRelease>']
             for binding in event_bindings:
@@ -2383,6 +2904,11 @@ class MouseClickerApp:
             except Exception as e:
                 self.log_message(f"Errore salvando stato: {e}")
             
+            # Ferma gli aggiornamenti periodici dell'interfaccia e l'endpoint metriche
+            self.ui_updates.stop()
+            if self.metrics_server is not None:
+                self.metrics_server.stop()
+            
             # Chiudi l'applicazione
             self.root.quit()  # Usa quit() invece di destroy() per una chiusura più pulita
             self.root.destroy()
@@ -2404,10 +2930,19 @@ class MouseClickerApp:
 
 def main():
     """Funzione principale"""
-    try:
-        # Verifica dipendenze
-        import pyautogui
-    except ImportError:
+    # Processi di ricerca immagini nell'eseguibile compilato (PyInstaller)
+    if getattr(sys, 'frozen', False):
+        import multiprocessing
+        multiprocessing.freeze_support()
+    
+    # Esecuzione headless di un profilo: nessun widget Tk
+    if len(sys.argv) > 1 and sys.argv[1] == 'run':
+        from headless_runner import main as run_headless
+        sys.exit(run_headless(sys.argv[2:]))
+    
+    # Verifica dipendenze senza importare pyautogui (caricato al primo click)
+    import importlib.util
+    if importlib.util.find_spec('pyautogui') is None:
         print("Errore: pyautogui non installato. Installa con: pip install pyautogui")
         sys.exit(1)
     
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Profile Files - Lettura e validazione dei file profilo JSON
+Autore: Andrea Piani
+Descrizione: Controlli condivisi tra il caricamento dall'interfaccia e il runner headless
+             e indice persistente dei metadati per la lista dei profili
+"""
+
+import json
+import os
+import tempfile
+import threading
+
+# Sezioni che ogni profilo deve contenere
+REQUIRED_SECTIONS = ('basic_settings', 'advanced_settings', 'sequence_settings')
+
+# Dimensione massima di un file profilo (per sicurezza)
+MAX_PROFILE_SIZE = 10 * 1024 * 1024
+
+
+class ProfileError(ValueError):
+    """File profilo mancante, illeggibile o con struttura non valida"""
+
+
+def read_profile(filepath):
+    """Legge e valida un file profilo; solleva ProfileError con un messaggio per l'utente"""
+    if not os.path.exists(filepath):
+        raise ProfileError("File non trovato")
+
+    if not os.path.isfile(filepath):
+        raise ProfileError("Il percorso specificato non è un file")
+
+    file_size = os.path.getsize(filepath)
+    if file_size > MAX_PROFILE_SIZE:
+        raise ProfileError("File troppo grande (max 10MB)")
+
+    if file_size == 0:
+        raise ProfileError("File vuoto")
+
+    try:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    except json.JSONDecodeError as e:
+        raise ProfileError(f"File JSON non valido: {str(e)}")
+    except UnicodeDecodeError as e:
+        raise ProfileError(f"Errore di codifica file: {str(e)}")
+    except PermissionError:
+        raise ProfileError("Permessi insufficienti per leggere il file")
+    except IOError as e:
+        raise ProfileError(f"Errore di I/O: {str(e)}")
+
+    if not isinstance(config, dict):
+        raise ProfileError("Struttura profilo non valida")
+
+    for section in REQUIRED_SECTIONS:
+        if section not in config or not isinstance(config[section], dict):
+            raise ProfileError(f"Sezione '{section}' mancante o non valida")
+
+    # Il file binario della sequenza e le immagini sono relativi alla cartella del profilo
+    profile_dir = os.path.dirname(os.path.abspath(filepath))
+    sequence_file = config['sequence_settings'].get('sequence_file')
+    if sequence_file:
+        if not isinstance(sequence_file, str):
+            raise ProfileError("Riferimento al file di sequenza non valido")
+        config['sequence_settings']['sequence_file'] = os.path.join(profile_dir, sequence_file)
+
+    target_image = config['advanced_settings'].get('target_image')
+    if target_image:
+        if not isinstance(target_image, str):
+            raise ProfileError("Riferimento all'immagine bersaglio non valido")
+        config['advanced_settings']['target_image'] = os.path.join(profile_dir, target_image)
+
+    sequence_data = config['sequence_settings'].get('current_sequence')
+    if isinstance(sequence_data, list):
+        for step in sequence_data:
+            if isinstance(step, dict) and step.get('type') == 'image' and isinstance(step.get('template'), str):
+                step['template'] = os.path.join(profile_dir, step['template'])
+
+    return config
+
+
+def profile_reference(path, profile_dir):
+    """Riferimento a un file da salvare nel profilo: relativo alla sua cartella quando possibile"""
+    try:
+        return os.path.relpath(path, profile_dir)
+    except ValueError:
+        return os.path.abspath(path)  # Dischi diversi su Windows
+
+
+def relink_profile_paths(config, profile_dir):
+    """Rende relativi alla cartella profile_dir, in cui il profilo verrà scritto, i percorsi
+    che read_profile ha reso assoluti (sequenza binaria, immagine bersaglio, template).
+
+    Gli step immagine vengono copiati: la sequenza originale non viene modificata.
+    """
+    sequence = config['sequence_settings']
+    if sequence.get('sequence_file'):
+        sequence['sequence_file'] = profile_reference(sequence['sequence_file'], profile_dir)
+    else:
+        sequence.pop('sequence_file', None)
+
+    advanced = config['advanced_settings']
+    if advanced.get('target_image') and isinstance(advanced['target_image'], str):
+        advanced['target_image'] = profile_reference(advanced['target_image'], profile_dir)
+
+    steps = sequence.get('current_sequence')
+    if isinstance(steps, list):
+        sequence['current_sequence'] = [
+            dict(step, template=profile_reference(step['template'], profile_dir))
+            if isinstance(step, dict) and step.get('type') == 'image' and isinstance(step.get('template'), str)
+            else step
+            for step in steps
+        ]
+
+
+def read_import_profile(filepath, max_steps=1000):
+    """Come read_profile, con i controlli aggiuntivi sulla sequenza di un file importato"""
+    config = read_profile(filepath)
+
+    sequence_data = config['sequence_settings'].get('current_sequence', [])
+    if sequence_data and isinstance(sequence_data, list):
+        if len(sequence_data) > max_steps:  # Limite di sicurezza
+            raise ProfileError(f"Sequenza troppo lunga (max {max_steps} click)")
+
+        # Valida ogni click nella sequenza
+        for i, click in enumerate(sequence_data):
+            if not isinstance(click, dict):
+                raise ProfileError(f"Click {i+1} nella sequenza non valido")
+
+            # Movimenti, step immagine e attese: validati da compile_sequence al caricamento
+            required = {'path': ('x', 'y', 'points'), 'image': ('template',),
+                        'wait': ('x', 'y', 'color')}.get(click.get('type'), ('x', 'y', 'button'))
+            for field in required:
+                if field not in click:
+                    raise ProfileError(f"Campo '{field}' mancante nel click {i+1}")
+
+    return config
+
+
+class ProfileIndex:
+    """Indice persistente dei metadati dei profili, invalidato per mtime e dimensione.
+
+    Ogni aggiornamento rilegge solo i file nuovi o modificati; gli altri
+    restano quelli salvati nel file indice della cartella profili.
+    scan(), parse() e save() possono girare in thread di lavoro: l'interfaccia
+    distribuisce parse() su un pool e registra i risultati con store().
+    """
+
+    INDEX_FILENAME = ".profiles_index"
+    VERSION = 2
+
+    def __init__(self, profiles_dir):
+        self.profiles_dir = profiles_dir
+        self.index_path = os.path.join(profiles_dir, self.INDEX_FILENAME)
+        self.entries = {}
+        self._loaded = False
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # Un solo salvataggio alla volta, in ordine
+
+        # File riletti dall'ultimo refresh (per diagnostica e test)
+        self.parsed = 0
+
+    def _load(self):
+        """Carica l'indice salvato; un indice illeggibile viene ricostruito"""
+        self._loaded = True
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict) and data.get('version') == self.VERSION:
+                self.entries = data.get('entries', {})
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        """Scrive l'indice in modo atomico (file temporaneo e rename), solo se cambiato.
+
+        I salvataggi sono serializzati: quello che prende i dati per ultimo è anche
+        l'ultimo a sostituire il file. Il file temporaneo è unico, per non mescolare
+        le scritture di un'altra istanza dell'applicazione sulla stessa cartella.
+        """
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                data = json.dumps({'version': self.VERSION, 'entries': self.entries}, ensure_ascii=False)
+                self._dirty = False
+
+            try:
+                fd, temp_path = tempfile.mkstemp(prefix=self.INDEX_FILENAME + ".", suffix=".tmp",
+                                                 dir=self.profiles_dir)
+            except OSError:
+                return  # L'indice è solo una cache: al prossimo avvio verrà ricostruito
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(temp_path, self.index_path)
+            except OSError:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def read_metadata(filepath, size):
+        """Legge un profilo e ne estrae i metadati mostrati nella lista"""
+        entry = {'name': None, 'created_date': None, 'steps': 0, 'status': 'ok', 'error': None}
+        if size == 0:
+            entry['status'] = 'empty'
+            return entry
+
+        try:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            entry['status'] = 'corrupt'
+            entry['error'] = str(e)
+            return entry
+        except OSError as e:
+            entry['status'] = 'error'
+            entry['error'] = str(e)
+            return entry
+
+        if not isinstance(config, dict) or not all(isinstance(config.get(s), dict) for s in REQUIRED_SECTIONS):
+            entry['status'] = 'invalid'
+            return entry
+
+        entry['name'] = str(config.get('profile_name', ''))[:100] or None
+        created_date = config.get('created_date')
+        entry['created_date'] = created_date if isinstance(created_date, str) else None
+        sequence = config['sequence_settings'].get('current_sequence', [])
+        entry['steps'] = len(sequence) if isinstance(sequence, list) else 0
+
+        # Sequenza binaria: basta l'intestazione per il numero di step. mtime e
+        # dimensione del .seq entrano nella voce: rigenerarlo la invalida
+        sequence_file = config['sequence_settings'].get('sequence_file')
+        if sequence_file and isinstance(sequence_file, str):
+            from sequence_file import read_step_count
+            sequence_path = os.path.join(os.path.dirname(filepath), sequence_file)
+            entry['sequence_path'] = sequence_path
+            entry['sequence_stat'] = ProfileIndex.file_stat(sequence_path)
+            try:
+                entry['steps'] = read_step_count(sequence_path)
+            except (OSError, ValueError) as e:
+                entry['status'] = 'invalid'
+                entry['error'] = str(e)
+        return entry
+
+    @staticmethod
+    def file_stat(path):
+        """[mtime_ns, dimensione] del file, o None se non esiste"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+
+    @classmethod
+    def parse(cls, filepath, mtime_ns, size):
+        """Voce d'indice per un file (lavoro di I/O e parsing, adatto a un thread del pool)"""
+        entry = cls.read_metadata(filepath, size)
+        entry['mtime_ns'] = mtime_ns
+        entry['size'] = size
+        return entry
+
+    @classmethod
+    def parse_batch(cls, pending):
+        """parse() su un blocco di voci di scan(): restituisce [(filename, entry)]"""
+        return [(filename, cls.parse(filepath, mtime_ns, size))
+                for filename, filepath, mtime_ns, size in pending]
+
+    def is_current(self, filename, mtime_ns, size):
+        """True se la voce salvata corrisponde ancora a mtime e dimensione del file (e del .seq referenziato)"""
+        entry = self.entries.get(filename)
+        if (entry is None or entry.get('status') == 'error'
+                or entry.get('mtime_ns') != mtime_ns or entry.get('size') != size):
+            return False
+        sequence_path = entry.get('sequence_path')
+        return sequence_path is None or self.file_stat(sequence_path) == entry.get('sequence_stat')
+
+    def scan(self):
+        """Elenca i profili: restituisce (dall'indice, da rileggere), entrambi ordinati.
+
+        dall'indice: [(filename, entry)]; da rileggere: [(filename, path, mtime_ns, size)].
+        I file spariti dalla cartella vengono tolti dall'indice.
+        """
+        with self._lock:
+            if not self._loaded:
+                self._load()
+
+        cached, pending = [], []
+        seen = set()
+        with os.scandir(self.profiles_dir) as it:
+            for dir_entry in it:
+                filename = dir_entry.name
+                if not filename.endswith('.json') or not dir_entry.is_file():
+                    continue
+                try:
+                    stat = dir_entry.stat()
+                except OSError:
+                    continue
+
+                seen.add(filename)
+                if self.is_current(filename, stat.st_mtime_ns, stat.st_size):
+                    cached.append((filename, self.entries[filename]))
+                else:
+                    pending.append((filename, dir_entry.path, stat.st_mtime_ns, stat.st_size))
+
+        with self._lock:
+            removed = [filename for filename in self.entries if filename not in seen]
+            for filename in removed:
+                del self.entries[filename]
+            if removed:
+                self._dirty = True
+
+        cached.sort()
+        pending.sort()
+        return cached, pending
+
+    def store(self, filename, entry):
+        """Registra la voce di un file appena riletto"""
+        with self._lock:
+            self.entries[filename] = entry
+            self._dirty = True
+
+    def remove(self, filename):
+        """Toglie dall'indice un file eliminato"""
+        with self._lock:
+            if self.entries.pop(filename, None) is not None:
+                self._dirty = True
+
+    def profiles_using(self, sequence_filename):
+        """Profili dell'indice che referenziano la sequenza .seq indicata (nella cartella profili)"""
+        sequence_path = os.path.normcase(os.path.abspath(os.path.join(self.profiles_dir, sequence_filename)))
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            return sorted(filename for filename, entry in self.entries.items()
+                          if entry.get('sequence_path')
+                          and os.path.normcase(os.path.abspath(entry['sequence_path'])) == sequence_path)
+
+    def update(self, filename):
+        """Riallinea la voce di un singolo file: restituisce la voce, o None se il file non c'è più"""
+        filepath = os.path.join(self.profiles_dir, filename)
+        try:
+            stat = os.stat(filepath)
+        except FileNotFoundError:
+            self.remove(filename)
+            return None
+
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if self.is_current(filename, stat.st_mtime_ns, stat.st_size):
+                return self.entries[filename]
+
+        entry = self.parse(filepath, stat.st_mtime_ns, stat.st_size)
+        self.store(filename, entry)
+        return entry
+
+    def refresh(self):
+        """Aggiornamento sincrono: restituisce [(filename, entry)] ordinati per nome file"""
+        cached, pending = self.scan()
+        self.parsed = len(pending)
+        result = dict(cached)
+        for filename, filepath, mtime_ns, size in pending:
+            entry = self.parse(filepath, mtime_ns, size)
+            self.store(filename, entry)
+            result[filename] = entry
+        self.save()
+        return sorted(result.items())
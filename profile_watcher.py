@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Profile Watcher - Osservazione della cartella profili
+Autore: Andrea Piani
+Descrizione: Segnala i profili .json e le sequenze binarie .seq creati, modificati o
+             eliminati nella cartella profili. Su Linux usa inotify (tramite ctypes,
+             senza dipendenze esterne); altrove, o se inotify non è disponibile,
+             confronta periodicamente mtime e dimensione
+"""
+
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+# Maschere inotify (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# Scrittura completata, rename dentro/fuori e cancellazione: bastano per i profili
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+
+def is_watched_file(filename):
+    """Profili .json e sequenze .seq che essi referenziano (non l'indice né i file temporanei nascosti)"""
+    return filename.endswith(('.json', '.seq')) and not filename.startswith('.')
+
+
+def parse_inotify_events(data):
+    """Decodifica un buffer letto dal descrittore inotify in [(mask, filename)]"""
+    events = []
+    offset = 0
+    while offset + EVENT_HEADER.size <= len(data):
+        _wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+        offset += EVENT_HEADER.size
+        name = data[offset:offset + length].split(b'\0', 1)[0]
+        offset += length
+        events.append((mask, os.fsdecode(name)))
+    return events
+
+
+class InotifyError(OSError):
+    """inotify non disponibile o non inizializzabile"""
+
+
+class _Inotify:
+    """Descrittore inotify su una singola directory"""
+
+    def __init__(self, directory):
+        if not sys.platform.startswith('linux'):
+            raise InotifyError("inotify disponibile solo su Linux")
+
+        import ctypes
+        import ctypes.util
+
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            inotify_init1 = libc.inotify_init1
+            inotify_add_watch = libc.inotify_add_watch
+        except (OSError, AttributeError) as e:
+            raise InotifyError(f"inotify non disponibile: {e}")
+
+        inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise InotifyError(errno, f"inotify_init1: {os.strerror(errno)}")
+
+        if inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise InotifyError(errno, f"inotify_add_watch: {os.strerror(errno)}")
+
+    def read(self, timeout):
+        """Eventi disponibili entro timeout secondi ([] se nessuno)"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            return parse_inotify_events(os.read(self.fd, 64 * 1024))
+        except BlockingIOError:
+            return []
+
+    def close(self):
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+class ProfileWatcher:
+    """Notifica callback(filename) per ogni profilo o sequenza creato, modificato o eliminato.
+
+    callback gira nel thread dell'osservatore: chi aggiorna widget Tk deve
+    rimandare il lavoro al thread principale. filename None significa che gli
+    eventi sono andati persi (coda inotify piena, cartella spostata): serve
+    una scansione completa. Più eventi ravvicinati sullo stesso file vengono
+    riuniti in una sola notifica dopo debounce secondi.
+    """
+
+    def __init__(self, directory, callback, poll_interval=2.0, debounce=0.2, use_inotify=True):
+        self.directory = directory
+        self.callback = callback
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.use_inotify = use_inotify
+        self.mode = None  # 'inotify' o 'polling' dopo start()
+        self._stop = threading.Event()
+        self._thread = None
+        self._inotify = None
+
+    def start(self):
+        """Avvia l'osservazione in un thread daemon; restituisce self"""
+        if self.use_inotify:
+            try:
+                self._inotify = _Inotify(self.directory)
+            except InotifyError:
+                self._inotify = None
+
+        if self._inotify is not None:
+            self.mode = 'inotify'
+            target = self._run_inotify
+        else:
+            self.mode = 'polling'
+            self._snapshot = self._scan()
+            target = self._run_polling
+
+        self._thread = threading.Thread(target=target, name="ProfileWatcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        """Ferma l'osservazione"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _notify(self, filename):
+        try:
+            self.callback(filename)
+        except Exception:
+            pass  # Un errore del destinatario non deve fermare l'osservazione
+
+    def _run_inotify(self):
+        pending = {}  # filename -> istante in cui notificare
+        while not self._stop.is_set():
+            # Attesa fino alla prossima notifica in sospeso (al massimo 0.5s per lo stop)
+            timeout = 0.5
+            if pending:
+                timeout = min(timeout, max(0.0, min(pending.values()) - time.monotonic()))
+
+            try:
+                events = self._inotify.read(timeout)
+            except (OSError, ValueError):
+                break  # Descrittore chiuso da stop()
+
+            for mask, filename in events:
+                if mask & (IN_Q_OVERFLOW | IN_DELETE_SELF | IN_MOVE_SELF):
+                    pending.clear()
+                    self._notify(None)
+                elif is_watched_file(filename):
+                    pending[filename] = time.monotonic() + self.debounce
+
+            now = time.monotonic()
+            for filename in [name for name, due in pending.items() if due <= now]:
+                del pending[filename]
+                self._notify(filename)
+
+    def _scan(self):
+        """Stato della cartella: {filename: (mtime_ns, size)}"""
+        snapshot = {}
+        try:
+            with os.scandir(self.directory) as it:
+                for dir_entry in it:
+                    if not is_watched_file(dir_entry.name):
+                        continue
+                    try:
+                        stat = dir_entry.stat()
+                    except OSError:
+                        continue
+                    snapshot[dir_entry.name] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            pass
+        return snapshot
+
+    def _run_polling(self):
+        while not self._stop.wait(self.poll_interval):
+            snapshot = self._scan()
+            previous = self._snapshot
+            self._snapshot = snapshot
+            for filename in sorted(set(previous) | set(snapshot)):
+                if previous.get(filename) != snapshot.get(filename):
+                    self._notify(filename)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Run Config - Istantanea immutabile della configurazione di esecuzione
+Autore: Andrea Piani
+Descrizione: Catturata nel thread principale all'avvio, così il thread di click
+             legge solo attributi Python e non accede mai alle variabili Tk
+"""
+
+import os
+from typing import NamedTuple, Optional
+from sequence_file import open_sequence_file
+from sequence_program import BUTTON_CODES, MAX_COORDINATE, SequenceProgram, compile_sequence
+from screen_capture import CAPTURE_TTL
+from template_matcher import ImageTarget, parse_scales
+
+
+class RunConfig(NamedTuple):
+    """Configurazione di una singola esecuzione dei click automatici"""
+
+    min_interval: float
+    max_interval: float
+    max_clicks: Optional[int]           # None = click infiniti
+    click_type: str
+    double_click: bool
+    use_current_position: bool
+    fixed_x: int
+    fixed_y: int
+    initial_delay: float
+    click_backend: str
+    file_log: bool
+    file_log_compress: bool
+    sequence_mode: bool
+    sequence: SequenceProgram
+    sequence_repeats: Optional[int]     # None = sequenza infinita
+    sequence_pause: float
+    target: Optional[ImageTarget] = None    # Click singoli sull'immagine invece che sulla posizione
+    capture_ttl: float = CAPTURE_TTL        # Validità (s) di una cattura condivisa tra step immagine
+    match_processes: int = 1                # Processi per la ricerca immagini (0 = nel thread dei click)
+
+    @classmethod
+    def from_profile(cls, config):
+        """Costruisce la configurazione dal formato dei profili (get_current_config).
+
+        Solleva ValueError (o SequenceCompileError, SequenceFileError) se un valore non
+        è valido. Con sequence_file la sequenza è mappata dal file binario: chi ha
+        finito di eseguirla chiama sequence.close().
+        """
+        basic = config.get('basic_settings', {})
+        advanced = config.get('advanced_settings', {})
+        sequence = config.get('sequence_settings', {})
+
+        min_interval = float(basic.get('min_interval', 1))
+        max_interval = float(basic.get('max_interval', 5))
+        if min_interval <= 0 or max_interval <= 0:
+            raise ValueError("Gli intervalli devono essere maggiori di 0")
+        if min_interval > max_interval:
+            raise ValueError("L'intervallo minimo deve essere minore del massimo")
+
+        max_clicks = None
+        if not basic.get('infinite_clicks', True):
+            max_clicks = int(basic.get('max_clicks', 100))
+            if max_clicks <= 0:
+                raise ValueError("Il numero massimo di click deve essere maggiore di 0")
+
+        click_type = advanced.get('click_type', 'left')
+        if click_type not in BUTTON_CODES:
+            raise ValueError(f"Tipo di click non valido: {click_type}")
+
+        fixed_x = int(advanced.get('fixed_x', 100))
+        fixed_y = int(advanced.get('fixed_y', 100))
+        use_current_position = bool(advanced.get('use_current_position', True))
+        if not use_current_position:
+            if fixed_x < 0 or fixed_y < 0 or fixed_x > MAX_COORDINATE or fixed_y > MAX_COORDINATE:
+                raise ValueError(f"Coordinate fisse non valide: ({fixed_x}, {fixed_y})")
+
+        target = None
+        target_image = advanced.get('target_image')
+        if target_image:
+            if not isinstance(target_image, str) or not os.path.isfile(target_image):
+                raise ValueError(f"Immagine bersaglio non trovata: {target_image}")
+            threshold = float(advanced.get('target_threshold', 0.8))
+            if not 0 < threshold <= 1:
+                raise ValueError(f"Soglia dell'immagine bersaglio non valida: {threshold}")
+            try:
+                scales = parse_scales(advanced.get('target_scales'))
+            except ValueError as e:
+                raise ValueError(f"Immagine bersaglio: {e}")
+            target = ImageTarget(target_image, threshold, scales=scales)
+
+        capture_ttl = float(advanced.get('capture_ttl_ms', CAPTURE_TTL * 1000)) / 1000
+        if capture_ttl < 0:
+            raise ValueError("La validità della cattura dello schermo deve essere positiva")
+
+        match_processes = int(advanced.get('match_processes', 1))
+        if not 0 <= match_processes <= 8:
+            raise ValueError(f"Numero di processi per la ricerca immagini non valido: {match_processes}")
+
+        initial_delay = float(advanced.get('initial_delay', 3))
+        if initial_delay < 0:
+            raise ValueError("Il ritardo iniziale deve essere positivo")
+
+        sequence_repeats = None
+        if not sequence.get('infinite_sequence', False):
+            sequence_repeats = int(sequence.get('sequence_repeats', 1))
+            if sequence_repeats <= 0:
+                raise ValueError("Numero di ripetizioni non valido")
+
+        sequence_pause = float(sequence.get('sequence_pause', 1.0))
+        if sequence_pause < 0:
+            raise ValueError("Pausa sequenza non valida")
+
+        # Aperta per ultima: nessun'altra validazione può lasciare il file mappato
+        sequence_file = sequence.get('sequence_file')
+        if sequence_file:
+            program = open_sequence_file(sequence_file)
+        else:
+            program = compile_sequence(sequence.get('current_sequence', []))
+
+        return cls(
+            min_interval=min_interval,
+            max_interval=max_interval,
+            max_clicks=max_clicks,
+            click_type=click_type,
+            double_click=bool(advanced.get('double_click', False)),
+            use_current_position=use_current_position,
+            fixed_x=fixed_x,
+            fixed_y=fixed_y,
+            initial_delay=initial_delay,
+            click_backend=advanced.get('click_backend', 'pyautogui'),
+            file_log=bool(advanced.get('file_log', False)),
+            file_log_compress=bool(advanced.get('file_log_compress', False)),
+            sequence_mode=sequence.get('execution_mode', 'single') == 'sequence',
+            sequence=program,
+            sequence_repeats=sequence_repeats,
+            sequence_pause=sequence_pause,
+            target=target,
+            capture_ttl=capture_ttl,
+            match_processes=match_processes,
+        )
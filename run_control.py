@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Run Control - Segnalazione avvio/stop/pausa per il thread di click
+Autore: Andrea Piani
+Descrizione: Sostituisce il polling del flag is_running con attese su Condition,
+             così stop, pausa e ripresa svegliano subito il thread di lavoro
+"""
+
+import threading
+import time
+from click_clock import SYSTEM_CLOCK
+
+
+class RunControl:
+    """Stato di esecuzione condiviso tra interfaccia e thread di click"""
+
+    def __init__(self, clock=None):
+        # Con un orologio virtuale sleep() avanza il tempo senza attendere
+        self.clock = clock or SYSTEM_CLOCK
+        self._cond = threading.Condition()
+        self._halted = threading.Event()
+        self._halted.set()
+        self._running = False
+        self._paused = False
+        self._stop_requested_at = None
+        self._paused_at = None
+
+        # Latenza tra stop() e arresto effettivo del thread (secondi)
+        self.stop_latency = None
+        # Tempo totale trascorso in pausa nell'esecuzione corrente (secondi, sull'orologio)
+        self.paused_time = 0.0
+
+    @property
+    def is_running(self):
+        """True se l'esecuzione è attiva (anche se in pausa)"""
+        return self._running
+
+    @property
+    def is_paused(self):
+        """True se l'esecuzione è in pausa"""
+        return self._paused
+
+    def start(self):
+        """Segnala l'avvio di una nuova esecuzione"""
+        with self._cond:
+            self._running = True
+            self._paused = False
+            self._stop_requested_at = None
+            self._paused_at = None
+            self.stop_latency = None
+            self.paused_time = 0.0
+            self._halted.clear()
+            self._cond.notify_all()
+
+    def stop(self):
+        """Richiede lo stop e sveglia immediatamente il thread di click"""
+        with self._cond:
+            if self._running:
+                self._stop_requested_at = time.perf_counter()
+            self._running = False
+            self._paused = False
+            self._cond.notify_all()
+
+    def pause(self):
+        """Mette in pausa l'esecuzione"""
+        with self._cond:
+            if self._running:
+                if not self._paused:
+                    self._paused_at = self.clock.now()
+                self._paused = True
+                self._cond.notify_all()
+
+    def resume(self):
+        """Riprende l'esecuzione dopo una pausa"""
+        with self._cond:
+            if self._paused and self._paused_at is not None:
+                self.paused_time += self.clock.now() - self._paused_at
+                self._paused_at = None
+            self._paused = False
+            self._cond.notify_all()
+
+    def paused_seconds(self):
+        """Tempo in pausa dall'avvio, compresa la pausa in corso (secondi, sull'orologio)"""
+        with self._cond:
+            paused = self.paused_time
+            if self._paused and self._paused_at is not None:
+                paused += self.clock.now() - self._paused_at
+            return paused
+
+    def sleep(self, timeout):
+        """Attende timeout secondi restando reattivo a stop e pausa.
+
+        Durante la pausa l'attesa si blocca finché non arriva resume() o stop().
+        Restituisce False se è stato richiesto lo stop, True altrimenti.
+        """
+        if self.clock.virtual:
+            if not self.wait_if_paused():
+                return False
+            self.clock.sleep(timeout)
+            return True
+
+        with self._cond:
+            deadline = time.perf_counter() + timeout
+            while self._running:
+                if self._paused:
+                    self._cond.wait()
+                    continue
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    return True
+                self._cond.wait(remaining)
+            return False
+
+    def wait_if_paused(self):
+        """Blocca finché in pausa; restituisce False se è stato richiesto lo stop"""
+        with self._cond:
+            while self._running and self._paused:
+                self._cond.wait()
+            return self._running
+
+    def mark_halted(self):
+        """Chiamata dal thread di click quando termina: misura la latenza di stop"""
+        if self._stop_requested_at is not None:
+            self.stop_latency = time.perf_counter() - self._stop_requested_at
+        self._halted.set()
+
+    def wait_halted(self, timeout=None):
+        """Attende che il thread di click sia effettivamente terminato"""
+        return self._halted.wait(timeout)
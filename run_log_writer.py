@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Run Log Writer - Log strutturato delle esecuzioni su file JSONL a rotazione
+Autore: Andrea Piani
+Descrizione: Il thread di click accoda record (dict) senza bloccarsi; un thread in
+             background li scrive a blocchi con un solo flush per blocco e ruota i file
+             per dimensione, comprimendo opzionalmente con gzip i file ruotati
+"""
+
+import gzip
+import json
+import os
+import queue
+import shutil
+import threading
+
+
+class RunLogWriter:
+    """Scrittore in background di record JSONL con rotazione per dimensione"""
+
+    _STOP = object()
+
+    def __init__(self, log_dir="logs", filename="clicks.jsonl",
+                 max_bytes=10 * 1024 * 1024, backup_count=10, compress=False,
+                 batch_size=1000, flush_interval=0.5):
+        self.log_dir = log_dir
+        self.path = os.path.join(log_dir, filename)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.compress = compress
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._file = None
+
+        # Statistiche
+        self.records_written = 0
+        self.batches_written = 0
+        self.rotations = 0
+        self.errors = 0
+
+    def start(self):
+        """Apre il file e avvia il thread di scrittura"""
+        os.makedirs(self.log_dir, exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._thread = threading.Thread(target=self._run, name="RunLogWriter", daemon=True)
+        self._thread.start()
+        return self
+
+    def write(self, record):
+        """Accoda un record (dict serializzabile in JSON); non blocca mai"""
+        self._queue.put(record)
+
+    def close(self, timeout=5.0):
+        """Scrive i record rimasti in coda e chiude il file"""
+        if self._thread is None:
+            return
+        self._queue.put(self._STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        get = self._queue.get
+        get_nowait = self._queue.get_nowait
+        stopping = False
+
+        while not stopping:
+            try:
+                item = get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = []
+            while True:
+                if item is self._STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._write_batch(batch)
+
+        try:
+            self._file.close()
+        except Exception:
+            pass
+
+    def _write_batch(self, batch):
+        """Serializza il blocco e lo scrive con una sola write e un solo flush"""
+        try:
+            dumps = json.dumps
+            data = "".join(dumps(record, ensure_ascii=False, default=str) + "\n" for record in batch)
+            self._file.write(data)
+            self._file.flush()
+            self.records_written += len(batch)
+            self.batches_written += 1
+
+            if self._file.tell() >= self.max_bytes:
+                self._rotate()
+        except Exception as e:
+            self.errors += 1
+            print(f"Errore scrittura log su file: {e}")
+
+    def _backup_name(self, index):
+        suffix = ".gz" if self.compress else ""
+        return f"{self.path}.{index}{suffix}"
+
+    def _rotate(self):
+        """Ruota i file: clicks.jsonl -> clicks.jsonl.1[.gz] -> ... -> backup_count"""
+        self._file.close()
+        try:
+            if self.backup_count > 0:
+                oldest = self._backup_name(self.backup_count)
+                if os.path.exists(oldest):
+                    os.remove(oldest)
+                for index in range(self.backup_count - 1, 0, -1):
+                    source = self._backup_name(index)
+                    if os.path.exists(source):
+                        os.replace(source, self._backup_name(index + 1))
+
+                if self.compress:
+                    with open(self.path, 'rb') as source, gzip.open(self._backup_name(1), 'wb') as target:
+                        shutil.copyfileobj(source, target)
+                    os.remove(self.path)
+                else:
+                    os.replace(self.path, self._backup_name(1))
+            else:
+                os.remove(self.path)
+            self.rotations += 1
+        finally:
+            # Anche se la rotazione fallisce (file bloccato su Windows, disco pieno) il log
+            # resta attivo: si continua sul file corrente e la rotazione viene ritentata
+            self._file = open(self.path, 'a', encoding='utf-8')
@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Screen Capture - Cattura di regioni dello schermo per la ricerca visiva
+Autore: Andrea Piani
+Descrizione: Cattura solo la regione richiesta invece dell'intero schermo. Su X11 usa
+             XShmGetImage (memoria condivisa con il server: il fotogramma è una vista
+             NumPy sul segmento, senza copie) o, se MIT-SHM non è disponibile,
+             XGetSubImage in un buffer NumPy riusato; altrove pyautogui.
+             ScreenCapture tiene i fotogrammi per un breve TTL: più step della stessa
+             sequenza eseguiti di seguito condividono una sola cattura. ScreenCapture.color
+             legge solo il pixel (o il piccolo quadrato) di uno step di attesa colore
+"""
+
+import os
+import threading
+from typing import NamedTuple, Tuple
+
+from click_clock import SYSTEM_CLOCK
+
+# Validità predefinita di un fotogramma catturato (secondi)
+CAPTURE_TTL = 0.05
+
+# Costanti X11 (X.h, sys/ipc.h)
+Z_PIXMAP = 2
+IPC_PRIVATE = 0
+IPC_CREAT = 0o1000
+IPC_RMID = 0
+
+
+class CaptureError(OSError):
+    """Cattura dello schermo non disponibile o regione non valida"""
+
+
+class ColorWait(NamedTuple):
+    """Attesa di uno step: colore (r, g, b), scarto massimo per canale, timeout (s) e lato
+    del quadrato campionato attorno al punto (1 = solo il pixel, altrimenti colore medio)"""
+
+    color: Tuple[int, int, int]
+    tolerance: int = 16
+    timeout: float = 10.0
+    size: int = 1
+
+    def matches(self, color):
+        """True se color (r, g, b) è entro la tolleranza su ogni canale"""
+        tolerance = self.tolerance
+        return all(abs(a - b) <= tolerance for a, b in zip(color, self.color))
+
+
+def parse_color(value):
+    """Colore da '#rrggbb' o [r, g, b] a tupla (r, g, b); solleva ValueError"""
+    if isinstance(value, str):
+        text = value.strip().lstrip('#')
+        if len(text) != 6:
+            raise ValueError(f"Colore non valido: {value}")
+        color = tuple(int(text[i:i + 2], 16) for i in (0, 2, 4))
+    else:
+        try:
+            color = tuple(int(channel) for channel in value)
+        except TypeError:
+            raise ValueError(f"Colore non valido: {value}")
+        if len(color) != 3 or not all(0 <= channel <= 255 for channel in color):
+            raise ValueError(f"Colore non valido: {value}")
+    return color
+
+
+def format_color(color):
+    """Tupla (r, g, b) in '#rrggbb'"""
+    return '#{:02x}{:02x}{:02x}'.format(*color)
+
+
+_xlib = None
+_xlib_lock = threading.Lock()
+_x_errors = {}  # Display (indirizzo) -> ultimo codice di errore X11 ricevuto
+
+
+def load_xlib():
+    """Carica libX11, libXext e libc con ctypes (una volta); solleva CaptureError"""
+    global _xlib
+    with _xlib_lock:
+        if _xlib is not None:
+            return _xlib
+
+        import ctypes
+        import ctypes.util
+        from ctypes import POINTER, c_char_p, c_int, c_uint, c_ulong, c_void_p
+
+        class XImage(ctypes.Structure):
+            _fields_ = [('width', c_int), ('height', c_int), ('xoffset', c_int), ('format', c_int),
+                        ('data', c_void_p), ('byte_order', c_int), ('bitmap_unit', c_int),
+                        ('bitmap_bit_order', c_int), ('bitmap_pad', c_int), ('depth', c_int),
+                        ('bytes_per_line', c_int), ('bits_per_pixel', c_int),
+                        ('red_mask', c_ulong), ('green_mask', c_ulong), ('blue_mask', c_ulong),
+                        ('obdata', c_void_p), ('f', c_void_p * 6)]
+
+        class XShmSegmentInfo(ctypes.Structure):
+            _fields_ = [('shmseg', c_ulong), ('shmid', c_int), ('shmaddr', c_void_p), ('readOnly', c_int)]
+
+        try:
+            x11 = ctypes.CDLL(ctypes.util.find_library('X11') or 'libX11.so.6')
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        except OSError as e:
+            raise CaptureError(f"libX11 non disponibile: {e}")
+        try:
+            xext = ctypes.CDLL(ctypes.util.find_library('Xext') or 'libXext.so.6')
+        except OSError:
+            xext = None  # Solo XGetSubImage
+
+        image_p = POINTER(XImage)
+        signatures = (
+            (x11, 'XOpenDisplay', [c_char_p], c_void_p),
+            (x11, 'XCloseDisplay', [c_void_p], c_int),
+            (x11, 'XDefaultScreen', [c_void_p], c_int),
+            (x11, 'XRootWindow', [c_void_p, c_int], c_ulong),
+            (x11, 'XDefaultVisual', [c_void_p, c_int], c_void_p),
+            (x11, 'XDefaultDepth', [c_void_p, c_int], c_int),
+            (x11, 'XDisplayWidth', [c_void_p, c_int], c_int),
+            (x11, 'XDisplayHeight', [c_void_p, c_int], c_int),
+            (x11, 'XCreateImage', [c_void_p, c_void_p, c_uint, c_int, c_int, c_void_p, c_uint, c_uint, c_int, c_int],
+             image_p),
+            (x11, 'XGetSubImage', [c_void_p, c_ulong, c_int, c_int, c_uint, c_uint, c_ulong, c_int, image_p,
+                                   c_int, c_int], image_p),
+            (x11, 'XSync', [c_void_p, c_int], c_int),
+            (x11, 'XFree', [c_void_p], c_int),
+            (libc, 'shmget', [c_int, ctypes.c_size_t, c_int], c_int),
+            (libc, 'shmat', [c_int, c_void_p, c_int], c_void_p),
+            (libc, 'shmdt', [c_void_p], c_int),
+            (libc, 'shmctl', [c_int, c_int, c_void_p], c_int),
+        )
+        if xext is not None:
+            signatures += (
+                (xext, 'XShmQueryExtension', [c_void_p], c_int),
+                (xext, 'XShmCreateImage', [c_void_p, c_void_p, c_uint, c_int, c_void_p,
+                                           POINTER(XShmSegmentInfo), c_uint, c_uint], image_p),
+                (xext, 'XShmAttach', [c_void_p, POINTER(XShmSegmentInfo)], c_int),
+                (xext, 'XShmDetach', [c_void_p, POINTER(XShmSegmentInfo)], c_int),
+                (xext, 'XShmGetImage', [c_void_p, c_ulong, image_p, c_int, c_int, c_ulong], c_int),
+            )
+
+        functions = {'ctypes': ctypes, 'XImage': XImage, 'XShmSegmentInfo': XShmSegmentInfo,
+                     'has_shm': xext is not None, 'all_planes': c_ulong(-1).value}
+        try:
+            for library, name, argtypes, restype in signatures:
+                function = getattr(library, name)
+                function.argtypes = argtypes
+                function.restype = restype
+                functions[name] = function
+        except AttributeError as e:
+            raise CaptureError(f"Funzione X11 non disponibile: {e}")
+
+        # Gestore degli errori X11 di tutto il processo: registra quelli delle nostre
+        # connessioni e passa gli altri (es. quelli di Tk) al gestore precedente
+        handler_type = ctypes.CFUNCTYPE(c_int, c_void_p, c_void_p)
+        x11.XSetErrorHandler.argtypes = [handler_type]
+        x11.XSetErrorHandler.restype = c_void_p
+        previous = []
+
+        def on_error(display, event):
+            if display in _x_errors:
+                # XErrorEvent: type, display, resourceid, serial, poi error_code (unsigned char)
+                code = ctypes.cast(event, POINTER(ctypes.c_ubyte))[4 * ctypes.sizeof(ctypes.c_long)]
+                _x_errors[display] = code or 1
+                return 0
+            if previous and previous[0]:
+                return handler_type(previous[0])(display, event)
+            return 0
+
+        functions['error_handler'] = handler_type(on_error)  # Riferimento: non va raccolto
+        previous.append(x11.XSetErrorHandler(functions['error_handler']))
+
+        _xlib = functions
+        return _xlib
+
+
+class X11Capture:
+    """Cattura di regioni da un display X11 in buffer riusati, una per dimensione di regione.
+
+    Il fotogramma restituito (BGRA, shape (altezza, larghezza, 4)) è una vista sul
+    buffer della sua dimensione: resta valido fino alla cattura successiva con la
+    stessa dimensione. Una connessione va usata da un solo thread.
+    """
+
+    MAX_BUFFERS = 4
+
+    def __init__(self, display_name=None, use_shm=True):
+        if display_name is None and not os.environ.get('DISPLAY'):
+            raise CaptureError("DISPLAY non impostato")
+
+        import numpy as np
+
+        self._np = np
+        self._x = load_xlib()
+        self._display = self._x['XOpenDisplay'](display_name.encode() if display_name else None)
+        if not self._display:
+            raise CaptureError(f"Impossibile aprire il display X11 {display_name or os.environ.get('DISPLAY')}")
+        _x_errors[self._display] = 0
+
+        screen = self._x['XDefaultScreen'](self._display)
+        self._root = self._x['XRootWindow'](self._display, screen)
+        self._visual = self._x['XDefaultVisual'](self._display, screen)
+        self._depth = self._x['XDefaultDepth'](self._display, screen)
+        self.width = self._x['XDisplayWidth'](self._display, screen)
+        self.height = self._x['XDisplayHeight'](self._display, screen)
+        self.use_shm = bool(use_shm and self._x['has_shm'] and self._x['XShmQueryExtension'](self._display))
+        self._buffers = {}  # (larghezza, altezza) -> buffer (vedi _create_buffer)
+
+    @property
+    def mode(self):
+        return 'xshm' if self.use_shm else 'xgetimage'
+
+    def _check_errors(self):
+        """Sincronizza con il server e restituisce l'ultimo codice di errore (0 = nessuno)"""
+        self._x['XSync'](self._display, 0)
+        error = _x_errors.get(self._display, 0)
+        _x_errors[self._display] = 0
+        return error
+
+    def _create_buffer(self, width, height):
+        """Immagine X11 di width x height con i dati in un buffer riusabile e la sua vista NumPy"""
+        x = self._x
+        ctypes = x['ctypes']
+        np = self._np
+
+        if self.use_shm:
+            info = x['XShmSegmentInfo']()
+            image = x['XShmCreateImage'](self._display, self._visual, self._depth, Z_PIXMAP, None,
+                                         ctypes.byref(info), width, height)
+            if image and image.contents.bits_per_pixel == 32:
+                size = image.contents.bytes_per_line * height
+                info.shmid = x['shmget'](IPC_PRIVATE, size, IPC_CREAT | 0o600)
+                address = x['shmat'](info.shmid, None, 0) if info.shmid >= 0 else None
+                if address and address != ctypes.c_void_p(-1).value:
+                    info.shmaddr = address
+                    info.readOnly = 0
+                    image.contents.data = address
+                    attached = x['XShmAttach'](self._display, ctypes.byref(info))
+                    # Segmento rimosso appena tutti lo staccano (anche se il processo termina)
+                    x['shmctl'](info.shmid, IPC_RMID, None)
+                    if attached and not self._check_errors():
+                        data = (ctypes.c_ubyte * size).from_address(address)
+                        view = np.ndarray((height, width, 4), np.uint8, data,
+                                          strides=(image.contents.bytes_per_line, 4, 1))
+                        return {'image': image, 'shm': info, 'view': view}
+                    x['shmdt'](address)
+                elif info.shmid >= 0:
+                    x['shmctl'](info.shmid, IPC_RMID, None)
+                image.contents.data = None
+            if image:
+                x['XFree'](image)
+            # MIT-SHM presente ma non utilizzabile (es. display remoto o container)
+            self.use_shm = False
+
+        view = np.empty((height, width, 4), np.uint8)
+        image = x['XCreateImage'](self._display, self._visual, self._depth, Z_PIXMAP, 0,
+                                  view.ctypes.data, width, height, 32, width * 4)
+        if not image or image.contents.bits_per_pixel != 32:
+            if image:
+                image.contents.data = None
+                x['XFree'](image)
+            raise CaptureError(f"Formato dello schermo non supportato (profondità {self._depth})")
+        return {'image': image, 'shm': None, 'view': view}
+
+    def _free_buffer(self, buffer):
+        x = self._x
+        ctypes = x['ctypes']
+        image = buffer['image']
+        if buffer['shm'] is not None:
+            x['XShmDetach'](self._display, ctypes.byref(buffer['shm']))
+            x['XSync'](self._display, 0)
+            x['shmdt'](buffer['shm'].shmaddr)
+        image.contents.data = None  # I dati non sono di Xlib: libera solo la struttura
+        x['XFree'](image)
+
+    def grab(self, left, top, width, height):
+        """Regione (left, top, width, height) già interna allo schermo, come vista BGRA"""
+        key = (width, height)
+        buffer = self._buffers.pop(key, None)
+        if buffer is None:
+            if len(self._buffers) >= self.MAX_BUFFERS:
+                # Il buffer usato meno di recente (i dict mantengono l'ordine di inserimento)
+                self._free_buffer(self._buffers.pop(next(iter(self._buffers))))
+            buffer = self._create_buffer(width, height)
+        self._buffers[key] = buffer
+
+        x = self._x
+        if buffer['shm'] is not None:
+            ok = x['XShmGetImage'](self._display, self._root, buffer['image'], left, top, x['all_planes'])
+        else:
+            ok = x['XGetSubImage'](self._display, self._root, left, top, width, height, x['all_planes'],
+                                   Z_PIXMAP, buffer['image'], 0, 0)
+        error = self._check_errors()
+        if not ok or error:
+            raise CaptureError(f"Cattura della regione {(left, top, width, height)} fallita (errore X11 {error})")
+        return buffer['view']
+
+    def close(self):
+        if not self._display:
+            return
+        for buffer in self._buffers.values():
+            self._free_buffer(buffer)
+        self._buffers = {}
+        self._x['XCloseDisplay'](self._display)
+        _x_errors.pop(self._display, None)
+        self._display = None
+
+
+class PyAutoGUICapture:
+    """Cattura con pyautogui (pyscreeze), per i sistemi senza X11; converte in BGRA"""
+
+    mode = 'pyautogui'
+
+    def __init__(self):
+        try:
+            import cv2
+            import numpy as np
+            import pyautogui
+        except ImportError as e:
+            raise CaptureError(f"Cattura non disponibile: {e}")
+        self._cv2 = cv2
+        self._np = np
+        self._pyautogui = pyautogui
+        self.width, self.height = pyautogui.size()
+        self._buffers = {}
+
+    def grab(self, left, top, width, height):
+        image = self._np.asarray(self._pyautogui.screenshot(region=(left, top, width, height)))
+        view = self._buffers.get((width, height))
+        if view is None:
+            view = self._buffers[(width, height)] = self._np.empty((height, width, 4), self._np.uint8)
+        self._cv2.cvtColor(image, self._cv2.COLOR_RGB2BGRA, dst=view)
+        return view
+
+    def close(self):
+        self._buffers = {}
+
+
+def open_capture_backend(display_name=None):
+    """X11 (XShm o XGetImage) se disponibile, altrimenti pyautogui"""
+    try:
+        return X11Capture(display_name)
+    except CaptureError:
+        return PyAutoGUICapture()
+
+
+class ScreenCapture:
+    """Regioni dello schermo con cache a TTL, in BGRA o in scala di grigi.
+
+    Una regione contenuta in un fotogramma catturato da meno di ttl secondi
+    viene servita come vista su quel fotogramma, senza una nuova cattura.
+    Le viste restano valide fino alla cattura successiva della stessa dimensione.
+    """
+
+    def __init__(self, ttl=CAPTURE_TTL, clock=None, backend=None):
+        self.ttl = ttl
+        self.clock = clock or SYSTEM_CLOCK
+        self._backend = backend
+        # Fotogrammi recenti: [istante, (left, top, width, height), bgra, gray o None]
+        self._frames = []
+        self.captures = 0
+        self.hits = 0
+
+    @property
+    def backend(self):
+        """Backend di cattura, aperto al primo uso (dal thread che cattura)"""
+        if self._backend is None:
+            self._backend = open_capture_backend()
+        return self._backend
+
+    def clip(self, region):
+        """Regione (left, top, width, height) limitata allo schermo; None = schermo intero"""
+        backend = self.backend
+        if region is None:
+            return 0, 0, backend.width, backend.height
+        left, top, width, height = region
+        right = min(left + width, backend.width)
+        bottom = min(top + height, backend.height)
+        left, top = max(0, left), max(0, top)
+        if right <= left or bottom <= top:
+            raise CaptureError(f"Regione fuori dallo schermo: {region}")
+        return left, top, right - left, bottom - top
+
+    def _frame(self, region):
+        """Fotogramma che contiene region (dalla cache o nuovo) e offset della regione al suo interno"""
+        left, top, width, height = region
+        now = self.clock.now()
+        self._frames = [frame for frame in self._frames if now - frame[0] <= self.ttl]
+        for frame in self._frames:
+            frame_left, frame_top, frame_width, frame_height = frame[1]
+            if (frame_left <= left and frame_top <= top and left + width <= frame_left + frame_width
+                    and top + height <= frame_top + frame_height):
+                self.hits += 1
+                return frame, left - frame_left, top - frame_top
+
+        bgra = self.backend.grab(left, top, width, height)
+        self.captures += 1
+        # Il buffer di questa dimensione è stato riscritto: i fotogrammi che lo usavano non valgono più
+        self._frames = [frame for frame in self._frames if frame[2].shape != bgra.shape]
+        frame = [now, region, bgra, None]
+        self._frames.append(frame)
+        return frame, 0, 0
+
+    def grab(self, region=None):
+        """Regione in BGRA (vista, non copia) e la sua origine (left, top) sullo schermo"""
+        region = self.clip(region)
+        frame, dx, dy = self._frame(region)
+        return frame[2][dy:dy + region[3], dx:dx + region[2]], region[:2]
+
+    def grab_gray(self, region=None):
+        """Regione in scala di grigi e la sua origine; la conversione è fatta una volta per fotogramma"""
+        region = self.clip(region)
+        frame, dx, dy = self._frame(region)
+        if frame[3] is None:
+            import cv2
+            frame[3] = cv2.cvtColor(frame[2], cv2.COLOR_BGRA2GRAY)
+        return frame[3][dy:dy + region[3], dx:dx + region[2]], region[:2]
+
+    def color(self, x, y, size=1):
+        """Colore (r, g, b) del pixel (x, y), o medio del quadrato size x size centrato lì.
+
+        Sempre una cattura nuova (mai dalla cache): serve a chi attende un cambiamento.
+        Cattura solo quei pixel, senza lo screenshot intero di pyautogui.pixel.
+        """
+        region = self.clip((x - size // 2, y - size // 2, size, size))
+        bgra = self.backend.grab(*region)
+        self.captures += 1
+        self._frames = [frame for frame in self._frames if frame[2].shape != bgra.shape]
+        if bgra.shape[0] == 1 and bgra.shape[1] == 1:
+            blue, green, red = bgra[0, 0, :3].tolist()
+            return red, green, blue
+        blue, green, red = bgra[:, :, :3].mean(axis=(0, 1)).round().astype(int).tolist()
+        return red, green, blue
+
+    def invalidate(self):
+        """Scarta i fotogrammi in cache (es. dopo un click che cambia lo schermo)"""
+        self._frames = []
+
+    def close(self):
+        self._frames = []
+        if self._backend is not None:
+            self._backend.close()
+            self._backend = None
@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sequence File - Formato binario compatto delle sequenze di click
+Autore: Andrea Piani
+Descrizione: Salva un SequenceProgram in un file .seq a record fissi (18 byte per step)
+             e lo riapre con mmap: gli array del programma sono viste sul file, quindi
+             anche un milione di step si apre all'istante senza occupare heap.
+             SequenceFileWriter scrive invece step per step (registrazione in streaming).
+             I percorsi degli step di movimento stanno nel file affiancato <file>.paths.
+             Il profilo JSON fa riferimento al file con sequence_settings.sequence_file
+Utilizzo: python sequence_file.py profiles/foo.json [--output profiles/foo.seq]
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from profile_files import ProfileError, profile_reference, read_profile
+from motion_path import MotionPath
+from sequence_program import BUTTON_CODES, FLAG_DOUBLE, FLAG_PATH, SequenceProgram, compile_sequence
+
+# Intestazione v1: magic, versione, byte per step, numero di step (little endian)
+MAGIC = b'MCSQ'
+VERSION = 2
+HEADER_V1 = struct.Struct('<4sHHQ')
+# v2 aggiunge gli step riservati per colonna: il file può crescere mentre si registra
+HEADER = struct.Struct('<4sHHQQ')
+COUNT_OFFSET = 8
+COUNT = struct.Struct('<Q')
+
+# Colonne nell'ordine su disco: (attributo, typecode array, byte per valore).
+# Una colonna per campo permette a memoryview.cast di esporre il file come array
+COLUMNS = (('xs', 'i', 4), ('ys', 'i', 4), ('buttons', 'B', 1), ('flags', 'B', 1), ('delays', 'd', 8))
+STEP_SIZE = sum(size for _, _, size in COLUMNS)
+COLUMN_STRUCTS = {name: struct.Struct('<' + typecode) for name, typecode, _ in COLUMNS}
+
+SEQUENCE_EXTENSION = '.seq'
+
+# File dei percorsi: intestazione, poi per ogni step di movimento (indice, punti)
+# seguiti dalle colonne int32 xs, int32 ys, uint32 ms. Solo in coda: si scrive in streaming
+PATHS_SUFFIX = '.paths'
+PATHS_MAGIC = b'MCPT'
+PATHS_VERSION = 1
+PATHS_HEADER = struct.Struct('<4sH')
+PATH_RECORD = struct.Struct('<QI')
+
+
+class SequenceFileError(ValueError):
+    """File di sequenza mancante, troncato o in un formato non riconosciuto"""
+
+
+def column_offsets(capacity, header_size=HEADER.size):
+    """Offset di ogni colonna per capacity step riservati e dimensione totale del file"""
+    offsets = {}
+    offset = header_size
+    for name, _, size in COLUMNS:
+        # Allineamento naturale: i double partono da un multiplo di 8
+        offset += -offset % size
+        offsets[name] = offset
+        offset += size * capacity
+    return offsets, offset
+
+
+def paths_file_path(path):
+    """File affiancato con i percorsi degli step di movimento"""
+    return path + PATHS_SUFFIX
+
+
+def pack_path_record(index, motion_path):
+    """Record del file dei percorsi per lo step index"""
+    columns = []
+    for column in (motion_path.xs, motion_path.ys, motion_path.ts):
+        if sys.byteorder != 'little':
+            column = array(column.typecode, column)
+            column.byteswap()
+        columns.append(column.tobytes())
+    return PATH_RECORD.pack(index, len(motion_path)) + b''.join(columns)
+
+
+def write_paths_file(path, paths):
+    """Scrive (o rimuove, se non ci sono percorsi) il file dei percorsi di path"""
+    paths_path = paths_file_path(path)
+    if not paths:
+        if os.path.exists(paths_path):
+            os.remove(paths_path)
+        return
+
+    temp_path = paths_path + ".tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(PATHS_HEADER.pack(PATHS_MAGIC, PATHS_VERSION))
+            for index in sorted(paths):
+                f.write(pack_path_record(index, paths[index]))
+        os.replace(temp_path, paths_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def read_paths_file(path, count):
+    """Percorsi degli step di movimento di path ({indice: MotionPath}); {} se non ci sono.
+
+    I record oltre count vengono ignorati: sono di step mai completati
+    (registrazione interrotta tra il percorso e lo step).
+    """
+    try:
+        with open(paths_file_path(path), 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return {}
+    except OSError as e:
+        raise SequenceFileError(f"File dei percorsi non leggibile: {e}")
+
+    if len(data) < PATHS_HEADER.size:
+        raise SequenceFileError(f"File dei percorsi troncato: {path}")
+    magic, version = PATHS_HEADER.unpack_from(data)
+    if magic != PATHS_MAGIC or version != PATHS_VERSION:
+        raise SequenceFileError(f"File dei percorsi non riconosciuto: {path}")
+
+    paths = {}
+    offset = PATHS_HEADER.size
+    while offset < len(data):
+        if offset + PATH_RECORD.size > len(data):
+            break  # Record interrotto durante la scrittura
+        index, points = PATH_RECORD.unpack_from(data, offset)
+        offset += PATH_RECORD.size
+        end = offset + 12 * points
+        if points == 0 or end > len(data):
+            break
+        columns = []
+        for typecode in ('i', 'i', 'I'):
+            column = array(typecode, data[offset:offset + 4 * points])
+            if sys.byteorder != 'little':
+                column.byteswap()
+            columns.append(column)
+            offset += 4 * points
+        if index < count:
+            paths[index] = MotionPath(*columns)
+    return paths
+
+
+def write_sequence_file(path, program):
+    """Scrive program nel formato binario in modo atomico (file temporaneo e rename)"""
+    if program.targets:
+        raise SequenceFileError("Gli step immagine non sono supportati nel formato binario")
+    if program.waits:
+        raise SequenceFileError("Le attese di colore non sono supportate nel formato binario")
+    if program.anchors:
+        raise SequenceFileError("Gli step ancorati a una finestra non sono supportati nel formato binario")
+    count = len(program)
+    offsets, _ = column_offsets(count)
+    temp_path = path + ".tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, STEP_SIZE, count, count))
+            for name, typecode, _ in COLUMNS:
+                f.write(b'\0' * (offsets[name] - f.tell()))
+                column = getattr(program, name)
+                if sys.byteorder != 'little':
+                    column = array(typecode, column)
+                    column.byteswap()
+                f.write(memoryview(column).cast('B'))
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    write_paths_file(path, program.paths)
+
+
+def read_header(f, path):
+    """Legge e verifica l'intestazione; restituisce (step, step riservati, byte di intestazione)"""
+    data = f.read(HEADER.size)
+    if len(data) < HEADER_V1.size:
+        raise SequenceFileError(f"File di sequenza troncato: {path}")
+    magic, version, step_size, count = HEADER_V1.unpack_from(data)
+    if magic != MAGIC:
+        raise SequenceFileError(f"Non è un file di sequenza: {path}")
+    if version not in (1, VERSION) or step_size != STEP_SIZE:
+        raise SequenceFileError(f"Versione del file di sequenza non supportata ({version}): {path}")
+    if version == 1:
+        return count, count, HEADER_V1.size
+
+    if len(data) < HEADER.size:
+        raise SequenceFileError(f"File di sequenza troncato: {path}")
+    capacity = HEADER.unpack(data)[4]
+    if capacity < count:
+        raise SequenceFileError(f"Intestazione del file di sequenza non valida: {path}")
+    return count, capacity, HEADER.size
+
+
+def read_step_count(path):
+    """Numero di step di un file di sequenza, leggendo solo l'intestazione"""
+    with open(path, 'rb') as f:
+        return read_header(f, path)[0]
+
+
+class MappedSequence:
+    """Sequenza letta con mmap: stessi attributi di SequenceProgram, in sola lettura"""
+
+    def __init__(self, path):
+        self.path = path
+        self.targets = {}  # Step immagine, attese di colore e ancoraggi restano nel profilo JSON
+        self.waits = {}
+        self.anchors = {}
+        self._file = None
+        self._mmap = None
+        self._views = []
+
+        try:
+            self._file = open(path, 'rb')
+        except OSError as e:
+            raise SequenceFileError(f"File di sequenza non leggibile: {e}")
+
+        try:
+            count, capacity, header_size = read_header(self._file, path)
+            offsets, size = column_offsets(capacity, header_size)
+            if os.fstat(self._file.fileno()).st_size < size:
+                raise SequenceFileError(f"File di sequenza troncato: {path}")
+
+            self._mmap = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_READ)
+            buffer = memoryview(self._mmap)
+            self._views.append(buffer)
+            for name, typecode, item_size in COLUMNS:
+                start = offsets[name]
+                view = buffer[start:start + item_size * count].cast(typecode)
+                self._views.append(view)
+                setattr(self, name, view)
+            self.paths = read_paths_file(path, count)
+        except Exception:
+            self.close()
+            raise
+
+    def __len__(self):
+        return len(self.xs)
+
+    step = SequenceProgram.step
+
+    def close(self):
+        """Rilascia le viste e chiude la mappatura (gli array non sono più utilizzabili)"""
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def load_sequence_file(path):
+    """Legge il file in un SequenceProgram in memoria (host big endian)"""
+    program = SequenceProgram()
+    with open(path, 'rb') as f:
+        count, capacity, header_size = read_header(f, path)
+        offsets, _ = column_offsets(capacity, header_size)
+        for name, typecode, size in COLUMNS:
+            f.seek(offsets[name])
+            column = getattr(program, name)
+            data = f.read(size * count)
+            if len(data) < size * count:
+                raise SequenceFileError(f"File di sequenza troncato: {path}")
+            column.frombytes(data)
+            column.byteswap()
+    program.paths = read_paths_file(path, count)
+    return program
+
+
+def open_sequence_file(path):
+    """Apre un file di sequenza per l'esecuzione: mmap se il formato è quello nativo"""
+    if sys.byteorder == 'little':
+        return MappedSequence(path)
+    try:
+        return load_sequence_file(path)
+    except OSError as e:
+        raise SequenceFileError(f"File di sequenza non leggibile: {e}")
+
+
+class SequenceFileWriter:
+    """Scrive una sequenza su file uno step alla volta, senza tenerla in memoria.
+
+    Le colonne sono riservate per capacity step e raddoppiano quando si riempiono
+    (spostamento in place, costo ammortizzato costante). Il numero di step
+    nell'intestazione viene aggiornato ad ogni append: se il processo termina
+    il file resta leggibile fino all'ultimo step scritto. close() compatta le
+    colonne, così il file finale non contiene spazio riservato.
+    """
+
+    def __init__(self, path, capacity=1024):
+        self.path = path
+        self.count = 0
+        self.capacity = max(1, capacity)
+        self._file = open(path, 'w+b')
+        self._offsets, size = column_offsets(self.capacity)
+        self._file.truncate(size)
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+        HEADER.pack_into(self._mmap, 0, MAGIC, VERSION, STEP_SIZE, 0, self.capacity)
+        # File dei percorsi aperto al primo step di movimento; quello di una registrazione precedente va via
+        self._paths_file = None
+        if os.path.exists(paths_file_path(path)):
+            os.remove(paths_file_path(path))
+
+    def __len__(self):
+        return self.count
+
+    def append(self, x, y, button, double, delay):
+        """Aggiunge uno step già validato (button come nome: 'left', 'middle', 'right')"""
+        self._append(x, y, BUTTON_CODES[button], FLAG_DOUBLE if double else 0, delay)
+
+    def append_path(self, motion_path, delay):
+        """Aggiunge uno step di movimento: prima il percorso, poi lo step che lo rende visibile"""
+        if self._paths_file is None:
+            self._paths_file = open(paths_file_path(self.path), 'wb')
+            self._paths_file.write(PATHS_HEADER.pack(PATHS_MAGIC, PATHS_VERSION))
+        self._paths_file.write(pack_path_record(self.count, motion_path))
+        self._paths_file.flush()
+
+        x, y = motion_path.end
+        self._append(x, y, 0, FLAG_PATH, delay)
+
+    def _append(self, x, y, button_code, flags, delay):
+        if self.count == self.capacity:
+            self._relocate(self.capacity * 2)
+
+        index = self.count
+        mm = self._mmap
+        offsets = self._offsets
+        for name, value in (('xs', x), ('ys', y), ('buttons', button_code),
+                            ('flags', flags), ('delays', delay)):
+            packer = COLUMN_STRUCTS[name]
+            packer.pack_into(mm, offsets[name] + packer.size * index, value)
+
+        self.count = index + 1
+        COUNT.pack_into(mm, COUNT_OFFSET, self.count)
+
+    def set_delay(self, index, delay):
+        """Aggiorna la pausa dopo uno step già scritto (es. appena noto l'istante del successivo)"""
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        packer = COLUMN_STRUCTS['delays']
+        packer.pack_into(self._mmap, self._offsets['delays'] + packer.size * index, delay)
+
+    def _relocate(self, capacity):
+        """Sposta le colonne per una nuova capacità, ridimensionando il file"""
+        old_offsets = self._offsets
+        offsets, size = column_offsets(capacity)
+        growing = capacity > self.capacity
+
+        if growing:
+            self._mmap.close()
+            self._file.truncate(size)
+            self._mmap = mmap.mmap(self._file.fileno(), size)
+
+        # Crescita: dall'ultima colonna (si spostano in avanti); compattazione: dalla prima
+        columns = reversed(COLUMNS) if growing else COLUMNS
+        for name, _, item_size in columns:
+            self._mmap.move(offsets[name], old_offsets[name], item_size * self.count)
+
+        self.capacity = capacity
+        self._offsets = offsets
+        HEADER.pack_into(self._mmap, 0, MAGIC, VERSION, STEP_SIZE, self.count, capacity)
+
+        if not growing:
+            self._mmap.close()
+            self._file.truncate(size)
+            self._mmap = mmap.mmap(self._file.fileno(), size)
+
+    def flush(self):
+        """Forza su disco gli step scritti finora"""
+        self._mmap.flush()
+        if self._paths_file is not None:
+            os.fsync(self._paths_file.fileno())
+
+    def close(self):
+        """Compatta il file al numero di step scritti e lo chiude"""
+        if self._file is None:
+            return
+        if self.capacity > self.count:
+            self._relocate(max(1, self.count))
+        self._mmap.flush()
+        self._mmap.close()
+        self._file.close()
+        self._file = None
+        if self._paths_file is not None:
+            self._paths_file.close()
+            self._paths_file = None
+
+
+def main(argv=None):
+    """Converte la sequenza JSON di un profilo in un file .seq referenziato dal profilo"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Converte la sequenza di un profilo nel formato binario")
+    parser.add_argument('profile', help="file profilo JSON")
+    parser.add_argument('--output', default=None, help="file .seq (predefinito: accanto al profilo)")
+    args = parser.parse_args(argv)
+
+    try:
+        config = read_profile(args.profile)
+        if config['sequence_settings'].get('sequence_file'):
+            raise ProfileError("Il profilo fa già riferimento a un file di sequenza")
+        steps = config['sequence_settings'].get('current_sequence') or []
+        if not steps:
+            raise ProfileError("Il profilo non contiene una sequenza da convertire")
+        program = compile_sequence(steps)
+        # read_profile rende assoluti i percorsi: si riscrive il JSON originale
+        with open(args.profile, 'r', encoding='utf-8') as f:
+            raw = json.load(f)
+    except (ProfileError, ValueError) as e:
+        print(f"Errore: {e}", file=sys.stderr)
+        return 1
+
+    output = args.output or os.path.splitext(args.profile)[0] + SEQUENCE_EXTENSION
+    try:
+        write_sequence_file(output, program)
+    except SequenceFileError as e:
+        print(f"Errore: {e}", file=sys.stderr)
+        return 1
+
+    sequence = raw['sequence_settings']
+    sequence['current_sequence'] = []
+    sequence['sequence_file'] = profile_reference(output, os.path.dirname(os.path.abspath(args.profile)))
+
+    temp_path = args.profile + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(raw, f, indent=2, ensure_ascii=False)
+    os.replace(temp_path, args.profile)
+
+    print(f"{len(program)} step scritti in {output} ({os.path.getsize(output)} byte)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Sequence Program - Compilazione delle sequenze di click
+Autore: Andrea Piani
+Descrizione: Valida una sola volta la sequenza (lista di dict) e la trasforma in un
+             programma compatto basato su array, eseguito senza conversioni per step
+"""
+
+import os
+from array import array
+
+from motion_path import MotionPath
+from screen_capture import ColorWait, format_color, parse_color
+from template_matcher import ImageTarget, parse_scales
+from window_tracker import WindowAnchor
+
+
+# Pulsanti: codice numerico <-> nome pyautogui
+BUTTON_NAMES = ('left', 'middle', 'right')
+BUTTON_CODES = {name: code for code, name in enumerate(BUTTON_NAMES)}
+
+# Flag per step
+FLAG_DOUBLE = 1
+FLAG_PATH = 2       # Step di movimento: percorso in program.paths, nessun click
+FLAG_IMAGE = 4      # Click sull'immagine in program.targets: x, y sono calcolati all'esecuzione
+FLAG_WAIT = 8       # Attesa del colore in program.waits nel punto x, y, nessun click
+FLAG_WINDOW = 16    # x, y relativi alla finestra in program.anchors (click e attese)
+
+# Limiti delle coordinate (come in ClickDialog)
+MAX_COORDINATE = 32767
+
+
+class SequenceCompileError(ValueError):
+    """Sequenza non valida: indica lo step che ha causato l'errore"""
+
+
+class SequenceProgram:
+    """Sequenza compilata: un array per campo, indicizzati per step"""
+
+    __slots__ = ('xs', 'ys', 'buttons', 'flags', 'delays', 'paths', 'targets', 'waits', 'anchors')
+
+    def __init__(self):
+        self.xs = array('i')
+        self.ys = array('i')
+        self.buttons = array('B')
+        self.flags = array('B')
+        self.delays = array('d')
+        # Percorsi degli step di movimento, per indice di step (pochi rispetto ai click)
+        self.paths = {}
+        # Bersagli degli step immagine, per indice di step
+        self.targets = {}
+        # Attese di colore, per indice di step
+        self.waits = {}
+        # Finestre a cui sono ancorati gli step, per indice di step
+        self.anchors = {}
+
+    def __len__(self):
+        return len(self.xs)
+
+    def append(self, x, y, button, double, delay):
+        """Aggiunge uno step già validato"""
+        self.xs.append(x)
+        self.ys.append(y)
+        self.buttons.append(BUTTON_CODES[button])
+        self.flags.append(FLAG_DOUBLE if double else 0)
+        self.delays.append(delay)
+
+    def append_path(self, path, delay):
+        """Aggiunge uno step di movimento: x, y sono il punto finale del percorso"""
+        x, y = path.end
+        self.paths[len(self.xs)] = path
+        self.xs.append(x)
+        self.ys.append(y)
+        self.buttons.append(0)
+        self.flags.append(FLAG_PATH)
+        self.delays.append(delay)
+
+    def append_image(self, target, button, double, delay):
+        """Aggiunge un click su immagine (ImageTarget già validato)"""
+        self.targets[len(self.xs)] = target
+        self.xs.append(0)
+        self.ys.append(0)
+        self.buttons.append(BUTTON_CODES[button])
+        self.flags.append(FLAG_IMAGE | (FLAG_DOUBLE if double else 0))
+        self.delays.append(delay)
+
+    def append_wait(self, x, y, wait, delay):
+        """Aggiunge un'attesa del colore (ColorWait già validato) nel punto x, y"""
+        self.waits[len(self.xs)] = wait
+        self.xs.append(x)
+        self.ys.append(y)
+        self.buttons.append(0)
+        self.flags.append(FLAG_WAIT)
+        self.delays.append(delay)
+
+    def anchor_last(self, anchor):
+        """Ancora l'ultimo step aggiunto alla finestra anchor: x, y diventano relativi"""
+        index = len(self.xs) - 1
+        self.anchors[index] = anchor
+        self.flags[index] |= FLAG_WINDOW
+
+    def close(self):
+        """Nessuna risorsa da rilasciare (vedi MappedSequence)"""
+
+    def step(self, index):
+        """Restituisce lo step come dict (per visualizzazione e salvataggio)"""
+        if self.flags[index] & FLAG_PATH:
+            return {
+                'type': 'path',
+                'x': self.xs[index],
+                'y': self.ys[index],
+                'points': self.paths[index].to_list(),
+                'delay': self.delays[index]
+            }
+        if self.flags[index] & FLAG_IMAGE:
+            target = self.targets[index]
+            step = {
+                'type': 'image',
+                'template': target.template,
+                'threshold': target.threshold,
+                'button': BUTTON_NAMES[self.buttons[index]],
+                'double': bool(self.flags[index] & FLAG_DOUBLE),
+                'delay': self.delays[index]
+            }
+            if target.region is not None:
+                step['region'] = list(target.region)
+            if target.scales != (1.0,):
+                step['scales'] = list(target.scales)
+            return step
+        if self.flags[index] & FLAG_WAIT:
+            wait = self.waits[index]
+            step = {
+                'type': 'wait',
+                'x': self.xs[index],
+                'y': self.ys[index],
+                'color': format_color(wait.color),
+                'tolerance': wait.tolerance,
+                'timeout': wait.timeout,
+                'size': wait.size,
+                'delay': self.delays[index]
+            }
+        else:
+            step = {
+                'x': self.xs[index],
+                'y': self.ys[index],
+                'button': BUTTON_NAMES[self.buttons[index]],
+                'double': bool(self.flags[index] & FLAG_DOUBLE),
+                'delay': self.delays[index]
+            }
+        if self.flags[index] & FLAG_WINDOW:
+            anchor = self.anchors[index]
+            step['window'] = {'class': anchor.wm_class, 'title': anchor.title}
+        return step
+
+
+def compile_step(index, click_data):
+    """Valida un singolo step e restituisce (x, y, button, double, delay)"""
+    if not isinstance(click_data, dict):
+        raise SequenceCompileError(f"Click {index + 1}: dati non validi")
+
+    try:
+        x = int(click_data.get('x', 0))
+        y = int(click_data.get('y', 0))
+        delay = float(click_data.get('delay', 1.0))
+    except (ValueError, TypeError) as e:
+        raise SequenceCompileError(f"Click {index + 1}: {e}")
+
+    if x < 0 or y < 0 or x > MAX_COORDINATE or y > MAX_COORDINATE:
+        raise SequenceCompileError(f"Click {index + 1}: coordinate non valide ({x}, {y})")
+
+    if delay < 0:
+        raise SequenceCompileError(f"Click {index + 1}: delay negativo ({delay})")
+
+    button = click_data.get('button', 'left')
+    if button not in BUTTON_CODES:
+        raise SequenceCompileError(f"Click {index + 1}: tipo click non valido ({button})")
+
+    return x, y, button, bool(click_data.get('double', False)), delay
+
+
+def compile_path_step(index, click_data):
+    """Valida uno step di movimento ({'type': 'path', 'points': [[x, y, ms], ...]}) e restituisce (path, delay)"""
+    try:
+        delay = float(click_data.get('delay', 0.0))
+        path = MotionPath.from_list(click_data.get('points'))
+    except (ValueError, TypeError) as e:
+        raise SequenceCompileError(f"Movimento {index + 1}: {e}")
+
+    if delay < 0:
+        raise SequenceCompileError(f"Movimento {index + 1}: delay negativo ({delay})")
+    return path, delay
+
+
+def compile_image_step(index, click_data):
+    """Valida uno step immagine ({'type': 'image', 'template': file, 'threshold': 0-1,
+    'region': [left, top, width, height] e 'scales': [0.8, 1.0, ...] opzionali}) e restituisce
+    (target, button, double, delay)"""
+    template = click_data.get('template')
+    if not isinstance(template, str) or not template:
+        raise SequenceCompileError(f"Immagine {index + 1}: file del template mancante")
+    if not os.path.isfile(template):
+        raise SequenceCompileError(f"Immagine {index + 1}: file non trovato ({template})")
+
+    try:
+        threshold = float(click_data.get('threshold', 0.8))
+        delay = float(click_data.get('delay', 1.0))
+    except (ValueError, TypeError) as e:
+        raise SequenceCompileError(f"Immagine {index + 1}: {e}")
+
+    if not 0 < threshold <= 1:
+        raise SequenceCompileError(f"Immagine {index + 1}: soglia non valida ({threshold})")
+    if delay < 0:
+        raise SequenceCompileError(f"Immagine {index + 1}: delay negativo ({delay})")
+
+    button = click_data.get('button', 'left')
+    if button not in BUTTON_CODES:
+        raise SequenceCompileError(f"Immagine {index + 1}: tipo click non valido ({button})")
+
+    region = click_data.get('region')
+    if region is not None:
+        try:
+            region = tuple(int(value) for value in region)
+        except (ValueError, TypeError) as e:
+            raise SequenceCompileError(f"Immagine {index + 1}: regione non valida ({e})")
+        if (len(region) != 4 or region[0] < 0 or region[1] < 0 or region[2] <= 0 or region[3] <= 0
+                or region[0] + region[2] > MAX_COORDINATE or region[1] + region[3] > MAX_COORDINATE):
+            raise SequenceCompileError(f"Immagine {index + 1}: regione non valida ({list(region)})")
+
+    try:
+        scales = parse_scales(click_data.get('scales'))
+    except ValueError as e:
+        raise SequenceCompileError(f"Immagine {index + 1}: {e}")
+
+    return ImageTarget(template, threshold, region, scales), button, bool(click_data.get('double', False)), delay
+
+
+def compile_wait_step(index, click_data):
+    """Valida un'attesa del colore ({'type': 'wait', 'x', 'y', 'color': '#rrggbb', 'tolerance': 0-255,
+    'timeout': s, 'size': lato}) e restituisce (x, y, wait, delay)"""
+    try:
+        x = int(click_data.get('x', 0))
+        y = int(click_data.get('y', 0))
+        color = parse_color(click_data.get('color'))
+        tolerance = int(click_data.get('tolerance', 16))
+        timeout = float(click_data.get('timeout', 10.0))
+        size = int(click_data.get('size', 1))
+        delay = float(click_data.get('delay', 0.0))
+    except (ValueError, TypeError) as e:
+        raise SequenceCompileError(f"Attesa {index + 1}: {e}")
+
+    if x < 0 or y < 0 or x > MAX_COORDINATE or y > MAX_COORDINATE:
+        raise SequenceCompileError(f"Attesa {index + 1}: coordinate non valide ({x}, {y})")
+    if not 0 <= tolerance <= 255:
+        raise SequenceCompileError(f"Attesa {index + 1}: tolleranza non valida ({tolerance})")
+    if timeout <= 0:
+        raise SequenceCompileError(f"Attesa {index + 1}: timeout non valido ({timeout})")
+    if not 1 <= size <= 64:
+        raise SequenceCompileError(f"Attesa {index + 1}: dimensione non valida ({size})")
+    if delay < 0:
+        raise SequenceCompileError(f"Attesa {index + 1}: delay negativo ({delay})")
+
+    return x, y, ColorWait(color, tolerance, timeout, size), delay
+
+
+def compile_window(index, click_data):
+    """Finestra di ancoraggio dello step ({'window': {'class': WM_CLASS, 'title': parte del titolo}}), o None"""
+    window = click_data.get('window')
+    if window is None:
+        return None
+    if not isinstance(window, dict):
+        raise SequenceCompileError(f"Step {index + 1}: finestra non valida ({window})")
+    wm_class = window.get('class') or ''
+    title = window.get('title') or ''
+    if not isinstance(wm_class, str) or not isinstance(title, str) or not (wm_class or title):
+        raise SequenceCompileError(f"Step {index + 1}: indicare classe (WM_CLASS) o titolo della finestra")
+    if click_data.get('type') not in (None, 'wait'):
+        raise SequenceCompileError(f"Step {index + 1}: solo click e attese possono essere ancorati a una finestra")
+    return WindowAnchor(wm_class, title)
+
+
+def compile_sequence(sequence):
+    """Compila una lista di dict in un SequenceProgram; solleva SequenceCompileError"""
+    program = SequenceProgram()
+    for index, click_data in enumerate(sequence):
+        step_type = click_data.get('type') if isinstance(click_data, dict) else None
+        if step_type == 'path':
+            program.append_path(*compile_path_step(index, click_data))
+        elif step_type == 'image':
+            program.append_image(*compile_image_step(index, click_data))
+        elif step_type == 'wait':
+            program.append_wait(*compile_wait_step(index, click_data))
+        else:
+            program.append(*compile_step(index, click_data))
+        anchor = compile_window(index, click_data)
+        if anchor is not None:
+            program.anchor_last(anchor)
+    return program
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Template Matcher - Ricerca di un'immagine di riferimento sullo schermo
+Autore: Andrea Piani
+Descrizione: Template matching a piramide con OpenCV: ricerca completa solo al livello
+             più ridotto (fino a 1/64 dei pixel), poi raffinamento in una piccola finestra
+             a ogni livello fino alla risoluzione piena. Più scale del template coprono
+             DPI e zoom diversi. OpenCV e NumPy vengono importati al primo uso
+"""
+
+import os
+from typing import NamedTuple, Optional, Tuple
+
+from screen_capture import ScreenCapture
+
+
+# Scale del template accettate nei profili (DPI o zoom diversi da quelli della cattura)
+MIN_SCALE = 0.25
+MAX_SCALE = 4.0
+MAX_SCALES = 8
+
+
+class TemplateMatchError(ValueError):
+    """Immagine di riferimento non leggibile o OpenCV non disponibile"""
+
+
+class ImageTarget(NamedTuple):
+    """Bersaglio di uno step immagine: file del template, punteggio minimo, regione
+    (left, top, width, height) in cui cercarlo (None = schermo intero) e scale del
+    template da provare"""
+
+    template: str
+    threshold: float = 0.8
+    region: Optional[Tuple[int, int, int, int]] = None
+    scales: Tuple[float, ...] = (1.0,)
+
+
+def parse_scales(value):
+    """Scale del template da un profilo: lista di numeri o testo "0.8, 1, 1.25".
+
+    Restituisce una tupla ordinata senza duplicati; solleva ValueError se non valida.
+    Ogni scala in più costa circa una ricerca completa.
+    """
+    if value is None or value == '':
+        return (1.0,)
+    items = value.replace(';', ',').split(',') if isinstance(value, str) else value
+    try:
+        scales = tuple(sorted({float(item) for item in items}))
+    except (ValueError, TypeError):
+        raise ValueError(f"scale non valide ({value})")
+    if not 1 <= len(scales) <= MAX_SCALES:
+        raise ValueError(f"da 1 a {MAX_SCALES} scale ({value})")
+    if scales[0] < MIN_SCALE or scales[-1] > MAX_SCALE:
+        raise ValueError(f"scale tra {MIN_SCALE} e {MAX_SCALE} ({value})")
+    return scales
+
+
+def format_scales(scales):
+    """Scale nel formato testo dell'interfaccia ("0.8, 1, 1.25")"""
+    return ', '.join(f'{scale:g}' for scale in scales)
+
+
+class Match(NamedTuple):
+    """Miglior corrispondenza: centro in coordinate schermo, punteggio (0-1) e scala del template"""
+
+    x: int
+    y: int
+    score: float
+    scale: float
+
+
+def import_cv2():
+    """Importa OpenCV; solleva TemplateMatchError se non è installato"""
+    try:
+        import cv2
+    except ImportError as e:
+        raise TemplateMatchError(f"OpenCV non installato (pip install opencv-python): {e}")
+    return cv2
+
+
+def load_template(path):
+    """Legge il template in scala di grigi (array NumPy uint8)"""
+    cv2 = import_cv2()
+    image = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        raise TemplateMatchError(f"Immagine non leggibile: {path}")
+    return image
+
+
+class PyramidMatcher:
+    """Template matching a piramide (TM_CCOEFF_NORMED) su immagini in scala di grigi.
+
+    I livelli si fermano quando il lato minore del template scenderebbe sotto
+    min_size pixel: oltre, il template ridotto non è più distintivo. Al livello
+    più ridotto si tengono i candidates picchi migliori, per non perdere il
+    bersaglio quando un'area simile prevale solo a bassa risoluzione.
+    """
+
+    def __init__(self, scales=(1.0,), min_size=8, max_levels=3, candidates=3, margin=3):
+        self.scales = tuple(scales)
+        self.min_size = min_size
+        self.max_levels = max_levels
+        self.candidates = candidates
+        self.margin = margin
+        self._templates = {}
+
+    def template_pyramid(self, template, scale, key=None):
+        """Piramide del template alla scala indicata; con key viene riusata tra le ricerche"""
+        cache_key = (key, scale)
+        if key is not None and cache_key in self._templates:
+            return self._templates[cache_key]
+
+        cv2 = import_cv2()
+        if scale != 1.0:
+            template = cv2.resize(template, None, fx=scale, fy=scale,
+                                  interpolation=cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR)
+        images = [template]
+        while (len(images) <= self.max_levels
+               and min(images[-1].shape[:2]) // 2 >= self.min_size):
+            images.append(cv2.pyrDown(images[-1]))
+
+        if key is not None:
+            self._templates[cache_key] = images
+        return images
+
+    def forget(self, key):
+        """Dimentica le piramidi di un template (es. file modificato)"""
+        for cache_key in [cache_key for cache_key in self._templates if cache_key[0] == key]:
+            del self._templates[cache_key]
+
+    def find(self, screen, template, threshold=0.8, key=None, scales=None):
+        """Miglior corrispondenza con punteggio >= threshold, o None (scales sostituisce quelle del matcher)"""
+        cv2 = import_cv2()
+        screens = [screen]
+        best = None
+
+        for scale in scales or self.scales:
+            templates = self.template_pyramid(template, scale, key)
+            height, width = templates[0].shape[:2]
+            if height > screen.shape[0] or width > screen.shape[1]:
+                continue
+
+            level = len(templates) - 1
+            while len(screens) <= level:
+                screens.append(cv2.pyrDown(screens[-1]))
+            # Il template ridotto può superare lo schermo ridotto di un pixel (arrotondamenti)
+            while level and any(t > s for t, s in zip(templates[level].shape[:2], screens[level].shape[:2])):
+                level -= 1
+
+            coarse = cv2.matchTemplate(screens[level], templates[level], cv2.TM_CCOEFF_NORMED)
+            for x, y in self.peaks(coarse, templates[level].shape[:2]):
+                x, y, score = self.refine(screens, templates, level, x, y, float(coarse[y, x]))
+                if best is None or score > best.score:
+                    best = Match(x + width // 2, y + height // 2, score, scale)
+
+        if best is None or best.score < threshold:
+            return None
+        return best
+
+    def peaks(self, result, template_shape):
+        """Fino a candidates massimi locali distinti della mappa dei punteggi"""
+        cv2 = import_cv2()
+        result = result.copy() if self.candidates > 1 else result
+        half_height, half_width = template_shape[0] // 2 + 1, template_shape[1] // 2 + 1
+        found = []
+        for _ in range(self.candidates):
+            _, value, _, (x, y) = cv2.minMaxLoc(result)
+            if found and value <= 0:
+                break
+            found.append((x, y))
+            # Esclude l'intorno del picco: il prossimo candidato è in un'altra zona
+            result[max(0, y - half_height):y + half_height, max(0, x - half_width):x + half_width] = -1.0
+        return found
+
+    def refine(self, screens, templates, level, x, y, score):
+        """Porta la posizione (x, y) del livello level a piena risoluzione; restituisce (x, y, punteggio)"""
+        cv2 = import_cv2()
+        margin = self.margin
+        for level in range(level - 1, -1, -1):
+            x *= 2
+            y *= 2
+            image = screens[level]
+            height, width = templates[level].shape[:2]
+            left = min(max(0, x - margin), image.shape[1] - width)
+            top = min(max(0, y - margin), image.shape[0] - height)
+            right = min(image.shape[1], x + width + margin)
+            bottom = min(image.shape[0], y + height + margin)
+
+            result = cv2.matchTemplate(image[top:bottom, left:right], templates[level], cv2.TM_CCOEFF_NORMED)
+            _, score, _, (dx, dy) = cv2.minMaxLoc(result)
+            x, y = left + dx, top + dy
+        return x, y, float(score)
+
+
+class ImageLocator:
+    """Cattura la regione del bersaglio e cerca un ImageTarget; i template restano in cache
+    finché il file non cambia. capture espone grab_gray(region) e close() (ScreenCapture)"""
+
+    def __init__(self, matcher=None, capture=None):
+        self.matcher = matcher or PyramidMatcher()
+        self.capture = capture or ScreenCapture()
+        self._templates = {}
+
+    def template(self, path):
+        """Template del file path, riletto solo se il file è stato modificato"""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError as e:
+            raise TemplateMatchError(f"Immagine non trovata: {e}")
+
+        cached = self._templates.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        self.matcher.forget(path)
+        template = load_template(path)
+        self._templates[path] = (mtime, template)
+        return template
+
+    def locate(self, target):
+        """Match del bersaglio in coordinate schermo, o None se non è visibile"""
+        template = self.template(target.template)
+        screen, (left, top) = self.capture.grab_gray(target.region)
+        match = self.matcher.find(screen, template, target.threshold, key=target.template, scales=target.scales)
+        if match is None:
+            return None
+        return match._replace(x=match.x + left, y=match.y + top)
+
+    def prefetch(self, target):
+        """Nessun anticipo: qui la ricerca avviene nel thread che chiama locate (vedi PoolLocator)"""
+
+    def close(self):
+        """Libera la cattura (connessione X11 e buffer)"""
+        self.capture.close()
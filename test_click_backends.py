@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test dei backend di click
+Autore: Andrea Piani
+Descrizione: Verifica il ripiego quando il backend richiesto non è disponibile
+             (senza display) e, con un display X11, failsafe e raffiche del
+             backend XTest
+"""
+
+import os
+
+from click_backends import (ClickBackendError, FailSafeError, NullBackend, XTestBackend,
+                            create_backend_with_fallback)
+
+
+def test_fallback_selection():
+    """XTest senza python-xlib o senza display: si usa il backend di ripiego, con un avviso"""
+    messages = []
+    try:
+        XTestBackend(display_name=':987')  # Display inesistente
+    except ClickBackendError:
+        pass
+    else:
+        raise AssertionError("Display inesistente aperto")
+
+    saved = os.environ.pop('DISPLAY', None)
+    try:
+        backend = create_backend_with_fallback('xtest', fallback='null', log=messages.append)
+    finally:
+        if saved is not None:
+            os.environ['DISPLAY'] = saved
+    assert isinstance(backend, NullBackend)
+    assert len(messages) == 1 and "Backend 'xtest' non disponibile" in messages[0]
+
+    # Backend disponibile: nessun ripiego né avviso
+    assert isinstance(create_backend_with_fallback('null', log=messages.append), NullBackend)
+    assert len(messages) == 1
+
+    try:
+        create_backend_with_fallback('inesistente', fallback='inesistente')
+    except ClickBackendError:
+        pass
+    else:
+        raise AssertionError("Backend sconosciuto accettato")
+
+
+def test_xtest_backend():
+    """Failsafe nell'angolo e raffica inviata con un solo flush (solo con un display X11)"""
+    if not os.environ.get('DISPLAY'):
+        print("DISPLAY non impostato: test del backend XTest saltato")
+        return
+    try:
+        backend = XTestBackend()
+    except ClickBackendError as e:
+        print(f"Backend XTest non disponibile: {e}")
+        return
+
+    display = backend._display
+    flush = display.flush
+    flushes = []
+
+    def counting_flush():
+        flushes.append(1)
+        flush()
+
+    display.flush = counting_flush
+    try:
+        backend.move(50, 60)
+        assert backend.position() == (50, 60)
+
+        flushes.clear()
+        backend.burst([(100, 100, 'left', 1), (120, 110, 'right', 2), (140, 130, 'middle', 1)])
+        assert len(flushes) == 1
+        assert backend.position() == (140, 130)
+
+        backend.failsafe = False
+        backend.move(0, 0)
+        backend.failsafe = True
+        for action in (lambda: backend.click(10, 10), lambda: backend.burst([(10, 10, 'left', 1)]),
+                       lambda: backend.move(10, 10)):
+            try:
+                action()
+            except FailSafeError:
+                pass
+            else:
+                raise AssertionError("Failsafe non scattato con il mouse nell'angolo")
+        assert backend.position() == (0, 0)  # Nessun evento inviato
+    finally:
+        display.flush = flush
+        backend.close()
+
+
+if __name__ == "__main__":
+    test_fallback_selection()
+    test_xtest_backend()
+    print("✅ Test backend di click completati!")
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test del motore di click
+Autore: Andrea Piani
+Descrizione: Esegue il motore con orologio virtuale e backend di registrazione
+             e verifica in modo deterministico istanti e coordinate dei click
+"""
+
+import random
+from click_backends import RecordingBackend
+from click_clock import VirtualClock
+from click_engine import ClickEngine, EngineListener
+from run_config import RunConfig
+from run_control import RunControl
+from sequence_program import compile_sequence
+
+
+class StopListener(EngineListener):
+    """Ferma il RunControl quando il motore lo richiede, come farebbe l'interfaccia"""
+
+    def __init__(self, run_control):
+        self.run_control = run_control
+        self.messages = []
+
+    def log(self, message):
+        self.messages.append(message)
+
+    def request_stop(self):
+        self.run_control.stop()
+
+
+def make_config(**overrides):
+    """RunConfig di base: 10 click fissi ogni 0.5 s"""
+    values = dict(min_interval=0.5, max_interval=0.5, max_clicks=10, click_type='left',
+                  double_click=False, use_current_position=False, fixed_x=10, fixed_y=20,
+                  initial_delay=0.0, click_backend='recording', file_log=False,
+                  file_log_compress=False, sequence_mode=False, sequence=compile_sequence([]),
+                  sequence_repeats=1, sequence_pause=0.0)
+    values.update(overrides)
+    return RunConfig(**values)
+
+
+def run_engine(config, clock, locator=None, screen=None, windows=None):
+    """Esegue il motore fino alla fine e restituisce backend e motore"""
+    run_control = RunControl(clock=clock)
+    backend = RecordingBackend(clock=clock)
+    engine = ClickEngine(config, run_control, backend, clock=clock,
+                         listener=StopListener(run_control), rng=random.Random(1), locator=locator,
+                         screen=screen, windows=windows)
+    run_control.start()
+    engine.run()
+    run_control.mark_halted()
+    return backend, engine
+
+
+def test_single_clicks_exact_timing():
+    """Con l'orologio virtuale ogni click cade esattamente sulla scadenza"""
+    clock = VirtualClock()
+    backend, engine = run_engine(make_config(initial_delay=2.0), clock)
+
+    assert engine.click_count == 10
+    assert len(backend) == 10
+    for n, t in enumerate(backend.times, start=1):
+        assert abs(t - (2.0 + 0.5 * n)) < 1e-9
+    assert set(backend.xs) == {10} and set(backend.ys) == {20}
+
+
+def test_single_clicks_deterministic():
+    """Stesso seme, stessi intervalli casuali: esecuzioni identiche"""
+    config = make_config(min_interval=0.1, max_interval=0.9, max_clicks=50)
+    first, _ = run_engine(config, VirtualClock())
+    second, _ = run_engine(config, VirtualClock())
+    assert first.times == second.times
+
+
+def test_sequence_timing():
+    """La sequenza rispetta i ritardi per step e la pausa tra ripetizioni"""
+    sequence = compile_sequence([
+        {'x': 1, 'y': 2, 'button': 'left', 'delay': 0.25},
+        {'x': 3, 'y': 4, 'button': 'right', 'double': True, 'delay': 0.5},
+        {'x': 5, 'y': 6, 'button': 'middle', 'delay': 0.75},
+    ])
+    config = make_config(sequence_mode=True, sequence=sequence,
+                         sequence_repeats=2, sequence_pause=1.0)
+    backend, engine = run_engine(config, VirtualClock())
+
+    assert engine.click_count == 6
+    assert list(backend.times) == [0.0, 0.25, 0.75, 1.75, 2.0, 2.5]
+    assert backend.events()[1] == (0.25, 3, 4, 'right', 2)
+
+
+if __name__ == "__main__":
+    test_single_clicks_exact_timing()
+    test_single_clicks_deterministic()
+    test_sequence_timing()
+    print("✅ Test motore di click completati!")
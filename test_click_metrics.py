@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test delle metriche di prestazione
+Autore: Andrea Piani
+Descrizione: Verifica istogrammi, click al secondo su finestra mobile, esportazione
+             Prometheus ed endpoint locale
+"""
+
+import urllib.request
+from click_clock import VirtualClock
+from click_metrics import CPS_WINDOW, ClickMetrics, LatencyHistogram, MetricsServer
+from run_control import RunControl
+
+
+def test_histogram_quantiles():
+    """I quantili stimati cadono nel bucket corretto"""
+    histogram = LatencyHistogram()
+    for _ in range(99):
+        histogram.observe(0.0003)
+    histogram.observe(0.2)
+
+    assert histogram.count == 100
+    assert 0.00025 <= histogram.quantile(0.5) <= 0.0005
+    assert histogram.quantile(1.0) == 0.2
+    assert histogram.max == 0.2
+
+
+def test_prometheus_text():
+    """Il testo esportato contiene contatori e bucket cumulativi"""
+    metrics = ClickMetrics()
+    metrics.start_run()
+    for _ in range(10):
+        metrics.observe_click(0.0001)
+        metrics.observe_lateness(0.00002)
+    metrics.observe_error()
+
+    text = metrics.to_prometheus()
+    assert "mouse_clicker_clicks_total 10" in text
+    assert "mouse_clicker_errors_total 1" in text
+    assert 'mouse_clicker_click_call_seconds_bucket{le="+Inf"} 10' in text
+    assert "mouse_clicker_schedule_lateness_seconds_count 10" in text
+
+
+def test_clicks_per_second_window():
+    """CPS sugli ultimi secondi attivi: esclusi ritardo iniziale e pause, segue i cambi di ritmo"""
+    clock = VirtualClock()
+    control = RunControl(clock)
+    control.start()
+    metrics = ClickMetrics()
+    metrics.start_run(control)
+
+    clock.sleep(3.0)  # ritardo iniziale
+    metrics.start_clicks()
+    for _ in range(20):
+        clock.sleep(0.1)
+        metrics.observe_click(0.0001)
+    assert abs(metrics.clicks_per_second - 10.0) < 0.01
+
+    # Pausa lunga: il valore resta quello di prima della pausa
+    control.pause()
+    clock.sleep(60.0)
+    assert abs(metrics.clicks_per_second - 10.0) < 0.01
+    control.resume()
+    clock.sleep(60.0 - CPS_WINDOW)  # ripresa, poi un minuto senza click
+    assert metrics.clicks_per_second == 0.0
+
+    # Ritmo più alto: la finestra mostra il ritmo attuale, non la media dell'esecuzione
+    for _ in range(300):
+        clock.sleep(0.02)
+        metrics.observe_click(0.0001)
+    assert abs(metrics.clicks_per_second - 50.0) < 0.5
+    assert len(metrics._recent_clicks) <= CPS_WINDOW / 0.02 + 1
+    assert "mouse_clicker_clicks_total 320" in metrics.to_prometheus()
+
+
+def test_metrics_endpoint():
+    """L'endpoint locale risponde su /metrics"""
+    metrics = ClickMetrics()
+    metrics.observe_click(0.001)
+    server = MetricsServer(metrics, port=0).start()
+    try:
+        url = f"http://127.0.0.1:{server.port}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            body = response.read().decode('utf-8')
+        assert "mouse_clicker_clicks_total 1" in body
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    test_histogram_quantiles()
+    test_prometheus_text()
+    test_clicks_per_second_window()
+    test_metrics_endpoint()
+    print("✅ Test metriche completati!")
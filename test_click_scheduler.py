@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test dello scheduler a scadenze assolute
+Autore: Andrea Piani
+Descrizione: Verifica assenza di deriva e misura dell'errore di pianificazione
+"""
+
+import threading
+import time
+from click_clock import VirtualClock
+from click_scheduler import DeadlineScheduler
+from run_control import RunControl
+
+
+def test_no_drift_with_click_cost():
+    """Il costo del click non si accumula sulle scadenze"""
+    clock = VirtualClock()
+    scheduler = DeadlineScheduler(clock=clock)
+    scheduler.start()
+
+    for _ in range(1000):
+        scheduler.advance(0.05)
+        assert abs(scheduler.wait()) < 1e-9
+        clock.advance(0.01)  # Costo simulato del click
+
+    # 1000 click a 20 CPS terminano esattamente a 50 secondi
+    assert abs(scheduler.deadline - 50.0) < 1e-9
+    assert scheduler.count == 1000
+
+
+def test_wait_interrupted():
+    """L'attesa termina con None quando il RunControl viene fermato"""
+    scheduler = DeadlineScheduler()
+    scheduler.start()
+    scheduler.advance(10.0)
+
+    control = RunControl()
+    control.start()
+    threading.Timer(0.05, control.stop).start()
+
+    assert scheduler.wait(control) is None
+    assert scheduler.count == 0
+
+
+def test_pause_is_not_lateness():
+    """Una pausa durante l'attesa sposta la scadenza della sua durata e non conta come ritardo"""
+    clock = VirtualClock()
+    control = RunControl(clock=clock)
+    control.start()
+    scheduler = DeadlineScheduler(clock=clock)
+    scheduler.start()
+    scheduler.advance(1.0)
+
+    # Dopo 0.3s pausa di 1s (il tempo virtuale avanza mentre il thread di click è bloccato)
+    clock.advance(0.3)
+    control.pause()
+
+    def resume_later():
+        time.sleep(0.05)
+        clock.advance(1.0)
+        control.resume()
+
+    thread = threading.Thread(target=resume_later)
+    thread.start()
+    error = scheduler.wait(control)
+    thread.join()
+    assert error is not None and abs(error) < 1e-9
+    assert abs(clock.now() - 2.0) < 1e-9  # 0.7s rimanenti dopo la ripresa
+    assert scheduler.max_error < 1e-9 and control.paused_time == 1.0
+
+    # La scadenza successiva parte da quella spostata, senza recuperi
+    scheduler.advance(0.5)
+    assert abs(scheduler.wait(control)) < 1e-9
+    assert abs(clock.now() - 2.5) < 1e-9
+
+
+def test_pause_during_spin():
+    """Una pausa arrivata nello spin finale blocca il click fino alla ripresa"""
+    control = RunControl()
+    control.start()
+    scheduler = DeadlineScheduler(spin_window=0.05)
+    scheduler.start()
+    scheduler.advance(0.06)
+    threading.Timer(0.03, control.pause).start()  # Dentro la finestra di spin
+    threading.Timer(0.2, control.resume).start()
+
+    start = time.perf_counter()
+    error = scheduler.wait(control)
+    elapsed = time.perf_counter() - start
+    assert elapsed >= 0.2  # Nessun click durante la pausa
+    assert error < 0.01    # La pausa non è contata come ritardo
+
+
+def test_real_clock_precision():
+    """Con l'orologio reale l'errore di pianificazione resta sotto il millisecondo"""
+    scheduler = DeadlineScheduler()
+    start = scheduler.start()
+
+    errors = []
+    for _ in range(20):
+        scheduler.advance(0.01)
+        error = scheduler.wait()
+        assert error >= 0.0
+        errors.append(error)
+
+    # Lo spin finale tiene l'errore tipico sotto il millisecondo; la mediana
+    # non risente di un singolo prerilascio del sistema operativo
+    errors.sort()
+    assert errors[len(errors) // 2] < 0.001
+
+    elapsed = time.perf_counter() - start
+    assert abs(elapsed - 0.2) < 0.01
+
+
+if __name__ == "__main__":
+    test_no_drift_with_click_cost()
+    test_wait_interrupted()
+    test_pause_is_not_lateness()
+    test_pause_during_spin()
+    test_real_clock_precision()
+    print("✅ Test scheduler completati!")
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test della registrazione globale dei click
+Autore: Andrea Piani
+Descrizione: Verifica le pause reali calcolate dai timestamp degli eventi e, se sono
+             disponibili python-xlib e un display (es. xvfb-run), la registrazione
+             X11 RECORD di click sintetici inviati con XTest
+"""
+
+import os
+import time
+from global_recorder import ClickTimeline, GlobalClickRecorder, RecorderError
+from sequence_file import MappedSequence, SequenceFileWriter
+
+
+def read_steps(path):
+    mapped = MappedSequence(path)
+    try:
+        return [mapped.step(i) for i in range(len(mapped))]
+    finally:
+        mapped.close()
+
+
+def test_timeline_real_delays(tmp_path):
+    """Pause dai timestamp (anche a cavallo dell'azzeramento a 32 bit), rotella e area ignorata"""
+    path = str(tmp_path / 'globale.seq')
+    writer = SequenceFileWriter(path)
+    clicks = []
+    timeline = ClickTimeline(writer, on_click=lambda count, button, x, y: clicks.append(count))
+    timeline.ignore_rect = (0, 0, 100, 100)
+
+    assert timeline.button_press(1, 500, 400, 1000)
+    assert not timeline.button_press(4, 500, 400, 1100)     # Rotella
+    assert not timeline.button_press(1, 50, 50, 1200)       # Dentro l'area ignorata
+    assert timeline.button_press(3, 600, 400, 1250)
+    assert timeline.button_press(1, 700, 400, 0xFFFFFF00)
+    assert timeline.button_press(2, 800, 400, 0x50)         # Dopo l'azzeramento del contatore
+    writer.close()
+
+    steps = read_steps(path)
+    assert clicks == [1, 2, 3, 4]
+    assert [step['button'] for step in steps] == ['left', 'right', 'left', 'middle']
+    assert steps[0]['delay'] == 0.25
+    assert steps[2]['delay'] == (0x100 + 0x50) / 1000.0
+    assert steps[3]['delay'] == 0.0
+
+
+def test_record_synthetic_input(tmp_path):
+    """Click XTest su tutto il display registrati con le pause reali (richiede un display X11)"""
+    try:
+        from Xlib import X, display
+        from Xlib.ext import xtest
+    except ImportError:
+        print("python-xlib non installato: test X11 RECORD saltato")
+        return
+    if not os.environ.get('DISPLAY'):
+        print("DISPLAY non impostato: test X11 RECORD saltato (usare xvfb-run)")
+        return
+
+    path = str(tmp_path / 'xvfb.seq')
+    writer = SequenceFileWriter(path)
+    try:
+        recorder = GlobalClickRecorder(ClickTimeline(writer)).start()
+    except RecorderError as e:
+        writer.close()
+        print(f"Registrazione non disponibile: {e}")
+        return
+
+    source = display.Display()
+    try:
+        time.sleep(0.2)
+        pauses = (0.3, 0.15, 0.0)
+        for i, (button, pause) in enumerate(zip((1, 3, 1), pauses)):
+            xtest.fake_input(source, X.MotionNotify, x=100 + 10 * i, y=200)
+            xtest.fake_input(source, X.ButtonPress, button)
+            xtest.fake_input(source, X.ButtonRelease, button)
+            source.sync()
+            time.sleep(pause)
+        time.sleep(0.2)
+    finally:
+        source.close()
+        recorder.stop()
+        writer.close()
+
+    steps = read_steps(path)
+    assert [(step['x'], step['y'], step['button']) for step in steps] == [
+        (100, 200, 'left'), (110, 200, 'right'), (120, 200, 'left')]
+    for step, pause in zip(steps, pauses[:2]):
+        assert abs(step['delay'] - pause) < 0.05
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    for test in (test_timeline_real_delays, test_record_synthetic_input):
+        with tempfile.TemporaryDirectory() as directory:
+            test(pathlib.Path(directory))
+    print("✅ Test registrazione globale completati!")
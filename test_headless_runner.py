@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test del runner headless
+Autore: Andrea Piani
+Descrizione: Esegue profili da riga di comando con il backend nullo, in una
+             directory temporanea (così i dati di licenza non toccano il progetto)
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def write_profile(directory, execution_mode='single', **basic):
+    """Scrive un profilo nel formato di save_profile"""
+    profile = {
+        'basic_settings': dict({'min_interval': '0.01', 'max_interval': '0.01',
+                                'infinite_clicks': True, 'max_clicks': '100'}, **basic),
+        'advanced_settings': {'click_type': 'left', 'use_current_position': False,
+                              'fixed_x': '10', 'fixed_y': '10', 'initial_delay': '0',
+                              'click_backend': 'null'},
+        'sequence_settings': {'execution_mode': execution_mode,
+                              'current_sequence': [{'x': 1, 'y': 1, 'delay': 0.01},
+                                                   {'x': 2, 'y': 2, 'delay': 0.01}],
+                              'infinite_sequence': True, 'sequence_pause': '0.01'},
+        'profile_name': 'test'
+    }
+    path = os.path.join(directory, 'profilo.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(profile, f)
+    return path
+
+
+def run(directory, *args):
+    """Avvia il runner headless in un processo separato"""
+    env = dict(os.environ, PYTHONPATH=PROJECT_DIR)
+    return subprocess.run([sys.executable, os.path.join(PROJECT_DIR, 'headless_runner.py'), *args],
+                          cwd=directory, env=env, capture_output=True, text=True, timeout=30)
+
+
+def test_single_clicks(tmp_path):
+    """Il limite da riga di comando ferma i click singoli"""
+    profile = write_profile(str(tmp_path))
+    result = run(str(tmp_path), profile, '--max-clicks', '5', '--quiet')
+    assert result.returncode == 0, result.stderr
+    assert "Click eseguiti: 5 " in result.stdout
+
+
+def test_sequence_limited(tmp_path):
+    """Anche una sequenza infinita si ferma al limite di click"""
+    profile = write_profile(str(tmp_path), execution_mode='sequence')
+    result = run(str(tmp_path), profile, '--max-clicks', '7')
+    assert result.returncode == 0, result.stderr
+    assert "Raggiunto numero massimo di click (7)" in result.stdout
+    assert "Click eseguiti: 7 " in result.stdout
+
+
+def test_invalid_profile(tmp_path):
+    """Un profilo non valido termina con codice 1 e un messaggio chiaro"""
+    path = tmp_path / 'rotto.json'
+    path.write_text('{"basic_settings": {}}', encoding='utf-8')
+    result = run(str(tmp_path), str(path))
+    assert result.returncode == 1
+    assert "advanced_settings" in result.stderr
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    for test in (test_single_clicks, test_sequence_limited, test_invalid_profile):
+        with tempfile.TemporaryDirectory() as directory:
+            test(pathlib.Path(directory))
+    print("✅ Test runner headless completati!")
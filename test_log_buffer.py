@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test del buffer circolare del log
+Autore: Andrea Piani
+Descrizione: Verifica sovrascrittura delle righe vecchie e lettura a pagine
+"""
+
+from log_buffer import LogRingBuffer
+
+
+def test_overwrite_oldest():
+    """Oltre la capacità restano solo le righe più recenti"""
+    buffer = LogRingBuffer(capacity=5)
+    buffer.extend(f"riga {i}\n" for i in range(1, 13))
+
+    assert len(buffer) == 5
+    assert buffer.total == 12
+    assert buffer.first_number == 8
+    assert buffer[0] == "riga 8\n"
+    assert buffer[-1] == "riga 12\n"
+
+
+def test_pages():
+    """Le pagine vengono tagliate ai limiti del buffer"""
+    buffer = LogRingBuffer(capacity=100)
+    buffer.extend(str(i) for i in range(250))
+
+    assert buffer.page(0, 10) == [str(i) for i in range(150, 160)]
+    assert buffer.page(95, 10) == [str(i) for i in range(245, 250)]
+    assert buffer.page(200, 10) == []
+
+    buffer.clear()
+    assert len(buffer) == 0
+    assert buffer.page(0, 10) == []
+
+
+if __name__ == "__main__":
+    test_overwrite_oldest()
+    test_pages()
+    print("✅ Test buffer log completati!")
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test della ricerca immagini in processi separati
+Autore: Andrea Piani
+Descrizione: Verifica ricerca tramite memoria condivisa, riuso del risultato quando la
+             regione non cambia, prefetch durante la pausa e click di una sequenza con
+             il PoolLocator (richiede OpenCV e NumPy)
+"""
+
+from click_clock import VirtualClock
+from match_pool import PoolLocator
+from run_control import RunControl
+from sequence_program import compile_sequence
+from template_matcher import ImageTarget
+from test_click_engine import make_config, run_engine
+from test_template_matcher import opencv_missing, synthetic_screen
+
+
+class SwitchableCapture:
+    """Cattura finta: lo schermo corrente (sostituibile) con la regione richiesta ritagliata"""
+
+    def __init__(self, screen):
+        self.screen = screen
+        self.grabs = 0
+        self.closed = False
+
+    def grab_gray(self, region):
+        self.grabs += 1
+        if region is None:
+            return self.screen, (0, 0)
+        left, top, width, height = region
+        return self.screen[top:top + height, left:left + width], (left, top)
+
+    def close(self):
+        self.closed = True
+
+
+def test_pool_locator(tmp_path):
+    """Stesso risultato di ImageLocator; regione invariata = nessuna nuova ricerca; prefetch usato"""
+    if opencv_missing():
+        return
+    import cv2
+
+    screen = synthetic_screen()
+    path = str(tmp_path / 'pulsante.png')
+    cv2.imwrite(path, screen[300:340, 500:560])
+    target = ImageTarget(path, 0.9, (400, 200, 400, 300))
+
+    capture = SwitchableCapture(screen)
+    locator = PoolLocator(capture=capture)
+    try:
+        match = locator.locate(target)
+        assert (match.x, match.y) == (530, 320)
+        assert (locator.searches, locator.reused) == (1, 0)
+
+        # Schermo invariato: il processo confronta la regione e riusa il match
+        assert locator.locate(target) == match
+        assert (locator.searches, locator.reused) == (1, 1)
+
+        # Bersaglio spostato: la differenza forza una nuova ricerca
+        moved = screen.copy()
+        moved[300:340, 500:560] = screen[0:40, 0:60]
+        moved[250:290, 600:660] = screen[300:340, 500:560]
+        capture.screen = moved
+        match = locator.locate(target)
+        assert (match.x, match.y) == (630, 270) and locator.searches == 2
+
+        # Prefetch: la ricerca è già fatta quando arriva lo step
+        capture.screen = screen
+        locator.prefetch(target)
+        match = locator.locate(target)
+        assert (match.x, match.y) == (530, 320)
+        assert (locator.prefetched, locator.searches, locator.reused) == (1, 3, 2)
+
+        # Immagine non visibile: None, riusato finché la regione non cambia
+        capture.screen = moved * 0
+        assert locator.locate(target) is None
+        assert locator.locate(target) is None and locator.reused == 3
+    finally:
+        locator.close()
+    assert capture.closed
+
+
+def test_sequence_with_pool(tmp_path):
+    """Sequenza di step immagine risolti nei processi, con il prefetch durante le pause"""
+    if opencv_missing():
+        return
+    import cv2
+
+    screen = synthetic_screen()
+    first = str(tmp_path / 'primo.png')
+    second = str(tmp_path / 'secondo.png')
+    cv2.imwrite(first, screen[100:150, 100:170])
+    cv2.imwrite(second, screen[800:840, 1500:1580])
+    program = compile_sequence([
+        {'type': 'image', 'template': first, 'delay': 0.5},
+        {'type': 'image', 'template': second, 'button': 'right', 'delay': 0.5},
+    ])
+
+    locator = PoolLocator(capture=SwitchableCapture(screen))
+    config = make_config(sequence_mode=True, sequence=program, max_clicks=None, sequence_repeats=2)
+    try:
+        backend, _ = run_engine(config, VirtualClock(), locator=locator)
+    finally:
+        locator.close()
+    assert [(x, y, button) for _, x, y, button, _ in backend.events()] == [
+        (135, 125, 'left'), (1540, 820, 'right')] * 2
+    # Ogni step trovato dal prefetch (il primo all'avvio); poi solo confronti: schermo invariato
+    assert locator.prefetched == 4 and locator.searches == 2
+
+
+def test_pool_recovers_and_stops(tmp_path):
+    """Processo morto: processi ricreati e ricerca ripetuta; stop durante l'attesa: None subito"""
+    if opencv_missing():
+        return
+    import os
+    import threading
+    import time
+
+    import cv2
+
+    screen = synthetic_screen()
+    path = str(tmp_path / 'pulsante.png')
+    cv2.imwrite(path, screen[300:340, 500:560])
+    target = ImageTarget(path, 0.9, (400, 200, 400, 300))
+
+    control = RunControl()
+    control.start()
+    locator = PoolLocator(capture=SwitchableCapture(screen), run_control=control)
+    try:
+        assert locator.locate(target) is not None
+
+        # Crash del processo (come un segfault di OpenCV): il pool si rompe
+        locator.prefetch(target)
+        locator.executor.submit(os._exit, 1)
+        time.sleep(0.5)
+        match = locator.locate(target)
+        assert (match.x, match.y) == (530, 320) and locator.restarts == 1
+        assert locator.locate(target) == match and locator.restarts == 1
+
+        # Unico processo occupato: lo stop interrompe l'attesa senza aspettare la ricerca
+        locator.executor.submit(time.sleep, 1.5)
+        threading.Timer(0.1, control.stop).start()
+        start = time.perf_counter()
+        assert locator.locate(target) is None
+        assert time.perf_counter() - start < 0.5
+    finally:
+        start = time.perf_counter()
+        locator.close()
+        assert time.perf_counter() - start < 0.5
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    for test in (test_pool_locator, test_sequence_with_pool, test_pool_recovers_and_stops):
+        with tempfile.TemporaryDirectory() as directory:
+            test(pathlib.Path(directory))
+    print("✅ Test ricerca immagini in processi separati completati!")
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test dei percorsi di movimento
+Autore: Andrea Piani
+Descrizione: Verifica compressione (RDP e ricampionamento), salvataggio nel file
+             .paths affiancato, registrazione dalla ClickTimeline e riproduzione
+             alla velocità originale con l'orologio virtuale (richiede NumPy)
+"""
+
+import math
+
+from click_clock import VirtualClock
+from global_recorder import ClickTimeline
+from motion_path import MotionPath, compress_path
+from sequence_file import MappedSequence, SequenceFileWriter, write_sequence_file
+from sequence_program import FLAG_PATH, SequenceCompileError, compile_sequence
+from test_click_engine import make_config, run_engine
+
+
+def numpy_missing():
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        print("NumPy non installato: test dei percorsi saltato")
+        return True
+    return False
+
+
+def arc_samples(count=2000):
+    """Mezzo cerchio a campioni irregolari (circa 4 ms), poi 300 ms fermi e un tratto rettilineo"""
+    xs, ys, ts = [], [], []
+    t = 0
+    for i in range(count):
+        angle = math.pi * i / (count - 1)
+        xs.append(round(500 + 200 * math.cos(angle)))
+        ys.append(round(400 + 200 * math.sin(angle)))
+        ts.append(t)
+        t += 3 + i % 3
+    t += 300
+    for i in range(100):
+        xs.append(300 + 2 * i)
+        ys.append(400)
+        ts.append(t)
+        t += 5
+    return xs, ys, ts
+
+
+def test_compress_path():
+    """Pochi punti chiave, stessa durata e scarto contenuto rispetto al movimento registrato"""
+    if numpy_missing():
+        return
+    xs, ys, ts = arc_samples()
+    path = compress_path(xs, ys, ts)
+
+    assert len(path) < len(xs) / 20
+    assert path.ts[0] == 0 and path.ts[-1] == ts[-1]
+    assert (path.xs[0], path.ys[0]) == (xs[0], ys[0])
+    assert path.end == (xs[-1], ys[-1])
+
+    # Posizione ricostruita a ogni campione originale: a meno di qualche pixel
+    times, frame_xs, frame_ys = path.frames()
+    assert times[-1] == ts[-1] / 1000.0
+    frame_at = {round(t * 1000): (x, y) for t, x, y in zip(times, frame_xs, frame_ys)}
+    position = None
+    errors = []
+    for x, y, t in zip(xs, ys, ts):
+        for ms in range(t - 9, t + 1):
+            position = frame_at.get(ms, position)
+        if position is not None:
+            errors.append(math.hypot(position[0] - x, position[1] - y))
+    assert max(errors) < 8
+
+    # Durante la sosta al massimo un fotogramma (arrotondamento di un pixel), non 30
+    pause_start = ts[1999] / 1000.0
+    assert len([t for t in times if pause_start + 0.05 < t < pause_start + 0.25]) <= 1
+
+
+def test_path_steps_roundtrip(tmp_path):
+    """Step di movimento da JSON, nel file binario e ritorno; punti non validi rifiutati"""
+    points = [[10, 10, 0], [200, 50, 120], [200, 60, 400]]
+    program = compile_sequence([
+        {'x': 5, 'y': 5, 'button': 'left'},
+        {'type': 'path', 'points': points, 'delay': 0.25},
+    ])
+    assert program.flags[1] & FLAG_PATH
+    assert program.step(1) == {'type': 'path', 'x': 200, 'y': 60, 'points': points, 'delay': 0.25}
+
+    path = str(tmp_path / 'percorso.seq')
+    write_sequence_file(path, program)
+    assert (tmp_path / 'percorso.seq.paths').exists()
+    mapped = MappedSequence(path)
+    try:
+        assert mapped.step(1)['points'] == points
+    finally:
+        mapped.close()
+
+    for invalid in ([], [[1, 1, 5]], [[1, 1, 0], [2, 2, 10], [3, 3, 5]], [[1, -1, 0]], [[1, 'a', 0]]):
+        try:
+            compile_sequence([{'type': 'path', 'points': invalid}])
+        except SequenceCompileError as e:
+            assert str(e).startswith("Movimento 1")
+        else:
+            raise AssertionError(f"Percorso non rifiutato: {invalid}")
+
+
+def test_record_and_replay_motion(tmp_path):
+    """Movimenti registrati tra due click e riprodotti con i tempi originali"""
+    if numpy_missing():
+        return
+    path = str(tmp_path / 'movimenti.seq')
+    writer = SequenceFileWriter(path)
+    timeline = ClickTimeline(writer, record_motion=True)
+
+    timeline.button_press(1, 100, 100, 1000)
+    for i in range(101):                      # 1.2 s dopo il click: 500 ms verso destra
+        timeline.motion(100 + 4 * i, 100, 2200 + 5 * i)
+    timeline.button_press(1, 500, 100, 3000)  # 300 ms dopo l'ultimo campione
+    writer.close()
+
+    mapped = MappedSequence(path)
+    try:
+        assert [mapped.flags[i] & FLAG_PATH for i in range(3)] == [0, FLAG_PATH, 0]
+        assert mapped.delays[0] == 1.2
+        assert mapped.delays[1] == 0.3
+        motion = mapped.paths[1]
+        assert isinstance(motion, MotionPath)
+        assert len(motion) == 2               # Velocità costante: bastano gli estremi
+        assert motion.to_list() == [[100, 100, 0], [500, 100, 500]]
+
+        config = make_config(sequence_mode=True, sequence=mapped, max_clicks=None)
+        clock = VirtualClock()
+        backend, engine = run_engine(config, clock)
+    finally:
+        mapped.close()
+
+    assert engine.click_count == 2
+    assert [round(t, 3) for t in backend.times] == [0.0, 2.0]
+    # Fotogrammi a 100 Hz dall'istante 1.2 per 0.5 s, fino al punto del secondo click
+    assert round(backend.move_times[0], 3) == 1.2 and round(backend.move_times[-1], 3) == 1.7
+    assert len(backend.move_times) == 51
+    assert (backend.move_xs[-1], backend.move_ys[-1]) == (500, 100)
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    test_compress_path()
+    for test in (test_path_steps_roundtrip, test_record_and_replay_motion):
+        with tempfile.TemporaryDirectory() as directory:
+            test(pathlib.Path(directory))
+    print("✅ Test percorsi di movimento completati!")
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test della lettura dei profili e dell'indice dei metadati
+Autore: Andrea Piani
+Descrizione: Verifica validazione dei file e rilettura dei soli profili modificati
+"""
+
+import json
+import os
+from profile_files import ProfileError, ProfileIndex, read_profile, relink_profile_paths
+
+
+def write_profile(directory, filename, name, steps=0):
+    """Scrive un profilo minimo con una sequenza di steps click"""
+    profile = {
+        'profile_name': name,
+        'created_date': '2025-01-02T03:04:05',
+        'basic_settings': {},
+        'advanced_settings': {},
+        'sequence_settings': {'current_sequence': [{'x': i, 'y': i} for i in range(steps)]},
+    }
+    path = os.path.join(directory, filename)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(profile, f)
+    return path
+
+
+def test_read_profile_validation(tmp_path):
+    """Sezioni mancanti e JSON rotto sollevano ProfileError"""
+    cases = [('rotto.json', '{"basic_settings": ', "JSON non valido"),
+             ('parziale.json', '{"basic_settings": {}}', "advanced_settings")]
+    for filename, content, message in cases:
+        path = tmp_path / filename
+        path.write_text(content, encoding='utf-8')
+        try:
+            read_profile(str(path))
+        except ProfileError as e:
+            assert message in str(e)
+        else:
+            raise AssertionError(f"Profilo non rifiutato: {filename}")
+
+    path = write_profile(str(tmp_path), 'ok.json', 'Ok')
+    assert read_profile(path)['profile_name'] == 'Ok'
+
+
+def test_relink_keeps_paths_relative(tmp_path):
+    """Caricato e risalvato (o esportato in un'altra cartella) il profilo non contiene percorsi assoluti"""
+    profiles = tmp_path / 'profiles'
+    profiles.mkdir()
+    path = write_profile(str(profiles), 'immagini.json', 'Immagini')
+    with open(path, 'r', encoding='utf-8') as f:
+        profile = json.load(f)
+    profile['advanced_settings']['target_image'] = 'img/bersaglio.png'
+    profile['sequence_settings'] = {'current_sequence': [
+        {'type': 'image', 'template': 'img/pulsante.png'}, {'x': 1, 'y': 2, 'button': 'left'}],
+        'sequence_file': 'immagini.seq'}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(profile, f)
+
+    loaded = read_profile(path)
+    template = loaded['sequence_settings']['current_sequence'][0]['template']
+    assert os.path.isabs(template)
+
+    # Salvataggio nella stessa cartella: i riferimenti originali
+    saved = json.loads(json.dumps(loaded))
+    relink_profile_paths(saved, str(profiles))
+    assert saved['advanced_settings']['target_image'] == os.path.join('img', 'bersaglio.png')
+    assert saved['sequence_settings']['current_sequence'][0]['template'] == os.path.join('img', 'pulsante.png')
+    assert saved['sequence_settings']['current_sequence'][1] == {'x': 1, 'y': 2, 'button': 'left'}
+    assert saved['sequence_settings']['sequence_file'] == 'immagini.seq'
+
+    # Esportazione in un'altra cartella: relativi a quella, e risolti negli stessi file
+    export_dir = tmp_path / 'export'
+    export_dir.mkdir()
+    relink_profile_paths(loaded, str(export_dir))
+    assert loaded['advanced_settings']['target_image'] == os.path.join('..', 'profiles', 'img', 'bersaglio.png')
+    exported = export_dir / 'immagini.json'
+    exported.write_text(json.dumps(loaded), encoding='utf-8')
+    reloaded = read_profile(str(exported))
+    assert os.path.normpath(reloaded['sequence_settings']['current_sequence'][0]['template']) == template
+    assert os.path.normpath(reloaded['sequence_settings']['sequence_file']) == str(profiles / 'immagini.seq')
+
+
+def test_index_reparses_only_changed_files(tmp_path):
+    """Il refresh rilegge solo i file nuovi o modificati e sopravvive al riavvio"""
+    directory = str(tmp_path)
+    for i in range(5):
+        write_profile(directory, f'p{i}.json', f'Profilo {i}', steps=i)
+    (tmp_path / 'vuoto.json').write_text('', encoding='utf-8')
+
+    index = ProfileIndex(directory)
+    entries = dict(index.refresh())
+    assert index.parsed == 6
+    assert entries['p3.json']['name'] == 'Profilo 3'
+    assert entries['p3.json']['steps'] == 3
+    assert entries['vuoto.json']['status'] == 'empty'
+
+    # Nuova istanza: l'indice su disco evita ogni rilettura
+    index = ProfileIndex(directory)
+    index.refresh()
+    assert index.parsed == 0
+
+    # Un file modificato (dimensione diversa) e uno eliminato
+    write_profile(directory, 'p1.json', 'Profilo 1 bis', steps=10)
+    os.remove(os.path.join(directory, 'p4.json'))
+    entries = dict(index.refresh())
+    assert index.parsed == 1
+    assert entries['p1.json']['name'] == 'Profilo 1 bis'
+    assert 'p4.json' not in entries
+    assert ProfileIndex.INDEX_FILENAME not in entries
+
+
+def test_index_tracks_sequence_file(tmp_path):
+    """Rigenerare il .seq referenziato aggiorna il numero di step anche se il JSON non cambia"""
+    from sequence_file import write_sequence_file
+    from sequence_program import compile_sequence
+
+    def write_seq(steps):
+        write_sequence_file(str(tmp_path / 'macro.seq'),
+                            compile_sequence([{'x': i, 'y': i, 'button': 'left'} for i in range(steps)]))
+
+    write_seq(3)
+    path = write_profile(str(tmp_path), 'macro.json', 'Macro')
+    with open(path, 'r', encoding='utf-8') as f:
+        profile = json.load(f)
+    profile['sequence_settings'] = {'current_sequence': [], 'sequence_file': 'macro.seq'}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(profile, f)
+
+    index = ProfileIndex(str(tmp_path))
+    assert dict(index.refresh())['macro.json']['steps'] == 3
+    index.refresh()
+    assert index.parsed == 0
+
+    write_seq(40)
+    entries = dict(index.refresh())
+    assert index.parsed == 1 and entries['macro.json']['steps'] == 40
+
+    # .seq eliminato e poi ricreato
+    os.remove(str(tmp_path / 'macro.seq'))
+    assert dict(index.refresh())['macro.json']['status'] == 'invalid'
+    write_seq(5)
+    entries = dict(ProfileIndex(str(tmp_path)).refresh())
+    assert entries['macro.json']['status'] == 'ok' and entries['macro.json']['steps'] == 5
+
+
+def test_index_statuses(tmp_path):
+    """Profili corrotti o senza sezioni sono segnalati nell'indice"""
+    (tmp_path / 'corrotto.json').write_text('{', encoding='utf-8')
+    (tmp_path / 'lista.json').write_text('[]', encoding='utf-8')
+    entries = dict(ProfileIndex(str(tmp_path)).refresh())
+    assert entries['corrotto.json']['status'] == 'corrupt'
+    assert entries['lista.json']['status'] == 'invalid'
+
+
+def test_index_parallel_scan(tmp_path):
+    """scan() separa le voci valide da quelle da rileggere, parse_batch() gira in un pool"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    directory = str(tmp_path)
+    for i in range(200):
+        write_profile(directory, f'p{i:03d}.json', f'Profilo {i}', steps=i % 7)
+
+    index = ProfileIndex(directory)
+    cached, pending = index.scan()
+    assert cached == [] and len(pending) == 200
+
+    batches = [pending[start:start + 64] for start in range(0, len(pending), 64)]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for parsed in executor.map(ProfileIndex.parse_batch, batches):
+            for filename, entry in parsed:
+                index.store(filename, entry)
+    index.save()
+
+    # Una nuova istanza trova tutto nell'indice salvato
+    cached, pending = ProfileIndex(directory).scan()
+    assert pending == [] and len(cached) == 200
+    assert dict(cached)['p010.json']['steps'] == 3
+
+    # Un profilo rimosso dall'indice torna tra quelli da rileggere
+    index.remove('p010.json')
+    cached, pending = index.scan()
+    assert [item[0] for item in pending] == ['p010.json']
+
+
+def test_index_concurrent_saves(tmp_path):
+    """Salvataggi sovrapposti (watcher e aggiornamento manuale) lasciano un indice completo e leggibile"""
+    import threading
+
+    directory = str(tmp_path)
+    index = ProfileIndex(directory)
+    index.scan()
+
+    def store_and_save(worker):
+        for i in range(50):
+            index.store(f'w{worker}_{i}.json', {'name': f'{worker}-{i}', 'steps': i, 'status': 'ok'})
+            index.save()
+
+    threads = [threading.Thread(target=store_and_save, args=(worker,)) for worker in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with open(index.index_path, 'r', encoding='utf-8') as f:
+        saved = json.load(f)
+    assert len(saved['entries']) == 300 and saved['entries'] == index.entries
+    assert os.listdir(directory) == [ProfileIndex.INDEX_FILENAME]  # Nessun file temporaneo rimasto
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    for test in (test_read_profile_validation, test_relink_keeps_paths_relative,
+                 test_index_reparses_only_changed_files,
+                 test_index_tracks_sequence_file, test_index_statuses,
+                 test_index_parallel_scan, test_index_concurrent_saves):
+        with tempfile.TemporaryDirectory() as directory:
+            test(pathlib.Path(directory))
+    print("✅ Test profili completati!")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test dell'osservatore della cartella profili
+Autore: Andrea Piani
+Descrizione: Verifica le notifiche per file creati, modificati ed eliminati,
+             con inotify (se disponibile) e con il polling di ripiego, e
+             l'aggiornamento dei profili che usano una sequenza .seq cambiata
+"""
+
+import json
+import os
+import queue
+import struct
+from profile_files import ProfileIndex
+from sequence_file import write_sequence_file
+from sequence_program import compile_sequence
+from profile_watcher import IN_CLOSE_WRITE, IN_DELETE, ProfileWatcher, parse_inotify_events
+
+
+def collect(events, expected, timeout=5.0):
+    """Attende le notifiche attese (insieme di nomi file) e le restituisce"""
+    seen = set()
+    while not expected <= seen:
+        seen.add(events.get(timeout=timeout))
+    return seen
+
+
+def exercise_watcher(directory, use_inotify):
+    """Crea, modifica ed elimina profili controllando le notifiche dell'osservatore"""
+    events = queue.Queue()
+    watcher = ProfileWatcher(str(directory), events.put, poll_interval=0.05,
+                             debounce=0.05, use_inotify=use_inotify).start()
+    try:
+        (directory / 'nuovo.json').write_text('{}', encoding='utf-8')
+        (directory / '.profiles_index').write_text('{}', encoding='utf-8')
+        assert collect(events, {'nuovo.json'}) == {'nuovo.json'}
+
+        (directory / 'nuovo.json').write_text('{"a": 1}', encoding='utf-8')
+        assert 'nuovo.json' in collect(events, {'nuovo.json'})
+
+        os.remove(directory / 'nuovo.json')
+        assert 'nuovo.json' in collect(events, {'nuovo.json'})
+
+        (directory / 'macro.seq').write_bytes(b'MCSQ')
+        assert 'macro.seq' in collect(events, {'macro.seq'})
+    finally:
+        watcher.stop()
+    return watcher.mode
+
+
+def test_polling_watcher(tmp_path):
+    """Il polling segnala creazione, modifica ed eliminazione, ignorando i file non profilo"""
+    assert exercise_watcher(tmp_path, use_inotify=False) == 'polling'
+
+
+def test_inotify_watcher(tmp_path):
+    """Con inotify le stesse notifiche arrivano senza polling (ripiego altrove)"""
+    assert exercise_watcher(tmp_path, use_inotify=True) in ('inotify', 'polling')
+
+
+def test_parse_events_and_index_update(tmp_path):
+    """Decodifica degli eventi inotify e aggiornamento di una sola voce d'indice"""
+    name = b'prova.json'
+    padded = name + b'\0' * (16 - len(name))
+    data = (struct.pack('iIII', 1, IN_CLOSE_WRITE, 0, len(padded)) + padded
+            + struct.pack('iIII', 1, IN_DELETE, 0, 0))
+    assert parse_inotify_events(data) == [(IN_CLOSE_WRITE, 'prova.json'), (IN_DELETE, '')]
+
+    index = ProfileIndex(str(tmp_path))
+    (tmp_path / 'prova.json').write_text('{', encoding='utf-8')
+    assert index.update('prova.json')['status'] == 'corrupt'
+    os.remove(tmp_path / 'prova.json')
+    assert index.update('prova.json') is None
+    assert 'prova.json' not in index.entries
+
+
+def test_sequence_change_updates_profile(tmp_path):
+    """Un .seq rigenerato viene segnalato e ricondotto ai profili che lo referenziano"""
+    def write_seq(steps):
+        write_sequence_file(str(tmp_path / 'macro.seq'),
+                            compile_sequence([{'x': i, 'y': i, 'button': 'left'} for i in range(steps)]))
+
+    write_seq(3)
+    for filename, sequence_file in (('macro.json', 'macro.seq'), ('copia.json', './macro.seq'),
+                                    ('altro.json', None)):
+        sequence_settings = {'current_sequence': []}
+        if sequence_file:
+            sequence_settings['sequence_file'] = sequence_file
+        (tmp_path / filename).write_text(json.dumps({
+            'basic_settings': {}, 'advanced_settings': {}, 'sequence_settings': sequence_settings}),
+            encoding='utf-8')
+    index = ProfileIndex(str(tmp_path))
+    assert dict(index.refresh())['macro.json']['steps'] == 3
+
+    events = queue.Queue()
+    watcher = ProfileWatcher(str(tmp_path), events.put, poll_interval=0.05, debounce=0.05).start()
+    try:
+        write_seq(40)
+        assert 'macro.seq' in collect(events, {'macro.seq'})
+    finally:
+        watcher.stop()
+
+    # Quello che fa l'interfaccia all'evento: riallinea le sole righe dei profili interessati
+    assert index.profiles_using('macro.seq') == ['copia.json', 'macro.json']
+    assert index.profiles_using('altro.seq') == []
+    assert index.update('macro.json')['steps'] == 40
+    assert index.update('copia.json')['steps'] == 40
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    for test in (test_polling_watcher, test_inotify_watcher, test_parse_events_and_index_update,
+                 test_sequence_change_updates_profile):
+        with tempfile.TemporaryDirectory() as directory:
+            test(pathlib.Path(directory))
+    print("✅ Test osservatore profili completati!")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test dell'istantanea di configurazione
+Autore: Andrea Piani
+Descrizione: Verifica la conversione dal formato profilo a RunConfig
+"""
+
+from run_config import RunConfig
+
+
+def make_profile(**overrides):
+    """Crea un profilo nel formato di get_current_config"""
+    profile = {
+        'basic_settings': {
+            'min_interval': '0.05',
+            'max_interval': '0.05',
+            'infinite_clicks': False,
+            'max_clicks': '20'
+        },
+        'advanced_settings': {
+            'click_type': 'right',
+            'double_click': True,
+            'use_current_position': False,
+            'fixed_x': '300',
+            'fixed_y': '400',
+            'initial_delay': '0'
+        },
+        'sequence_settings': {
+            'execution_mode': 'sequence',
+            'current_sequence': [{'x': 1, 'y': 2, 'button': 'left', 'delay': 0.1}],
+            'sequence_repeats': '3',
+            'sequence_pause': '0.5',
+            'infinite_sequence': False
+        }
+    }
+    for section, values in overrides.items():
+        profile[section].update(values)
+    return profile
+
+
+def test_from_profile():
+    """I valori stringa del profilo diventano tipi Python"""
+    config = RunConfig.from_profile(make_profile())
+
+    assert config.min_interval == 0.05
+    assert config.max_clicks == 20
+    assert config.click_type == 'right'
+    assert config.double_click is True
+    assert (config.fixed_x, config.fixed_y) == (300, 400)
+    assert config.click_backend == 'pyautogui'
+    assert config.sequence_mode is True
+    assert len(config.sequence) == 1
+    assert config.sequence_repeats == 3
+
+
+def test_infinite_values():
+    """Click e sequenze infinite diventano None"""
+    config = RunConfig.from_profile(make_profile(
+        basic_settings={'infinite_clicks': True},
+        sequence_settings={'infinite_sequence': True}
+    ))
+
+    assert config.max_clicks is None
+    assert config.sequence_repeats is None
+
+
+def test_invalid_values():
+    """Valori non validi sollevano ValueError"""
+    invalid = [
+        {'basic_settings': {'min_interval': '2', 'max_interval': '1'}},
+        {'basic_settings': {'max_clicks': 'molti'}},
+        {'advanced_settings': {'click_type': 'laterale'}},
+        {'advanced_settings': {'fixed_x': '-5'}},
+        {'sequence_settings': {'current_sequence': [{'x': -1, 'y': 0, 'button': 'left'}]}},
+    ]
+    for overrides in invalid:
+        try:
+            RunConfig.from_profile(make_profile(**overrides))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"Configurazione accettata: {overrides}")
+
+
+def test_image_scales():
+    """Scale del template per l'immagine bersaglio e per gli step immagine, validate"""
+    import os
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        image = os.path.join(directory, 'pulsante.png')
+        with open(image, 'wb') as f:
+            f.write(b'png')
+
+        config = RunConfig.from_profile(make_profile(advanced_settings={'target_image': image}))
+        assert config.target.scales == (1.0,)
+
+        config = RunConfig.from_profile(make_profile(
+            advanced_settings={'target_image': image, 'target_scales': '1.25, 0.8,1'},
+            sequence_settings={'current_sequence': [{'type': 'image', 'template': image, 'scales': [1.5, 1]}]}))
+        assert config.target.scales == (0.8, 1.0, 1.25)
+        assert config.sequence.targets[0].scales == (1.0, 1.5)
+        assert config.sequence.step(0)['scales'] == [1.0, 1.5]
+
+        invalid = [
+            {'advanced_settings': {'target_image': image, 'target_scales': 'grande'}},
+            {'advanced_settings': {'target_image': image, 'target_scales': '0.1'}},
+            {'advanced_settings': {'target_image': image, 'target_scales': [1 + i / 10 for i in range(9)]}},
+            {'sequence_settings': {'current_sequence': [{'type': 'image', 'template': image, 'scales': [5]}]}},
+            {'sequence_settings': {'current_sequence': [{'type': 'image', 'template': image, 'scales': 2}]}},
+        ]
+        for overrides in invalid:
+            try:
+                RunConfig.from_profile(make_profile(**overrides))
+            except ValueError:
+                pass
+            else:
+                raise AssertionError(f"Scale accettate: {overrides}")
+
+
+if __name__ == "__main__":
+    test_from_profile()
+    test_infinite_values()
+    test_invalid_values()
+    test_image_scales()
+    print("✅ Test configurazione completati!")
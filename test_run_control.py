@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test della segnalazione avvio/stop/pausa
+Autore: Andrea Piani
+Descrizione: Verifica che stop e pausa sveglino subito il thread di click
+"""
+
+import statistics
+import threading
+import time
+from run_control import RunControl
+
+
+def _worker(control, wake_times):
+    """Thread di lavoro che dorme a lungo finché non viene fermato"""
+    try:
+        while control.sleep(10.0):
+            wake_times.append(time.perf_counter())
+    finally:
+        control.mark_halted()
+
+
+def measure_stop_latency():
+    """Ferma un thread in una sleep lunga e restituisce la latenza di stop misurata"""
+    control = RunControl()
+    control.start()
+    thread = threading.Thread(target=_worker, args=(control, []), daemon=True)
+    thread.start()
+    time.sleep(0.02)
+
+    control.stop()
+    assert control.wait_halted(timeout=1.0)
+    thread.join(timeout=1.0)
+    assert not thread.is_alive()
+    return control.stop_latency
+
+
+def test_stop_latency():
+    """Lo stop interrompe una sleep lunga in meno di 1ms (mediana di più cicli)"""
+    latency = statistics.median(measure_stop_latency() for _ in range(7))
+    print(f"Latenza stop (mediana): {latency * 1000:.3f}ms")
+    assert latency < 0.001
+
+
+def test_pause_and_resume():
+    """La pausa blocca la sleep oltre la sua durata fino alla ripresa"""
+    control = RunControl()
+    control.start()
+    control.pause()
+
+    threading.Timer(0.1, control.resume).start()
+    start = time.perf_counter()
+    assert control.sleep(0.01)
+    assert time.perf_counter() - start >= 0.1
+
+
+def test_stop_during_pause():
+    """Lo stop sblocca anche un thread in pausa"""
+    control = RunControl()
+    control.start()
+    control.pause()
+
+    threading.Timer(0.05, control.stop).start()
+    assert not control.wait_if_paused()
+    assert not control.is_running
+
+
+if __name__ == "__main__":
+    test_stop_latency()
+    test_pause_and_resume()
+    test_stop_during_pause()
+    print("✅ Test run control completati!")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test dello scrittore di log JSONL
+Autore: Andrea Piani
+Descrizione: Verifica scrittura a blocchi, rotazione per dimensione e compressione gzip
+"""
+
+import gzip
+import json
+import os
+import tempfile
+from run_log_writer import RunLogWriter
+
+
+def make_record(i):
+    return {'ts': 1700000000.0 + i, 'mode': 'single', 'step': i, 'button': 'left',
+            'x': 100, 'y': 200, 'wait': 0.05, 'sched_error': 0.0001}
+
+
+def test_write_batches():
+    """Tutti i record arrivano su file, in ordine, con meno flush che record"""
+    with tempfile.TemporaryDirectory() as log_dir:
+        writer = RunLogWriter(log_dir=log_dir).start()
+        for i in range(5000):
+            writer.write(make_record(i))
+        writer.close()
+
+        with open(writer.path, encoding='utf-8') as f:
+            steps = [json.loads(line)['step'] for line in f]
+
+        assert steps == list(range(5000))
+        assert writer.records_written == 5000
+        assert writer.batches_written < 5000
+
+
+def test_rotation_with_gzip():
+    """Superata la dimensione massima i file vengono ruotati e compressi"""
+    with tempfile.TemporaryDirectory() as log_dir:
+        writer = RunLogWriter(log_dir=log_dir, max_bytes=20000, backup_count=3,
+                              compress=True, batch_size=100).start()
+        for i in range(2000):
+            writer.write(make_record(i))
+        writer.close()
+
+        assert writer.rotations > 3
+        assert not os.path.exists(writer.path + ".4.gz")
+
+        with gzip.open(writer.path + ".1.gz", 'rt', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        assert records and records[0]['mode'] == 'single'
+
+
+def test_rotation_failure_keeps_logging():
+    """Se la rotazione fallisce i record continuano sul file corrente; la rotazione viene ritentata"""
+    with tempfile.TemporaryDirectory() as log_dir:
+        writer = RunLogWriter(log_dir=log_dir, max_bytes=5000, backup_count=2, batch_size=10)
+        replace = os.replace
+
+        def locked_replace(source, target):
+            if source == writer.path:
+                raise PermissionError("File in uso da un altro processo")
+            replace(source, target)
+
+        os.replace = locked_replace
+        try:
+            writer.start()
+            for i in range(200):
+                writer.write(make_record(i))
+            writer.close()
+        finally:
+            os.replace = replace
+        assert writer.errors > 0 and writer.rotations == 0
+        with open(writer.path, encoding='utf-8') as f:
+            assert [json.loads(line)['step'] for line in f] == list(range(200))
+
+        # File di nuovo libero: la rotazione riprende
+        writer.start()
+        for i in range(200, 300):
+            writer.write(make_record(i))
+        writer.close()
+        assert writer.rotations > 0
+        steps = []
+        for path in (writer.path + ".2", writer.path + ".1", writer.path):
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    steps.extend(json.loads(line)['step'] for line in f)
+        assert steps[-1] == 299 and steps == sorted(steps)
+
+
+if __name__ == "__main__":
+    test_write_batches()
+    test_rotation_with_gzip()
+    test_rotation_failure_keeps_logging()
+    print("✅ Test log su file completati!")
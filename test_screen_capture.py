@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test della cattura di regioni dello schermo
+Autore: Andrea Piani
+Descrizione: Verifica cache a TTL, regioni contenute servite come viste, limiti dello
+             schermo e buffer riusati con un backend finto (richiede NumPy), gli step di
+             attesa del colore con uno schermo finto; la cattura X11 reale viene provata
+             solo se DISPLAY è impostato
+"""
+
+import os
+
+from click_clock import VirtualClock
+from screen_capture import CaptureError, ColorWait, ScreenCapture, X11Capture, parse_color
+from sequence_file import SequenceFileError, write_sequence_file
+from sequence_program import FLAG_WAIT, SequenceCompileError, compile_sequence
+from test_click_engine import make_config, run_engine
+
+
+def numpy_missing():
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        print("NumPy non installato: test della cattura saltato")
+        return True
+    return False
+
+
+class FakeBackend:
+    """Schermo 1920x1080 in cui ogni pixel vale (x + y) % 256; un buffer riusato per dimensione"""
+
+    mode = 'fake'
+
+    def __init__(self):
+        import numpy as np
+
+        self.width, self.height = 1920, 1080
+        ys, xs = np.mgrid[0:self.height, 0:self.width]
+        self.screen = np.repeat(((xs + ys) % 256).astype(np.uint8)[:, :, None], 4, axis=2)
+        self.buffers = {}
+        self.grabs = []
+        self.closed = False
+
+    def grab(self, left, top, width, height):
+        self.grabs.append((left, top, width, height))
+        buffer = self.buffers.setdefault((width, height), self.screen[:height, :width].copy())
+        buffer[:] = self.screen[top:top + height, left:left + width]
+        return buffer
+
+    def close(self):
+        self.closed = True
+
+
+def test_ttl_cache_and_regions():
+    """Regioni contenute in una cattura recente non ricatturano; scaduto il TTL sì"""
+    if numpy_missing():
+        return
+    clock = VirtualClock()
+    backend = FakeBackend()
+    capture = ScreenCapture(ttl=0.05, clock=clock, backend=backend)
+
+    frame, origin = capture.grab((100, 200, 400, 300))
+    assert origin == (100, 200) and frame.shape == (300, 400, 4)
+    assert frame[0, 0, 0] == (100 + 200) % 256
+
+    # Sotto-regione della precedente: vista sullo stesso buffer, nessuna nuova cattura
+    part, origin = capture.grab((150, 250, 50, 40))
+    assert origin == (150, 250) and part.shape == (40, 50, 4)
+    assert part[0, 0, 0] == (150 + 250) % 256
+    assert part.base is not None and backend.grabs == [(100, 200, 400, 300)]
+    assert (capture.captures, capture.hits) == (1, 1)
+
+    # Regione che esce dalla cattura: nuova cattura
+    capture.grab((450, 200, 100, 100))
+    assert len(backend.grabs) == 2
+
+    # Scaduto il TTL anche la regione contenuta viene ricatturata
+    clock.sleep(0.06)
+    capture.grab((150, 250, 50, 40))
+    assert backend.grabs[-1] == (150, 250, 50, 40) and capture.captures == 3
+
+    # Limiti dello schermo; None = schermo intero
+    frame, origin = capture.grab((1800, 1000, 400, 400))
+    assert origin == (1800, 1000) and frame.shape == (80, 120, 4)
+    frame, origin = capture.grab()
+    assert origin == (0, 0) and frame.shape == (1080, 1920, 4)
+    try:
+        capture.grab((5000, 0, 10, 10))
+    except CaptureError:
+        pass
+    else:
+        raise AssertionError("Regione fuori dallo schermo accettata")
+
+    capture.close()
+    assert backend.closed
+
+
+def test_reused_buffer_invalidates_cache():
+    """Una cattura della stessa dimensione riscrive il buffer: il fotogramma vecchio esce dalla cache"""
+    if numpy_missing():
+        return
+    clock = VirtualClock()
+    backend = FakeBackend()
+    capture = ScreenCapture(ttl=1.0, clock=clock, backend=backend)
+
+    capture.grab((0, 0, 100, 100))
+    capture.grab((500, 500, 100, 100))
+    capture.grab((10, 10, 20, 20))
+    assert backend.grabs[-1] == (10, 10, 20, 20)
+    frame, _ = capture.grab((510, 510, 20, 20))
+    assert frame[0, 0, 0] == (510 + 510) % 256 and capture.hits == 1
+
+    # La conversione in grigio è fatta una volta per fotogramma
+    try:
+        import cv2  # noqa: F401
+    except ImportError:
+        return
+    gray, origin = capture.grab_gray((500, 500, 100, 100))
+    assert origin == (500, 500) and gray.shape == (100, 100)
+    again, _ = capture.grab_gray((520, 530, 10, 10))
+    assert again.base is gray.base
+    assert again[0, 0] == gray[30, 20]
+
+
+class ChangingScreen:
+    """Schermo finto: il pixel (x, y) diventa del colore indicato dall'istante indicato"""
+
+    def __init__(self, clock, changes):
+        self.clock = clock
+        self.changes = changes  # (x, y) -> (istante, colore)
+        self.samples = 0
+
+    def color(self, x, y, size=1):
+        self.samples += 1
+        at, color = self.changes.get((x, y), (float('inf'), None))
+        return color if self.clock.now() >= at else (0, 0, 0)
+
+    def close(self):
+        pass
+
+
+def test_color_sampling():
+    """Colore del solo pixel, o medio del quadrato, sempre da una cattura nuova"""
+    if numpy_missing():
+        return
+    backend = FakeBackend()
+    capture = ScreenCapture(ttl=1.0, clock=VirtualClock(), backend=backend)
+    assert capture.color(10, 20) == (30, 30, 30)
+    assert capture.color(10, 20) == (30, 30, 30) and len(backend.grabs) == 2
+    assert backend.grabs[-1] == (10, 20, 1, 1)
+    assert capture.color(10, 20, size=3) == (30, 30, 30)
+    assert backend.grabs[-1] == (9, 19, 3, 3)
+
+
+def test_wait_steps():
+    """L'attesa termina appena compare il colore; allo scadere del timeout la sequenza prosegue"""
+    assert parse_color('#FF8000') == (255, 128, 0) == parse_color([255, 128, 0])
+    assert ColorWait((100, 100, 100), tolerance=5).matches((104, 96, 105))
+    assert not ColorWait((100, 100, 100), tolerance=5).matches((106, 100, 100))
+
+    program = compile_sequence([
+        {'type': 'wait', 'x': 5, 'y': 5, 'color': '#00ff00', 'timeout': 2.0},
+        {'x': 10, 'y': 20, 'button': 'left', 'delay': 0.5},
+        {'type': 'wait', 'x': 7, 'y': 7, 'color': '#ff0000', 'tolerance': 0, 'timeout': 1.0, 'delay': 0.25},
+        {'x': 30, 'y': 40, 'button': 'right', 'delay': 0.5},
+    ])
+    assert program.flags[0] & FLAG_WAIT
+    assert program.step(2) == {'type': 'wait', 'x': 7, 'y': 7, 'color': '#ff0000', 'tolerance': 0,
+                               'timeout': 1.0, 'size': 1, 'delay': 0.25}
+
+    clock = VirtualClock()
+    screen = ChangingScreen(clock, {(5, 5): (0.3, (10, 250, 12))})
+    config = make_config(sequence_mode=True, sequence=program, max_clicks=None)
+    backend, engine = run_engine(config, clock, screen=screen)
+    # Verde alle 0.3 s (campionato ogni 5 ms); rosso mai: timeout di 1 s, poi pausa 0.25 s
+    events = backend.events()
+    assert [(x, y) for _, x, y, _, _ in events] == [(10, 20), (30, 40)]
+    assert abs(events[0][0] - 0.3) < 0.006
+    assert abs(events[1][0] - (events[0][0] + 0.5 + 1.0 + 0.25)) < 0.006
+    assert 250 <= screen.samples <= 270
+    assert engine.click_count == 2
+
+    try:
+        write_sequence_file('/nonexistent/attese.seq', program)
+    except SequenceFileError as e:
+        assert 'attese' in str(e)
+    else:
+        raise AssertionError("Attese scritte nel formato binario")
+
+    for invalid in ({'type': 'wait', 'x': 1, 'y': 1},
+                    {'type': 'wait', 'x': 1, 'y': 1, 'color': '#12345'},
+                    {'type': 'wait', 'x': 1, 'y': 1, 'color': [0, 0, 300]},
+                    {'type': 'wait', 'x': 1, 'y': 1, 'color': '#000000', 'timeout': 0},
+                    {'type': 'wait', 'x': 1, 'y': 1, 'color': '#000000', 'tolerance': 256}):
+        try:
+            compile_sequence([invalid])
+        except SequenceCompileError as e:
+            assert str(e).startswith("Attesa 1")
+        else:
+            raise AssertionError(f"Step non rifiutato: {invalid}")
+
+
+def test_x11_capture():
+    """Cattura reale di una regione (solo con un display X11 disponibile)"""
+    if numpy_missing():
+        return
+    if not os.environ.get('DISPLAY'):
+        print("DISPLAY non impostato: test della cattura X11 saltato")
+        return
+    try:
+        backend = X11Capture()
+    except CaptureError as e:
+        print(f"Cattura X11 non disponibile: {e}")
+        return
+    try:
+        capture = ScreenCapture(backend=backend)
+        frame, origin = capture.grab((0, 0, 64, 32))
+        assert origin == (0, 0) and frame.shape == (32, 64, 4)
+        assert capture.grab((8, 8, 16, 16))[0].shape == (16, 16, 4)
+        assert capture.captures == 1
+    finally:
+        backend.close()
+
+
+if __name__ == "__main__":
+    test_ttl_cache_and_regions()
+    test_reused_buffer_invalidates_cache()
+    test_color_sampling()
+    test_wait_steps()
+    test_x11_capture()
+    print("✅ Test cattura dello schermo completati!")
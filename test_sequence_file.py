@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test del formato binario delle sequenze
+Autore: Andrea Piani
+Descrizione: Verifica scrittura e rilettura con mmap, il riferimento dal profilo
+             JSON e l'esecuzione della sequenza mappata con il motore
+"""
+
+import json
+import os
+from click_clock import VirtualClock
+from profile_files import read_profile
+from run_config import RunConfig
+from sequence_file import (MappedSequence, SequenceFileError, SequenceFileWriter, main as convert_profile,
+                           read_step_count, write_sequence_file)
+from sequence_program import compile_sequence
+from test_click_engine import make_config, run_engine
+
+
+def make_program(steps):
+    return compile_sequence([{'x': i, 'y': 2 * i, 'button': ('left', 'middle', 'right')[i % 3],
+                              'double': i % 4 == 0, 'delay': i / 100} for i in range(steps)])
+
+
+def test_roundtrip_and_errors(tmp_path):
+    """Il file mappato restituisce gli stessi step; file estranei o troncati sono rifiutati"""
+    path = str(tmp_path / 'seq.seq')
+    program = make_program(1001)
+    write_sequence_file(path, program)
+    assert read_step_count(path) == 1001
+
+    mapped = MappedSequence(path)
+    try:
+        assert len(mapped) == 1001
+        assert mapped.step(1000) == program.step(1000)
+        assert list(mapped.delays) == list(program.delays)
+    finally:
+        mapped.close()
+
+    with open(path, 'r+b') as f:
+        f.truncate(os.path.getsize(path) - 1)
+    (tmp_path / 'altro.seq').write_bytes(b'non una sequenza')
+    for name in ('seq.seq', 'altro.seq', 'mancante.seq'):
+        try:
+            MappedSequence(str(tmp_path / name))
+        except SequenceFileError:
+            pass
+        else:
+            raise AssertionError(f"File accettato: {name}")
+
+
+def test_profile_reference_and_playback(tmp_path):
+    """Il profilo convertito fa riferimento al .seq e il motore lo esegue dalla mappatura"""
+    profile_path = tmp_path / 'macro.json'
+    profile = {
+        'basic_settings': {},
+        'advanced_settings': {'use_current_position': True, 'initial_delay': 0},
+        'sequence_settings': {'execution_mode': 'sequence', 'sequence_repeats': 2, 'sequence_pause': 0,
+                              'current_sequence': [{'x': i, 'y': i, 'button': 'left', 'delay': 0.5}
+                                                   for i in range(3)]},
+    }
+    profile_path.write_text(json.dumps(profile), encoding='utf-8')
+    assert convert_profile([str(profile_path)]) == 0
+
+    saved = json.loads(profile_path.read_text(encoding='utf-8'))
+    assert saved['sequence_settings']['sequence_file'] == 'macro.seq'
+    assert saved['sequence_settings']['current_sequence'] == []
+
+    # read_profile risolve il percorso rispetto alla cartella del profilo
+    config = RunConfig.from_profile(read_profile(str(profile_path)))
+    assert isinstance(config.sequence, MappedSequence)
+
+    clock = VirtualClock()
+    backend, engine = run_engine(make_config(sequence_mode=True, sequence=config.sequence,
+                                             sequence_repeats=2), clock)
+    config.sequence.close()
+    assert engine.click_count == 6
+    assert [event[1] for event in backend.events()] == [0, 1, 2, 0, 1, 2]
+    assert backend.times[1] - backend.times[0] == 0.5
+
+
+def test_convert_keeps_profile(tmp_path):
+    """La conversione lascia relativi gli altri percorsi e non sovrascrive un .seq già referenziato"""
+    profile_path = tmp_path / 'macro.json'
+    profile = {
+        'basic_settings': {},
+        'advanced_settings': {'target_image': 'immagini/bersaglio.png'},
+        'sequence_settings': {'current_sequence': [{'x': 1, 'y': 2, 'button': 'left', 'delay': 0.1}]},
+    }
+    profile_path.write_text(json.dumps(profile), encoding='utf-8')
+    assert convert_profile([str(profile_path)]) == 0
+    saved = json.loads(profile_path.read_text(encoding='utf-8'))
+    assert saved['advanced_settings']['target_image'] == 'immagini/bersaglio.png'
+    assert saved['sequence_settings']['sequence_file'] == 'macro.seq'
+
+    # Seconda conversione: sequence_file già impostato e sequenza JSON vuota
+    seq_path = tmp_path / 'macro.seq'
+    content = seq_path.read_bytes()
+    assert convert_profile([str(profile_path)]) == 1
+    assert seq_path.read_bytes() == content
+    assert json.loads(profile_path.read_text(encoding='utf-8')) == saved
+
+    # Sequenza vuota senza riferimento: nessun file scritto
+    empty_path = tmp_path / 'vuoto.json'
+    empty_path.write_text(json.dumps({'basic_settings': {}, 'advanced_settings': {},
+                                      'sequence_settings': {'current_sequence': []}}), encoding='utf-8')
+    assert convert_profile([str(empty_path)]) == 1
+    assert not (tmp_path / 'vuoto.seq').exists()
+
+
+def test_streaming_writer(tmp_path):
+    """Il writer cresce oltre la capacità iniziale, è leggibile durante la scrittura e si compatta"""
+    path = str(tmp_path / 'registrazione.seq')
+    writer = SequenceFileWriter(path, capacity=16)
+    for i in range(50000):
+        writer.append(i % 1920, i % 1080, ('left', 'right')[i % 2], i % 3 == 0, 0.25)
+
+    # Prima di close (come dopo un'interruzione) il file contiene già tutti gli step
+    assert read_step_count(path) == 50000
+    mapped = MappedSequence(path)
+    assert mapped.step(49999) == {'x': 49999 % 1920, 'y': 49999 % 1080, 'button': 'right',
+                                  'double': False, 'delay': 0.25}
+    mapped.close()
+
+    writer.close()
+    assert os.path.getsize(path) < 50000 * 18 + 64
+    mapped = MappedSequence(path)
+    try:
+        assert len(mapped) == 50000
+        assert mapped.step(3) == {'x': 3, 'y': 3, 'button': 'right', 'double': True, 'delay': 0.25}
+    finally:
+        mapped.close()
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    for test in (test_roundtrip_and_errors, test_profile_reference_and_playback, test_convert_keeps_profile,
+                 test_streaming_writer):
+        with tempfile.TemporaryDirectory() as directory:
+            test(pathlib.Path(directory))
+    print("✅ Test sequenze binarie completati!")
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test della compilazione delle sequenze
+Autore: Andrea Piani
+Descrizione: Verifica conversione in array e rifiuto degli step non validi
+"""
+
+from sequence_program import (BUTTON_NAMES, FLAG_DOUBLE, SequenceCompileError,
+                              compile_sequence)
+
+
+def test_compile_valid_sequence():
+    """Gli step validi finiscono negli array con i tipi corretti"""
+    program = compile_sequence([
+        {'x': 10, 'y': 20, 'button': 'left', 'double': False, 'delay': 1.0},
+        {'x': '30', 'y': '40', 'button': 'right', 'double': True, 'delay': '0.5'},
+    ])
+
+    assert len(program) == 2
+    assert list(program.xs) == [10, 30]
+    assert list(program.ys) == [20, 40]
+    assert BUTTON_NAMES[program.buttons[1]] == 'right'
+    assert program.flags[1] & FLAG_DOUBLE
+    assert program.delays[1] == 0.5
+    assert program.step(0) == {'x': 10, 'y': 20, 'button': 'left', 'double': False, 'delay': 1.0}
+
+
+def test_reject_invalid_steps():
+    """Ogni tipo di step non valido viene rifiutato con il numero dello step"""
+    invalid_steps = [
+        "non un dict",
+        {'x': -1, 'y': 0, 'button': 'left'},
+        {'x': 0, 'y': 40000, 'button': 'left'},
+        {'x': 'abc', 'y': 0, 'button': 'left'},
+        {'x': 0, 'y': 0, 'button': 'laterale'},
+        {'x': 0, 'y': 0, 'button': 'left', 'delay': -1},
+    ]
+    for step in invalid_steps:
+        try:
+            compile_sequence([{'x': 1, 'y': 1, 'button': 'left'}, step])
+        except SequenceCompileError as e:
+            assert str(e).startswith("Click 2")
+        else:
+            raise AssertionError(f"Step non rifiutato: {step}")
+
+
+if __name__ == "__main__":
+    test_compile_valid_sequence()
+    test_reject_invalid_steps()
+    print("✅ Test compilazione sequenze completati!")
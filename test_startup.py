@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test dei caricamenti lazy all'avvio
+Autore: Andrea Piani
+Descrizione: Verifica in processi separati che le dipendenze pesanti non vengano
+             importate finché non servono
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def loaded_modules(code, cwd, modules):
+    """Esegue code in un nuovo interprete e dice quali moduli risultano caricati"""
+    script = code + f"\nimport sys, json\nprint(json.dumps({{m: m in sys.modules for m in {modules!r}}}))"
+    env = dict(os.environ, PYTHONPATH=PROJECT_DIR)
+    result = subprocess.run([sys.executable, '-c', script], cwd=cwd, env=env,
+                            capture_output=True, text=True, timeout=30)
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def test_gui_module_import_is_lazy(tmp_path):
+    """Importare l'applicazione non carica pyautogui, LicenseDialog, http.server né multiprocessing"""
+    loaded = loaded_modules("import mouse_clicker", str(tmp_path),
+                            ['pyautogui', 'license_dialog', 'http.server', 'multiprocessing'])
+    assert loaded == {'pyautogui': False, 'license_dialog': False, 'http.server': False,
+                      'multiprocessing': False}
+
+
+def test_headless_without_tkinter(tmp_path):
+    """Il runner headless (licenza compresa) non importa tkinter né, senza step immagine, multiprocessing"""
+    profile = tmp_path / 'p.json'
+    profile.write_text(json.dumps({
+        'basic_settings': {'min_interval': '0.001', 'max_interval': '0.001'},
+        'advanced_settings': {'use_current_position': False, 'initial_delay': '0'},
+        'sequence_settings': {}
+    }), encoding='utf-8')
+    code = (f"import headless_runner\n"
+            f"assert headless_runner.main([{str(profile)!r}, '--backend', 'null', "
+            f"'--max-clicks', '2', '--quiet']) == 0")
+    loaded = loaded_modules(code, str(tmp_path), ['tkinter', 'multiprocessing', 'concurrent.futures'])
+    assert loaded == {'tkinter': False, 'multiprocessing': False, 'concurrent.futures': False}
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    for test in (test_gui_module_import_is_lazy, test_headless_without_tkinter):
+        with tempfile.TemporaryDirectory() as directory:
+            test(pathlib.Path(directory))
+    print("✅ Test avvio completati!")
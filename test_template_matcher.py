@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test della ricerca di immagini sullo schermo
+Autore: Andrea Piani
+Descrizione: Verifica il matching a piramide su uno schermo sintetico (richiede OpenCV)
+             e i click su immagine di sequenze e click singoli con un locator finto
+"""
+
+from click_clock import VirtualClock
+from sequence_file import SequenceFileError, write_sequence_file
+from sequence_program import FLAG_IMAGE, SequenceCompileError, compile_sequence
+from template_matcher import ImageLocator, ImageTarget, Match, PyramidMatcher
+from test_click_engine import make_config, run_engine
+
+
+def opencv_missing():
+    try:
+        import cv2  # noqa: F401
+        import numpy  # noqa: F401
+    except ImportError:
+        print("OpenCV/NumPy non installati: test del matching saltato")
+        return True
+    return False
+
+
+def synthetic_screen(width=1920, height=1080):
+    """Schermo con struttura a macchie (rumore sfocato), deterministico"""
+    import cv2
+    import numpy as np
+
+    noise = (np.random.default_rng(1).random((height, width)) * 255).astype(np.uint8)
+    return cv2.normalize(cv2.GaussianBlur(noise, (0, 0), 3), None, 0, 255, cv2.NORM_MINMAX)
+
+
+class FixedCapture:
+    """Cattura finta: restituisce sempre lo stesso fotogramma con la sua origine sullo schermo"""
+
+    def __init__(self, screen, origin):
+        self.screen = screen
+        self.origin = origin
+        self.regions = []
+
+    def grab_gray(self, region):
+        self.regions.append(region)
+        return self.screen, self.origin
+
+    def close(self):
+        pass
+
+
+class FakeLocator:
+    """Restituisce le posizioni indicate per template, o None (immagine non visibile)"""
+
+    def __init__(self, positions):
+        self.positions = positions
+        self.calls = []
+        self.prefetches = []
+
+    def prefetch(self, target):
+        self.prefetches.append(target)
+
+    def locate(self, target):
+        self.calls.append(target)
+        position = self.positions.get(target.template)
+        return None if position is None else Match(position[0], position[1], 0.95, 1.0)
+
+
+def test_pyramid_matcher():
+    """Centro esatto a piena risoluzione, anche con il template a un'altra scala; None se assente"""
+    if opencv_missing():
+        return
+    import cv2
+
+    screen = synthetic_screen()
+    template = screen[700:760, 1300:1380].copy()
+    match = PyramidMatcher().find(screen, template, key='pulsante')
+    assert (match.x, match.y) == (1340, 730)
+    assert match.score > 0.99
+
+    zoomed = cv2.resize(screen, None, fx=1.25, fy=1.25)
+    match = PyramidMatcher(scales=(0.8, 1.0, 1.25)).find(zoomed, template)
+    assert match.scale == 1.25
+    assert abs(match.x - 1340 * 1.25) <= 2 and abs(match.y - 730 * 1.25) <= 2
+
+    other = synthetic_screen(200, 200)[50:110, 50:130].copy()
+    assert PyramidMatcher().find(screen, other, threshold=0.8) is None
+
+
+def test_locator_offsets_and_cache(tmp_path):
+    """Il locator riporta le coordinate nella regione catturata e rilegge il template solo se cambia"""
+    if opencv_missing():
+        return
+    import cv2
+
+    screen = synthetic_screen()
+    path = str(tmp_path / 'icona.png')
+    cv2.imwrite(path, screen[100:140, 200:260])
+
+    # Cattura di una regione che parte da (1000, 500) dello schermo
+    capture = FixedCapture(screen, (1000, 500))
+    locator = ImageLocator(capture=capture)
+    match = locator.locate(ImageTarget(path, 0.9, (1000, 500, 1920, 1080)))
+    assert (match.x, match.y) == (1000 + 230, 500 + 120)
+    assert capture.regions == [(1000, 500, 1920, 1080)]
+    assert locator.template(path) is locator.template(path)
+
+    # Schermo con zoom 125%: trovato solo con le scale del bersaglio
+    zoomed = ImageLocator(capture=FixedCapture(cv2.resize(screen, None, fx=1.25, fy=1.25), (0, 0)))
+    assert zoomed.locate(ImageTarget(path, 0.9)) is None
+    match = zoomed.locate(ImageTarget(path, 0.9, scales=(1.0, 1.25)))
+    assert match.scale == 1.25 and abs(match.x - 230 * 1.25) <= 2
+
+
+def test_image_steps_and_single_target(tmp_path):
+    """Step immagine cliccati dove il locator li trova, saltati se non visibili"""
+    found = str(tmp_path / 'trovata.png')
+    missing = str(tmp_path / 'assente.png')
+    for path in (found, missing):
+        open(path, 'wb').close()
+
+    program = compile_sequence([
+        {'type': 'image', 'template': found, 'button': 'right', 'double': True, 'delay': 0.5},
+        {'type': 'image', 'template': missing, 'threshold': 0.9, 'delay': 0.5},
+        {'x': 10, 'y': 20, 'button': 'left', 'delay': 0.5},
+    ])
+    assert program.flags[0] & FLAG_IMAGE
+    assert program.step(1) == {'type': 'image', 'template': missing, 'threshold': 0.9,
+                               'button': 'left', 'double': False, 'delay': 0.5}
+
+    locator = FakeLocator({found: (640, 480)})
+    config = make_config(sequence_mode=True, sequence=program, max_clicks=None)
+    backend, engine = run_engine(config, VirtualClock(), locator=locator)
+    assert backend.events() == [(0.0, 640, 480, 'right', 2), (1.0, 10, 20, 'left', 1)]
+    assert engine.click_count == 2
+    # Il primo bersaglio all'avvio, il secondo durante la pausa del primo step
+    assert [target.template for target in locator.prefetches] == [found, missing]
+
+    # Click singoli sull'immagine bersaglio
+    config = make_config(max_clicks=3, target=ImageTarget(found, 0.8))
+    backend, _ = run_engine(config, VirtualClock(), locator=locator)
+    assert [(x, y) for _, x, y, _, _ in backend.events()] == [(640, 480)] * 3
+
+    try:
+        write_sequence_file(str(tmp_path / 'immagini.seq'), program)
+    except SequenceFileError:
+        pass
+    else:
+        raise AssertionError("Step immagine scritti nel formato binario")
+
+    region_step = {'type': 'image', 'template': found, 'region': [100, 50, 300, 200], 'delay': 0.5}
+    assert compile_sequence([region_step]).targets[0].region == (100, 50, 300, 200)
+    assert compile_sequence([region_step]).step(0)['region'] == [100, 50, 300, 200]
+
+    for invalid in ({'type': 'image'}, {'type': 'image', 'template': str(tmp_path / 'nessuna.png')},
+                    {'type': 'image', 'template': found, 'threshold': 1.5},
+                    {'type': 'image', 'template': found, 'region': [0, 0, 0, 10]},
+                    {'type': 'image', 'template': found, 'region': 'schermo'}):
+        try:
+            compile_sequence([invalid])
+        except SequenceCompileError as e:
+            assert str(e).startswith("Immagine 1")
+        else:
+            raise AssertionError(f"Step non rifiutato: {invalid}")
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    test_pyramid_matcher()
+    for test in (test_locator_offsets_and_cache, test_image_steps_and_single_target):
+        with tempfile.TemporaryDirectory() as directory:
+            test(pathlib.Path(directory))
+    print("✅ Test ricerca immagini completati!")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test della pipeline di aggiornamento UI
+Autore: Andrea Piani
+Descrizione: Verifica l'accorpamento di log e contatore in un solo aggiornamento per frame
+"""
+
+import threading
+from ui_pipeline import UIUpdatePipeline
+
+
+class FakeRoot:
+    """Sostituto minimale di tk.Tk per after/after_cancel"""
+
+    def after(self, ms, callback):
+        return 'after#1'
+
+    def after_cancel(self, after_id):
+        pass
+
+
+def make_pipeline():
+    applied = {'logs': [], 'counter': [], 'status': []}
+    pipeline = UIUpdatePipeline(FakeRoot(),
+                                applied['logs'].append,
+                                applied['counter'].append,
+                                applied['status'].append)
+    return pipeline, applied
+
+
+def test_coalesce_frame():
+    """Molti messaggi da un altro thread diventano un solo aggiornamento"""
+    pipeline, applied = make_pipeline()
+
+    def producer():
+        for i in range(1000):
+            pipeline.post_log(f"click {i}\n")
+            pipeline.set_counter(f"Click eseguiti: {i + 1}")
+
+    thread = threading.Thread(target=producer)
+    thread.start()
+    thread.join()
+    pipeline.drain()
+
+    assert len(applied['logs']) == 1
+    assert len(applied['logs'][0]) == 1000
+    assert applied['counter'] == ["Click eseguiti: 1000"]
+    assert pipeline.coalesced_messages == 999
+    assert pipeline.coalesced_counters == 999
+
+
+def test_calls_and_empty_frames():
+    """Le chiamate accodate girano nel drain; i frame vuoti non toccano i widget"""
+    pipeline, applied = make_pipeline()
+    called = []
+
+    pipeline.post_call(lambda: called.append(True))
+    pipeline.set_status("Fermato")
+    pipeline.drain()
+    pipeline.drain()
+
+    assert called == [True]
+    assert applied['status'] == ["Fermato"]
+    assert applied['logs'] == []
+    assert pipeline.frames == 2
+
+
+if __name__ == "__main__":
+    test_coalesce_frame()
+    test_calls_and_empty_frames()
+    print("✅ Test pipeline UI completati!")
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Test degli step ancorati alle finestre
+Autore: Andrea Piani
+Descrizione: Verifica la risoluzione in cache degli ancoraggi (nessuna scansione delle
+             finestre quando una finestra si sposta), i click relativi alla posizione
+             attuale della finestra e la validazione degli step; il tracciamento X11
+             reale viene provato solo se DISPLAY è impostato
+"""
+
+import importlib.util
+import os
+import threading
+
+from click_clock import VirtualClock
+from sequence_file import SequenceFileError, write_sequence_file
+from sequence_program import FLAG_WINDOW, SequenceCompileError, compile_sequence
+from test_click_engine import make_config, run_engine
+from window_tracker import WindowAnchor, WindowCache, WindowTracker, WindowTrackerError
+
+
+def test_window_cache():
+    """Un ancoraggio viene risolto una volta; spostamenti e ridimensionamenti non lo invalidano"""
+    cache = WindowCache()
+    cache.set_window(1, ('gedit', 'Gedit'), 'note.txt - gedit')
+    cache.set_window(2, ('navigator', 'Firefox'), 'Posta - Mozilla Firefox')
+    cache.set_geometry(1, (10, 20, 800, 600))
+    cache.set_geometry(2, (300, 100, 1200, 900))
+
+    firefox = WindowAnchor('firefox')
+    assert cache.geometry(firefox) == (300, 100, 1200, 900)
+    assert cache.geometry(WindowAnchor(title='NOTE.TXT')) == (10, 20, 800, 600)
+    assert cache.geometry(WindowAnchor('gedit', 'posta')) is None
+    assert cache.scans == 3
+
+    for step in range(100):
+        cache.set_geometry(2, (300 + step, 100, 1200, 900))
+        assert cache.geometry(firefox) == (300 + step, 100, 1200, 900)
+    assert cache.scans == 3
+
+    # Minimizzata: non visibile; un'altra finestra che corrisponde (la più recente) prende il posto
+    cache.set_window(3, ('navigator', 'Firefox'), 'Mozilla Firefox')
+    cache.set_geometry(3, (0, 0, 640, 480))
+    assert cache.geometry(firefox) == (0, 0, 640, 480)
+    cache.set_geometry(3, None)
+    assert cache.geometry(firefox) == (399, 100, 1200, 900)
+    cache.remove(2)
+    assert cache.geometry(firefox) is None
+    assert 2 not in cache and len(cache) == 2
+
+
+def test_anchored_steps():
+    """Click e attese relativi alla finestra, che segue gli spostamenti tra un'esecuzione e l'altra"""
+    program = compile_sequence([
+        {'x': 10, 'y': 20, 'button': 'left', 'delay': 0.5, 'window': {'class': 'Gedit'}},
+        {'x': 5, 'y': 5, 'button': 'left', 'delay': 0.5, 'window': {'title': 'Calcolatrice'}},
+        {'x': 30, 'y': 40, 'button': 'right', 'delay': 0.5},
+    ])
+    assert program.flags[0] & FLAG_WINDOW and not program.flags[2] & FLAG_WINDOW
+    assert program.step(0) == {'x': 10, 'y': 20, 'button': 'left', 'double': False, 'delay': 0.5,
+                               'window': {'class': 'Gedit', 'title': ''}}
+
+    windows = WindowCache()
+    windows.set_window(7, ('gedit', 'Gedit'), 'note.txt - gedit')
+    windows.set_geometry(7, (200, 100, 800, 600))
+    config = make_config(sequence_mode=True, sequence=program, max_clicks=None)
+    backend, engine = run_engine(config, VirtualClock(), windows=windows)
+    # La calcolatrice non c'è: step saltato, la pausa resta
+    assert backend.events() == [(0.0, 210, 120, 'left', 1), (1.0, 30, 40, 'right', 1)]
+    assert engine.click_count == 2
+
+    windows.set_geometry(7, (900, 400, 800, 600))
+    backend, _ = run_engine(config, VirtualClock(), windows=windows)
+    assert backend.events()[0][1:3] == (910, 420)
+    assert windows.scans == 2
+
+    try:
+        write_sequence_file('/nonexistent/finestre.seq', program)
+    except SequenceFileError as e:
+        assert 'finestra' in str(e)
+    else:
+        raise AssertionError("Step ancorati scritti nel formato binario")
+
+    wait = compile_sequence([{'type': 'wait', 'x': 1, 'y': 2, 'color': '#000000', 'window': {'class': 'xterm'}}])
+    assert wait.step(0)['window'] == {'class': 'xterm', 'title': ''}
+
+    for invalid in ({'x': 1, 'y': 1, 'window': 'gedit'},
+                    {'x': 1, 'y': 1, 'window': {}},
+                    {'x': 1, 'y': 1, 'window': {'class': 3}},
+                    {'type': 'path', 'x': 1, 'y': 1, 'points': [[0, 0, 0], [1, 1, 10]], 'window': {'class': 'gedit'}}):
+        try:
+            compile_sequence([invalid])
+        except SequenceCompileError as e:
+            assert str(e).startswith("Step 1")
+        else:
+            raise AssertionError(f"Step non rifiutato: {invalid}")
+
+
+class LostConnection:
+    """Connessione X11 finta senza finestre, che si interrompe quando richiesto"""
+
+    class Root:
+        id = 1
+
+        def change_attributes(self, **kwargs):
+            pass
+
+        def get_full_property(self, atom, property_type):
+            return None
+
+        def query_tree(self):
+            return type('Tree', (), {'children': []})()
+
+    def __init__(self):
+        self.root = self.Root()
+        self.lost = threading.Event()
+
+    def set_error_handler(self, handler):
+        pass
+
+    def screen(self):
+        return type('Screen', (), {'root': self.root})()
+
+    def intern_atom(self, name):
+        return hash(name) & 0xffff
+
+    def pending_events(self):
+        return 1
+
+    def next_event(self):
+        self.lost.wait()
+        from Xlib import error
+        raise error.ConnectionClosedError('display')
+
+    def close(self):
+        pass
+
+
+def test_tracker_connection_lost():
+    """Connessione persa: il tracker non serve più geometrie vecchie e gli step ancorati vengono saltati"""
+    if importlib.util.find_spec('Xlib') is None:
+        print("python-xlib non installato: test della connessione persa saltato")
+        return
+
+    connection = LostConnection()
+    tracker = WindowTracker(connection=connection).start()
+    tracker.cache.set_window(7, ('gedit', 'Gedit'), 'note.txt - gedit')
+    tracker.cache.set_geometry(7, (200, 100, 800, 600))
+    anchor = WindowAnchor('gedit')
+    assert tracker.geometry(anchor) == (200, 100, 800, 600)
+
+    connection.lost.set()
+    tracker._thread.join(1.0)
+    assert not tracker._thread.is_alive() and tracker.failure is not None
+    try:
+        tracker.geometry(anchor)
+    except WindowTrackerError:
+        pass
+    else:
+        raise AssertionError("Geometria servita dopo la perdita della connessione")
+
+    program = compile_sequence([
+        {'x': 10, 'y': 20, 'button': 'left', 'delay': 0.5, 'window': {'class': 'gedit'}},
+        {'x': 30, 'y': 40, 'button': 'right', 'delay': 0.5},
+    ])
+    config = make_config(sequence_mode=True, sequence=program, max_clicks=None)
+    backend, engine = run_engine(config, VirtualClock(), windows=tracker)
+    assert backend.events() == [(0.5, 30, 40, 'right', 1)]
+    assert any('gedit non localizzabile' in message and 'step saltato' in message
+               for message in engine.listener.messages)
+    tracker.close()
+
+
+def test_x11_tracker():
+    """Tracciamento reale delle finestre (solo con un display X11 disponibile)"""
+    if not os.environ.get('DISPLAY'):
+        print("DISPLAY non impostato: test del tracciamento X11 saltato")
+        return
+    try:
+        tracker = WindowTracker().start()
+    except WindowTrackerError as e:
+        print(f"Tracciamento X11 non disponibile: {e}")
+        return
+    try:
+        assert tracker.geometry(WindowAnchor('finestra-inesistente-test')) is None
+    finally:
+        tracker.close()
+
+
+if __name__ == "__main__":
+    test_window_cache()
+    test_anchored_steps()
+    test_tracker_connection_lost()
+    test_x11_tracker()
+    print("✅ Test step ancorati alle finestre completati!")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI Pipeline - Aggiornamenti dell'interfaccia accorpati a frequenza fissa
+Autore: Andrea Piani
+Descrizione: Il thread di click accoda messaggi e valori senza toccare Tk; il thread
+             principale svuota la coda a ~30 Hz con un solo aggiornamento per widget
+"""
+
+from collections import deque
+
+
+class UIUpdatePipeline:
+    """Coda senza lock (deque) svuotata dal thread Tk a frequenza fissa"""
+
+    def __init__(self, root, apply_log, apply_counter, apply_status,
+                 rate_hz=30, max_batch=2000):
+        self.root = root
+        self._apply_log = apply_log
+        self._apply_counter = apply_counter
+        self._apply_status = apply_status
+        self.interval_ms = max(1, int(1000 / rate_hz))
+        self.max_batch = max_batch
+
+        # deque.append/popleft sono atomiche: nessun lock tra produttore e consumatore
+        self._log_queue = deque()
+        self._calls = deque()
+        # Per contatore e stato conta solo l'ultimo valore (assegnazione atomica);
+        # il consumatore confronta l'identità con l'ultimo valore applicato
+        self._counter = None
+        self._status = None
+        self._applied_counter = None
+        self._applied_status = None
+        self._after_id = None
+
+        # Statistiche
+        self.frames = 0
+        self.messages = 0
+        self.log_updates = 0
+        self.counter_posts = 0
+        self.counter_updates = 0
+
+    @property
+    def coalesced_messages(self):
+        """Messaggi di log accorpati in un aggiornamento già esistente del widget"""
+        return self.messages - self.log_updates
+
+    @property
+    def coalesced_counters(self):
+        """Aggiornamenti del contatore scartati perché superati da uno più recente"""
+        return self.counter_posts - self.counter_updates
+
+    @property
+    def queue_depth(self):
+        """Messaggi di log in attesa di essere mostrati"""
+        return len(self._log_queue)
+
+    # === Lato produttore (qualsiasi thread) ===
+
+    def post_log(self, line):
+        """Accoda una riga di log già formattata"""
+        self._log_queue.append(line)
+
+    def set_counter(self, text):
+        """Imposta il testo del contatore (vince l'ultimo valore del frame)"""
+        self._counter = text
+        self.counter_posts += 1
+
+    def set_status(self, text):
+        """Imposta il testo della barra di stato (vince l'ultimo valore del frame)"""
+        self._status = text
+
+    def post_call(self, callback):
+        """Esegue callback nel thread principale al prossimo frame"""
+        self._calls.append(callback)
+
+    # === Lato consumatore (thread Tk) ===
+
+    def start(self):
+        """Avvia lo svuotamento periodico della coda"""
+        if self._after_id is None:
+            self._after_id = self.root.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        """Ferma lo svuotamento periodico"""
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+
+    def _tick(self):
+        self._after_id = None
+        try:
+            self.drain()
+        finally:
+            self._after_id = self.root.after(self.interval_ms, self._tick)
+
+    def drain(self):
+        """Applica in un solo passaggio tutto ciò che è stato accodato"""
+        self.frames += 1
+
+        log_queue = self._log_queue
+        if log_queue:
+            lines = []
+            popleft = log_queue.popleft
+            for _ in range(min(len(log_queue), self.max_batch)):
+                lines.append(popleft())
+            self.messages += len(lines)
+            self.log_updates += 1
+            self._apply_log(lines)
+
+        counter = self._counter
+        if counter is not self._applied_counter:
+            self._applied_counter = counter
+            self.counter_updates += 1
+            self._apply_counter(counter)
+
+        status = self._status
+        if status is not self._applied_status:
+            self._applied_status = status
+            self._apply_status(status)
+
+        calls = self._calls
+        while calls:
+            calls.popleft()()
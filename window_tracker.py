@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Window Tracker - Posizione delle finestre per gli step ancorati
+Autore: Andrea Piani
+Descrizione: Gli step ancorati a una finestra (WM_CLASS e/o titolo) hanno coordinate
+             relative al suo angolo superiore sinistro. WindowCache tiene geometria e
+             proprietà delle finestre e risolve un ancoraggio con una lettura da
+             dizionario; WindowTracker la aggiorna in un thread dagli eventi X11
+             (ConfigureNotify, MapNotify, PropertyNotify...) invece di interrogare
+             l'albero delle finestre a ogni click. Richiede python-xlib
+"""
+
+import select
+import threading
+from typing import NamedTuple
+
+
+class WindowTrackerError(OSError):
+    """Tracciamento delle finestre non disponibile (python-xlib o display)"""
+
+
+class WindowAnchor(NamedTuple):
+    """Finestra di riferimento: istanza o classe di WM_CLASS (senza distinzione di
+    maiuscole) e/o parte del titolo; un campo vuoto non viene controllato"""
+
+    wm_class: str = ''
+    title: str = ''
+
+    def matches(self, wm_class, title):
+        """wm_class è la coppia (istanza, classe) della finestra"""
+        if self.wm_class and self.wm_class.lower() not in (name.lower() for name in wm_class):
+            return False
+        return not self.title or self.title.lower() in title.lower()
+
+    def describe(self):
+        return ' '.join(part for part in (self.wm_class, f'"{self.title}"' if self.title else '') if part)
+
+
+_UNRESOLVED = object()
+
+
+class WindowCache:
+    """Proprietà e geometria (x, y, larghezza, altezza sullo schermo) delle finestre.
+
+    Gli ancoraggi risolti restano in cache finché non cambia l'insieme delle finestre,
+    un titolo o la visibilità: gli spostamenti aggiornano solo la geometria, quindi
+    geometry() non scorre mai le finestre dopo la prima risoluzione. Scritta dal
+    thread degli eventi e letta da quello dei click.
+    """
+
+    def __init__(self):
+        self._windows = {}   # Finestra -> (wm_class, titolo)
+        self._geometry = {}  # Finestra visibile -> (x, y, larghezza, altezza)
+        self._resolved = {}  # WindowAnchor -> finestra o None
+        self._lock = threading.Lock()
+        self.scans = 0       # Risoluzioni che hanno scorso le finestre
+
+    def __len__(self):
+        return len(self._windows)
+
+    def __contains__(self, window):
+        return window in self._windows
+
+    def visible(self, window):
+        return window in self._geometry
+
+    def set_window(self, window, wm_class, title):
+        """Aggiunge la finestra o ne aggiorna WM_CLASS e titolo"""
+        with self._lock:
+            if self._windows.get(window) != (wm_class, title):
+                self._windows[window] = (wm_class, title)
+                self._resolved = {}
+
+    def set_geometry(self, window, geometry):
+        """Nuova geometria della finestra; None = non visibile (minimizzata o chiusa)"""
+        with self._lock:
+            if geometry is None:
+                if self._geometry.pop(window, None) is not None:
+                    self._resolved = {}
+            else:
+                if window not in self._geometry:
+                    self._resolved = {}
+                self._geometry[window] = geometry
+
+    def remove(self, window):
+        with self._lock:
+            self._windows.pop(window, None)
+            self._geometry.pop(window, None)
+            self._resolved = {}
+
+    def windows(self):
+        return list(self._windows)
+
+    def geometry(self, anchor):
+        """Geometria della finestra ancorata (la più recente tra quelle visibili che corrispondono), o None"""
+        window = self._resolved.get(anchor, _UNRESOLVED)
+        if window is _UNRESOLVED:
+            with self._lock:
+                self.scans += 1
+                window = None
+                for candidate, (wm_class, title) in self._windows.items():
+                    if candidate in self._geometry and anchor.matches(wm_class, title):
+                        window = candidate
+                self._resolved[anchor] = window
+        return None if window is None else self._geometry.get(window)
+
+
+class WindowTracker:
+    """Segue le finestre di primo livello di un display X11 e ne tiene la geometria in una WindowCache.
+
+    Usa _NET_CLIENT_LIST del window manager (o i figli della root) e, per ogni
+    finestra, gli eventi di struttura e di proprietà; per le cornici dei window
+    manager che reparentano segue anche i ConfigureNotify delle cornici.
+    """
+
+    def __init__(self, display_name=None, connection=None):
+        """connection: connessione Xlib già aperta (al posto di display_name)"""
+        try:
+            from Xlib import X, Xatom, display, error
+        except ImportError as e:
+            raise WindowTrackerError(f"python-xlib non installato: {e}")
+
+        self._X = X
+        self._error = error
+        if connection is not None:
+            self._display = connection
+        else:
+            try:
+                self._display = display.Display(display_name)
+            except Exception as e:
+                raise WindowTrackerError(f"Impossibile aprire il display X11: {e}")
+        # Le finestre possono sparire tra un evento e la richiesta: errori ignorati
+        self._display.set_error_handler(lambda *args: None)
+        self._root = self._display.screen().root
+        self._client_list = self._display.intern_atom('_NET_CLIENT_LIST')
+        self._net_wm_name = self._display.intern_atom('_NET_WM_NAME')
+        self._utf8 = self._display.intern_atom('UTF8_STRING')
+        self._wm_name = Xatom.WM_NAME
+        self.cache = WindowCache()
+        self._frames = {}  # Cornice del window manager -> finestra
+        self._stop = threading.Event()
+        self._thread = None
+        self.failure = None  # Errore che ha fermato il thread degli eventi
+
+    def geometry(self, anchor):
+        """Geometria attuale della finestra ancorata, o None se non è visibile.
+
+        Se il thread degli eventi si è fermato per un errore (es. connessione persa)
+        la cache non è più aggiornata: solleva WindowTrackerError.
+        """
+        if self.failure is not None:
+            raise WindowTrackerError(f"Tracciamento delle finestre interrotto: {self.failure}")
+        return self.cache.geometry(anchor)
+
+    def start(self):
+        """Legge le finestre presenti e avvia il thread degli eventi; restituisce self"""
+        X = self._X
+        self._root.change_attributes(event_mask=X.SubstructureNotifyMask | X.PropertyChangeMask)
+        self._scan()
+        self._thread = threading.Thread(target=self._run, name="WindowTracker", daemon=True)
+        self._thread.start()
+        return self
+
+    def _clients(self):
+        clients = self._root.get_full_property(self._client_list, self._X.AnyPropertyType)
+        if clients is not None:
+            return [self._display.create_resource_object('window', window) for window in clients.value]
+        return self._root.query_tree().children
+
+    def _scan(self):
+        """Allinea la cache all'elenco delle finestre (all'avvio e quando l'elenco cambia)"""
+        clients = {window.id: window for window in self._clients()}
+        for window_id in set(self.cache.windows()) - set(clients):
+            self._forget(window_id)
+        known = set(self.cache.windows())
+        for window_id, window in clients.items():
+            if window_id not in known:
+                self._add(window)
+
+    def _title(self, window):
+        name = window.get_full_property(self._net_wm_name, self._utf8)
+        if name is not None:
+            value = name.value
+            return value.decode('utf-8', 'replace') if isinstance(value, bytes) else str(value)
+        name = window.get_wm_name()
+        return name.decode('latin-1') if isinstance(name, bytes) else (name or '')
+
+    def _add(self, window):
+        X = self._X
+        try:
+            window.change_attributes(event_mask=X.StructureNotifyMask | X.PropertyChangeMask)
+            attributes = window.get_attributes()
+            if attributes.override_redirect:
+                return  # Menu e tooltip: non sono finestre da ancorare
+            self.cache.set_window(window.id, tuple(window.get_wm_class() or ()), self._title(window))
+            self._track_frame(window)
+            self._update_geometry(window, attributes.map_state == X.IsViewable)
+        except self._error.XError:
+            self._forget(window.id)
+
+    def _track_frame(self, window):
+        """Registra la cornice (antenato figlio della root) che il window manager muove"""
+        for frame, client in list(self._frames.items()):
+            if client == window.id:
+                del self._frames[frame]
+        parent = window
+        while True:
+            tree = parent.query_tree()
+            parent_id = getattr(tree.parent, 'id', tree.parent)
+            if not parent_id or parent_id == self._root.id:
+                break
+            parent = tree.parent
+        if parent.id != window.id:
+            self._frames[parent.id] = window.id
+
+    def _update_geometry(self, window, visible=True):
+        """Posizione sullo schermo della finestra (una richiesta, nel thread degli eventi)"""
+        if not visible:
+            self.cache.set_geometry(window.id, None)
+            return
+        geometry = window.get_geometry()
+        origin = self._root.translate_coords(window, 0, 0)
+        self.cache.set_geometry(window.id, (origin.x, origin.y, geometry.width, geometry.height))
+
+    def _forget(self, window_id):
+        self.cache.remove(window_id)
+        for frame, client in list(self._frames.items()):
+            if client == window_id:
+                del self._frames[frame]
+
+    def _run(self):
+        display = self._display
+        while not self._stop.is_set():
+            try:
+                if not display.pending_events():
+                    select.select([display.fileno()], [], [], 0.2)
+                    continue
+                self._handle(display.next_event())
+            except self._error.XError:
+                continue
+            except Exception as e:
+                # Connessione persa o evento non gestibile: le geometrie in cache non
+                # verrebbero più aggiornate, geometry() da qui in poi segnala l'errore
+                if not self._stop.is_set():
+                    self.failure = e
+                break
+
+    def _handle(self, event):
+        X = self._X
+        window = getattr(event, 'window', None)
+        window_id = window.id if window is not None else None
+
+        if event.type == X.ConfigureNotify:
+            if window_id in self._frames:
+                # Cornice spostata o ridimensionata dal window manager
+                client = self._display.create_resource_object('window', self._frames[window_id])
+                self._update_geometry(client)
+            elif event.send_event:
+                # ConfigureNotify sintetico (ICCCM): coordinate già relative alla root
+                if self.cache.visible(window_id):
+                    self.cache.set_geometry(window_id, (event.x, event.y, event.width, event.height))
+            elif window_id in self.cache:
+                self._update_geometry(window)
+        elif event.type == X.MapNotify and window_id in self.cache:
+            self._update_geometry(window)
+        elif event.type == X.UnmapNotify and window_id in self.cache:
+            self.cache.set_geometry(window_id, None)
+        elif event.type == X.DestroyNotify:
+            self._forget(window_id)
+        elif event.type == X.ReparentNotify and window_id in self.cache:
+            self._track_frame(window)
+            self._update_geometry(window)
+        elif event.type == X.PropertyNotify:
+            if window_id == self._root.id:
+                if event.atom == self._client_list:
+                    self._scan()
+            elif event.atom in (self._net_wm_name, self._wm_name) and window_id in self.cache:
+                wm_class = tuple(window.get_wm_class() or ())
+                self.cache.set_window(window_id, wm_class, self._title(window))
+        elif event.type == X.CreateNotify and event.parent.id == self._root.id:
+            # Senza _NET_CLIENT_LIST le nuove finestre arrivano solo da qui
+            if self._root.get_full_property(self._client_list, X.AnyPropertyType) is None:
+                self._add(window)
+
+    def close(self):
+        """Ferma il thread e chiude la connessione al display"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(2.0)
+            self._thread = None
+        try:
+            self._display.close()
+        except Exception:
+            pass
+
+
+def find_window_geometry(anchor, display_name=None):
+    """Geometria attuale della finestra ancorata con una sola lettura (senza thread), o None"""
+    tracker = WindowTracker(display_name)
+    try:
+        tracker._scan()
+        return tracker.geometry(anchor)
+    finally:
+        tracker.close()